@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+为已有文章生成纯文本摘要（article.summary字段）
+
+用法：
+    python scripts/backfill_article_summary.py          # 只处理摘要为空的文章
+    python scripts/backfill_article_summary.py --all    # 重新生成全部文章的摘要
+"""
+import argparse
+from sqlalchemy import inspect, text
+from woniunote.app import create_app
+from woniunote.common.database import db
+from woniunote.module.articles import Articles
+
+
+def ensure_summary_column():
+    """如果article表中还没有summary字段，则先添加该字段"""
+    columns = [column['name'] for column in inspect(db.engine).get_columns('article')]
+    if 'summary' not in columns:
+        print("article表缺少summary字段，开始添加...")
+        db.session.execute(text("ALTER TABLE article ADD COLUMN summary VARCHAR(255) NULL"))
+        db.session.commit()
+
+
+def backfill_article_summary(regenerate_all=False, batch_size=200):
+    """为文章批量生成摘要"""
+    app = create_app()
+
+    with app.app_context():
+        ensure_summary_column()
+        updated = Articles.backfill_summary(batch_size=batch_size, only_missing=not regenerate_all)
+        print(f"文章摘要生成完成，共处理 {updated} 篇文章")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="为已有文章生成纯文本摘要")
+    parser.add_argument('--all', action='store_true', help="重新生成全部文章的摘要")
+    parser.add_argument('--batch-size', type=int, default=200, help="每批处理的文章数量")
+    args = parser.parse_args()
+    backfill_article_summary(regenerate_all=args.all, batch_size=args.batch_size)
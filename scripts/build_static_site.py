@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成首页、分页、分类页和文章页的静态HTML文件
+
+默认全量生成并删除不再存在的页面，页面较多时用--workers开启进程池；
+加--article时只重新生成该文章写入后受影响的页面。
+输出目录为配置中的STATIC_SITE_DIR，nginx配置见configs/woniunote_nginx_config。
+
+用法：
+    python scripts/build_static_site.py
+    python scripts/build_static_site.py --workers 4
+    python scripts/build_static_site.py --article 123 --listing-changed
+"""
+import argparse
+from woniunote.app import create_app
+from woniunote.common.static_site import get_static_site
+from woniunote.module.articles import Articles
+
+
+def build_static_site(config_name='production', workers=None, articleid=None, listing_changed=False):
+    """全量或按文章增量生成静态页面"""
+    app = create_app(config_name)
+    static_site = get_static_site()
+    print(f"输出目录: {static_site.output_dir}")
+
+    with app.app_context():
+        if articleid is not None:
+            article = Articles.find_by_id(articleid)
+            article_type = article.type if article is not None else None
+            result = static_site.refresh_article(articleid, article_type, listing_changed)
+        else:
+            result = static_site.build_all(workers=workers)
+
+    print(f"生成 {result['written']} 个页面，删除 {result['removed']} 个，失败 {result['failed']} 个")
+    if 'build_time_ms' in result:
+        print(f"共 {result['pages']} 个页面，{result['workers']} 个进程，耗时 {result['build_time_ms']} 毫秒")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成静态HTML页面")
+    parser.add_argument('--config', default='production', help="配置名称：production、development、testing")
+    parser.add_argument('--workers', type=int, default=None, help="全量生成的进程数，默认为STATIC_SITE_WORKERS")
+    parser.add_argument('--article', type=int, default=None, help="只重新生成该文章影响的页面")
+    parser.add_argument('--listing-changed', action='store_true',
+                        help="文章新增、隐藏或审核状态改变时使用，重新生成全部分页和分类页")
+    args = parser.parse_args()
+    build_static_site(config_name=args.config, workers=args.workers, articleid=args.article,
+                      listing_changed=args.listing_changed)
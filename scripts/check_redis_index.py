@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检查Redis文章列表与数据库是否一致
+
+列出Redis中缺失、多余和内容不一致的文章，加--repair时直接修复；
+加--rebuild时删除Redis中的文章列表后全量重新加载（首次启用REDIS_INDEX_ENABLED时使用）。
+
+用法：
+    python scripts/check_redis_index.py
+    python scripts/check_redis_index.py --repair
+    python scripts/check_redis_index.py --rebuild
+"""
+import argparse
+from woniunote.app import create_app
+from woniunote.module.articles import Articles
+
+
+def check_redis_index(repair=False, rebuild=False, batch_size=500):
+    """对比数据库和Redis中的文章列表"""
+    app = create_app()
+
+    with app.app_context():
+        if rebuild:
+            total = Articles.rebuild_redis_index(batch_size=batch_size)
+            print(f"Redis文章列表重建完成，共写入 {total} 篇文章")
+            return
+
+        report = Articles.check_redis_index(repair=repair, batch_size=batch_size)
+        if report is None:
+            print("检查失败，详见articles日志")
+            return
+        print(f"共检查 {report['checked']} 篇公开文章")
+        for name, label in (('missing', 'Redis中缺失'), ('extra', 'Redis中多余'), ('stale', '内容不一致')):
+            ids = report[name]
+            print(f"{label}: {len(ids)} 篇" + (f"，编号: {ids[:20]}" if ids else ''))
+        if 'repaired' in report:
+            print(f"已修复 {report['repaired']} 篇文章")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="检查Redis文章列表与数据库是否一致")
+    parser.add_argument('--repair', action='store_true', help="修复不一致的文章")
+    parser.add_argument('--rebuild', action='store_true', help="全量重建Redis文章列表")
+    parser.add_argument('--batch-size', type=int, default=500, help="每批读取的文章数量")
+    args = parser.parse_args()
+    check_redis_index(repair=args.repair, rebuild=args.rebuild, batch_size=args.batch_size)
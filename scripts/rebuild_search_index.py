@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全量重建文章全文搜索索引
+
+首次启用全文搜索、修改分词规则或索引文件损坏时运行，日常的文章写入会增量更新索引。
+
+用法：
+    python scripts/rebuild_search_index.py
+    python scripts/rebuild_search_index.py --batch-size 500
+"""
+import argparse
+from woniunote.app import create_app
+from woniunote.module.articles import Articles
+
+
+def rebuild_search_index(batch_size=200):
+    """从数据库读取全部文章重建索引"""
+    app = create_app()
+
+    with app.app_context():
+        total = Articles.rebuild_search_index(batch_size=batch_size)
+        print(f"搜索索引重建完成，共索引 {total} 篇文章")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="全量重建文章全文搜索索引")
+    parser.add_argument('--batch-size', type=int, default=200, help="每批读取的文章数量")
+    args = parser.parse_args()
+    rebuild_search_index(batch_size=args.batch_size)
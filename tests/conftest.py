@@ -274,6 +274,7 @@ def prepare_test_database():
                         type VARCHAR(10) NOT NULL DEFAULT '1',
                         headline VARCHAR(100) NOT NULL,
                         content TEXT,
+                        summary VARCHAR(255) NULL,
                         readcount INT DEFAULT 0,
                         replycount INT DEFAULT 0,
                         hidden INT DEFAULT 0,
@@ -0,0 +1,5 @@
+"""
+性能回归测试包
+
+此包包含检查页面SQL查询次数等性能指标的测试
+"""
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+N+1查询回归测试
+
+测试服务器以testing或development配置启动时会启用N+1查询检测，
+每个响应都带有X-Query-Count（SQL语句数）和X-Query-Repeats（执行次数超过阈值的语句数）响应头。
+这里访问首页、分页、文章详情和评论分页等热点页面，要求没有重复执行的语句。
+"""
+
+import pytest
+import sys
+import os
+
+# 导入测试基类和配置
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+from utils.test_base import TestBase, logger
+from utils.test_config import TEST_DATA
+
+
+class TestQueryRepeats(TestBase):
+    """热点页面N+1查询检测"""
+
+    def setup_method(self):
+        """每个测试方法前的准备工作"""
+        self.article_id = TEST_DATA['article']['sample_id']
+
+    def assert_no_repeated_queries(self, path):
+        response = self.make_request('get', path)
+        assert response.status_code == 200, f"{path} 返回错误状态码: {response.status_code}"
+
+        if 'X-Query-Count' not in response.headers:
+            pytest.skip("测试服务器未启用N+1查询检测（QUERY_DETECTOR_ACTIONS需要包含header）")
+
+        repeats = int(response.headers.get('X-Query-Repeats', 0))
+        logger.info(f"{path}: SQL语句数={response.headers['X-Query-Count']}, 重复语句数={repeats}")
+        assert repeats == 0, f"{path} 存在N+1查询，详见query_detector日志（trace_id={response.headers.get('X-Trace-Id')}）"
+
+    def test_home_page(self):
+        """测试首页"""
+        self.assert_no_repeated_queries('/')
+
+    def test_paginate(self):
+        """测试文章分页"""
+        self.assert_no_repeated_queries('/page/1')
+
+    def test_article_detail(self):
+        """测试文章详情页（作者、评论者昵称和评论回复）"""
+        self.assert_no_repeated_queries(f'/article/{self.article_id}')
+
+    def test_comment_page(self):
+        """测试评论分页"""
+        self.assert_no_repeated_queries(f'/comment/{self.article_id}-1')
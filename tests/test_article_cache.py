@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章读缓存测试 - 验证LRU淘汰、过期、版本失效和快照序列化
+不依赖数据库和Redis
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.article_cache import LRUCache, ArticleCache, CachedArticle
+
+
+def test_lru_evicts_least_recently_used():
+    """超过容量上限时淘汰最久未使用的条目"""
+    cache = LRUCache(maxsize=2, ttl=0)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_lru_expires_entries():
+    """过期的条目不再返回"""
+    cache = LRUCache(maxsize=10, ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+
+
+def test_article_cache_read_through_and_invalidate():
+    """命中缓存时不调用loader，失效后重新加载"""
+    cache = ArticleCache(maxsize=10, ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return CachedArticle({'articleid': 1, 'headline': f'v{len(calls)}'})
+
+    assert cache.get(1, loader).headline == 'v1'
+    assert cache.get(1, loader).headline == 'v1'
+    assert len(calls) == 1
+
+    cache.invalidate(1)
+    assert cache.get(1, loader).headline == 'v2'
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_article_cache_does_not_cache_missing_article():
+    """文章不存在时不缓存None"""
+    cache = ArticleCache(maxsize=10, ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    assert cache.get(1, loader) is None
+    assert cache.get(1, loader) is None
+    assert len(calls) == 2
+
+
+def test_cached_article_json_round_trip():
+    """快照序列化后保留datetime字段"""
+    article = CachedArticle({'articleid': 1, 'headline': '标题', 'createtime': datetime(2025, 1, 2, 3, 4, 5)})
+    restored = CachedArticle.from_json(article.to_json())
+    assert restored.headline == '标题'
+    assert restored.createtime == datetime(2025, 1, 2, 3, 4, 5)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章数量计数表测试 - 验证按条件统计、增量更新和定期校正
+不依赖数据库
+"""
+
+import os
+import sys
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.article_counters import ArticleCounters, make_state
+
+# (hidden, drafted, checked, type, count)
+ROWS = [(0, 0, 1, 1, 5), (0, 0, 1, 2, 3), (1, 0, 1, 1, 2), (0, 1, 0, 1, 4), (0, 0, 0, 2, 1)]
+
+
+def test_count_by_conditions():
+    """按可见性和分类统计"""
+    counters = ArticleCounters(enabled=True)
+    loader = lambda: ROWS
+    assert counters.count(loader, hidden=0, drafted=0, checked=1) == 8
+    assert counters.count(loader, hidden=0, drafted=0, type=2) == 4
+    assert counters.count(loader, drafted=0) == 11
+
+
+def test_incremental_updates_without_reloading():
+    """新增和状态变化只更新计数表，不重新查询"""
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return ROWS
+
+    counters = ArticleCounters(enabled=True)
+    assert counters.count(loader, hidden=0, drafted=0, checked=1) == 8
+    counters.add(make_state(0, 0, 1, 1))
+    counters.move(make_state(0, 0, 1, 2), make_state(1, 0, 1, 2))
+    assert counters.count(loader, hidden=0, drafted=0, checked=1) == 8
+    assert counters.count(loader, hidden=0, drafted=0, type=1) == 6
+    assert len(calls) == 1
+
+
+def test_reconcile_reloads_from_loader():
+    """到达校正间隔后重新加载"""
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return ROWS
+
+    counters = ArticleCounters(enabled=True, reconcile_interval=0)
+    counters.count(loader, drafted=0)
+    counters.add(make_state(0, 0, 1, 1), 100)
+    assert counters.count(loader, drafted=0) == 11
+    assert len(calls) == 2
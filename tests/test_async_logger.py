@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+异步日志测试 - 验证批量写入、缓冲区满时丢弃最旧记录、关闭时写入剩余日志和级别过滤
+"""
+
+import json
+import logging
+import os
+import sys
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.simple_logger import AsyncLogWriter, SimpleLogger, Lazy, get_async_log_writer
+
+
+def read_lines(logger):
+    # 应用已启用异步日志时，先写入全局缓冲区中的记录
+    if get_async_log_writer() is not None:
+        get_async_log_writer().flush()
+    for handler in logger.logger.handlers:
+        handler.flush()
+    with open(logger.log_file, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_writer_batches_records(tmp_path):
+    """多条日志在一批中写入，内容与同步模式相同"""
+    logger = SimpleLogger('async_test_batch', log_dir=str(tmp_path))
+    writer = AsyncLogWriter(flush_interval=60)
+    writer._pid = os.getpid()  # 不启动后台线程，手工flush
+    for i in range(3):
+        writer.enqueue(logger, 'INFO', f'消息{i}', {'n': i})
+    assert writer.queue_depth() == 3
+
+    writer.flush()
+    lines = read_lines(logger)
+    assert [line['message'] for line in lines] == ['消息0', '消息1', '消息2']
+    assert lines[2]['n'] == 2 and lines[0]['module'] == 'async_test_batch'
+    assert writer.stats()['batches'] == 1
+
+
+def test_drop_policy_discards_oldest(tmp_path):
+    """缓冲区满时丢弃最旧的记录"""
+    logger = SimpleLogger('async_test_drop', log_dir=str(tmp_path))
+    writer = AsyncLogWriter(maxsize=2, policy='drop')
+    writer._pid = os.getpid()
+    for i in range(4):
+        writer.enqueue(logger, 'INFO', f'消息{i}', None)
+    assert writer.stats()['dropped'] == 2
+
+    writer.flush()
+    assert [line['message'] for line in read_lines(logger)] == ['消息2', '消息3']
+
+
+def test_shutdown_flushes_pending_records(tmp_path):
+    """关闭时写入剩余记录"""
+    logger = SimpleLogger('async_test_shutdown', log_dir=str(tmp_path))
+    writer = AsyncLogWriter(flush_interval=60)
+    writer.enqueue(logger, 'ERROR', '退出前的日志', None)
+    writer.shutdown()
+    assert read_lines(logger)[-1]['message'] == '退出前的日志'
+    assert writer.queue_depth() == 0
+
+
+def test_level_gate_skips_lazy_payload(tmp_path):
+    """低于最低级别的日志不计算延迟内容，启用的级别正常计算"""
+    logger = SimpleLogger('level_test', log_dir=str(tmp_path))
+    logger.min_level = logging.WARNING
+    calls = []
+
+    def payload():
+        calls.append(1)
+        return {'n': 1, 'text': Lazy(lambda: '延迟字段')}
+
+    assert not logger.is_enabled_for('INFO')
+    assert logger.info('不会记录', payload) is False
+    assert calls == []
+
+    logger.warning('会记录', payload)
+    assert calls == [1]
+    assert read_lines(logger)[-1]['text'] == '延迟字段'
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按显示宽度截取字符串测试 - 验证与逐字符累加的实现结果一致、模板过滤器的注册和转义
+"""
+
+import os
+import random
+import sys
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from flask import Flask, render_template_string
+from markupsafe import Markup
+
+from woniunote.common.utils import cjk_truncate, cjk_truncate_filter
+
+
+def reference_truncate(s, length, end='...'):
+    """逐字符累加宽度的原始实现"""
+    width = 0
+    for index, c in enumerate(s):
+        width += 0.5 if ord(c) <= 128 else 1
+        if width > length:
+            return s[:index] + end
+    return s
+
+
+def test_matches_reference():
+    alphabet = 'ab 1\x80' + '蜗牛笔记量化交易' + 'ＡＢ'
+    rng = random.Random(7)
+    for _ in range(2000):
+        s = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        length = rng.choice([0, 1, 2.5, 5, 12, 24])
+        assert cjk_truncate(s, length) == reference_truncate(s, length), (s, length)
+
+
+def test_examples():
+    assert cjk_truncate('蜗牛笔记', 4) == '蜗牛笔记'
+    assert cjk_truncate('蜗牛笔记', 3) == '蜗牛笔...'
+    assert cjk_truncate('abcdef', 2) == 'abcd...'
+    assert cjk_truncate('ab蜗牛', 2, end='…') == 'ab蜗…'
+
+
+def test_long_text_only_scans_prefix():
+    text = '量化' * 500000
+    assert cjk_truncate(text, 10) == '量化' * 5 + '...'
+
+
+def test_template_filter():
+    app = Flask(__name__)
+    app.add_template_filter(cjk_truncate_filter, 'cjk_truncate')
+    with app.test_request_context('/'):
+        assert render_template_string('{{ s | cjk_truncate(3) }}', s='<b>蜗牛笔记') == '&lt;b&gt;蜗...'
+        assert render_template_string('{{ s | cjk_truncate(2) }}', s=None) == ''
+    assert type(cjk_truncate_filter(Markup('蜗牛笔记'), 1)) is str
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+整页缓存测试 - 验证匿名访问命中、ETag/304、登录用户绕过、错误页不缓存和按标签失效
+使用flask_caching的SimpleCache，不依赖数据库和Redis
+"""
+
+import os
+import sys
+
+import pytest
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from flask import Flask, session
+from flask_caching import Cache
+
+from woniunote.common.page_cache import (LIST_TAG, article_tags, cached_page, get_page_cache, init_page_cache,
+                                         tag_page, type_tag)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', CACHE_TYPE='SimpleCache', PAGE_CACHE_ENABLED=True, PAGE_CACHE_TTL=60)
+    init_page_cache(app, Cache(app))
+    app.renders = []
+    app.reads = []
+
+    @app.route('/page/<int:page>')
+    @cached_page()
+    def paginate(page):
+        app.renders.append(page)
+        rows = [({'articleid': page * 10 + i}, 'nick') for i in range(2)]
+        tag_page(LIST_TAG, *article_tags(rows))
+        return f'page {page} render {len(app.renders)}'
+
+    @app.route('/type/<int:class_type>')
+    @cached_page()
+    def classify(class_type):
+        app.renders.append(class_type)
+        tag_page(type_tag(class_type))
+        return f'type {class_type} render {len(app.renders)}'
+
+    @app.route('/article/<int:articleid>')
+    @cached_page(on_hit=lambda articleid: app.reads.append(articleid))
+    def read(articleid):
+        app.reads.append(articleid)
+        tag_page(f'article:{articleid}')
+        return f'article {articleid}'
+
+    @app.route('/broken')
+    @cached_page()
+    def broken():
+        app.renders.append('broken')
+        return '加载失败'
+
+    @app.route('/login')
+    def login():
+        session['main_islogin'] = 'true'
+        session['main_userid'] = 1
+        return 'ok'
+
+    return app
+
+
+def test_anonymous_hit_and_conditional_get(app):
+    client = app.test_client()
+    first = client.get('/page/1')
+    assert first.headers['X-Page-Cache'] == 'MISS'
+    second = client.get('/page/1')
+    assert second.headers['X-Page-Cache'] == 'HIT'
+    assert second.text == first.text
+    assert app.renders == [1]
+
+    etag = second.headers['ETag']
+    assert client.get('/page/1', headers={'If-None-Match': etag}).status_code == 304
+    last_modified = second.headers['Last-Modified']
+    assert client.get('/page/1', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    # 查询参数不同的页面分别缓存
+    client.get('/page/1?before=5')
+    assert app.renders == [1, 1]
+
+
+def test_on_hit_still_runs(app):
+    client = app.test_client()
+    client.get('/article/3')
+    client.get('/article/3')
+    assert app.reads == [3, 3]
+
+
+def test_logged_in_users_bypass_cache(app):
+    client = app.test_client()
+    client.get('/page/1')
+    client.get('/login')
+    response = client.get('/page/1')
+    assert 'X-Page-Cache' not in response.headers
+    assert app.renders == [1, 1]
+
+
+def test_untagged_pages_are_not_cached(app):
+    client = app.test_client()
+    client.get('/broken')
+    client.get('/broken')
+    assert app.renders == ['broken', 'broken']
+
+
+def test_purge_by_tag(app):
+    client = app.test_client()
+    for path in ('/page/1', '/page/2', '/type/3', '/type/4'):
+        client.get(path)
+    page_cache = get_page_cache()
+
+    # 编辑文章11只影响列出它的第1页；flask_caching按current_app查找缓存，请求之外调用时需要应用上下文
+    with app.app_context():
+        page_cache.purge_article(11, 3)
+    assert [client.get(path).headers['X-Page-Cache'] for path in ('/page/1', '/page/2', '/type/3', '/type/4')] \
+        == ['MISS', 'HIT', 'HIT', 'HIT']
+
+    # 隐藏文章改变了列表：所有分页和该文章的分类页失效
+    with app.app_context():
+        page_cache.purge_article(11, 3, listing_changed=True)
+    assert [client.get(path).headers['X-Page-Cache'] for path in ('/page/1', '/page/2', '/type/3', '/type/4')] \
+        == ['MISS', 'MISS', 'MISS', 'HIT']
+    assert page_cache.stats()['purges'] == 2
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+N+1查询检测测试 - 验证SQL规范化和重复语句统计
+使用内存SQLite数据库
+"""
+
+import os
+import sys
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import create_engine, text
+
+from woniunote.common.query_detector import install, normalize_sql, track_queries
+
+
+def test_normalize_sql():
+    assert normalize_sql("SELECT *  FROM users\n WHERE userid = 3") == "SELECT * FROM users WHERE userid = ?"
+    assert normalize_sql("SELECT * FROM t WHERE name = 'a''b' LIMIT 10") == "SELECT * FROM t WHERE name = ? LIMIT ?"
+    assert normalize_sql("SELECT * FROM t WHERE id IN (?, ?, ?)") == normalize_sql("SELECT * FROM t WHERE id IN (%s)")
+    # 表名、列名中的数字不替换
+    assert normalize_sql("SELECT col1 FROM t2") == "SELECT col1 FROM t2"
+
+
+def test_track_repeated_queries():
+    engine = create_engine('sqlite://')
+    install(engine)
+    install(engine)  # 重复注册不会重复统计
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE users (userid INTEGER PRIMARY KEY, nickname TEXT)"))
+        with track_queries() as report:
+            for userid in range(1, 8):
+                conn.execute(text("SELECT nickname FROM users WHERE userid = :userid"), {'userid': userid})
+            conn.execute(text("SELECT nickname FROM users WHERE userid IN (1, 2, 3)"))
+
+        # 代码块之外不统计
+        conn.execute(text("SELECT 1"))
+
+    assert report.total == 8
+    assert report.repeated(5) == [("SELECT nickname FROM users WHERE userid = ?", 7)]
+    assert report.repeated(7) == []
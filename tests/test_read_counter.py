@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+阅读次数缓冲计数器测试 - 验证计数合并、批量写回和写回失败后的重试
+不依赖数据库和Redis
+"""
+
+import os
+import sys
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.read_counter import ReadCounter
+
+
+def test_flush_merges_increments_into_one_batch():
+    """多次阅读合并为一次写回"""
+    batches = []
+    counter = ReadCounter(flush_handler=batches.append)
+    for _ in range(3):
+        counter.incr(1)
+    counter.incr(2)
+    assert counter.pending_count() == 4
+
+    assert counter.flush() == 2
+    assert batches == [{1: 3, 2: 1}]
+    assert counter.pending_count() == 0
+    assert counter.flush() == 0
+
+
+def test_failed_flush_keeps_pending_counts():
+    """写回失败时计数保留到下一次写回"""
+    def broken_handler(deltas):
+        raise RuntimeError('db down')
+
+    counter = ReadCounter(flush_handler=broken_handler)
+    counter.incr(1, 5)
+    assert counter.flush() == 0
+    assert counter.pending_count() == 5
+
+    batches = []
+    counter.flush_handler = batches.append
+    counter.incr(1)
+    counter.flush()
+    assert batches == [{1: 6}]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+共享Redis客户端测试 - 验证连接池参数、客户端复用、流水线分批和fakeredis测试模式
+不需要部署Redis
+"""
+
+import os
+import sys
+
+import pytest
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import redis
+from flask import Flask
+
+from woniunote.common import redis_client
+from woniunote.common.redis_client import (create_redis_client, get_redis_client, init_redis, mask_url,
+                                           pipeline_batches)
+
+
+def test_pool_settings_from_url():
+    client = create_redis_client('redis://:secret@10.0.0.5:6380/2', max_connections=7, pool_timeout=3,
+                                 socket_timeout=1.5, health_check_interval=15)
+    pool = client.connection_pool
+    assert isinstance(pool, redis.BlockingConnectionPool)
+    assert pool.max_connections == 7
+    assert pool.timeout == 3
+    kwargs = pool.connection_kwargs
+    assert (kwargs['host'], kwargs['port'], kwargs['db']) == ('10.0.0.5', 6380, 2)
+    assert kwargs['socket_timeout'] == 1.5
+    assert kwargs['health_check_interval'] == 15
+    assert kwargs['decode_responses'] is True
+
+
+def test_mask_url():
+    assert mask_url('redis://:secret@127.0.0.1:6379/0') == 'redis://:***@127.0.0.1:6379/0'
+    assert mask_url('redis://127.0.0.1:6379/0') == 'redis://127.0.0.1:6379/0'
+
+
+def test_shared_client_follows_app_config():
+    app = Flask(__name__)
+    app.config.update(REDIS_URL='redis://127.0.0.1:6390/1', REDIS_MAX_CONNECTIONS=5)
+    saved = dict(redis_client._settings)
+    try:
+        init_redis(app)
+        client = get_redis_client()
+        assert get_redis_client() is client
+        assert client.connection_pool.max_connections == 5
+        assert client.connection_pool.connection_kwargs['port'] == 6390
+    finally:
+        redis_client._settings.update(saved)
+        redis_client._clients.clear()
+
+
+def test_fake_mode_and_pipeline_batches():
+    pytest.importorskip('fakeredis')
+    client = create_redis_client(fake=True)
+    items = list(range(7))
+    results = pipeline_batches(items, lambda pipe, i: pipe.hset('h', i, i * i), batch_size=3, client=client)
+    assert results == [1] * 7
+    assert client.hget('h', 3) == '9'
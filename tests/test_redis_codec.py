@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Redis缓存编码测试 - 验证文章Hash和带版本号JSON的编码、解码及旧数据的处理
+不依赖Redis服务
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.redis_codec import (ARTICLE_HMGET_FIELDS, CODEC_VERSION, decode_article, decode_record,
+                                          encode_article, encode_record)
+
+
+def test_article_round_trip():
+    article = {'articleid': 12, 'userid': 3, 'type': 2, 'headline': '标题', 'thumbnail': None,
+               'readcount': 8, 'createtime': datetime(2024, 5, 1, 8, 30), 'content': '摘要', 'nickname': '强哥'}
+    mapping = encode_article(article)
+    assert all(isinstance(value, str) for value in mapping.values())
+
+    # 模拟HMGET按字段顺序返回的结果
+    decoded = decode_article([mapping[name] for name in ARTICLE_HMGET_FIELDS])
+    assert decoded['articleid'] == 12
+    assert decoded['readcount'] == 8
+    assert decoded['credit'] == 0
+    assert decoded['thumbnail'] == ''
+    assert decoded['createtime'] == '2024-05-01 08:30:00'
+    assert decoded['nickname'] == '强哥'
+
+
+def test_article_missing_or_other_version():
+    assert decode_article([None] * len(ARTICLE_HMGET_FIELDS)) is None
+    values = [str(CODEC_VERSION + 1)] + [''] * (len(ARTICLE_HMGET_FIELDS) - 1)
+    assert decode_article(values) is None
+
+
+def test_record_round_trip():
+    user = {'userid': 1, 'username': 'woniu', 'createtime': datetime(2024, 1, 2, 3, 4, 5)}
+    encoded = encode_record(user)
+    assert encoded.startswith(f'{CODEC_VERSION}:')
+    assert decode_record(encoded) == {'userid': 1, 'username': 'woniu', 'createtime': '2024-01-02 03:04:05'}
+    assert decode_record(encoded.encode('utf-8'))['username'] == 'woniu'
+
+
+def test_legacy_record_is_not_evaluated():
+    # 旧版本保存的str(dict)数据不再被解析
+    assert decode_record(str({'username': 'woniu', 'password': 'x'})) is None
+    assert decode_record(None) is None
+    assert decode_record(f'{CODEC_VERSION}:not json') is None
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Redis会话测试 - 验证延迟加载、未修改时跳过写入、压缩、滑动过期和登录时更换会话编号
+使用fakeredis，不需要部署Redis
+"""
+
+import os
+import sys
+from datetime import timedelta
+
+import pytest
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+fakeredis = pytest.importorskip('fakeredis')
+
+from flask import Flask, session
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+from woniunote.common.redis_session import RedisSessionInterface
+from woniunote.common.user_context import login_user
+
+
+class FakeUser:
+    """只有users表字段的用户对象"""
+
+    __table__ = Table('users', MetaData(), Column('userid', Integer), Column('username', String),
+                      Column('nickname', String), Column('role', String))
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class CountingRedis(fakeredis.FakeRedis):
+    """记录执行过的写命令"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = []
+
+    def set(self, name, value, *args, **kwargs):
+        self.writes.append(('set', name))
+        return super().set(name, value, *args, **kwargs)
+
+    def expire(self, name, time, *args, **kwargs):
+        self.writes.append(('expire', name))
+        return super().expire(name, time, *args, **kwargs)
+
+
+@pytest.fixture
+def red():
+    return CountingRedis()
+
+
+@pytest.fixture
+def app(red):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', SESSION_COOKIE_NAME='woniunote_session',
+                      PERMANENT_SESSION_LIFETIME=timedelta(days=7))
+    app.session_interface = RedisSessionInterface(compress_threshold=200, refresh_interval=3600, client=red)
+
+    @app.route('/login')
+    def login():
+        session['islogin'] = 'true'
+        session['userid'] = 1
+        return 'ok'
+
+    @app.route('/signin')
+    def signin():
+        login_user(FakeUser(userid=1, username='woniu', nickname='蜗牛', role='user'))
+        return 'ok'
+
+    @app.route('/read')
+    def read():
+        return session.get('islogin', 'false')
+
+    @app.route('/static')
+    def static_page():
+        return 'static'
+
+    @app.route('/big')
+    def big():
+        session['note'] = '蜗牛笔记' * 200
+        return 'ok'
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+def _session_key(client):
+    cookie = client.get_cookie('woniunote_session')
+    assert cookie is not None
+    return f'session:{cookie.value}'
+
+
+def test_untouched_session_does_not_use_redis(app, red):
+    client = app.test_client()
+    response = client.get('/static')
+    assert 'Set-Cookie' not in response.headers
+    assert red.writes == []
+
+    # 只读取新会话也不写入
+    assert client.get('/read').text == 'false'
+    assert red.writes == []
+
+
+def test_write_once_and_skip_unmodified(app, red):
+    client = app.test_client()
+    client.get('/login')
+    key = _session_key(client)
+    assert red.writes == [('set', key)]
+
+    response = client.get('/read')
+    assert response.text == 'true'
+    assert 'Set-Cookie' not in response.headers
+    assert red.writes == [('set', key)]
+
+    # 不使用session的请求不读取Redis
+    app.session_interface._client = None
+    assert client.get('/static').text == 'static'
+
+
+def test_sliding_expiry_refreshes_ttl(app, red):
+    client = app.test_client()
+    client.get('/login')
+    key = _session_key(client)
+    red.expire(key, 7 * 86400 - 7200)
+    red.writes.clear()
+
+    response = client.get('/read')
+    assert 'Set-Cookie' in response.headers
+    assert red.writes == [('expire', key)]
+    assert red.ttl(key) > 7 * 86400 - 10
+
+
+def test_large_session_is_compressed(app, red):
+    client = app.test_client()
+    client.get('/big')
+    value = red.get(_session_key(client))
+    assert value[:1] == b'z'
+    assert len(value) < len(('蜗牛笔记' * 200).encode('utf-8'))
+    assert app.session_interface.loads(value)['note'] == '蜗牛笔记' * 200
+
+
+def test_clear_deletes_session(app, red):
+    client = app.test_client()
+    client.get('/login')
+    key = _session_key(client)
+    client.get('/logout')
+    assert red.get(key) is None
+    assert client.get_cookie('woniunote_session') is None
+    assert client.get('/read').text == 'false'
+
+
+def test_unknown_or_forged_sid_starts_new_session(app, red):
+    client = app.test_client()
+    client.set_cookie('woniunote_session', '../etc/passwd')
+    assert client.get('/read').text == 'false'
+    client.get('/login')
+    assert _session_key(client) != 'session:../etc/passwd'
+
+
+def test_missing_sid_is_not_reused(app, red):
+    client = app.test_client()
+    # 格式正确但Redis中不存在的编号（例如由他人设置在Cookie中）
+    client.set_cookie('woniunote_session', 'a' * 43)
+    client.get('/login')
+    assert _session_key(client) != 'session:' + 'a' * 43
+    assert red.get('session:' + 'a' * 43) is None
+
+
+def test_login_rotates_sid(app, red):
+    client = app.test_client()
+    client.get('/big')
+    old_key = _session_key(client)
+    # 登录前的会话编号可能已经被他人知道，登录后不能继续有效
+    attacker = app.test_client()
+    attacker.set_cookie('woniunote_session', old_key.split(':', 1)[1])
+
+    client.get('/signin')
+    new_key = _session_key(client)
+    assert new_key != old_key
+    assert red.get(old_key) is None
+    data = app.session_interface.loads(red.get(new_key))
+    assert data['main_userid'] == 1 and data['note'] == '蜗牛笔记' * 200
+    assert attacker.get('/read').text == 'false'
+    assert red.get(old_key) is None
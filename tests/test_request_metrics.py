@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+请求性能统计测试 - 验证按端点汇总、直方图百分位和Prometheus文本格式
+不依赖数据库
+"""
+
+import os
+import sys
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.request_metrics import RequestMetrics, SlowRequestProfiler, UNMATCHED_ENDPOINT
+from woniunote.common.trace_context import RequestTrace
+
+
+def test_observe_and_snapshot():
+    metrics = RequestMetrics(enabled=True)
+    for latency in (3, 8, 40, 900):
+        metrics.observe('index.home', latency, sql_count=2, sql_ms=1.5, response_bytes=1000)
+    metrics.observe(None, 2, status=404)
+
+    endpoints = metrics.snapshot()['endpoints']
+    home = endpoints['index.home']
+    assert home['count'] == 4
+    assert home['avg_sql_count'] == 2
+    assert home['avg_response_bytes'] == 1000
+    assert home['p50_ms'] == 10
+    assert home['p99_ms'] == 1000
+    assert home['statuses'] == {200: 4}
+    assert endpoints[UNMATCHED_ENDPOINT]['statuses'] == {404: 1}
+
+
+def test_disabled_metrics_ignore_requests():
+    metrics = RequestMetrics(enabled=False)
+    metrics.observe('index.home', 10)
+    assert metrics.snapshot()['endpoints'] == {}
+
+
+def test_observe_trace_uses_spans():
+    metrics = RequestMetrics(enabled=True)
+    trace = RequestTrace()
+    trace.add_span('db', 0.002)
+    trace.add_span('db', 0.002)
+    trace.add_span('render', 0.01)
+    metrics.observe_trace('article.read', trace, 200, None)
+
+    read = metrics.snapshot()['endpoints']['article.read']
+    assert read['avg_sql_count'] == 2
+    assert read['avg_sql_ms'] == 4.0
+    assert read['avg_render_ms'] == 10.0
+
+
+def test_prometheus_text():
+    metrics = RequestMetrics(enabled=True)
+    metrics.observe('index.home', 30)
+    metrics.observe('index.home', 3000, status=500)
+    text = metrics.prometheus_text()
+
+    assert 'woniunote_request_duration_seconds_bucket{endpoint="index.home",le="0.05"} 1' in text
+    assert 'woniunote_request_duration_seconds_bucket{endpoint="index.home",le="+Inf"} 2' in text
+    assert 'woniunote_request_duration_seconds_count{endpoint="index.home"} 2' in text
+    assert 'woniunote_requests_total{endpoint="index.home",status="500"} 1' in text
+
+
+def test_slow_profiler_saves_only_slow_requests(tmp_path):
+    profiler = SlowRequestProfiler(str(tmp_path), threshold_ms=100, sample_rate=1.0, max_files=1, enabled=True)
+
+    active = profiler.start()
+    assert profiler.start() is None  # 同一时间只分析一个请求
+    assert profiler.stop(active, 10, 'index.home', 'fast') is None
+
+    for trace_id in ('slow1', 'slow2'):
+        active = profiler.start()
+        sum(range(1000))
+        assert profiler.stop(active, 500, 'index.home', trace_id).endswith('.prof')
+
+    # 超过max_files时删除最旧的结果
+    assert sorted(os.listdir(tmp_path)) == [name + suffix for name in profiler.recent() for suffix in ('.prof', '.txt')]
+    assert profiler.recent()[0].endswith('slow2')
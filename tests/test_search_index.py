@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+全文搜索索引测试 - 验证中文分词、BM25排序、可见性过滤和增量更新
+使用内存中的SQLite索引，不依赖MySQL
+"""
+
+import os
+import sys
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.search_index import SearchIndex, tokenize, build_match_query
+
+# (articleid, headline, content, hidden, drafted, checked)
+ARTICLES = [
+    (1, 'Python入门教程', '<p>学习<b>Flask</b>开发博客</p>', 0, 0, 1),
+    (2, 'Flask部署', '<p>使用nginx作为Python应用的反向代理</p>', 0, 0, 1),
+    (3, '隐藏的文章', '<p>Python</p>', 1, 0, 1),
+]
+
+
+def make_index():
+    index = SearchIndex(enabled=True)
+    index.rebuild([ARTICLES])
+    return index
+
+
+def test_tokenize_cjk_bigrams():
+    """中文切分为二元组，英文按单词切分并转为小写"""
+    assert tokenize('Flask入门教程') == 'flask 入门 门教 教程 程'
+    assert build_match_query('入门教程') == '"入门 门教 教程"'
+    assert build_match_query('%') is None
+
+
+def test_search_ranks_headline_matches_first():
+    """标题命中的文章排在正文命中的文章之前，隐藏文章不出现在公开搜索结果中"""
+    index = make_index()
+    assert index.is_ready()
+    assert index.search('python') == ([1, 2], 2)
+    assert index.search('flask') == ([2, 1], 2)
+    ids, total = index.search('python', public=False)
+    assert sorted(ids) == [1, 2, 3] and total == 3
+
+
+def test_search_cjk_substrings():
+    """中文子串和单字都能命中"""
+    index = make_index()
+    assert index.search('门教')[0] == [1]
+    assert index.search('署')[0] == [2]
+    assert index.search('反向代理')[0] == [2]
+    assert index.search('不存在') == ([], 0)
+
+
+def test_incremental_update():
+    """文章更新后索引立即生效"""
+    index = make_index()
+    index.index_article(3, '隐藏的文章', '<p>Python</p>', 0, 0, 1)
+    assert index.search('python')[1] == 3
+    index.remove(3)
+    assert index.search('python')[1] == 2
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+侧边栏缓存测试 - 验证缓存复用、失效重载和推荐池洗牌
+不依赖数据库
+"""
+
+import os
+import sys
+from collections import namedtuple
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.sidebar import SidebarCache
+
+Row = namedtuple('Row', ['articleid', 'headline'])
+
+
+def make_loader(calls):
+    def loader():
+        calls.append(1)
+        rows = [Row(i, f'标题{i}') for i in range(1, 21)]
+        return {'last': rows[:9], 'most': rows[:9], 'recommended': rows}
+    return loader
+
+
+def test_sidebar_cache_reuses_data_until_invalidated():
+    """有效期内只加载一次，失效后重新加载并递增版本号"""
+    cache = SidebarCache(ttl=60, refresh_ahead=0, enabled=True)
+    calls = []
+    loader = make_loader(calls)
+
+    first = cache.get(loader)
+    assert cache.get(loader) is first
+    assert len(calls) == 1
+    assert cache.version == 1
+
+    cache.invalidate()
+    cache.get(loader)
+    assert len(calls) == 2
+    assert cache.version == 2
+
+
+def test_sidebar_recommended_comes_from_pool():
+    """特别推荐从推荐池中取count篇，不重复"""
+    cache = SidebarCache(ttl=60, count=9, enabled=True)
+    last, most, recommended = cache.get(make_loader([]))
+    assert len(last) == 9
+    assert len(recommended) == 9
+    assert len({row.articleid for row in recommended}) == 9
+    assert all(1 <= row.articleid <= 20 for row in recommended)
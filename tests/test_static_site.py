@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+静态化生成器测试 - 验证全量生成、原子写入、出错页面不写入、按文章标签增量生成和删除多余的页面
+使用临时目录和简单的视图函数，不依赖数据库
+"""
+
+import os
+import sys
+
+import pytest
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from flask import Flask, abort, request
+
+from woniunote.common.page_cache import LIST_TAG, article_tag, tag_page, type_tag
+from woniunote.common.static_site import StaticSiteGenerator, is_static_render, page_file
+
+
+@pytest.fixture
+def site(tmp_path):
+    app = Flask(__name__)
+    app.renders = []
+    # 每页2篇文章，按编号倒序
+    app.articles = {5: 1, 4: 1, 3: 2, 2: 1, 1: 2}
+    app.broken = set()
+
+    def listed(article_type=None):
+        return [i for i in sorted(app.articles, reverse=True) if article_type in (None, app.articles[i])]
+
+    def render(ids, *tags):
+        app.renders.append(request.path)
+        if request.path in app.broken:
+            return '加载失败'
+        tag_page(*tags, *(article_tag(i) for i in ids))
+        return f'{request.path} {ids} static={is_static_render()}'
+
+    @app.route('/')
+    @app.route('/page/<int:page>')
+    def paginate(page=1):
+        return render(listed()[(page - 1) * 2:page * 2], LIST_TAG)
+
+    @app.route('/type/<int:class_type>/<int:page>')
+    def classify(class_type, page):
+        return render(listed(class_type)[(page - 1) * 2:page * 2], type_tag(class_type))
+
+    @app.route('/article/<int:articleid>')
+    def read(articleid):
+        if articleid not in app.articles:
+            abort(404)
+        ids = listed()
+        position = ids.index(articleid)
+        return render(ids[max(position - 1, 0):position + 2])
+
+    def sitemap():
+        return {
+            'pages': (len(listed()) + 1) // 2,
+            'type_pages': {t: (len(listed(t)) + 1) // 2 for t in (1, 2)},
+            'articles': set(app.articles)
+        }
+
+    def neighbours(articleid):
+        ids = sorted(app.articles)
+        lower = [i for i in ids if i < articleid]
+        higher = [i for i in ids if i > articleid]
+        return {'prev_id': lower[-1] if lower else articleid, 'next_id': higher[0] if higher else articleid}
+
+    generator = StaticSiteGenerator(output_dir=str(tmp_path), app=app, sitemap_loader=sitemap,
+                                    neighbour_loader=neighbours)
+    generator.root = tmp_path
+    return app, generator
+
+
+def read_page(generator, path):
+    return (generator.root / page_file(path)).read_text(encoding='utf-8')
+
+
+def test_build_all(site):
+    app, generator = site
+    result = generator.build_all()
+    assert result['failed'] == 0
+    for path in ('/', '/page/1', '/page/3', '/type/1/2', '/type/2/1', '/article/3'):
+        assert os.path.exists(generator.root / page_file(path))
+    assert 'static=True' in read_page(generator, '/page/3')
+    assert not [name for name in os.listdir(generator.root) if name.endswith('.tmp')]
+    assert generator.load_manifest()['/page/2'] == ['article:2', 'article:3', LIST_TAG]
+
+
+def test_error_pages_keep_old_file(site):
+    app, generator = site
+    generator.build_all()
+    app.broken.add('/page/2')
+    assert generator.generate(['/page/2'])['failed'] == 1
+    assert '加载失败' not in read_page(generator, '/page/2')
+
+
+def test_refresh_only_tagged_pages(site):
+    app, generator = site
+    generator.build_all()
+    app.renders.clear()
+    # 修改文章3的内容：只有列出它的页面和相邻文章页重新生成
+    generator.refresh_article(3, 2)
+    assert sorted(app.renders) == ['/article/2', '/article/3', '/article/4', '/page/2', '/type/2/1']
+
+
+def test_listing_changed_removes_extra_pages(site):
+    app, generator = site
+    generator.build_all()
+    # 隐藏文章1：列表少了一页，文章页删除
+    del app.articles[1]
+    app.renders.clear()
+    result = generator.refresh_article(1, 2, listing_changed=True)
+    assert result['failed'] == 0
+    assert not os.path.exists(generator.root / page_file('/article/1'))
+    assert not os.path.exists(generator.root / page_file('/page/3'))
+    assert '/page/3' not in generator.load_manifest()
+    assert '/article/1' not in app.renders and '/type/1/1' not in app.renders
+    assert {'/', '/page/1', '/page/2', '/type/2/1', '/article/2'} <= set(app.renders)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+流式渲染测试 - 验证延迟加载的变量、页面头部在查询之前输出、整页缓存收集标签时不使用流式输出
+使用临时目录中的模板，不依赖数据库
+"""
+
+import os
+import sys
+
+import pytest
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from flask import Flask, g
+
+from woniunote.common.streaming import LazyValue, stream_page, streaming_enabled
+
+PAGE = ("<head>标题</head><main>{{ content }}</main>"
+        "{% for row in comments %}<p>{{ row.text }}</p>{% endfor %}"
+        "{% for i in range(total) %}[{{ i + 1 }}]{% endfor %}")
+
+
+@pytest.fixture
+def app(tmp_path):
+    template_dir = tmp_path / 'template'
+    template_dir.mkdir()
+    (template_dir / 'page.html').write_text(PAGE, encoding='utf-8')
+    app = Flask(__name__, template_folder=str(template_dir))
+    app.config.update(STREAM_TEMPLATES_ENABLED=True, STREAM_BUFFER_SIZE=1)
+    return app
+
+
+def test_lazy_value_loads_once():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return [{'text': 'a'}, {'text': 'b'}]
+
+    value = LazyValue(loader)
+    assert not value.loaded and calls == []
+    assert len(value) == 2 and value[1]['text'] == 'b' and [row['text'] for row in value] == ['a', 'b']
+    assert value.loaded and calls == [1]
+    assert LazyValue(lambda: 3) == 3 and list(range(LazyValue(lambda: 2))) == [0, 1]
+    assert not LazyValue(lambda: None)
+
+
+def test_head_sent_before_queries(app):
+    loaded = []
+
+    def comments():
+        loaded.append('comments')
+        return [{'text': '评论'}]
+
+    with app.test_request_context('/'):
+        response = stream_page('page.html', content='正文', comments=LazyValue(comments),
+                               total=LazyValue(lambda: 2))
+        chunks = iter(response.response)
+        first = next(chunks)
+        assert first.startswith('<head>') and loaded == []
+        body = first + ''.join(chunks)
+    assert loaded == ['comments']
+    assert body == '<head>标题</head><main>正文</main><p>评论</p>[1][2]'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+
+
+def test_disabled_while_collecting_page_tags(app):
+    with app.test_request_context('/'):
+        assert streaming_enabled()
+        g._page_tags = set()
+        assert not streaming_enabled()
+    app.config['STREAM_TEMPLATES_ENABLED'] = False
+    with app.test_request_context('/'):
+        assert not streaming_enabled()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+模板缓存测试 - 验证预编译写入字节码缓存、片段按键缓存、键为None时不缓存
+使用临时目录中的模板，不依赖数据库
+"""
+
+import os
+import sys
+
+import pytest
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from flask import Flask, render_template_string
+
+from woniunote.common.template_cache import init_template_cache, template_cache_stats
+
+SIDEBAR = "{% fragment 'sidebar', version %}{% for row in rows %}{{ row }};{% endfor %}{% endfragment %}"
+
+
+@pytest.fixture
+def app(tmp_path):
+    template_dir = tmp_path / 'template'
+    template_dir.mkdir()
+    (template_dir / 'base.html').write_text('<p>{% block content %}{% endblock %}</p>', encoding='utf-8')
+    (template_dir / 'side.html').write_text(SIDEBAR, encoding='utf-8')
+    app = Flask(__name__, template_folder=str(template_dir))
+    app.config.update(TEMPLATE_BYTECODE_CACHE_DIR=str(tmp_path / 'bytecode'))
+    init_template_cache(app)
+    return app
+
+
+def test_warmup_fills_bytecode_cache(app, tmp_path):
+    assert len(os.listdir(tmp_path / 'bytecode')) == 2
+    assert template_cache_stats(app)['bytecode_cache_dir'] == str(tmp_path / 'bytecode')
+
+
+def test_fragment_cached_by_key(app):
+    with app.test_request_context('/'):
+        assert render_template_string(SIDEBAR, version=1, rows=['a', 'b']) == 'a;b;'
+        # 版本号不变时使用缓存的片段
+        assert render_template_string(SIDEBAR, version=1, rows=['c']) == 'a;b;'
+        assert render_template_string(SIDEBAR, version=2, rows=['c']) == 'c;'
+    stats = template_cache_stats(app)
+    assert (stats['hits'], stats['misses'], stats['fragment_count']) == (1, 2, 2)
+
+
+def test_none_key_is_not_cached(app):
+    with app.test_request_context('/'):
+        assert render_template_string(SIDEBAR, version=None, rows=['a']) == 'a;'
+        assert render_template_string(SIDEBAR, version=None, rows=['b']) == 'b;'
+    assert template_cache_stats(app)['fragment_count'] == 0
+
+
+def test_fragment_output_is_escaped(app):
+    with app.test_request_context('/'):
+        assert render_template_string(SIDEBAR, version=3, rows=['<b>']) == '&lt;b&gt;;'
+        assert render_template_string(SIDEBAR, version=3, rows=[]) == '&lt;b&gt;;'
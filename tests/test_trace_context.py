@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+请求跟踪上下文测试 - 验证trace_id在请求内共享、分段耗时累计和Server-Timing格式
+不依赖数据库
+"""
+
+import os
+import sys
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from woniunote.common.trace_context import (RequestTrace, add_span, end_trace, get_current_trace,
+                                            get_trace_id, span, start_trace)
+
+
+def test_trace_id_shared_inside_trace():
+    token = start_trace()
+    try:
+        trace_id = get_trace_id()
+        assert get_trace_id() == trace_id
+        assert get_current_trace().trace_id == trace_id
+    finally:
+        end_trace(token)
+
+    # 不在请求中时每次生成新的ID
+    assert get_current_trace() is None
+    assert get_trace_id() != get_trace_id()
+
+
+def test_incoming_trace_id_is_kept():
+    token = start_trace('upstream_trace_01')
+    try:
+        assert get_trace_id() == 'upstream_trace_01'
+    finally:
+        end_trace(token)
+
+
+def test_spans_accumulate():
+    token = start_trace()
+    try:
+        add_span('db', 0.002)
+        add_span('db', 0.003)
+        with span('render'):
+            pass
+        summary = get_current_trace().span_summary()
+    finally:
+        end_trace(token)
+
+    assert summary['db'] == {'ms': 5.0, 'count': 2}
+    assert summary['render']['count'] == 1
+
+    # 不在请求中时忽略
+    add_span('db', 1)
+
+
+def test_server_timing_header():
+    trace = RequestTrace('abcdefgh')
+    trace.add_span('db', 0.0015)
+    header = trace.server_timing()
+    assert header.startswith('db;dur=1.50;desc="1"')
+    assert ', total;dur=' in header
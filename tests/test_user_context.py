@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+登录用户上下文测试 - 验证三套session键名的兼容、每个请求只解析一次、用户信息缓存和登录退出
+不依赖数据库
+"""
+
+import os
+import sys
+
+import pytest
+
+# 确保能找到项目根目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from flask import Flask, g, session
+
+from woniunote.common import user_context
+from woniunote.common.user_context import (get_current_user, get_user, init_user_context, invalidate_user,
+                                           login_user, logout_user)
+
+
+class FakeColumn:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeUser:
+    """模拟Users对象的字段"""
+    __table__ = type('Table', (), {'columns': [FakeColumn(name) for name in
+                                               ('userid', 'username', 'password', 'nickname', 'role', 'credit')]})
+
+    def __init__(self, userid, nickname='蜗牛', role='user', credit=50):
+        self.userid = userid
+        self.username = f'user{userid}@woniunote.com'
+        self.password = 'md5'
+        self.nickname = nickname
+        self.role = role
+        self.credit = credit
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', USER_CACHE_TTL=60)
+    loads = []
+
+    def loader(userid):
+        loads.append(userid)
+        return FakeUser(userid)
+
+    init_user_context(app, loader)
+    app.loads = loads
+    return app
+
+
+@pytest.mark.parametrize('keys', [
+    {'main_islogin': 'true', 'main_userid': 3, 'main_nickname': '蜗牛', 'main_role': 'admin'},
+    {'islogin': 'true', 'userid': 3, 'nickname': '蜗牛', 'role': 'admin'},
+    {'islogin_abc': 'true', 'userid_abc': 3, 'nickname_abc': '蜗牛', 'role_abc': 'admin'},
+])
+def test_all_session_schemes(app, keys):
+    with app.test_request_context('/', headers={'Cookie': 'session_id=abc'}):
+        session.update(keys)
+        current = get_current_user()
+        assert current.islogin and current.is_admin
+        assert (current.userid, current.nickname) == (3, '蜗牛')
+
+
+def test_resolved_once_per_request(app):
+    with app.test_request_context('/'):
+        session['main_islogin'] = 'true'
+        session['main_userid'] = 3
+        first = get_current_user()
+        session['main_userid'] = 4
+        assert get_current_user() is first
+        assert g.current_user is first
+
+
+def test_anonymous_user(app):
+    with app.test_request_context('/'):
+        current = get_current_user()
+        assert not current.islogin and current.userid is None
+        assert current.user is None
+    assert get_current_user().islogin is False
+
+
+def test_user_rows_are_cached(app):
+    invalidate_user(7)
+    with app.test_request_context('/'):
+        session['main_islogin'] = 'true'
+        session['main_userid'] = 7
+        assert get_current_user().user.credit == 50
+        assert get_current_user().user is get_current_user().user
+        assert not hasattr(get_current_user().user, 'password')
+    with app.test_request_context('/'):
+        session['main_islogin'] = 'true'
+        session['main_userid'] = 7
+        get_current_user().user
+    assert app.loads == [7]
+
+    invalidate_user(7)
+    get_user(7)
+    assert app.loads == [7, 7]
+
+
+def test_login_and_logout(app):
+    with app.test_request_context('/'):
+        session['islogin'] = 'true'
+        session['userid'] = 1
+        login_user(FakeUser(9, role='editor'), source='cookie')
+        assert 'islogin' not in session and session['main_userid'] == 9
+        assert get_current_user().is_editor and get_current_user().source == 'cookie'
+        # 登录时写入缓存，不需要再查询
+        assert get_user(9).nickname == '蜗牛'
+        assert app.loads == []
+
+        logout_user()
+        assert not get_current_user().islogin
+        assert not [key for key in session if key.startswith('main_')]
+
+
+def test_templates_see_current_user(app):
+    with app.test_request_context('/'):
+        session['main_islogin'] = 'true'
+        session['main_userid'] = 5
+        session['main_nickname'] = '蜗牛'
+        from flask import render_template_string
+        assert render_template_string('{{ current_user.nickname }}') == '蜗牛'
+    user_context._user_cache.clear()
@@ -2,14 +2,28 @@ import uuid, os, time, pymysql, json, hashlib, traceback
 from datetime import datetime, timedelta
 from flask import Flask, redirect, request, render_template, session, url_for, jsonify
 from flask_caching import Cache
-from flask_session import Session
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from woniunote.configs.config import config
-from woniunote.common.utils import read_config, get_package_path, get_db_connection, parse_db_uri
+from woniunote.common.utils import read_config, get_package_path, get_db_connection, parse_db_uri, cjk_truncate_filter
 from woniunote.common.database import db, ARTICLE_TYPES
 # 使用相对导入方式
-from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.simple_logger import get_simple_logger, init_async_logging, init_log_levels
+from woniunote.common.article_cache import init_article_cache
+from woniunote.common.read_counter import init_read_counter
+from woniunote.common.sidebar import init_sidebar_cache
+from woniunote.common.article_counters import init_article_counters
+from woniunote.common.search_index import init_search_index
+from woniunote.common.redis_client import init_redis
+from woniunote.common.redis_session import init_session_interface
+from woniunote.common.redis_index import init_redis_index
+from woniunote.common.trace_context import init_trace_context
+from woniunote.common.request_metrics import init_request_metrics
+from woniunote.common.query_detector import init_query_detector
+from woniunote.common.user_context import get_current_user, init_user_context, login_user
+from woniunote.common.page_cache import init_page_cache
+from woniunote.common.static_site import default_sitemap, init_static_site
+from woniunote.common.template_cache import init_template_cache
 from woniunote.controller.admin import admin
 from woniunote.controller.article import article
 from woniunote.controller.card_center import card_center
@@ -21,6 +35,7 @@ from woniunote.controller.ueditor import ueditor
 from woniunote.controller.ucenter import ucenter
 from woniunote.controller.user import user
 from woniunote.module.users import Users
+from woniunote.module.articles import Articles
 pymysql.install_as_MySQLdb()
 
 
@@ -34,6 +49,8 @@ def create_app(config_name='production'):
     
     # 加载配置
     app.config.from_object(config[config_name])
+    init_async_logging(app)
+    init_log_levels(app)
     app_logger.info("应用程序配置已加载")
     
     # 设置安全的SECRET_KEY
@@ -71,9 +88,6 @@ def create_app(config_name='production'):
     }
     app.config.update(session_config)
     
-    # 初始化Flask-Session
-    Session(app)
-    
     # 数据库配置
     SQLALCHEMY_DATABASE_URI = None
     if custom_config:
@@ -81,16 +95,39 @@ def create_app(config_name='production'):
         app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
         if 'redis' in custom_config:
             app.config['CACHE_REDIS_URL'] = custom_config['redis']['REDIS_URL']
+            # 应用共享的Redis客户端使用同一个地址，连接池等参数也可以在redis配置段中设置
+            app.config.update({k: v for k, v in custom_config['redis'].items() if k.startswith('REDIS_')})
             
         # 如果自定义配置中有session配置，则使用自定义配置
         if 'session' in custom_config:
             app.config.update(custom_config['session'])
-            
+    
+    # 共享Redis客户端需要在Redis会话之前配置
+    init_redis(app)
+    # 初始化会话存储：SESSION_BACKEND为redis时使用Redis会话，否则使用Flask-Session的文件会话
+    init_session_interface(app)
+    
     DATABASE_INFO = parse_db_uri(SQLALCHEMY_DATABASE_URI)
     
     # 初始化扩展
     cache = Cache(app)
     db.init_app(app)
+    init_article_cache(app)
+    init_read_counter(app, Articles.add_read_counts)
+    init_sidebar_cache(app)
+    init_article_counters(app)
+    init_search_index(app)
+    init_redis_index(app)
+    init_trace_context(app)
+    init_request_metrics(app)
+    init_query_detector(app)
+    init_user_context(app, Users.find_by_userid)
+    init_page_cache(app, cache)
+    init_static_site(app,
+                     default_sitemap(10, ARTICLE_TYPES, Articles.get_total_count, Articles.get_count_by_type,
+                                     Articles.find_public_ids),
+                     neighbour_loader=Articles.find_prev_next_by_id,
+                     config_name=config_name)
     
     # 注册蓝图
     app.register_blueprint(article)
@@ -127,46 +164,23 @@ def create_app(config_name='production'):
         if url in pass_list or url.endswith('.js') or url.endswith('.jpg'):
             return
             
-        # 检查session是否存在
-        # 先检查基于 session_id 的会话
-        session_id = request.cookies.get('session_id')
-        if session_id and session.get(f'islogin_{session_id}') == 'true':
-            # 用户已登录，不需要进一步处理
+        # 解析当前登录用户，结果保存在g.current_user中，本请求内不再重复读取
+        if get_current_user().islogin:
             return
             
-        # 再检查普通的会话
-        if session.get('islogin') is None:
-            username = request.cookies.get('username')
-            password = request.cookies.get('password')
+        # 未登录时尝试使用Cookie自动登录，每个请求最多查询一次数据库
+        username = request.cookies.get('username')
+        password = request.cookies.get('password')
+        
+        if username is not None and password is not None:
+            result = Users.find_by_username(username)
             
-            if username is not None and password is not None:
-                user_ = Users()
-                result = user_.find_by_username(username)
-                
-                if len(result) == 1 and hashlib.md5(password.encode()).hexdigest() == result[0].password:
-                    # 设置session
-                    session['islogin'] = 'true'
-                    session['userid'] = result[0].userid
-                    session['username'] = username
-                    session['nickname'] = result[0].nickname
-                    session['role'] = result[0].role
-                    # 确保session被保存
-                    session.modified = True
-                return
+            if len(result) == 1 and hashlib.md5(password.encode()).hexdigest() == result[0].password:
+                login_user(result[0], source='cookie')
+            return
                 
-    # 通过自定义过滤器来重构truncate原生过滤器
-    def mytruncate(s, length, end='...'):
-        count = 0
-        new = ''
-        for c in s:
-            new += c  # 每循环一次，将一个字符添加到new字符串后面
-            if ord(c) <= 128:
-                count += 0.5
-            else:
-                count += 1
-            if count > length:
-                break
-        return new + end
+    # 按显示宽度截取的过滤器：中文等全角字符计1，ASCII字符计0.5，用法 {{ row.headline | cjk_truncate(24) }}
+    app.add_template_filter(cjk_truncate_filter, 'cjk_truncate')
 
     # 定义文章类型函数，供模板页面直接调用
     @app.context_processor
@@ -495,6 +509,9 @@ def create_app(config_name='production'):
     def health_check():
         return {'status': 'ok', 'timestamp': time.time()}, 200
 
+    # 设置模板字节码缓存和片段缓存，并预编译所有模板，第一批请求不再编译模板
+    init_template_cache(app)
+
     return app
 
    
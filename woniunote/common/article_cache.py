@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章读缓存
+
+文章详情按"文章编号 + 版本号"缓存：
+- 进程内LRU缓存，支持过期时间(TTL)和容量上限
+- 可选的Redis二级缓存，多个工作进程共享缓存数据和版本号
+- 文章写入（新增、编辑、隐藏、推荐、审核）时递增版本号，旧版本的缓存自然失效
+
+缓存中保存的是文章字段的快照(CachedArticle)，而不是SQLAlchemy对象，
+避免跨会话使用已分离的ORM对象。
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from woniunote.common.redis_client import get_redis_client
+from woniunote.common.simple_logger import get_simple_logger
+
+cache_logger = get_simple_logger('article_cache')
+
+
+class LRUCache:
+    """线程安全的进程内LRU缓存，带过期时间和容量上限"""
+
+    def __init__(self, maxsize=1000, ttl=300):
+        """
+        Args:
+            maxsize: 最多缓存的条目数，超出时淘汰最久未使用的条目
+            ttl: 条目的过期时间（秒），小于等于0表示不过期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expire_at = item
+            if expire_at and expire_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expire_at = time.monotonic() + self.ttl if self.ttl > 0 else 0
+        with self._lock:
+            self._data[key] = (value, expire_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CachedArticle:
+    """文章字段快照，可以像Article对象一样通过属性访问字段"""
+
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+
+    @classmethod
+    def from_model(cls, article):
+        fields = {column.name: getattr(article, column.name) for column in article.__table__.columns}
+        return cls(fields)
+
+    def to_json(self):
+        fields = {}
+        for k, v in self.__dict__.items():
+            if isinstance(v, datetime):
+                v = {'__datetime__': v.isoformat()}
+            fields[k] = v
+        return json.dumps(fields, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data):
+        fields = json.loads(data)
+        for k, v in fields.items():
+            if isinstance(v, dict) and '__datetime__' in v:
+                fields[k] = datetime.fromisoformat(v['__datetime__'])
+        return cls(fields)
+
+    def __repr__(self):
+        return f"CachedArticle(articleid={self.__dict__.get('articleid')}, headline={self.__dict__.get('headline')})"
+
+
+class ArticleCache:
+    """文章读缓存：进程内LRU + 可选Redis二级缓存"""
+
+    def __init__(self, maxsize=1000, ttl=300, use_redis=False, enabled=True, key_prefix='article_cache'):
+        self.enabled = enabled
+        self.use_redis = use_redis
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self.local = LRUCache(maxsize=maxsize, ttl=ttl)
+        # 未启用Redis时，版本号保存在进程内
+        self._versions = {}
+        self._versions_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # 获取进程内共享的Redis客户端
+    @staticmethod
+    def _redis():
+        return get_redis_client()
+
+    def _version_key(self, articleid):
+        return f'{self.key_prefix}:version:{articleid}'
+
+    def _data_key(self, articleid, version):
+        return f'{self.key_prefix}:{articleid}:{version}'
+
+    def get_version(self, articleid):
+        if self.use_redis:
+            try:
+                return int(self._redis().get(self._version_key(articleid)) or 0)
+            except Exception as e:
+                cache_logger.warning("读取Redis文章版本号失败，使用进程内版本号", {
+                    'articleid': articleid,
+                    'error': str(e)
+                })
+        return self._versions.get(articleid, 0)
+
+    def get(self, articleid, loader):
+        """按文章编号读取文章，缓存未命中时调用loader从数据库加载
+
+        Args:
+            articleid: 文章编号
+            loader: 无参函数，返回CachedArticle或None（None不会被缓存）
+
+        Returns:
+            CachedArticle: 文章快照，不存在时返回None
+        """
+        if not self.enabled:
+            return loader()
+
+        version = self.get_version(articleid)
+        key = self._data_key(articleid, version)
+
+        article = self.local.get(key)
+        if article is not None:
+            self.hits += 1
+            return article
+
+        if self.use_redis:
+            try:
+                data = self._redis().get(key)
+                if data:
+                    article = CachedArticle.from_json(data)
+                    self.local.set(key, article)
+                    self.hits += 1
+                    return article
+            except Exception as e:
+                cache_logger.warning("读取Redis文章缓存失败", {
+                    'articleid': articleid,
+                    'error': str(e)
+                })
+
+        self.misses += 1
+        article = loader()
+        if article is None:
+            return None
+
+        self.local.set(key, article)
+        if self.use_redis:
+            try:
+                self._redis().set(key, article.to_json(), ex=self.ttl if self.ttl > 0 else None)
+            except Exception as e:
+                cache_logger.warning("写入Redis文章缓存失败", {
+                    'articleid': articleid,
+                    'error': str(e)
+                })
+        return article
+
+    def invalidate(self, articleid):
+        """文章发生变更时调用：递增版本号，使所有进程中该文章的旧缓存失效"""
+        self.local.delete(self._data_key(articleid, self.get_version(articleid)))
+        with self._versions_lock:
+            self._versions[articleid] = self._versions.get(articleid, 0) + 1
+
+        if self.use_redis:
+            try:
+                self._redis().incr(self._version_key(articleid))
+            except Exception as e:
+                cache_logger.warning("递增Redis文章版本号失败", {
+                    'articleid': articleid,
+                    'error': str(e)
+                })
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'use_redis': self.use_redis,
+            'size': len(self.local),
+            'maxsize': self.local.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# 全局文章缓存实例，create_app中会根据配置重新初始化
+_article_cache = ArticleCache()
+
+
+def get_article_cache():
+    return _article_cache
+
+
+def init_article_cache(app):
+    """根据应用配置初始化文章缓存
+
+    配置项：
+        ARTICLE_CACHE_ENABLED: 是否启用文章缓存
+        ARTICLE_CACHE_SIZE: 进程内缓存的文章数量上限
+        ARTICLE_CACHE_TTL: 缓存过期时间（秒）
+        ARTICLE_CACHE_USE_REDIS: 是否启用Redis二级缓存
+    """
+    global _article_cache
+    _article_cache = ArticleCache(maxsize=app.config.get('ARTICLE_CACHE_SIZE', 1000),
+                                  ttl=app.config.get('ARTICLE_CACHE_TTL', 300),
+                                  use_redis=app.config.get('ARTICLE_CACHE_USE_REDIS', False),
+                                  enabled=app.config.get('ARTICLE_CACHE_ENABLED', True))
+    cache_logger.info("文章缓存初始化完成", _article_cache.stats())
+    return _article_cache
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章数量计数器
+
+列表页计算总页数时需要按可见性和分类统计文章数量，每次都执行COUNT(*)会随文章数增长而变慢。
+这里在进程内维护一份 (hidden, drafted, checked, type) -> 文章数 的计数表：
+- 首次使用时用一条GROUP BY语句加载，之后每隔RECONCILE_INTERVAL秒重新加载一次进行校正
+- 新增文章、隐藏、审核、草稿发布等状态变化时由文章模块增量更新
+- 各种统计只需要对计数表中的少量状态求和，与文章总数无关
+
+标题模糊搜索的数量无法按状态归类，按关键字缓存一段时间，文章变化时清空。
+多进程部署时其他进程的变更会在下一次校正后体现。
+"""
+import threading
+import time
+
+from woniunote.common.article_cache import LRUCache
+from woniunote.common.simple_logger import get_simple_logger
+
+counters_logger = get_simple_logger('article_counters')
+
+# 计数表键中各字段的位置
+STATE_FIELDS = ('hidden', 'drafted', 'checked', 'type')
+
+
+def make_state(hidden, drafted, checked, article_type):
+    """生成计数表的键，数据库中可能为NULL的字段按0处理"""
+    return int(hidden or 0), int(drafted or 0), int(checked or 0), int(article_type or 0)
+
+
+class ArticleCounters:
+    """按文章状态和分类维护的文章数量计数表"""
+
+    def __init__(self, reconcile_interval=300, enabled=False, headline_cache_size=200):
+        """
+        Args:
+            reconcile_interval: 重新从数据库加载计数表的间隔（秒）
+            enabled: 为False时每次统计都直接调用loader查询数据库
+            headline_cache_size: 缓存的标题搜索关键字数量
+        """
+        self.reconcile_interval = reconcile_interval
+        self.enabled = enabled
+        self._counts = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+        self._headline_counts = LRUCache(maxsize=headline_cache_size, ttl=reconcile_interval)
+
+    def _ensure_loaded(self, loader):
+        """计数表不存在或到了校正时间时重新加载"""
+        if self._counts is not None and time.monotonic() - self._loaded_at < self.reconcile_interval:
+            return self._counts
+
+        start_time = time.time()
+        rows = loader()
+        counts = {}
+        for hidden, drafted, checked, article_type, count in rows:
+            state = make_state(hidden, drafted, checked, article_type)
+            counts[state] = counts.get(state, 0) + count
+
+        with self._lock:
+            if self._counts is not None and counts != self._counts:
+                counters_logger.info("文章计数表校正", {
+                    'before_total': sum(self._counts.values()),
+                    'after_total': sum(counts.values())
+                })
+            self._counts = counts
+            self._loaded_at = time.monotonic()
+        counters_logger.info("加载文章计数表成功", {
+            'state_count': len(counts),
+            'article_count': sum(counts.values()),
+            'load_time_ms': round((time.time() - start_time) * 1000, 2)
+        })
+        return counts
+
+    def count(self, loader, **conditions):
+        """统计满足条件的文章数量
+
+        Args:
+            loader: 无参函数，返回 (hidden, drafted, checked, type, count) 行的列表
+            conditions: 按hidden、drafted、checked、type过滤，未给出的字段不限制
+        """
+        if not self.enabled:
+            counts = {}
+            for hidden, drafted, checked, article_type, count in loader():
+                state = make_state(hidden, drafted, checked, article_type)
+                counts[state] = counts.get(state, 0) + count
+        else:
+            counts = self._ensure_loaded(loader)
+
+        positions = [(STATE_FIELDS.index(name), int(value)) for name, value in conditions.items()]
+        with self._lock:
+            return sum(n for state, n in counts.items()
+                       if all(state[i] == value for i, value in positions))
+
+    def headline_count(self, headline, loader):
+        """标题模糊搜索的结果数量，按关键字缓存"""
+        if not self.enabled:
+            return loader()
+        count = self._headline_counts.get(headline)
+        if count is None:
+            count = loader()
+            self._headline_counts.set(headline, count)
+        return count
+
+    def add(self, state, n=1):
+        """新增文章时调用"""
+        self._headline_counts.clear()
+        with self._lock:
+            if self._counts is None:
+                return
+            self._counts[state] = max(self._counts.get(state, 0) + n, 0)
+
+    def move(self, old_state, new_state):
+        """文章状态或分类变化时调用，把一篇文章从旧状态移到新状态"""
+        if old_state == new_state:
+            return
+        self._headline_counts.clear()
+        with self._lock:
+            if self._counts is None:
+                return
+            self._counts[old_state] = max(self._counts.get(old_state, 0) - 1, 0)
+            self._counts[new_state] = self._counts.get(new_state, 0) + 1
+
+    def invalidate(self):
+        """丢弃计数表，下次统计时重新加载"""
+        self._headline_counts.clear()
+        with self._lock:
+            self._counts = None
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'reconcile_interval': self.reconcile_interval,
+            'loaded': self._counts is not None,
+            'state_count': len(self._counts) if self._counts else 0
+        }
+
+
+# 全局计数表，默认不缓存，create_app中根据配置启用
+_article_counters = ArticleCounters()
+
+
+def get_article_counters():
+    return _article_counters
+
+
+def init_article_counters(app):
+    """根据应用配置初始化文章数量计数表
+
+    配置项：
+        ARTICLE_COUNTERS_ENABLED: 是否启用计数表
+        ARTICLE_COUNTERS_RECONCILE_INTERVAL: 从数据库重新校正计数的间隔（秒）
+    """
+    global _article_counters
+    _article_counters = ArticleCounters(reconcile_interval=app.config.get('ARTICLE_COUNTERS_RECONCILE_INTERVAL', 300),
+                                        enabled=app.config.get('ARTICLE_COUNTERS_ENABLED', True))
+    counters_logger.info("文章计数表初始化完成", _article_counters.stats())
+    return _article_counters
@@ -44,6 +44,7 @@ class Article(db.Model):
     type = db.Column(db.Integer, nullable=False)
     headline = db.Column(db.String(100), nullable=False)
     content = db.Column(db.TEXT(16777216))
+    summary = db.Column(db.String(255))  # 纯文本摘要，写入文章时根据content生成
     thumbnail = db.Column(db.String(30))
     credit = db.Column(db.Integer, default=0)
     readcount = db.Column(db.Integer, default=0)
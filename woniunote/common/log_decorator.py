@@ -1,50 +1,51 @@
 import functools
 import time
 import traceback
-import uuid
 from flask import request, session
 from woniunote.common.simple_logger import get_simple_logger
+# 跟踪ID由请求跟踪上下文统一提供，同一请求内与各模块的日志一致
+from woniunote.common.trace_context import get_trace_id
 
-# 线程本地存储，用于跟踪ID
-_thread_local_trace_id = {}
+def describe_result(result):
+    """返回值的简要描述，避免把渲染后的整个页面转换为字符串写入日志"""
+    if result is None or isinstance(result, (bool, int, float)):
+        return result
+    if isinstance(result, (str, bytes)):
+        return f"<{type(result).__name__} len={len(result)}>"
+    status = getattr(result, 'status', None)
+    if status is not None:
+        return f"<{type(result).__name__} {status}>"
+    return f"<{type(result).__name__}>"
 
-# 生成跟踪ID
-def generate_trace_id():
-    return str(uuid.uuid4())
-
-# 获取当前跟踪ID
-def get_trace_id():
-    if 'trace_id' not in _thread_local_trace_id:
-        _thread_local_trace_id['trace_id'] = generate_trace_id()
-    return _thread_local_trace_id['trace_id']
 
 def log_function(logger=None, log_args=True, log_return=True, log_exception=True, performance=True):
     """
     通用函数/方法日志装饰器，自动记录trace_id、参数、返回值、异常、耗时。
     """
     def decorator(func):
+        func_name = f"{func.__module__}.{func.__qualname__}"
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             nonlocal logger
             if logger is None:
                 logger = get_simple_logger(func.__module__)
             trace_id = get_trace_id()
-            func_name = f"{func.__module__}.{func.__qualname__}"
             # 记录参数
             if log_args:
-                logger.info(f"调用: {func_name}", {'trace_id': trace_id, 'args': str(args), 'kwargs': str(kwargs)})
+                logger.info(f"调用: {func_name}", lambda: {'trace_id': trace_id, 'args': str(args), 'kwargs': str(kwargs)})
             start = time.time() if performance else None
             try:
                 result = func(*args, **kwargs)
                 if log_return:
-                    logger.info(f"返回: {func_name}", {'trace_id': trace_id, 'result': str(result)})
+                    logger.info(f"返回: {func_name}", lambda: {'trace_id': trace_id, 'result': describe_result(result)})
                 return result
             except Exception as e:
                 if log_exception:
-                    logger.error(f"异常: {func_name}: {e}", {'trace_id': trace_id, 'exception': traceback.format_exc()})
+                    logger.error(f"异常: {func_name}: {e}", lambda: {'trace_id': trace_id, 'exception': traceback.format_exc()})
                 raise
             finally:
-                if performance and start is not None:
+                if performance and start is not None and logger.is_enabled_for('INFO'):
                     elapsed = (time.time() - start) * 1000
                     logger.info(f"性能: {func_name} 耗时 {elapsed:.2f}ms", {'trace_id': trace_id, 'elapsed_ms': elapsed})
         return wrapper
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+匿名访问的整页缓存
+
+未登录访客看到的首页、分页、分类页和文章页只与URL有关，但每次请求都要查询数据库并渲染模板。
+开启后，视图函数用@cached_page装饰，匿名用户的GET请求按路径（含查询参数）缓存渲染好的HTML：
+- 缓存保存在create_app创建的flask_caching.Cache中（CACHE_TYPE，生产环境为Redis，多进程共享）
+- 响应带ETag和Last-Modified，浏览器带If-None-Match/If-Modified-Since再次请求时返回304
+- 响应头X-Page-Cache为HIT或MISS
+- 登录用户、非GET请求和静态化生成器的渲染不使用缓存；只有视图调用了tag_page()（即正常渲染完成）的200响应才会被缓存，
+  出错时返回的错误页面不会被缓存
+
+失效按标签进行。视图渲染时用tag_page()登记页面依赖的数据：
+- article:<编号>  页面中出现的文章（列表中的文章、文章页本身和上一篇、下一篇）
+- type:<类型>     分类列表页
+- list            首页和分页列表
+文章写入后调用purge()，只有带这些标签的页面失效。每个标签对应一个版本号，
+缓存的页面记录生成时各标签的版本号，读取时版本号不一致即视为失效，不需要遍历缓存。
+侧边栏和阅读次数不参与失效，最多在PAGE_CACHE_TTL秒后更新。
+"""
+import hashlib
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import g, make_response, request
+
+from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.static_site import is_static_render
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
+
+page_cache_logger = get_simple_logger('page_cache')
+
+LIST_TAG = 'list'
+
+
+def article_tag(articleid):
+    return f'article:{int(articleid)}'
+
+
+def type_tag(article_type):
+    return f'type:{int(article_type)}'
+
+
+def _row_articleid(row):
+    """从文章对象、投影行或 (文章, 昵称) 元组中取文章编号"""
+    if isinstance(row, tuple) and not hasattr(row, 'articleid'):
+        row = row[0]
+    if isinstance(row, dict):
+        return row.get('articleid')
+    return getattr(row, 'articleid', None)
+
+
+def article_tags(rows):
+    """列表中所有文章的标签"""
+    return [article_tag(articleid) for articleid in map(_row_articleid, rows or ()) if articleid is not None]
+
+
+def tag_page(*tags):
+    """登记当前页面依赖的数据标签，同时表示页面已经正常渲染、可以缓存"""
+    page_tags = g.get('_page_tags')
+    if page_tags is not None:
+        page_tags.update(tags)
+
+
+def _new_version():
+    return f'{time.time_ns():x}{random.getrandbits(16):04x}'
+
+
+class PageCache:
+    """带标签失效的整页缓存"""
+
+    def __init__(self, cache=None, ttl=120, enabled=False, key_prefix='page'):
+        """
+        Args:
+            cache: flask_caching.Cache对象
+            ttl: 页面缓存时间（秒）
+            enabled: 是否启用
+            key_prefix: 缓存键前缀
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.enabled = enabled and cache is not None
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'stale': 0, 'purges': 0, 'errors': 0}
+
+    def _page_key(self, path):
+        return f'{self.key_prefix}:{path}'
+
+    def _tag_key(self, tag):
+        return f'{self.key_prefix}_tag:{tag}'
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _tag_versions(self, tags, create=False):
+        keys = [self._tag_key(tag) for tag in tags]
+        versions = dict(zip(tags, self.cache.get_many(*keys))) if keys else {}
+        if create:
+            for tag, key in zip(tags, keys):
+                if versions[tag] is None:
+                    # 并发请求可能同时初始化同一个标签，以最终保存的值为准
+                    self.cache.add(key, _new_version(), timeout=0)
+                    versions[tag] = self.cache.get(key)
+        return versions
+
+    def get(self, path):
+        """读取缓存的页面，不存在或已失效时返回None"""
+        try:
+            entry = self.cache.get(self._page_key(path))
+            if entry is None:
+                self._count('misses')
+                return None
+            tags = list(entry['tags'])
+            if self._tag_versions(tags) != entry['tags']:
+                self._count('stale')
+                return None
+            self._count('hits')
+            return entry
+        except Exception as e:
+            self._count('errors')
+            page_cache_logger.error("读取页面缓存失败", {
+                'trace_id': get_trace_id(),
+                'path': path,
+                'error': str(e)
+            })
+            return None
+
+    def set(self, path, body, mimetype, tags):
+        """保存页面，返回保存的条目"""
+        tags = sorted(tags)
+        entry = {
+            'body': body,
+            'mimetype': mimetype,
+            'etag': hashlib.md5(body).hexdigest(),
+            'last_modified': int(time.time()),
+            'tags': None
+        }
+        try:
+            entry['tags'] = self._tag_versions(tags, create=True)
+            self.cache.set(self._page_key(path), entry, timeout=self.ttl)
+            self._count('stores')
+        except Exception as e:
+            self._count('errors')
+            page_cache_logger.error("保存页面缓存失败", {
+                'trace_id': get_trace_id(),
+                'path': path,
+                'error': str(e)
+            })
+        return entry
+
+    def purge(self, *tags):
+        """使带有任一标签的页面失效"""
+        if not self.enabled or not tags:
+            return
+        try:
+            self.cache.set_many({self._tag_key(tag): _new_version() for tag in tags}, timeout=0)
+            self._count('purges')
+            page_cache_logger.debug("页面缓存失效", lambda: {
+                'trace_id': get_trace_id(),
+                'tags': list(tags)
+            })
+        except Exception as e:
+            self._count('errors')
+            page_cache_logger.error("页面缓存失效失败", {
+                'trace_id': get_trace_id(),
+                'tags': list(tags),
+                'error': str(e)
+            })
+
+    def purge_article(self, articleid, article_type=None, listing_changed=False, old_type=None):
+        """文章写入后调用
+
+        Args:
+            articleid: 文章编号，文章页和列出该文章的页面失效
+            article_type: 文章类型
+            listing_changed: 文章新增、隐藏、审核等改变了列表内容时为True，首页分页和分类页全部失效
+            old_type: 修改了文章类型时的原类型
+        """
+        tags = [article_tag(articleid)]
+        if listing_changed:
+            tags.append(LIST_TAG)
+            tags.extend(type_tag(t) for t in {article_type, old_type} if t is not None)
+        self.purge(*tags)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({'enabled': self.enabled, 'ttl': self.ttl})
+        return stats
+
+
+def _make_cached_response(entry, status):
+    response = make_response(entry['body'])
+    response.mimetype = entry['mimetype']
+    response.set_etag(entry['etag'])
+    response.last_modified = datetime.fromtimestamp(entry['last_modified'], timezone.utc)
+    response.headers['X-Page-Cache'] = status
+    return response.make_conditional(request)
+
+
+def cached_page(on_hit=None):
+    """缓存匿名用户访问的页面
+
+    用法：
+        @index.route('/page/<int:page>')
+        @cached_page()
+        def paginate(page):
+            ...
+            tag_page(LIST_TAG, *article_tags(result))
+
+    Args:
+        on_hit: 命中缓存时调用的函数，参数与视图函数相同，如文章页命中缓存时仍要增加阅读次数
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            page_cache = get_page_cache()
+            if not page_cache.enabled or request.method != 'GET' or get_current_user().islogin \
+                    or is_static_render():
+                return view(*args, **kwargs)
+
+            path = request.full_path.rstrip('?')
+            entry = page_cache.get(path)
+            if entry is not None:
+                if on_hit is not None:
+                    on_hit(*args, **kwargs)
+                return _make_cached_response(entry, 'HIT')
+
+            g._page_tags = set()
+            response = make_response(view(*args, **kwargs))
+            tags = g.pop('_page_tags', None)
+            if response.status_code != 200 or not tags or response.direct_passthrough:
+                return response
+            entry = page_cache.set(path, response.get_data(), response.mimetype, tags)
+            response.set_etag(entry['etag'])
+            response.last_modified = datetime.fromtimestamp(entry['last_modified'], timezone.utc)
+            response.headers['X-Page-Cache'] = 'MISS'
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+# 全局页面缓存，默认不启用，create_app中根据配置初始化
+_page_cache = PageCache()
+
+
+def get_page_cache():
+    return _page_cache
+
+
+def init_page_cache(app, cache):
+    """根据应用配置初始化整页缓存
+
+    配置项：
+        PAGE_CACHE_ENABLED: 是否缓存匿名用户访问的页面
+        PAGE_CACHE_TTL: 页面缓存时间（秒）
+
+    Args:
+        cache: create_app中创建的flask_caching.Cache对象
+    """
+    global _page_cache
+    _page_cache = PageCache(cache,
+                            ttl=app.config.get('PAGE_CACHE_TTL', 120),
+                            enabled=app.config.get('PAGE_CACHE_ENABLED', False))
+    page_cache_logger.info("页面缓存初始化完成", _page_cache.stats())
+    return _page_cache
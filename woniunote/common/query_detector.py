@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+N+1查询检测
+
+在循环中逐行查询数据库（N+1查询）是列表页变慢最常见的原因。开启后，
+在数据库引擎的before_cursor_execute事件中按"规范化后的SQL"统计每个请求执行的语句，
+同一语句在一个请求内执行超过QUERY_DETECTOR_THRESHOLD次时按配置处理：
+- log: 记录一条包含重复语句和次数的WARNING日志
+- header: 在响应头X-Query-Count、X-Query-Repeats中返回总语句数和重复语句数，
+  tests/functional中的测试通过HTTP检查这两个响应头
+- raise: 抛出RepeatedQueryError，测试客户端中请求直接失败
+
+规范化会去掉参数值、数字和IN列表的长度，只按语句结构分组。
+默认只在开发和测试环境启用。
+"""
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+
+detector_logger = get_simple_logger('query_detector')
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*(?:(?:\?|%s|%\(\w+\)s|:\w+|\[POSTCOMPILE_\w+\]|\.\.\.)\s*,?\s*)+\)', re.I)
+
+_current_queries = ContextVar('woniunote_request_queries', default=None)
+
+
+class RepeatedQueryError(AssertionError):
+    """请求中出现了N+1查询"""
+
+
+def normalize_sql(statement):
+    """把SQL语句规范化为结构相同即相等的形式"""
+    sql = _WHITESPACE.sub(' ', statement).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryReport:
+    """一个请求（或一段代码）中执行的SQL语句统计"""
+
+    def __init__(self):
+        self.total = 0
+        # {规范化后的语句: 执行次数}
+        self.statements = {}
+
+    def record(self, statement):
+        sql = normalize_sql(statement)
+        self.total += 1
+        self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    def repeated(self, threshold):
+        """执行次数超过threshold的语句，返回 [(语句, 次数)]，按次数从多到少排序"""
+        return sorted(((sql, count) for sql, count in self.statements.items() if count > threshold),
+                      key=lambda item: item[1], reverse=True)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    report = _current_queries.get()
+    if report is not None:
+        report.record(statement)
+
+
+def install(engine):
+    """在数据库引擎上注册语句统计的事件，重复调用不会重复注册"""
+    from sqlalchemy import event
+
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+
+
+@contextmanager
+def track_queries():
+    """统计代码块中执行的SQL语句
+
+    用法：
+        with track_queries() as report:
+            Comments.get_comment_user_list(articleid, 0, 10)
+        assert not report.repeated(5)
+    """
+    report = QueryReport()
+    token = _current_queries.set(report)
+    try:
+        yield report
+    finally:
+        _current_queries.reset(token)
+
+
+def init_query_detector(app):
+    """根据应用配置注册N+1查询检测
+
+    配置项：
+        QUERY_DETECTOR_ENABLED: 是否启用
+        QUERY_DETECTOR_THRESHOLD: 同一语句在一个请求中允许执行的次数
+        QUERY_DETECTOR_ACTIONS: 发现N+1查询时的处理方式，log、header、raise的组合
+        QUERY_DETECTOR_IGNORE: 不检查的端点名称列表
+    """
+    if not app.config.get('QUERY_DETECTOR_ENABLED', False):
+        return None
+
+    from flask import g, request
+    from woniunote.common.database import db
+
+    threshold = app.config.get('QUERY_DETECTOR_THRESHOLD', 5)
+    actions = set(app.config.get('QUERY_DETECTOR_ACTIONS', ('log',)))
+    ignore = set(app.config.get('QUERY_DETECTOR_IGNORE', ()))
+
+    with app.app_context():
+        install(db.engine)
+
+    @app.before_request
+    def start_query_tracking():
+        report = QueryReport()
+        g._query_report = (report, _current_queries.set(report))
+
+    @app.after_request
+    def check_repeated_queries(response):
+        tracking = g.get('_query_report')
+        if tracking is None or request.endpoint in ignore:
+            return response
+        report = tracking[0]
+        repeated = report.repeated(threshold)
+
+        if 'header' in actions:
+            response.headers['X-Query-Count'] = str(report.total)
+            response.headers['X-Query-Repeats'] = str(len(repeated))
+        if repeated:
+            if 'log' in actions:
+                detector_logger.warning("检测到N+1查询", {
+                    'trace_id': get_trace_id(),
+                    'endpoint': request.endpoint,
+                    'path': request.path,
+                    'total_queries': report.total,
+                    'threshold': threshold,
+                    'repeated': [{'sql': sql[:300], 'count': count} for sql, count in repeated]
+                })
+            if 'raise' in actions:
+                raise RepeatedQueryError(f"{request.endpoint} 中有 {len(repeated)} 条语句执行超过 {threshold} 次: "
+                                         + '; '.join(f'{count} x {sql[:200]}' for sql, count in repeated))
+        return response
+
+    @app.teardown_request
+    def stop_query_tracking(exc=None):
+        tracking = g.pop('_query_report', None)
+        if tracking is not None:
+            try:
+                _current_queries.reset(tracking[1])
+            except ValueError:
+                _current_queries.set(None)
+
+    detector_logger.info("N+1查询检测已启用", {
+        'threshold': threshold,
+        'actions': sorted(actions),
+        'ignore': sorted(ignore)
+    })
+    return threshold
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章阅读次数缓冲计数器
+
+每次阅读文章只在内存（或Redis哈希表）中累加计数，由后台线程按固定间隔批量写回数据库，
+每批只执行一条 UPDATE article SET readcount = readcount + n 语句，
+避免热门文章的每次访问都对同一行加锁并提交事务。
+进程退出时会自动把尚未写回的计数刷新到数据库。
+"""
+import atexit
+import os
+import threading
+import uuid
+
+from woniunote.common.redis_client import get_redis_client
+from woniunote.common.simple_logger import get_simple_logger
+
+counter_logger = get_simple_logger('read_counter')
+
+# Redis中暂存待写回阅读计数的哈希表
+REDIS_PENDING_KEY = 'article:readcount:pending'
+
+
+class ReadCounter:
+    """阅读次数缓冲计数器"""
+
+    def __init__(self, flush_handler=None, flush_interval=10, use_redis=False, enabled=False, app=None):
+        """
+        Args:
+            flush_handler: 写回函数，参数为 {articleid: 增量} 字典
+            flush_interval: 后台写回间隔（秒）
+            use_redis: 是否使用Redis的HINCRBY暂存计数，多进程部署时可共享缓冲区
+            enabled: 为False时不缓冲，调用方应直接写数据库
+            app: Flask应用，后台线程在该应用上下文中写回数据库
+        """
+        self.flush_handler = flush_handler
+        self.flush_interval = flush_interval
+        self.use_redis = use_redis
+        self.enabled = enabled
+        self.app = app
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    # 获取进程内共享的Redis客户端
+    @staticmethod
+    def _redis():
+        return get_redis_client()
+
+    def incr(self, articleid, n=1):
+        """累加一篇文章的阅读次数"""
+        self._ensure_started()
+        if self.use_redis:
+            try:
+                self._redis().hincrby(REDIS_PENDING_KEY, articleid, n)
+                return
+            except Exception as e:
+                counter_logger.warning("Redis累加阅读次数失败，改用进程内缓冲", {
+                    'articleid': articleid,
+                    'error': str(e)
+                })
+        with self._lock:
+            self._pending[articleid] = self._pending.get(articleid, 0) + n
+
+    def pending_count(self):
+        """当前进程中尚未写回的阅读次数"""
+        with self._lock:
+            return sum(self._pending.values())
+
+    def _take_pending(self):
+        """取出并清空待写回的计数"""
+        with self._lock:
+            deltas, self._pending = self._pending, {}
+
+        if self.use_redis:
+            # 先把哈希表改名为临时键再读取，保证多个进程不会重复写回同一批计数
+            temp_key = f'{REDIS_PENDING_KEY}:{uuid.uuid4().hex}'
+            try:
+                red = self._redis()
+                if red.exists(REDIS_PENDING_KEY):
+                    red.rename(REDIS_PENDING_KEY, temp_key)
+                    for articleid, n in red.hgetall(temp_key).items():
+                        articleid = int(articleid)
+                        deltas[articleid] = deltas.get(articleid, 0) + int(n)
+                    red.delete(temp_key)
+            except Exception as e:
+                counter_logger.warning("读取Redis阅读计数失败", {
+                    'error': str(e)
+                })
+        return deltas
+
+    def flush(self):
+        """把缓冲的阅读次数批量写回数据库，返回写回的文章数量"""
+        with self._flush_lock:
+            deltas = self._take_pending()
+            if not deltas or self.flush_handler is None:
+                return 0
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        self.flush_handler(deltas)
+                else:
+                    self.flush_handler(deltas)
+                counter_logger.info("阅读次数写回成功", {
+                    'article_count': len(deltas),
+                    'read_count': sum(deltas.values())
+                })
+                return len(deltas)
+            except Exception as e:
+                # 写回失败时把计数放回缓冲区，下次再试
+                with self._lock:
+                    for articleid, n in deltas.items():
+                        self._pending[articleid] = self._pending.get(articleid, 0) + n
+                counter_logger.error("阅读次数写回失败", {
+                    'article_count': len(deltas),
+                    'error': str(e),
+                    'error_type': type(e).__name__
+                })
+                return 0
+
+    def _ensure_started(self):
+        """在当前进程中启动后台写回线程（兼容gunicorn等fork之后的工作进程）"""
+        if not self.enabled or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='read-counter-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def shutdown(self):
+        """停止后台线程并写回剩余的计数"""
+        self._stop_event.set()
+        self.flush()
+
+
+# 全局计数器，默认不缓冲，create_app中根据配置启用
+_read_counter = ReadCounter()
+
+
+def get_read_counter():
+    return _read_counter
+
+
+def init_read_counter(app, flush_handler):
+    """根据应用配置初始化阅读次数计数器
+
+    配置项：
+        READ_COUNT_BUFFER_ENABLED: 是否启用缓冲写回
+        READ_COUNT_FLUSH_INTERVAL: 写回间隔（秒）
+        READ_COUNT_USE_REDIS: 是否使用Redis暂存计数
+    """
+    global _read_counter
+    _read_counter = ReadCounter(flush_handler=flush_handler,
+                                flush_interval=app.config.get('READ_COUNT_FLUSH_INTERVAL', 10),
+                                use_redis=app.config.get('READ_COUNT_USE_REDIS', False),
+                                enabled=app.config.get('READ_COUNT_BUFFER_ENABLED', True),
+                                app=app)
+    # 进程退出时写回剩余计数
+    atexit.register(_read_counter.shutdown)
+    counter_logger.info("阅读次数计数器初始化完成", {
+        'enabled': _read_counter.enabled,
+        'flush_interval': _read_counter.flush_interval,
+        'use_redis': _read_counter.use_redis
+    })
+    return _read_counter
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+应用共享的Redis客户端
+
+以前每次调用redis_connect()都会新建一个连接池，每个请求都要重新建立TCP连接。
+现在整个进程共享一个客户端：
+- 按REDIS_URL（user_password_config.yaml中的redis.REDIS_URL）连接，连接池大小和超时可配置
+- 使用BlockingConnectionPool，连接用尽时等待REDIS_POOL_TIMEOUT秒而不是无限新建连接
+- 空闲连接在使用前按REDIS_HEALTH_CHECK_INTERVAL做健康检查，Redis重启后自动重连
+- fork出的子进程（gunicorn worker）会由redis-py自动重建连接池
+- REDIS_FAKE为True时使用fakeredis的内存实现，测试环境不需要部署Redis
+
+redis_connect()仍然可用，返回的就是这个共享客户端。
+需要读写二进制数据（如压缩后的会话）时使用get_redis_client(binary=True)，两个客户端使用相同的配置。
+"""
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import redis
+
+from woniunote.common.simple_logger import get_simple_logger
+
+redis_logger = get_simple_logger('redis_client')
+
+DEFAULT_REDIS_URL = 'redis://127.0.0.1:6379/0'
+
+# 当前客户端的连接参数，init_redis中根据应用配置更新
+_settings = {
+    'url': DEFAULT_REDIS_URL,
+    'max_connections': 50,
+    'pool_timeout': 2,
+    'socket_timeout': 2,
+    'socket_connect_timeout': 1,
+    'health_check_interval': 30,
+    'fake': False
+}
+
+# 共享客户端：False为返回str的客户端，True为返回bytes的客户端
+_clients = {}
+_client_lock = threading.Lock()
+# fakeredis模式下两个客户端共享同一份内存数据
+_fake_server = None
+
+
+def mask_url(url):
+    """隐藏连接地址中的密码，用于日志和统计"""
+    parts = urlsplit(url)
+    if parts.password is None:
+        return url
+    netloc = parts.netloc.replace(f':{parts.password}@', ':***@', 1)
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+def create_redis_client(url=DEFAULT_REDIS_URL, max_connections=50, pool_timeout=2, socket_timeout=2,
+                        socket_connect_timeout=1, health_check_interval=30, fake=False, decode_responses=True):
+    """创建Redis客户端
+
+    Args:
+        url: 连接地址，如 redis://:password@127.0.0.1:6379/0
+        max_connections: 连接池最大连接数
+        pool_timeout: 连接用尽时等待空闲连接的秒数，超时抛出ConnectionError
+        socket_timeout: 命令的读写超时（秒）
+        socket_connect_timeout: 建立连接的超时（秒）
+        health_check_interval: 连接空闲超过该秒数后，使用前先PING检查
+        fake: 使用fakeredis的内存实现，未安装fakeredis时仍连接真实的Redis
+        decode_responses: 为True时返回str，为False时返回bytes
+    """
+    global _fake_server
+    if fake:
+        try:
+            import fakeredis
+            if _fake_server is None:
+                _fake_server = fakeredis.FakeServer()
+            return fakeredis.FakeRedis(server=_fake_server, decode_responses=decode_responses)
+        except ImportError:
+            redis_logger.warning("未安装fakeredis，使用真实的Redis连接", {
+                'url': mask_url(url)
+            })
+
+    pool = redis.BlockingConnectionPool.from_url(url,
+                                                 max_connections=max_connections,
+                                                 timeout=pool_timeout,
+                                                 decode_responses=decode_responses,
+                                                 socket_timeout=socket_timeout,
+                                                 socket_connect_timeout=socket_connect_timeout,
+                                                 socket_keepalive=True,
+                                                 health_check_interval=health_check_interval)
+    return redis.Redis(connection_pool=pool)
+
+
+def get_redis_client(binary=False):
+    """进程内共享的Redis客户端，首次使用时按当前配置创建
+
+    Args:
+        binary: 为True时返回不解码响应的客户端，用于读写二进制数据
+    """
+    client = _clients.get(binary)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(binary)
+            if client is None:
+                client = _clients[binary] = create_redis_client(decode_responses=not binary, **_settings)
+    return client
+
+
+def pipeline_batches(items, add_commands, batch_size=500, transaction=False, client=None):
+    """把大量命令分批放入流水线执行，每批一次网络往返
+
+    用法：
+        pipeline_batches(users, lambda pipe, user: pipe.hset('users_hash', user['username'], encode_record(user)))
+
+    Args:
+        items: 可迭代对象
+        add_commands: 函数(pipe, item)，把一个元素对应的命令加入流水线
+        batch_size: 每批的元素数量
+        transaction: 每批是否使用MULTI/EXEC事务
+        client: Redis客户端，默认使用共享客户端
+
+    Returns:
+        list: 所有命令的执行结果
+    """
+    red = client or get_redis_client()
+    results = []
+    pipe = red.pipeline(transaction=transaction)
+    pending = 0
+    for item in items:
+        add_commands(pipe, item)
+        pending += 1
+        if pending >= batch_size:
+            results.extend(pipe.execute())
+            pending = 0
+    if pending:
+        results.extend(pipe.execute())
+    return results
+
+
+def redis_stats(ping=True):
+    """共享客户端的配置和状态，ping为True时测量一次PING的耗时"""
+    stats = {
+        'url': mask_url(_settings['url']),
+        'fake': _settings['fake'],
+        'max_connections': _settings['max_connections'],
+        'created': bool(_clients)
+    }
+    pools = [getattr(client, 'connection_pool', None) for client in _clients.values()]
+    stats['open_connections'] = sum(len(getattr(pool, '_connections', ())) for pool in pools if pool is not None)
+    if ping:
+        start = time.perf_counter()
+        try:
+            get_redis_client().ping()
+            stats['ping_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        except Exception as e:
+            stats['error'] = str(e)
+    return stats
+
+
+def init_redis(app):
+    """根据应用配置设置共享Redis客户端的连接参数
+
+    配置项：
+        REDIS_URL: 连接地址
+        REDIS_MAX_CONNECTIONS: 连接池最大连接数
+        REDIS_POOL_TIMEOUT: 等待空闲连接的秒数
+        REDIS_SOCKET_TIMEOUT: 命令读写超时（秒）
+        REDIS_CONNECT_TIMEOUT: 建立连接超时（秒）
+        REDIS_HEALTH_CHECK_INTERVAL: 空闲连接健康检查间隔（秒）
+        REDIS_FAKE: 是否使用fakeredis
+    """
+    _settings.update({
+        'url': app.config.get('REDIS_URL') or DEFAULT_REDIS_URL,
+        'max_connections': app.config.get('REDIS_MAX_CONNECTIONS', 50),
+        'pool_timeout': app.config.get('REDIS_POOL_TIMEOUT', 2),
+        'socket_timeout': app.config.get('REDIS_SOCKET_TIMEOUT', 2),
+        'socket_connect_timeout': app.config.get('REDIS_CONNECT_TIMEOUT', 1),
+        'health_check_interval': app.config.get('REDIS_HEALTH_CHECK_INTERVAL', 30),
+        'fake': app.config.get('REDIS_FAKE', False)
+    })
+    # 配置变化后丢弃旧客户端，下次使用时按新配置创建
+    with _client_lock:
+        old_clients = list(_clients.values())
+        _clients.clear()
+    for client in old_clients:
+        pool = getattr(client, 'connection_pool', None)
+        if pool is not None:
+            pool.disconnect()
+    redis_logger.info("Redis客户端配置完成", redis_stats(ping=False))
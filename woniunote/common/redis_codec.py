@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Redis缓存数据的编码格式
+
+以前缓存中保存的是str(dict)，读取时用eval()还原，既慢又不安全。这里定义两种带版本号的格式：
+
+- 文章：每篇文章一个Hash（article:<编号>），字段见ARTICLE_SCHEMA，另有_v字段保存格式版本。
+  读取时用HMGET按ARTICLE_HMGET_FIELDS的顺序取值，decode_article按字段类型还原。
+  单独保存字段便于之后只更新阅读数等个别字段。
+- 其他记录（如users_hash中的用户）：'<版本号>:' + 紧凑JSON。
+
+版本号与当前CODEC_VERSION不一致（包括旧的str(dict)数据）时解码返回None，调用方按未缓存处理。
+修改ARTICLE_SCHEMA的字段或类型时需要递增CODEC_VERSION并重新加载缓存。
+"""
+import json
+from datetime import date, datetime
+
+CODEC_VERSION = 1
+
+# 文章Hash中保存格式版本的字段
+VERSION_FIELD = '_v'
+
+# 文章列表缓存的字段和类型，content为列表页展示的纯文本摘要
+ARTICLE_SCHEMA = (
+    ('articleid', int),
+    ('userid', int),
+    ('type', int),
+    ('headline', str),
+    ('thumbnail', str),
+    ('credit', int),
+    ('readcount', int),
+    ('replycount', int),
+    ('recommended', int),
+    ('hidden', int),
+    ('drafted', int),
+    ('checked', int),
+    ('createtime', str),
+    ('content', str),
+    ('nickname', str),
+)
+
+ARTICLE_FIELDS = tuple(name for name, _ in ARTICLE_SCHEMA)
+
+# HMGET读取文章时的字段顺序，第一个为格式版本
+ARTICLE_HMGET_FIELDS = (VERSION_FIELD,) + ARTICLE_FIELDS
+
+
+def _to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def _to_str(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+def encode_article(article):
+    """把文章字典编码为HSET的mapping，缺少的字段保存为空字符串"""
+    mapping = {name: _to_text(article.get(name)) for name in ARTICLE_FIELDS}
+    mapping[VERSION_FIELD] = str(CODEC_VERSION)
+    return mapping
+
+
+def decode_article(values):
+    """把HMGET(ARTICLE_HMGET_FIELDS)的结果还原为文章字典，版本不符或文章不存在时返回None"""
+    if not values or _to_str(values[0]) != str(CODEC_VERSION):
+        return None
+    article = {}
+    for (name, kind), value in zip(ARTICLE_SCHEMA, values[1:]):
+        value = _to_str(value)
+        if kind is int:
+            article[name] = int(value) if value else 0
+        else:
+            article[name] = value or ''
+    return article
+
+
+def encode_record(record):
+    """把字典编码为 '<版本号>:<紧凑JSON>'"""
+    return f'{CODEC_VERSION}:' + json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=_to_text)
+
+
+def decode_record(value):
+    """还原encode_record编码的字典，版本不符或不是该格式（如旧的str(dict)数据）时返回None"""
+    value = _to_str(value)
+    if not value:
+        return None
+    version, sep, payload = value.partition(':')
+    if not sep or version != str(CODEC_VERSION):
+        return None
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return None
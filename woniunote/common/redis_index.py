@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Redis文章列表索引
+
+Redis版首页(/redis、/redis/page/<n>)和分类页(/redis/type/<type>/<n>)的数据结构：
+- article:<编号>        每篇文章一个Hash，格式见redis_codec
+- article:index         所有公开文章编号的有序集合，分值为文章编号
+- article:type:<类型>   各分类公开文章编号的有序集合
+
+公开文章指未隐藏、非草稿的文章，与数据库版分类页的条件一致。
+文章新增、编辑、隐藏、审核、推荐时由文章模块调用sync()写入或移除，不需要再全量重新加载；
+check()对比数据库和Redis，列出缺失、多余和内容不一致的文章，repair=True时直接修复。
+阅读数和评论数变化频繁，不做实时同步，也不参与一致性比较。
+"""
+from woniunote.common.redis_codec import ARTICLE_FIELDS, ARTICLE_HMGET_FIELDS, decode_article, encode_article
+from woniunote.common.redis_client import get_redis_client
+from woniunote.common.simple_logger import get_simple_logger
+
+redis_index_logger = get_simple_logger('redis_index')
+
+KEY_PREFIX = 'article'
+ARTICLE_INDEX_KEY = f'{KEY_PREFIX}:index'
+# 旧版本中成员为str(dict)整行数据的有序集合，重建时删除
+LEGACY_ARTICLE_KEY = KEY_PREFIX
+
+# 一致性检查时忽略的频繁变化字段
+VOLATILE_FIELDS = ('readcount', 'replycount')
+
+
+def article_key(articleid):
+    return f'{KEY_PREFIX}:{articleid}'
+
+
+def type_key(article_type):
+    return f'{KEY_PREFIX}:type:{int(article_type)}'
+
+
+def article_cache_row(article, nickname):
+    """把文章（ORM对象或投影行）转换为缓存的字典，正文不参与缓存，content字段保存列表摘要"""
+    row = {name: getattr(article, name) for name in ARTICLE_FIELDS if name not in ('content', 'nickname')}
+    row['content'] = article.summary or ''
+    row['nickname'] = nickname
+    return row
+
+
+def is_listed(row):
+    """文章是否出现在列表中：未隐藏且不是草稿"""
+    return not row.get('hidden') and not row.get('drafted')
+
+
+def _to_int(value):
+    return int(value.decode() if isinstance(value, bytes) else value)
+
+
+def fetch_article_page(red, start, count, index_key=ARTICLE_INDEX_KEY):
+    """按编号倒序读取一页文章
+
+    一次往返取总数和当前页的编号，再用一次流水线对每篇文章执行HMGET。
+
+    Returns:
+        tuple: (文章字典列表, 文章总数)，Hash缺失或格式版本不符的文章会被跳过
+    """
+    pipe = red.pipeline(transaction=False)
+    pipe.zcard(index_key)
+    pipe.zrevrange(index_key, start, start + count - 1)
+    total, ids = pipe.execute()
+    if not ids:
+        return [], total
+
+    pipe = red.pipeline(transaction=False)
+    for articleid in ids:
+        pipe.hmget(article_key(_to_int(articleid)), ARTICLE_HMGET_FIELDS)
+    articles = [decode_article(values) for values in pipe.execute()]
+    return [article for article in articles if article is not None], total
+
+
+class RedisArticleIndex:
+    """维护Redis中的文章Hash和编号有序集合"""
+
+    def __init__(self, enabled=False):
+        """
+        Args:
+            enabled: 为False时sync()和remove()不做任何操作，适用于未部署Redis的环境
+        """
+        self.enabled = enabled
+
+    # 获取进程内共享的Redis客户端
+    @staticmethod
+    def _redis():
+        return get_redis_client()
+
+    @staticmethod
+    def _write(pipe, row, old_type=None):
+        """把一篇文章的写入或移除操作加入流水线"""
+        articleid = row['articleid']
+        if old_type is not None and int(old_type) != int(row['type']):
+            pipe.zrem(type_key(old_type), articleid)
+        if is_listed(row):
+            pipe.hset(article_key(articleid), mapping=encode_article(row))
+            pipe.zadd(ARTICLE_INDEX_KEY, {articleid: articleid})
+            pipe.zadd(type_key(row['type']), {articleid: articleid})
+        else:
+            pipe.zrem(ARTICLE_INDEX_KEY, articleid)
+            pipe.zrem(type_key(row['type']), articleid)
+            pipe.delete(article_key(articleid))
+
+    def sync(self, row):
+        """文章写入数据库后调用，按文章当前状态写入或移除
+
+        Args:
+            row: article_cache_row()生成的字典
+        """
+        if not self.enabled:
+            return
+        self._sync_with(self._redis(), row)
+
+    def remove(self, articleid):
+        """从列表中移除一篇文章"""
+        if not self.enabled:
+            return
+        self._remove_with(self._redis(), articleid)
+
+    def rebuild(self, batches):
+        """全量重建，删除旧格式数据、全部索引和文章Hash后重新写入
+
+        Args:
+            batches: 可迭代对象，每个元素为一批article_cache_row()生成的字典
+
+        Returns:
+            int: 写入的文章数量
+        """
+        red = self._redis()
+        stale_keys = [LEGACY_ARTICLE_KEY, ARTICLE_INDEX_KEY]
+        stale_keys.extend(red.scan_iter(match=f'{KEY_PREFIX}:type:*'))
+        stale_keys.extend(red.scan_iter(match=f'{KEY_PREFIX}:[0-9]*'))
+        for i in range(0, len(stale_keys), 500):
+            red.delete(*stale_keys[i:i + 500])
+
+        total = 0
+        for batch in batches:
+            pipe = red.pipeline(transaction=False)
+            for row in batch:
+                if is_listed(row):
+                    self._write(pipe, row)
+                    total += 1
+            pipe.execute()
+        redis_index_logger.info("重建Redis文章索引完成", {
+            'article_count': total
+        })
+        return total
+
+    def check(self, batches, repair=False):
+        """对比数据库和Redis中的文章
+
+        Args:
+            batches: 可迭代对象，每个元素为一批数据库中全部文章的article_cache_row()字典
+            repair: 是否把Redis修复为与数据库一致
+
+        Returns:
+            dict: missing（Redis中缺失）、extra（Redis中多余）、stale（内容或分类不一致）的文章编号列表
+        """
+        red = self._redis()
+        indexed = {_to_int(articleid) for articleid in red.zrange(ARTICLE_INDEX_KEY, 0, -1)}
+        expected = set()
+        missing, stale = [], []
+        repairs = []
+
+        compare_fields = [name for name in ARTICLE_FIELDS if name not in VOLATILE_FIELDS]
+        for batch in batches:
+            rows = [row for row in batch if is_listed(row)]
+            if not rows:
+                continue
+            pipe = red.pipeline(transaction=False)
+            for row in rows:
+                pipe.hmget(article_key(row['articleid']), ARTICLE_HMGET_FIELDS)
+                pipe.zscore(type_key(row['type']), row['articleid'])
+            results = pipe.execute()
+
+            for i, row in enumerate(rows):
+                articleid = row['articleid']
+                expected.add(articleid)
+                cached = decode_article(results[2 * i])
+                if articleid not in indexed or cached is None:
+                    missing.append(articleid)
+                    repairs.append(row)
+                    continue
+                encoded = decode_article([encode_article(row)[name] for name in ARTICLE_HMGET_FIELDS])
+                if results[2 * i + 1] is None or any(cached[name] != encoded[name] for name in compare_fields):
+                    stale.append(articleid)
+                    repairs.append(row)
+
+        extra = sorted(indexed - expected)
+        report = {
+            'checked': len(expected),
+            'missing': sorted(missing),
+            'extra': extra,
+            'stale': sorted(stale)
+        }
+
+        if repair and (repairs or extra):
+            for row in repairs:
+                self._sync_with(red, row)
+            for articleid in extra:
+                self._remove_with(red, articleid)
+            report['repaired'] = len(repairs) + len(extra)
+
+        redis_index_logger.info("Redis文章索引一致性检查", lambda: {
+            'checked': report['checked'],
+            'missing_count': len(report['missing']),
+            'extra_count': len(report['extra']),
+            'stale_count': len(report['stale']),
+            'repair': repair
+        })
+        return report
+
+    def _sync_with(self, red, row):
+        old_type = red.hget(article_key(row['articleid']), 'type')
+        # 使用事务，读者不会看到只更新了一半的文章
+        pipe = red.pipeline(transaction=True)
+        self._write(pipe, row, old_type or None)
+        pipe.execute()
+
+    def _remove_with(self, red, articleid):
+        old_type = red.hget(article_key(articleid), 'type')
+        pipe = red.pipeline(transaction=True)
+        pipe.zrem(ARTICLE_INDEX_KEY, articleid)
+        if old_type:
+            pipe.zrem(type_key(old_type), articleid)
+        pipe.delete(article_key(articleid))
+        pipe.execute()
+
+    def stats(self):
+        return {
+            'enabled': self.enabled
+        }
+
+
+# 全局Redis文章索引，默认不启用，create_app中根据配置初始化
+_redis_index = RedisArticleIndex()
+
+
+def get_redis_index():
+    return _redis_index
+
+
+def init_redis_index(app):
+    """根据应用配置初始化Redis文章索引
+
+    配置项：
+        REDIS_INDEX_ENABLED: 文章写入时是否同步更新Redis中的文章列表
+    """
+    global _redis_index
+    _redis_index = RedisArticleIndex(enabled=app.config.get('REDIS_INDEX_ENABLED', False))
+    redis_index_logger.info("Redis文章索引初始化完成", _redis_index.stats())
+    return _redis_index
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Redis会话存储
+
+Flask-Session的filesystem后端每个请求都要读一次会话文件，响应时再完整写回一次，
+文件数超过SESSION_FILE_THRESHOLD后还要扫描目录清理，多进程部署时也无法共享。
+SESSION_BACKEND为'redis'时改用这里的会话接口，使用共享Redis客户端（REDIS_URL等配置）：
+- 延迟加载：请求中第一次读写session时才访问Redis，不使用session的请求（静态资源、接口等）不产生任何Redis命令
+- 跳过写入：会话内容没有修改时不写回Redis，也不重新设置Cookie
+- 压缩：序列化后超过SESSION_COMPRESS_THRESHOLD字节的会话用zlib压缩后保存
+- 滑动过期：会话剩余有效期比PERMANENT_SESSION_LIFETIME少SESSION_REFRESH_INTERVAL秒以上时，
+  只执行一次EXPIRE延长Redis中的有效期并刷新Cookie，不重写会话内容
+- 防止会话固定：Cookie中的会话编号在Redis中不存在时（已过期或由客户端指定）改用新生成的编号；
+  登录时login_user调用regenerate()更换会话编号，删除旧编号的数据
+
+会话保存在 session:<会话编号> 中，值为1字节格式标记加数据：j为JSON，z为zlib压缩的JSON。
+与Flask默认的会话一样，修改session中可变对象（如列表）的内容后需要设置session.modified = True。
+Redis不可用时按空会话处理并记录错误，不会让请求失败。
+"""
+import re
+import secrets
+import zlib
+from datetime import datetime, timezone
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from woniunote.common.redis_client import get_redis_client
+from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+
+session_logger = get_simple_logger('redis_session')
+
+# 会话编号：secrets.token_urlsafe(32)生成的43个字符
+_SID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{32,64}$')
+
+# 保存格式标记
+_PLAIN = b'j'
+_COMPRESSED = b'z'
+
+
+class RedisSession(CallbackDict, SessionMixin):
+    """延迟加载的会话，第一次读写内容时才从Redis读取"""
+
+    def __init__(self, sid, loader=None, new=False):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(None, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        # Redis中会话的剩余有效期（秒），加载后设置，用于判断是否需要延长有效期
+        self.ttl = None
+        self._loader = loader
+
+    @property
+    def loaded(self):
+        return self._loader is None
+
+    def _load(self):
+        self.accessed = True
+        loader = self._loader
+        if loader is None:
+            return
+        self._loader = None
+        data, self.ttl = loader()
+        if data is None:
+            # Redis中没有该编号的会话：不沿用客户端提交的编号
+            self.sid = RedisSessionInterface.new_sid()
+            self.new = True
+        elif data:
+            # 直接写入字典，不触发on_update
+            dict.update(self, data)
+
+
+def _loading(name):
+    base = getattr(CallbackDict, name)
+
+    def method(self, *args, **kwargs):
+        self._load()
+        return base(self, *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = base.__doc__
+    return method
+
+
+for _name in ('__getitem__', '__setitem__', '__delitem__', '__contains__', '__iter__', '__len__', '__eq__',
+              '__ne__', '__repr__', 'get', 'keys', 'values', 'items', 'copy', 'pop', 'popitem', 'setdefault',
+              'update', 'clear'):
+    setattr(RedisSession, _name, _loading(_name))
+# 定义了__eq__后需要重新指定__hash__
+RedisSession.__hash__ = None
+
+
+class RedisSessionInterface(SessionInterface):
+    """把会话保存在Redis中的会话接口"""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, key_prefix='session:', compress_threshold=1024, refresh_interval=3600, client=None):
+        """
+        Args:
+            key_prefix: Redis键前缀
+            compress_threshold: 序列化后超过该字节数时压缩保存，0表示不压缩
+            refresh_interval: 距离上次写入超过该秒数时延长会话有效期
+            client: 返回bytes的Redis客户端，默认使用共享客户端get_redis_client(binary=True)
+        """
+        self.key_prefix = key_prefix
+        self.compress_threshold = compress_threshold
+        self.refresh_interval = refresh_interval
+        self._client = client
+
+    def _redis(self):
+        return self._client or get_redis_client(binary=True)
+
+    def _key(self, sid):
+        return f'{self.key_prefix}{sid}'
+
+    @staticmethod
+    def new_sid():
+        return secrets.token_urlsafe(32)
+
+    def dumps(self, data):
+        """序列化会话，超过阈值时压缩"""
+        payload = self.serializer.dumps(data).encode('utf-8')
+        if self.compress_threshold and len(payload) > self.compress_threshold:
+            return _COMPRESSED + zlib.compress(payload)
+        return _PLAIN + payload
+
+    def loads(self, value):
+        """还原dumps保存的会话，无法识别的数据返回None"""
+        if not value:
+            return None
+        marker, payload = value[:1], value[1:]
+        if marker == _COMPRESSED:
+            payload = zlib.decompress(payload)
+        elif marker != _PLAIN:
+            return None
+        data = self.serializer.loads(payload.decode('utf-8'))
+        return data if isinstance(data, dict) else None
+
+    def _fetch(self, sid):
+        """一次往返读取会话内容和剩余有效期，Redis中没有该会话或无法识别时内容为None"""
+        try:
+            pipe = self._redis().pipeline(transaction=False)
+            pipe.get(self._key(sid))
+            pipe.ttl(self._key(sid))
+            value, ttl = pipe.execute()
+            return self.loads(value), (ttl if ttl is not None and ttl >= 0 else None)
+        except Exception as e:
+            session_logger.error("读取Redis会话失败", {
+                'trace_id': get_trace_id(),
+                'error': str(e)
+            })
+            return {}, None
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not _SID_PATTERN.match(sid):
+            return RedisSession(self.new_sid(), new=True)
+        return RedisSession(sid, loader=lambda: self._fetch(sid))
+
+    def regenerate(self, session):
+        """更换会话编号：内容保留，响应时写入新的编号，旧编号的数据立即删除
+
+        与Flask-Session的session_interface.regenerate()用法相同，登录成功后调用。
+        """
+        session._load()
+        old_sid = session.sid
+        session.sid = self.new_sid()
+        session.modified = True
+        if not session.new:
+            try:
+                self._redis().delete(self._key(old_sid))
+            except Exception as e:
+                session_logger.error("删除旧的Redis会话失败", {
+                    'trace_id': get_trace_id(),
+                    'error': str(e)
+                })
+        session.new = True
+
+    def _expires(self, app):
+        if app.config.get('SESSION_PERMANENT', True):
+            return datetime.now(timezone.utc) + app.permanent_session_lifetime
+        return None
+
+    def save_session(self, app, session, response):
+        # 请求中没有使用session：不访问Redis，也不设置Cookie
+        if not session.accessed:
+            return
+        response.vary.add('Cookie')
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        lifetime = int(app.permanent_session_lifetime.total_seconds())
+
+        try:
+            if session.modified and not session:
+                # 会话被清空（如退出登录）：删除Redis中的数据和Cookie
+                if not session.new:
+                    self._redis().delete(self._key(session.sid))
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+                return
+
+            if session.modified:
+                self._redis().set(self._key(session.sid), self.dumps(dict(session)), ex=lifetime)
+            elif session.ttl is not None and lifetime - session.ttl >= self.refresh_interval:
+                # 内容未修改，只延长有效期
+                self._redis().expire(self._key(session.sid), lifetime)
+            else:
+                return
+        except Exception as e:
+            session_logger.error("保存Redis会话失败", {
+                'trace_id': get_trace_id(),
+                'error': str(e)
+            })
+            return
+
+        response.set_cookie(name, session.sid,
+                            expires=self._expires(app),
+                            httponly=self.get_cookie_httponly(app),
+                            domain=domain,
+                            path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
+
+
+def init_session_interface(app):
+    """根据应用配置选择会话后端
+
+    配置项：
+        SESSION_BACKEND: 'filesystem'使用Flask-Session的文件会话，'redis'使用RedisSessionInterface
+        SESSION_REDIS_PREFIX: Redis键前缀
+        SESSION_COMPRESS_THRESHOLD: 超过该字节数的会话压缩保存
+        SESSION_REFRESH_INTERVAL: 延长会话有效期的最小间隔（秒）
+    """
+    backend = app.config.get('SESSION_BACKEND', 'filesystem')
+    if backend == 'redis':
+        app.session_interface = RedisSessionInterface(
+            key_prefix=app.config.get('SESSION_REDIS_PREFIX', 'session:'),
+            compress_threshold=app.config.get('SESSION_COMPRESS_THRESHOLD', 1024),
+            refresh_interval=app.config.get('SESSION_REFRESH_INTERVAL', 3600))
+    else:
+        from flask_session import Session
+        Session(app)
+    session_logger.info("会话存储初始化完成", {
+        'backend': backend,
+        'lifetime': int(app.permanent_session_lifetime.total_seconds())
+    })
+    return app.session_interface
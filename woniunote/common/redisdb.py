@@ -1,16 +1,14 @@
-from datetime import datetime
-import re
-import redis
-from woniunote.common.database import dbconnect
+from woniunote.common.redis_client import get_redis_client, pipeline_batches
+from woniunote.common.redis_codec import decode_record, encode_record
 from woniunote.common.utils import model_list
-from woniunote.module.articles import Article
 from woniunote.module.users import Users
 
+USERS_HASH_KEY = 'users_hash'
+
 
 def redis_connect():
-    pool = redis.ConnectionPool(host='127.0.0.1', port=6379, decode_responses=True, db=0)
-    red = redis.Redis(connection_pool=pool)
-    return red
+    # 返回进程内共享的客户端，连接池和超时在create_app中根据REDIS_*配置设置
+    return get_redis_client()
 
 
 # def redis_mysql_string():
@@ -51,46 +49,25 @@ def redis_mysql_hash():
     # 获取数据库连接信息
     dbsession, md, db_base = dbconnect()
 
-    # 查询users表的所有数据，并将其转换为JSON
+    # 查询users表的所有数据，每个用户编码为带版本号的JSON保存到Hash中
     result = dbsession.query(Users).all()
     user_list = model_list(result)
-    for user in user_list:
-        red.hset('users_hash', user['username'], str(user))
+    pipeline_batches(user_list, lambda pipe, user: pipe.hset(USERS_HASH_KEY, user['username'], encode_record(user)),
+                     client=red)
 
 
-def redis_article_zsort():
-    dbsession, md, db_base = dbconnect()
-    result = dbsession.query(Article, Users.nickname).join(Users, Users.userid == Article.userid).all()
-    # result的数据格式为：[ (<__main__.Article object at 0x113F9150>, '强哥')，() ]
-    # 对result进行遍历处理，最终生成一个标准的JSON数据结构
-
-    m_list = []
-    for article, nickname in result:
-        m_dict = {}
-        for k, v in article.__dict__.items():
-            if not k.startswith('_sa_instance_state'):  # 跳过内置字段
-                # 如果某个字段的值是datetime类型，则将其格式为字符串
-                if isinstance(v, datetime):
-                    v = v.strftime('%Y-%m-%d %H:%M:%S')
-                # 将文章内容的HTML和不可见字符删除，再截取前面80个字符
-                elif k == 'content':
-                    pattern = re.compile(r'<[^>]+>')
-                    temp = pattern.sub('', v)
-                    temp = temp.replace('&nbsp;', '')
-                    temp = temp.replace('\r', '')
-                    temp = temp.replace('\n', '')
-                    temp = temp.replace('\t', '')
-                    v = temp.strip()[0:80]
-                m_dict[k] = v
-        m_dict['nickname'] = nickname
-        m_list.append(m_dict)  # 最终构建一个标准的列表+字典的数据结构
-
-    # 将数据缓存到有序集合中
-    red = redis_connect()
-    for row in m_list:
-        # zadd的命令参数为：（键名，{值:排序依据})
-        # 此处将文章表中的每一行数据作为值，文章编号作为排序依据
-        red.zadd('article', {str(row): row['articleid']})
+def find_cached_user(red, username):
+    """从users_hash中读取用户，不存在或格式不符时返回None"""
+    return decode_record(red.hget(USERS_HASH_KEY, username))
+
+
+def redis_article_zsort(batch_size=500):
+    """把全部公开文章加载到Redis：每篇文章一个Hash，有序集合中只保存文章编号
+
+    日常的文章写入会同步更新Redis，只有首次启用或数据损坏时需要运行
+    """
+    from woniunote.module.articles import Articles
+    return Articles.rebuild_redis_index(batch_size=batch_size)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+请求性能统计和慢请求采样分析
+
+在请求跟踪上下文(trace_context)的基础上，按端点汇总每个请求的：
+- 响应耗时直方图
+- SQL执行次数和耗时（来自trace的db分段）
+- 模板渲染耗时（来自trace的render分段）
+- 响应大小和状态码
+
+统计数据可以通过管理后台的 /admin/metrics 以JSON或Prometheus文本格式查看。
+统计保存在进程内，多进程部署时每个进程分别统计。
+
+开启PROFILE_SLOW_REQUESTS后，按PROFILE_SAMPLE_RATE抽样用cProfile分析请求，
+耗时超过PROFILE_THRESHOLD_MS的请求把分析结果写入PROFILE_DIR（.prof和按累计耗时排序的.txt），
+可以用 python -m pstats 或 snakeviz 查看。
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+
+from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_current_trace
+
+metrics_logger = get_simple_logger('request_metrics')
+
+# 响应耗时直方图的桶上限（毫秒）
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# 未匹配到路由的请求（404等）统一归到该端点下，避免随机路径导致统计项无限增长
+UNMATCHED_ENDPOINT = '<unmatched>'
+
+
+class EndpointStats:
+    """一个端点的累计统计"""
+
+    __slots__ = ('count', 'latency_ms', 'max_latency_ms', 'buckets', 'sql_count', 'sql_ms',
+                 'render_ms', 'response_bytes', 'statuses')
+
+    def __init__(self):
+        self.count = 0
+        self.latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        # 每个桶内的请求数，最后一个为超过最大桶上限的请求
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+    def observe(self, latency_ms, status, sql_count, sql_ms, render_ms, response_bytes):
+        self.count += 1
+        self.latency_ms += latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.sql_count += sql_count
+        self.sql_ms += sql_ms
+        self.render_ms += render_ms
+        self.response_bytes += response_bytes
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def percentile(self, p):
+        """按直方图估算百分位耗时（返回所在桶的上限，超过最大桶时返回最大耗时）"""
+        if self.count == 0:
+            return 0
+        target = self.count * p
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets):
+            cumulative += n
+            if cumulative >= target:
+                return bound
+        return round(self.max_latency_ms, 2)
+
+    def to_dict(self):
+        count = self.count or 1
+        return {
+            'count': self.count,
+            'avg_ms': round(self.latency_ms / count, 2),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_latency_ms, 2),
+            'avg_sql_count': round(self.sql_count / count, 2),
+            'avg_sql_ms': round(self.sql_ms / count, 2),
+            'avg_render_ms': round(self.render_ms / count, 2),
+            'avg_response_bytes': round(self.response_bytes / count),
+            'statuses': dict(self.statuses)
+        }
+
+
+class RequestMetrics:
+    """按端点汇总的请求性能统计"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, latency_ms, status=200, sql_count=0, sql_ms=0.0, render_ms=0.0,
+                response_bytes=0):
+        """记录一个请求"""
+        if not self.enabled:
+            return
+        endpoint = endpoint or UNMATCHED_ENDPOINT
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.observe(latency_ms, status, sql_count, sql_ms, render_ms, response_bytes or 0)
+
+    def observe_trace(self, endpoint, trace, status, response_bytes):
+        """根据请求的RequestTrace记录一个请求"""
+        db = trace.spans.get('db', (0.0, 0))
+        render = trace.spans.get('render', (0.0, 0))
+        self.observe(endpoint, trace.elapsed() * 1000, status, sql_count=db[1], sql_ms=db[0] * 1000,
+                     render_ms=render[0] * 1000, response_bytes=response_bytes)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """各端点的统计汇总，按请求总耗时从高到低排序"""
+        with self._lock:
+            items = sorted(self._endpoints.items(), key=lambda item: item[1].latency_ms, reverse=True)
+            endpoints = {name: stats.to_dict() for name, stats in items}
+        return {
+            'pid': os.getpid(),
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'uptime_seconds': round(time.time() - self.started_at),
+            'endpoints': endpoints
+        }
+
+    def prometheus_text(self):
+        """Prometheus文本格式的统计数据"""
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            lines = [
+                '# HELP woniunote_request_duration_seconds Request latency by endpoint.',
+                '# TYPE woniunote_request_duration_seconds histogram'
+            ]
+            for name, stats in items:
+                label = _label(name)
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS_MS, stats.buckets):
+                    cumulative += n
+                    lines.append(f'woniunote_request_duration_seconds_bucket{{endpoint="{label}",le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'woniunote_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {stats.count}')
+                lines.append(f'woniunote_request_duration_seconds_sum{{endpoint="{label}"}} {stats.latency_ms / 1000:.6f}')
+                lines.append(f'woniunote_request_duration_seconds_count{{endpoint="{label}"}} {stats.count}')
+
+            counters = (
+                ('woniunote_requests_total', 'Requests by endpoint and status.', None),
+                ('woniunote_request_sql_queries_total', 'SQL statements executed while handling requests.', 'sql_count'),
+                ('woniunote_request_sql_seconds_total', 'Time spent in SQL while handling requests.', 'sql_ms'),
+                ('woniunote_request_render_seconds_total', 'Time spent rendering templates.', 'render_ms'),
+                ('woniunote_response_bytes_total', 'Response body bytes.', 'response_bytes'),
+            )
+            for metric, help_text, field in counters:
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} counter')
+                for name, stats in items:
+                    label = _label(name)
+                    if field is None:
+                        for status, n in sorted(stats.statuses.items()):
+                            lines.append(f'{metric}{{endpoint="{label}",status="{status}"}} {n}')
+                    elif field.endswith('_ms'):
+                        lines.append(f'{metric}{{endpoint="{label}"}} {getattr(stats, field) / 1000:.6f}')
+                    else:
+                        lines.append(f'{metric}{{endpoint="{label}"}} {getattr(stats, field)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class SlowRequestProfiler:
+    """抽样分析请求，保存慢请求的cProfile结果"""
+
+    def __init__(self, directory, threshold_ms=1000, sample_rate=0.1, max_files=50, enabled=False):
+        """
+        Args:
+            directory: 分析结果的保存目录
+            threshold_ms: 耗时超过该值（毫秒）的抽样请求才会保存
+            sample_rate: 抽样比例，0到1之间
+            max_files: 最多保留的分析结果数量，超过时删除最旧的
+            enabled: 是否启用
+        """
+        self.directory = directory
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.enabled = enabled
+        # cProfile同一时间只能有一个分析器处于启用状态，同时只分析一个请求
+        self._lock = threading.Lock()
+        self._saved = deque()
+
+    def start(self):
+        """按抽样比例开始分析当前请求，未抽中时返回None"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        except Exception:
+            self._lock.release()
+            raise
+        return profiler
+
+    def stop(self, profiler, elapsed_ms, endpoint, trace_id):
+        """结束分析，耗时超过阈值时保存结果，返回保存的文件路径"""
+        try:
+            profiler.disable()
+        finally:
+            self._lock.release()
+
+        if elapsed_ms < self.threshold_ms:
+            return None
+        try:
+            return self._save(profiler, elapsed_ms, endpoint, trace_id)
+        except Exception as e:
+            metrics_logger.error("保存慢请求分析结果失败", {
+                'trace_id': trace_id,
+                'error': str(e)
+            })
+            return None
+
+    def _save(self, profiler, elapsed_ms, endpoint, trace_id):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{(endpoint or UNMATCHED_ENDPOINT).strip('<>')}_{trace_id}"
+        path = os.path.join(self.directory, name + '.prof')
+        profiler.dump_stats(path)
+
+        output = io.StringIO()
+        output.write(f"endpoint: {endpoint}\ntrace_id: {trace_id}\nelapsed_ms: {elapsed_ms:.2f}\n\n")
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(40)
+        with open(os.path.join(self.directory, name + '.txt'), 'w', encoding='utf-8') as f:
+            f.write(output.getvalue())
+
+        self._saved.append(name)
+        while len(self._saved) > self.max_files:
+            old = self._saved.popleft()
+            for suffix in ('.prof', '.txt'):
+                try:
+                    os.remove(os.path.join(self.directory, old + suffix))
+                except OSError:
+                    pass
+
+        metrics_logger.warning("已保存慢请求分析结果", {
+            'trace_id': trace_id,
+            'endpoint': endpoint,
+            'elapsed_ms': round(elapsed_ms, 2),
+            'path': path
+        })
+        return path
+
+    def recent(self):
+        """最近保存的分析结果文件名（不含扩展名），最新的在前"""
+        return list(reversed(self._saved))
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'directory': self.directory,
+            'threshold_ms': self.threshold_ms,
+            'sample_rate': self.sample_rate
+        }
+
+
+# 全局统计和分析器，默认不启用，create_app中根据配置初始化
+_request_metrics = RequestMetrics()
+_slow_profiler = SlowRequestProfiler(directory='profiles')
+
+
+def get_request_metrics():
+    return _request_metrics
+
+
+def get_slow_profiler():
+    return _slow_profiler
+
+
+def init_request_metrics(app):
+    """根据应用配置注册请求统计和慢请求分析的钩子，需要在init_trace_context之后调用
+
+    配置项：
+        METRICS_ENABLED: 是否按端点统计请求性能
+        PROFILE_SLOW_REQUESTS: 是否抽样分析慢请求
+        PROFILE_SAMPLE_RATE: 抽样比例
+        PROFILE_THRESHOLD_MS: 保存分析结果的耗时阈值（毫秒）
+        PROFILE_DIR: 分析结果目录，默认为程序目录下的profiles
+        PROFILE_MAX_FILES: 最多保留的分析结果数量
+    """
+    from flask import g, request
+
+    global _request_metrics, _slow_profiler
+    _request_metrics = RequestMetrics(enabled=app.config.get('METRICS_ENABLED', True))
+    _slow_profiler = SlowRequestProfiler(directory=app.config.get('PROFILE_DIR') or os.path.join(app.root_path, 'profiles'),
+                                         threshold_ms=app.config.get('PROFILE_THRESHOLD_MS', 1000),
+                                         sample_rate=app.config.get('PROFILE_SAMPLE_RATE', 0.1),
+                                         max_files=app.config.get('PROFILE_MAX_FILES', 50),
+                                         enabled=app.config.get('PROFILE_SLOW_REQUESTS', False))
+    metrics = _request_metrics
+    profiler = _slow_profiler
+
+    @app.before_request
+    def start_request_profile():
+        g._request_profiler = profiler.start()
+
+    @app.after_request
+    def record_request_metrics(response):
+        trace = get_current_trace()
+        if trace is None:
+            return response
+        endpoint = request.endpoint
+        active = g.pop('_request_profiler', None)
+        if active is not None:
+            profiler.stop(active, trace.elapsed() * 1000, endpoint, trace.trace_id)
+        # 流式响应的大小未知，按0统计
+        metrics.observe_trace(endpoint, trace, response.status_code, response.calculate_content_length())
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(exc=None):
+        # 请求异常中断、没有执行after_request时也要停止分析器
+        active = g.pop('_request_profiler', None)
+        if active is not None:
+            profiler.stop(active, 0, request.endpoint, '')
+
+    metrics_logger.info("请求性能统计初始化完成", lambda: {
+        'metrics_enabled': metrics.enabled,
+        'profiler': profiler.stats()
+    })
+    return metrics
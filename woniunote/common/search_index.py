@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章全文搜索索引
+
+使用SQLite FTS5在本地磁盘上维护文章标题和正文（去除HTML后的纯文本）的倒排索引：
+- 中文按二元组(bigram)切分，每段中文的最后一个字额外作为单字词，单字搜索也能命中；
+  英文和数字按单词切分，搜索时支持前缀匹配
+- 按BM25排序，标题的权重高于正文
+- 文章新增、编辑、隐藏、审核时由文章模块增量更新，rebuild()用于全量重建
+
+索引未完成全量构建之前is_ready()返回False，文章模块会退回到数据库的LIKE查询。
+"""
+import contextlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.utils import html_to_text
+
+search_logger = get_simple_logger('search_index')
+
+# 中日韩统一表意文字
+_CJK_CHARS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_PATTERN = re.compile(f'([{_CJK_CHARS}]+)|([^\\W_{_CJK_CHARS}]+)')
+
+# 公开页面只搜索已审核、未隐藏的正式文章，后台搜索除草稿外的全部文章
+_PUBLIC_FILTER = 'hidden = 0 AND drafted = 0 AND checked = 1'
+_ADMIN_FILTER = 'drafted = 0'
+
+
+def _split_runs(text):
+    """把文本切分为 (是否中文, 文本段) 的列表"""
+    runs = []
+    for cjk, word in _TOKEN_PATTERN.findall((text or '').lower()):
+        runs.append((True, cjk) if cjk else (False, word))
+    return runs
+
+
+def _cjk_tokens(run):
+    """中文按二元组切分，最后一个字额外作为单字词"""
+    tokens = [run[i:i + 2] for i in range(len(run) - 1)]
+    tokens.append(run[-1])
+    return tokens
+
+
+def tokenize(text):
+    """把文本切分为索引词，返回空格分隔的字符串，交给FTS5的unicode61分词器按空格切分"""
+    tokens = []
+    for is_cjk, run in _split_runs(text):
+        if is_cjk:
+            tokens.extend(_cjk_tokens(run))
+        else:
+            tokens.append(run)
+    return ' '.join(tokens)
+
+
+def build_match_query(keyword):
+    """把搜索关键字转换为FTS5的MATCH表达式，无法生成时返回None
+
+    每段中文转换为二元组短语，要求相邻出现；单个汉字和英文单词使用前缀匹配。
+    各段之间为AND关系。
+    """
+    terms = []
+    for is_cjk, run in _split_runs(keyword):
+        if is_cjk and len(run) > 1:
+            terms.append('"' + ' '.join(run[i:i + 2] for i in range(len(run) - 1)) + '"')
+        else:
+            terms.append(f'"{run}"*')
+    return ' AND '.join(terms) if terms else None
+
+
+class SearchIndex:
+    """基于SQLite FTS5的文章全文索引"""
+
+    def __init__(self, path=None, enabled=False, headline_weight=10.0, body_weight=1.0):
+        """
+        Args:
+            path: 索引文件路径，为None时使用内存数据库（仅用于测试）
+            enabled: 为False时is_ready()总是返回False，文章模块使用LIKE查询
+            headline_weight: BM25中标题列的权重
+            body_weight: BM25中正文列的权重
+        """
+        self.path = path
+        self.enabled = enabled
+        self.headline_weight = headline_weight
+        self.body_weight = body_weight
+        self._local = threading.local()
+        # 文件索引每个线程使用自己的连接；内存数据库无法跨连接共享，只能加锁使用同一个连接
+        self._shared_conn = None
+        self._lock = threading.RLock() if path is None else contextlib.nullcontext()
+        self._ready = False
+
+    def _connect(self):
+        if self.path is None:
+            if self._shared_conn is None:
+                self._shared_conn = sqlite3.connect(':memory:', check_same_thread=False)
+                self._create_schema(self._shared_conn)
+            return self._shared_conn
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._create_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _create_schema(conn):
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS article_search USING fts5("
+                     "headline, body, hidden UNINDEXED, drafted UNINDEXED, checked UNINDEXED, "
+                     "tokenize='unicode61')")
+        conn.execute("CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.commit()
+
+    def is_ready(self):
+        """索引是否已经完成过全量构建"""
+        if not self.enabled:
+            return False
+        # 其他进程（如重建脚本）可能刚完成构建，未就绪时每次都重新检查
+        if not self._ready:
+            try:
+                with self._lock:
+                    row = self._connect().execute(
+                        "SELECT value FROM search_meta WHERE key = 'built_at'").fetchone()
+                self._ready = row is not None
+            except Exception as e:
+                search_logger.error("读取搜索索引状态失败", {
+                    'path': self.path,
+                    'error': str(e)
+                })
+                return False
+        return self._ready
+
+    @staticmethod
+    def _document(articleid, headline, content, hidden, drafted, checked):
+        return (int(articleid), tokenize(headline), tokenize(html_to_text(content)),
+                int(hidden or 0), int(drafted or 0), int(checked or 0))
+
+    def index_article(self, articleid, headline, content, hidden=0, drafted=0, checked=1):
+        """新增或更新一篇文章的索引"""
+        if not self.enabled:
+            return
+        document = self._document(articleid, headline, content, hidden, drafted, checked)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM article_search WHERE rowid = ?", (document[0],))
+            conn.execute("INSERT INTO article_search (rowid, headline, body, hidden, drafted, checked) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", document)
+            conn.commit()
+
+    def remove(self, articleid):
+        """从索引中删除一篇文章"""
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM article_search WHERE rowid = ?", (int(articleid),))
+            conn.commit()
+
+    def rebuild(self, batches):
+        """全量重建索引
+
+        Args:
+            batches: 可迭代对象，每个元素为一批 (articleid, headline, content, hidden, drafted, checked)
+
+        Returns:
+            int: 写入索引的文章数量
+        """
+        start_time = time.time()
+        total = 0
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM article_search")
+                for batch in batches:
+                    conn.executemany("INSERT INTO article_search (rowid, headline, body, hidden, drafted, checked) "
+                                     "VALUES (?, ?, ?, ?, ?, ?)", [self._document(*row) for row in batch])
+                    total += len(batch)
+                conn.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES ('built_at', ?)",
+                             (time.strftime('%Y-%m-%d %H:%M:%S'),))
+                conn.execute("INSERT INTO article_search (article_search) VALUES ('optimize')")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        self._ready = True
+        search_logger.info("重建搜索索引完成", {
+            'path': self.path,
+            'article_count': total,
+            'build_time_ms': round((time.time() - start_time) * 1000, 2)
+        })
+        return total
+
+    def search(self, keyword, start=0, count=10, public=True):
+        """按BM25相关度搜索文章
+
+        Args:
+            keyword: 搜索关键字
+            start: 结果的起始位置
+            count: 返回的数量，为None时返回全部结果
+            public: True时只搜索公开文章，False时搜索除草稿外的全部文章
+
+        Returns:
+            tuple: (按相关度排序的文章编号列表, 结果总数)
+        """
+        match = build_match_query(keyword)
+        if match is None:
+            return [], 0
+
+        visibility = _PUBLIC_FILTER if public else _ADMIN_FILTER
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute(f"SELECT COUNT(*) FROM article_search WHERE article_search MATCH ? AND {visibility}",
+                                 (match,)).fetchone()[0]
+            if total == 0 or count == 0:
+                return [], total
+            rows = conn.execute(f"SELECT rowid FROM article_search WHERE article_search MATCH ? AND {visibility} "
+                                f"ORDER BY bm25(article_search, ?, ?), rowid DESC LIMIT ? OFFSET ?",
+                                (match, self.headline_weight, self.body_weight,
+                                 -1 if count is None else count, start)).fetchall()
+        return [row[0] for row in rows], total
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'path': self.path,
+            'ready': self._ready
+        }
+
+
+# 全局搜索索引，默认不启用，create_app中根据配置初始化
+_search_index = SearchIndex()
+
+
+def get_search_index():
+    return _search_index
+
+
+def init_search_index(app):
+    """根据应用配置初始化搜索索引
+
+    配置项：
+        SEARCH_INDEX_ENABLED: 是否启用全文索引
+        SEARCH_INDEX_PATH: 索引文件路径，默认为程序目录下的search_index/articles.db
+    """
+    global _search_index
+    path = app.config.get('SEARCH_INDEX_PATH')
+    if not path:
+        path = os.path.join(app.root_path, 'search_index', 'articles.db')
+    _search_index = SearchIndex(path=path, enabled=app.config.get('SEARCH_INDEX_ENABLED', True))
+    search_logger.info("搜索索引初始化完成", _search_index.stats())
+    return _search_index
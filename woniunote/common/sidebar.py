@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+侧边栏数据服务
+
+首页、分页、分类页和文章页的侧边栏都要展示"最新文章"、"最多阅读"和"特别推荐"三个列表，
+这里把三个列表作为(articleid, headline)快照在进程内共享：
+- 数据由调用方传入的loader一次查询得到，缓存TTL秒
+- 距离过期不足REFRESH_AHEAD秒时由后台线程提前刷新，请求线程直接返回旧数据
+- 特别推荐从推荐文章池中随机取，每次刷新时重新洗牌，不再使用ORDER BY RAND()
+- 文章的推荐、隐藏、审核状态变化时调用invalidate()，下次请求重新加载
+"""
+import random
+import threading
+import time
+from collections import namedtuple
+
+from flask import has_app_context
+
+from woniunote.common.simple_logger import get_simple_logger
+
+sidebar_logger = get_simple_logger('sidebar')
+
+# 侧边栏条目，模板中通过row.articleid和row.headline访问
+SidebarItem = namedtuple('SidebarItem', ['articleid', 'headline'])
+
+
+class SidebarCache:
+    """侧边栏三类文章列表的进程内缓存"""
+
+    def __init__(self, ttl=60, refresh_ahead=10, count=9, enabled=False, app=None):
+        """
+        Args:
+            ttl: 缓存有效期（秒）
+            refresh_ahead: 距离过期不足该秒数时在后台提前刷新
+            count: 每个列表展示的文章数量
+            enabled: 为False时每次都直接调用loader查询数据库
+            app: Flask应用，后台刷新线程在该应用上下文中查询数据库
+        """
+        self.loader = None
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.count = count
+        self.enabled = enabled
+        self.app = app
+        # 数据版本号，每次重新加载后递增，可用作片段缓存的键
+        self.version = 0
+        self._data = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+        # 同步加载使用单独的锁，保证同一时间只有一个线程查询数据库
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+
+    def _build(self, lists):
+        """把loader的结果转换为不可变的快照，并从推荐池中洗牌选出展示的推荐文章"""
+        last = tuple(SidebarItem(row.articleid, row.headline) for row in lists.get('last', []))
+        most = tuple(SidebarItem(row.articleid, row.headline) for row in lists.get('most', []))
+        pool = [SidebarItem(row.articleid, row.headline) for row in lists.get('recommended', [])]
+        random.shuffle(pool)
+        return last[:self.count], most[:self.count], tuple(pool[:self.count])
+
+    def _load(self):
+        """调用loader重新加载数据，失败时保留旧数据"""
+        start_time = time.time()
+        try:
+            # 后台线程中没有应用上下文，需要推入一个；请求线程中直接使用当前的上下文
+            if self.app is not None and not has_app_context():
+                with self.app.app_context():
+                    lists = self.loader()
+            else:
+                lists = self.loader()
+            data = self._build(lists)
+        except Exception as e:
+            sidebar_logger.error("加载侧边栏数据失败", {
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            return self._data
+
+        with self._lock:
+            self._data = data
+            self._loaded_at = time.monotonic()
+            self.version += 1
+        sidebar_logger.info("加载侧边栏数据成功", {
+            'version': self.version,
+            'last_count': len(data[0]),
+            'most_count': len(data[1]),
+            'recommended_count': len(data[2]),
+            'load_time_ms': round((time.time() - start_time) * 1000, 2)
+        })
+        return data
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._load()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name='sidebar-refresher', daemon=True).start()
+
+    def get(self, loader):
+        """返回 (last, most, recommended) 三个列表
+
+        Args:
+            loader: 无参函数，返回 {'last': rows, 'most': rows, 'recommended': rows} 字典，
+                    其中recommended为推荐文章池，rows的元素需要有articleid和headline属性
+        """
+        if not self.enabled:
+            return self._build(loader())
+
+        # 后台刷新时使用最近一次传入的loader
+        self.loader = loader
+
+        age = time.monotonic() - self._loaded_at
+        if self._data is None or age >= self.ttl:
+            # 没有数据或已过期：同步加载
+            with self._load_lock:
+                if self._data is None or time.monotonic() - self._loaded_at >= self.ttl:
+                    data = self._load()
+                    if data is not None:
+                        return data
+                    return (), (), ()
+        elif age >= self.ttl - self.refresh_ahead:
+            self._refresh_in_background()
+        return self._data
+
+    def invalidate(self):
+        """文章推荐、隐藏、审核等状态变化后调用，下次请求时重新加载"""
+        self._loaded_at = float('-inf')
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'ttl': self.ttl,
+            'refresh_ahead': self.refresh_ahead,
+            'version': self.version,
+            'loaded': self._data is not None
+        }
+
+
+# 全局侧边栏缓存，默认不缓存，create_app中根据配置启用
+_sidebar_cache = SidebarCache()
+
+
+def get_sidebar_cache():
+    return _sidebar_cache
+
+
+def init_sidebar_cache(app):
+    """根据应用配置初始化侧边栏缓存
+
+    配置项：
+        SIDEBAR_CACHE_ENABLED: 是否启用侧边栏缓存
+        SIDEBAR_CACHE_TTL: 缓存有效期（秒）
+        SIDEBAR_REFRESH_AHEAD: 提前刷新的时间（秒）
+    """
+    global _sidebar_cache
+    _sidebar_cache = SidebarCache(ttl=app.config.get('SIDEBAR_CACHE_TTL', 60),
+                                  refresh_ahead=app.config.get('SIDEBAR_REFRESH_AHEAD', 10),
+                                  enabled=app.config.get('SIDEBAR_CACHE_ENABLED', True),
+                                  app=app)
+
+    @app.context_processor
+    def inject_sidebar_version():
+        # 侧边栏数据的版本号，模板中作为片段缓存的键；未启用缓存时每次都重新查询，返回None表示不缓存片段
+        cache = get_sidebar_cache()
+        return {'sidebar_version': cache.version if cache.enabled and cache.version else None}
+
+    sidebar_logger.info("侧边栏缓存初始化完成", _sidebar_cache.stats())
+    return _sidebar_cache
@@ -2,12 +2,262 @@
 # -*- coding: utf-8 -*-
 
 import os
+import atexit
 import logging
 import datetime
 import json
+import threading
+import time
 import traceback
+import weakref
+from collections import deque
 from logging.handlers import TimedRotatingFileHandler
 
+
+class AsyncLogWriter:
+    """异步日志写入器
+
+    请求线程只把日志记录放入有界环形缓冲区，由后台线程批量完成JSON序列化和文件写入。
+    缓冲区满时按策略处理：
+        drop: 丢弃最旧的记录（环形缓冲区），请求线程永不阻塞
+        block: 请求线程等待缓冲区出现空位，最多等待block_timeout秒，超时后丢弃最旧的记录
+    """
+
+    def __init__(self, maxsize=10000, policy='drop', flush_interval=0.5, batch_size=500, block_timeout=1.0):
+        """
+        Args:
+            maxsize: 缓冲区最多容纳的日志记录数
+            policy: 缓冲区满时的处理策略，drop或block
+            flush_interval: 后台线程的最长写入间隔（秒）
+            batch_size: 每批最多写入的记录数
+            block_timeout: block策略下请求线程的最长等待时间（秒）
+        """
+        self.maxsize = maxsize
+        self.policy = policy
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self._pid = None
+        # 统计指标
+        self.max_depth = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+
+    def enqueue(self, logger, level, message, extra):
+        """放入一条日志记录，只记录时间戳，格式化和序列化都在后台线程完成"""
+        self._ensure_started()
+        record = (logger, time.time(), level, message, extra)
+        with self._cond:
+            if len(self._buffer) >= self.maxsize:
+                if self.policy == 'block':
+                    self._cond.wait_for(lambda: len(self._buffer) < self.maxsize, timeout=self.block_timeout)
+                if len(self._buffer) >= self.maxsize:
+                    self._buffer.popleft()
+                    self.dropped += 1
+            self._buffer.append(record)
+            depth = len(self._buffer)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if depth >= self.batch_size:
+                self._cond.notify_all()
+
+    def queue_depth(self):
+        """当前缓冲区中等待写入的记录数"""
+        return len(self._buffer)
+
+    def _take_batch(self):
+        with self._cond:
+            batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self.batch_size))]
+            # 唤醒block策略下等待空位的请求线程
+            self._cond.notify_all()
+        return batch
+
+    def _write_batch(self, batch):
+        """把一批记录序列化后按日志记录器分组，每个日志文件只写入一次"""
+        lines = {}
+        for logger, created, level, message, extra in batch:
+            log_data = {
+                'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created)),
+                'level': level,
+                'module': logger.name,
+                'message': message
+            }
+            if extra:
+                log_data.update(extra)
+            try:
+                line = json.dumps(log_data, ensure_ascii=False, default=str)
+            except Exception as e:
+                line = json.dumps({'time': log_data['time'], 'level': level, 'module': logger.name,
+                                   'message': message, 'log_error': str(e)}, ensure_ascii=False)
+            lines.setdefault(logger, []).append(line)
+
+        for logger, logger_lines in lines.items():
+            try:
+                # 合并为一条记录写入，沿用文件处理器的按天切分逻辑；级别过滤已在入队前完成，这里使用最高级别保证写入
+                logger.logger.log(logging.CRITICAL, '\n'.join(logger_lines))
+            except Exception as e:
+                print(f"批量写入日志失败: {str(e)}")
+        self.written += len(batch)
+        self.batches += 1
+
+    def flush(self):
+        """把缓冲区中的全部记录写入文件"""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def _ensure_started(self):
+        """在当前进程中启动后台写入线程（兼容gunicorn等fork之后的工作进程）"""
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='simple-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._buffer and not self._stopped:
+                    self._cond.wait(self.flush_interval)
+                stopped = self._stopped
+            self.flush()
+            if stopped:
+                return
+
+    def shutdown(self):
+        """停止后台线程并写入剩余的记录"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue_depth(),
+            'max_depth': self.max_depth,
+            'maxsize': self.maxsize,
+            'policy': self.policy,
+            'dropped': self.dropped,
+            'written': self.written,
+            'batches': self.batches
+        }
+
+
+# 全局异步写入器，为None时同步写入日志
+_async_writer = None
+
+
+def configure_async_logging(enabled=True, maxsize=10000, policy='drop', flush_interval=0.5):
+    """启用或关闭异步日志，所有SimpleLogger共享同一个后台写入线程"""
+    global _async_writer
+    if _async_writer is not None:
+        _async_writer.shutdown()
+        _async_writer = None
+    if enabled:
+        _async_writer = AsyncLogWriter(maxsize=maxsize, policy=policy, flush_interval=flush_interval)
+        # 进程退出时写入剩余日志
+        atexit.register(_async_writer.shutdown)
+    return _async_writer
+
+
+def get_async_log_writer():
+    return _async_writer
+
+
+def init_async_logging(app):
+    """根据应用配置初始化异步日志
+
+    配置项：
+        LOG_ASYNC_ENABLED: 是否启用异步日志
+        LOG_QUEUE_SIZE: 缓冲区最多容纳的日志记录数
+        LOG_QUEUE_POLICY: 缓冲区满时的处理策略，drop或block
+        LOG_FLUSH_INTERVAL: 后台线程的最长写入间隔（秒）
+    """
+    return configure_async_logging(enabled=app.config.get('LOG_ASYNC_ENABLED', False),
+                                   maxsize=app.config.get('LOG_QUEUE_SIZE', 10000),
+                                   policy=app.config.get('LOG_QUEUE_POLICY', 'drop'),
+                                   flush_interval=app.config.get('LOG_FLUSH_INTERVAL', 0.5))
+
+class Lazy:
+    """延迟计算的日志字段，只有日志级别启用时才会调用
+
+    用法：logger.info("查询成功", {'trace_id': trace_id, 'session_data': Lazy(lambda: str(session))})
+    """
+    __slots__ = ('func',)
+
+    def __init__(self, func):
+        self.func = func
+
+
+def _resolve_extra(extra):
+    """计算延迟的日志内容：extra本身可以是返回字典的函数，字典中的值可以是Lazy"""
+    if callable(extra):
+        extra = extra()
+    if extra and any(isinstance(v, Lazy) for v in extra.values()):
+        extra = {k: v.func() if isinstance(v, Lazy) else v for k, v in extra.items()}
+    return extra
+
+
+# 返回当前请求跟踪信息(RequestTrace)的函数，由trace_context模块注册
+_trace_provider = None
+
+
+def set_trace_provider(provider):
+    """注册当前请求跟踪信息的获取函数，日志会自动带上请求的trace_id，并把日志耗时计入请求"""
+    global _trace_provider
+    _trace_provider = provider
+
+
+# 日志级别配置：默认级别和按日志记录器名称单独设置的级别
+_default_level = logging.DEBUG
+_logger_levels = {}
+# 所有已创建的日志记录器，修改级别配置时同步更新
+_logger_instances = weakref.WeakSet()
+
+
+def _to_level(level):
+    if isinstance(level, int):
+        return level
+    return SimpleLogger._level_map.get(str(level).upper(), logging.INFO)
+
+
+def configure_log_levels(default='DEBUG', levels=None):
+    """设置日志级别
+
+    Args:
+        default: 默认最低级别
+        levels: {日志记录器名称: 最低级别}，优先于默认级别
+    """
+    global _default_level, _logger_levels
+    _default_level = _to_level(default)
+    _logger_levels = {name: _to_level(level) for name, level in (levels or {}).items()}
+    for logger in list(_logger_instances):
+        logger.min_level = _logger_levels.get(logger.name, _default_level)
+
+
+def init_log_levels(app):
+    """根据应用配置设置日志级别
+
+    配置项：
+        LOG_LEVEL: 默认最低级别
+        LOG_LEVELS: {日志记录器名称: 最低级别}
+    """
+    configure_log_levels(app.config.get('LOG_LEVEL', 'DEBUG'), app.config.get('LOG_LEVELS'))
+
+
 class SimpleLogger:
     """使用标准logging模块实现的日志记录器，保持与原来简单日志记录器相同的使用方式"""
     
@@ -28,6 +278,9 @@ class SimpleLogger:
             log_dir: 日志目录，默认为当前工作目录下的 simple_logs 目录
         """
         self.name = name
+        # 低于该级别的日志直接丢弃，不构建日志内容
+        self.min_level = _logger_levels.get(name, _default_level)
+        _logger_instances.add(self)
         
         # 确定日志目录
         if log_dir is None:
@@ -90,16 +343,45 @@ class SimpleLogger:
         Args:
             level: 日志级别
             message: 日志消息
-            extra: 额外信息
+            extra: 额外信息，可以是字典、返回字典的函数，字典的值可以是Lazy
         """
+        if self._level_map.get(level, logging.INFO) < self.min_level:
+            return False
+        
+        trace = _trace_provider() if _trace_provider is not None else None
+        if trace is None:
+            return self._emit(level, message, extra)
+        
+        # 在请求中：补充请求的trace_id，并统计日志占用的请求时间
+        start = time.perf_counter()
+        try:
+            return self._emit(level, message, extra, trace.trace_id)
+        finally:
+            trace.add_span('log', time.perf_counter() - start)
+    
+    def _emit(self, level, message, extra, trace_id=None):
+        try:
+            extra = _resolve_extra(extra)
+        except Exception as e:
+            extra = {'log_error': f"计算日志内容失败: {str(e)}"}
+        
+        if trace_id is not None and (not extra or 'trace_id' not in extra):
+            extra = dict(extra or {})
+            extra['trace_id'] = trace_id
+        
+        # 启用异步日志时只放入缓冲区，由后台线程写入
+        writer = _async_writer
+        if writer is not None:
+            writer.enqueue(self, level, message, extra)
+            return True
+        
         try:
             # 获取当前时间
             now = datetime.datetime.now()
             now_str = now.strftime('%Y-%m-%d %H:%M:%S')
             
             # 检查是否需要更新日志目录（如果跨月份）
-            today = datetime.datetime.now()
-            year_month_dir = os.path.join(self.log_dir, f"{today.year:04d}-{today.month:02d}")
+            year_month_dir = os.path.join(self.log_dir, f"{now.year:04d}-{now.month:02d}")
             expected_log_file_base = os.path.join(year_month_dir, f"{self.name}")
             
             # 如果当前日志文件基础路径与预期不符，则需要更新处理器
@@ -139,6 +421,13 @@ class SimpleLogger:
             print(traceback.format_exc())
             return False
     
+    def is_enabled_for(self, level):
+        """判断某个级别的日志是否会被记录，可在构建开销较大的日志内容前调用"""
+        return _to_level(level) >= self.min_level
+    
+    # 与标准logging.Logger一致的名称
+    isEnabledFor = is_enabled_for
+    
     def info(self, message, extra=None):
         """记录INFO级别日志"""
         return self._write_log('INFO', message, extra)
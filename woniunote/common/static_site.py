@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+首页、分页、分类页和文章页的静态化
+
+把匿名访客看到的页面渲染为HTML文件写入STATIC_SITE_DIR，由nginx直接返回（见configs/woniunote_nginx_config），
+访问高峰时这些页面不再经过Python进程：
+- URL与文件的对应关系：/ -> index.html，/page/2 -> page/2.html，/type/1/2 -> type/1/2.html，
+  /article/5 -> article/5.html
+- 页面通过应用的视图函数以匿名用户身份渲染，与动态访问看到的内容相同；
+  视图调用了tag_page()（即正常渲染完成）的200响应才写入文件，出错时保留旧文件
+- 写入先生成同目录下的临时文件再os.replace()，nginx不会读到写了一半的文件
+- 每个页面依赖的文章标签（与整页缓存相同）记录在输出目录的.manifest.json中，
+  文章写入后只重新生成带有该文章标签的页面；文章进出列表时重新生成全部分页、相关分类页和上一篇、下一篇，
+  删除页数减少后多出来的页面，文章不再公开时删除文章页
+- 文章写入后的增量生成由后台线程在STATIC_SITE_DELAY秒后执行，合并短时间内的多次写入
+- 全量生成可以用进程池并行渲染，每个进程创建自己的应用（scripts/build_static_site.py --workers）
+
+nginx直接返回的文章页不会增加阅读次数，侧边栏在页面重新生成前也不会更新，
+可以定时运行全量生成刷新这些内容。
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import g, has_app_context, has_request_context
+
+from woniunote.common.simple_logger import get_simple_logger
+
+static_site_logger = get_simple_logger('static_site')
+
+MANIFEST_FILE = '.manifest.json'
+
+
+def is_static_render():
+    """当前请求是否是静态化生成器发起的渲染（不使用整页缓存，不增加阅读次数）"""
+    return has_request_context() and g.get('_static_render', False)
+
+
+def list_path(page):
+    return '/' if page == 0 else f'/page/{page}'
+
+
+def type_path(article_type, page):
+    return f'/type/{article_type}/{page}'
+
+
+def article_path(articleid):
+    return f'/article/{articleid}'
+
+
+def path_group(path):
+    """页面所属的分组：list为首页和分页，type:<类型>为分类页，article为文章页"""
+    parts = path.strip('/').split('/')
+    if parts[0] in ('', 'page'):
+        return 'list'
+    if parts[0] == 'type':
+        return f'type:{parts[1]}'
+    return parts[0]
+
+
+def page_file(path):
+    """页面对应的文件（相对输出目录）"""
+    if path == '/':
+        return 'index.html'
+    return path.strip('/') + '.html'
+
+
+class StaticSiteGenerator:
+    """增量静态化生成器"""
+
+    def __init__(self, output_dir=None, enabled=False, workers=1, delay=2, pagesize=10,
+                 base_url='https://localhost', app=None, sitemap_loader=None, neighbour_loader=None,
+                 config_name=None):
+        """
+        Args:
+            output_dir: 静态文件输出目录
+            enabled: 是否在文章写入后自动重新生成受影响的页面
+            workers: 全量生成时的进程数
+            delay: 文章写入后延迟多少秒执行增量生成
+            pagesize: 列表每页的文章数，需与视图函数一致
+            base_url: 渲染页面时使用的地址，应用对http请求会重定向到https
+            app: Flask应用
+            sitemap_loader: 无参函数，返回 {'pages': 分页数, 'type_pages': {类型: 页数}, 'articles': 公开文章编号的集合}
+            neighbour_loader: 函数(articleid)，返回包含上一篇prev_id、下一篇next_id的字典
+            config_name: 创建应用时的配置名，进程池中的每个进程用它创建自己的应用
+        """
+        self.output_dir = output_dir
+        self.enabled = enabled and output_dir is not None
+        self.workers = max(1, workers)
+        self.delay = delay
+        self.pagesize = pagesize
+        self.base_url = base_url
+        self.app = app
+        self.sitemap_loader = sitemap_loader
+        self.neighbour_loader = neighbour_loader
+        self.config_name = config_name
+        self._pending = []
+        self._lock = threading.Lock()
+        # 同一进程中增量生成和全量生成不同时进行，避免互相覆盖页面清单
+        self._build_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._stats = {'written': 0, 'removed': 0, 'failed': 0, 'refreshes': 0, 'builds': 0}
+
+    # ---------- 文件 ----------
+
+    def _file(self, path):
+        return os.path.join(self.output_dir, page_file(path))
+
+    def _write_atomic(self, filename, data):
+        directory = os.path.dirname(filename)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # mkstemp创建的文件只有属主可读，nginx需要读取
+            os.chmod(temp_name, 0o644)
+            os.replace(temp_name, filename)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            raise
+
+    def _remove(self, path):
+        try:
+            os.remove(self._file(path))
+        except FileNotFoundError:
+            pass
+
+    def load_manifest(self):
+        """页面清单 {路径: [标签]}，每次读取文件，多个进程生成的结果都能看到"""
+        try:
+            with open(os.path.join(self.output_dir, MANIFEST_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        data = json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        self._write_atomic(os.path.join(self.output_dir, MANIFEST_FILE), data)
+
+    # ---------- 页面列表 ----------
+
+    def _load(self, loader, *args):
+        """调用查询数据库的函数，后台线程和命令行中没有应用上下文，需要推入一个"""
+        if self.app is not None and not has_app_context():
+            with self.app.app_context():
+                return loader(*args)
+        return loader(*args)
+
+    def site_paths(self, sitemap, groups=None):
+        """站点中应该存在的页面，groups不为None时只返回这些分组的页面"""
+        paths = []
+        if groups is None or 'list' in groups:
+            paths.extend(list_path(page) for page in range(0, max(sitemap['pages'], 1) + 1))
+        for article_type, pages in sitemap['type_pages'].items():
+            if groups is None or f'type:{article_type}' in groups:
+                paths.extend(type_path(article_type, page) for page in range(1, max(pages, 1) + 1))
+        if groups is None or 'article' in groups:
+            paths.extend(article_path(articleid) for articleid in sorted(sitemap['articles'], reverse=True))
+        return paths
+
+    # ---------- 渲染 ----------
+
+    def render(self, path):
+        """以匿名用户身份渲染一个页面，返回 (状态码, HTML, 标签)"""
+        # 推入新的应用上下文，在请求中调用时不会共用当前请求的flask.g（如登录用户）
+        with self.app.app_context(), self.app.test_request_context(path, base_url=self.base_url):
+            g._static_render = True
+            g._page_tags = set()
+            response = self.app.full_dispatch_request()
+            tags = g.pop('_page_tags', None)
+            return response.status_code, response.get_data(), sorted(tags or ())
+
+    def render_pages(self, paths):
+        """渲染并写入页面，返回 (成功写入的页面清单, 不存在的页面, 失败的页面)"""
+        written, missing, failed = {}, [], []
+        for path in paths:
+            try:
+                status, body, tags = self.render(path)
+                if status == 200 and tags:
+                    self._write_atomic(self._file(path), body)
+                    written[path] = tags
+                elif status == 404:
+                    missing.append(path)
+                else:
+                    failed.append(path)
+            except Exception as e:
+                failed.append(path)
+                static_site_logger.error("静态页面生成失败", {
+                    'path': path,
+                    'error': str(e),
+                    'error_type': type(e).__name__
+                })
+        return written, missing, failed
+
+    def _apply(self, manifest, written, removed, failed):
+        """把生成结果合并到页面清单并保存"""
+        manifest.update(written)
+        for path in removed:
+            self._remove(path)
+            manifest.pop(path, None)
+        self._save_manifest(manifest)
+        with self._lock:
+            self._stats['written'] += len(written)
+            self._stats['removed'] += len(removed)
+            self._stats['failed'] += len(failed)
+
+    def generate(self, paths, remove=()):
+        """重新生成指定的页面并删除remove中的页面，返回统计信息"""
+        with self._build_lock:
+            manifest = self.load_manifest()
+            written, missing, failed = self.render_pages(paths)
+            removed = set(remove) | set(missing)
+            self._apply(manifest, written, removed, failed)
+        return {'written': len(written), 'removed': len(removed), 'failed': len(failed)}
+
+    # ---------- 全量生成 ----------
+
+    def build_all(self, workers=None):
+        """生成站点的全部页面并删除不再存在的页面
+
+        Args:
+            workers: 进程数，默认为STATIC_SITE_WORKERS，大于1时使用进程池
+        """
+        start_time = time.time()
+        workers = max(1, workers or self.workers)
+        with self._build_lock:
+            paths = self.site_paths(self._load(self.sitemap_loader))
+            if workers > 1 and len(paths) > 1:
+                chunks = [paths[i::workers] for i in range(workers)]
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(self.config_name,)) as pool:
+                    results = list(pool.map(_render_chunk, chunks))
+            else:
+                results = [self.render_pages(paths)]
+
+            written, missing, failed = {}, [], []
+            for chunk_written, chunk_missing, chunk_failed in results:
+                written.update(chunk_written)
+                missing.extend(chunk_missing)
+                failed.extend(chunk_failed)
+
+            # 失败的页面保留旧文件，清单中已经不存在的页面删除
+            manifest = self.load_manifest()
+            wanted = set(paths)
+            removed = {path for path in manifest if path not in wanted} | set(missing)
+            self._apply(manifest, written, removed, failed)
+
+        with self._lock:
+            self._stats['builds'] += 1
+        result = {
+            'pages': len(paths),
+            'written': len(written),
+            'removed': len(removed),
+            'failed': len(failed),
+            'workers': workers,
+            'build_time_ms': round((time.time() - start_time) * 1000, 2)
+        }
+        static_site_logger.info("静态页面全量生成完成", result)
+        return result
+
+    # ---------- 增量生成 ----------
+
+    def affected_paths(self, manifest, sitemap, articleid, article_type=None, listing_changed=False,
+                       old_type=None):
+        """文章写入后需要重新生成和删除的页面，返回 (重新生成的页面, 删除的页面)"""
+        own_path = article_path(articleid)
+        tag = f'article:{int(articleid)}'
+        paths = {path for path, tags in manifest.items() if tag in tags}
+        paths.add(own_path)
+        remove = set()
+
+        if listing_changed:
+            groups = {'list'} | {f'type:{t}' for t in (article_type, old_type) if t is not None}
+            wanted = set(self.site_paths(sitemap, groups - {'article'}))
+            paths |= wanted
+            remove |= {path for path in manifest if path_group(path) in groups and path not in wanted}
+            # 新的上一篇、下一篇页面中的链接也要更新
+            if self.neighbour_loader is not None:
+                neighbours = self._load(self.neighbour_loader, articleid) or {}
+                paths |= {article_path(i) for i in (neighbours.get('prev_id'), neighbours.get('next_id'))
+                          if i and i != articleid}
+
+        if articleid not in sitemap['articles']:
+            # 隐藏、草稿、未审核的文章不生成静态页面
+            paths.discard(own_path)
+            remove.add(own_path)
+        return paths - remove, remove
+
+    def refresh_article(self, articleid, article_type=None, listing_changed=False, old_type=None):
+        """立即重新生成一篇文章写入后受影响的页面"""
+        return self.refresh_articles([(articleid, article_type, listing_changed, old_type)])
+
+    def refresh_articles(self, jobs):
+        """合并多篇文章的受影响页面后一次生成"""
+        if not jobs:
+            return None
+        sitemap = self._load(self.sitemap_loader)
+        manifest = self.load_manifest()
+        paths, remove = set(), set()
+        for articleid, article_type, listing_changed, old_type in jobs:
+            job_paths, job_remove = self.affected_paths(manifest, sitemap, articleid, article_type,
+                                                        listing_changed, old_type)
+            paths |= job_paths
+            remove |= job_remove
+        result = self.generate(sorted(paths - remove), remove)
+        with self._lock:
+            self._stats['refreshes'] += 1
+        static_site_logger.info("静态页面增量生成完成", dict(result, articles=[job[0] for job in jobs]))
+        return result
+
+    def schedule(self, articleid, article_type=None, listing_changed=False, old_type=None):
+        """文章写入后调用，由后台线程延迟重新生成受影响的页面"""
+        if not self.enabled:
+            return
+        self._ensure_started()
+        with self._lock:
+            self._pending.append((articleid, article_type, listing_changed, old_type))
+        self._wakeup.set()
+
+    def flush(self):
+        """执行所有等待中的增量生成"""
+        with self._lock:
+            jobs, self._pending = self._pending, []
+        try:
+            return self.refresh_articles(jobs)
+        except Exception as e:
+            static_site_logger.error("静态页面增量生成失败", {
+                'articles': [job[0] for job in jobs],
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            return None
+
+    def _ensure_started(self):
+        """在当前进程中启动后台生成线程（兼容gunicorn等fork之后的工作进程）"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wakeup = threading.Event()
+            threading.Thread(target=self._run, name='static-site-generator', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # 等待一段时间，合并连续的多次写入
+            time.sleep(self.delay)
+            self._wakeup.clear()
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, pending=len(self._pending))
+        stats.update({'enabled': self.enabled, 'output_dir': self.output_dir})
+        return stats
+
+
+# 进程池中每个进程的应用，由_init_worker创建
+_worker_app = None
+
+
+def _init_worker(config_name):
+    global _worker_app
+    from woniunote.app import create_app
+    _worker_app = create_app(config_name) if config_name else create_app()
+
+
+def _render_chunk(paths):
+    return get_static_site().render_pages(paths)
+
+
+def default_sitemap(pagesize, article_types, total_count, type_count, public_ids):
+    """按文章数量计算站点的页面
+
+    Args:
+        article_types: 文章类型编号
+        total_count: 无参函数，返回公开文章总数
+        type_count: 函数(类型)，返回该类型的文章数
+        public_ids: 无参函数，返回公开文章的编号
+    """
+    def loader():
+        return {
+            'pages': math.ceil(total_count() / pagesize),
+            'type_pages': {t: math.ceil(type_count(t) / pagesize) for t in article_types},
+            'articles': set(public_ids())
+        }
+    return loader
+
+
+# 全局静态化生成器，默认不启用，create_app中根据配置初始化
+_static_site = StaticSiteGenerator()
+
+
+def get_static_site():
+    return _static_site
+
+
+def init_static_site(app, sitemap_loader, neighbour_loader=None, config_name=None):
+    """根据应用配置初始化静态化生成器
+
+    配置项：
+        STATIC_SITE_ENABLED: 文章写入后是否自动重新生成受影响的静态页面
+        STATIC_SITE_DIR: 静态页面输出目录，默认为程序目录下的static_site
+        STATIC_SITE_WORKERS: 全量生成时的进程数
+        STATIC_SITE_DELAY: 文章写入后延迟多少秒执行增量生成
+        STATIC_SITE_BASE_URL: 渲染页面时使用的地址
+    """
+    global _static_site
+    output_dir = app.config.get('STATIC_SITE_DIR') or os.path.join(app.root_path, 'static_site')
+    _static_site = StaticSiteGenerator(output_dir=output_dir,
+                                       enabled=app.config.get('STATIC_SITE_ENABLED', False),
+                                       workers=app.config.get('STATIC_SITE_WORKERS', 1),
+                                       delay=app.config.get('STATIC_SITE_DELAY', 2),
+                                       base_url=app.config.get('STATIC_SITE_BASE_URL', 'https://localhost'),
+                                       app=app,
+                                       sitemap_loader=sitemap_loader,
+                                       neighbour_loader=neighbour_loader,
+                                       config_name=config_name)
+    static_site_logger.info("静态化生成器初始化完成", _static_site.stats())
+    return _static_site
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+流式渲染
+
+文章页要在内存中渲染出包含全文的完整页面后才开始返回，评论、上一篇下一篇和侧边栏的查询都在返回第一个字节之前完成。
+开启STREAM_TEMPLATES_ENABLED后，视图用stream_page()返回响应：
+- 模板由Jinja的generate()逐段生成，flask.stream_template通过stream_with_context在输出过程中保持请求上下文
+- 用LazyValue包装的变量在模板第一次用到时才查询，浏览器先收到页面头部和正文，之后才执行评论、侧边栏等查询；
+  模板没有用到的变量（例如命中片段缓存的侧边栏）不会查询
+- 输出按STREAM_BUFFER_SIZE个字符合并后发送，避免大量很小的写操作；响应带X-Accel-Buffering: no，nginx不缓冲
+- 页面需要整页缓存或生成静态文件时（cached_page、静态化生成器正在收集页面标签）不使用流式输出
+
+流式响应的状态码和响应头在开始输出时已经发送，输出过程中出错时无法再返回错误页面；
+after_request中的请求统计和N+1查询检测不包括输出过程中执行的查询。
+"""
+import operator
+
+from flask import Response, current_app, g, stream_template
+
+from woniunote.common.simple_logger import get_simple_logger
+
+streaming_logger = get_simple_logger('streaming')
+
+_NOT_LOADED = object()
+
+
+class LazyValue:
+    """模板变量的延迟加载代理：第一次迭代、取属性、取下标、比较、转换为整数或输出时才调用loader，之后使用同一个结果"""
+
+    __slots__ = ('_loader', '_value')
+
+    def __init__(self, loader):
+        """
+        Args:
+            loader: 无参函数，返回变量的值
+        """
+        self._loader = loader
+        self._value = _NOT_LOADED
+
+    def _load(self):
+        if self._value is _NOT_LOADED:
+            self._value = self._loader()
+        return self._value
+
+    @property
+    def loaded(self):
+        return self._value is not _NOT_LOADED
+
+    def __getattr__(self, name):
+        if name in LazyValue.__slots__:
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __bool__(self):
+        return bool(self._load())
+
+    def __str__(self):
+        return str(self._load())
+
+    def __int__(self):
+        return int(self._load())
+
+    def __index__(self):
+        return operator.index(self._load())
+
+    def __eq__(self, other):
+        return self._load() == other
+
+    def __ne__(self, other):
+        return self._load() != other
+
+    def __lt__(self, other):
+        return self._load() < other
+
+    def __le__(self, other):
+        return self._load() <= other
+
+    def __gt__(self, other):
+        return self._load() > other
+
+    def __ge__(self, other):
+        return self._load() >= other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LazyValue({self._value!r})" if self.loaded else "LazyValue(<未加载>)"
+
+
+def streaming_enabled():
+    """当前请求是否使用流式输出"""
+    # 整页缓存和静态化生成器需要完整的页面内容，它们渲染时会设置g._page_tags
+    return bool(current_app.config.get('STREAM_TEMPLATES_ENABLED', False)) and g.get('_page_tags') is None
+
+
+def _buffered(chunks, size):
+    """把模板生成的小段文本合并为不少于size个字符的块"""
+    buffer = []
+    length = 0
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            length += len(chunk)
+            if length >= size:
+                yield ''.join(buffer)
+                buffer = []
+                length = 0
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        # 客户端断开时关闭模板生成器，释放它保持的请求上下文
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def stream_page(template_name, **context):
+    """流式渲染模板，返回Response"""
+    buffer_size = current_app.config.get('STREAM_BUFFER_SIZE', 4096)
+    response = Response(_buffered(stream_template(template_name, **context), buffer_size), mimetype='text/html')
+    response.headers['X-Accel-Buffering'] = 'no'
+    streaming_logger.debug("流式渲染页面", lambda: {
+        'template': template_name,
+        'buffer_size': buffer_size
+    })
+    return response
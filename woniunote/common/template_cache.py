@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+模板预编译和片段缓存
+
+Jinja在第一次渲染某个模板时才把它编译为Python代码，部署或重启后每个工作进程的第一批请求都要编译
+base.html、side.html等模板。这里做两件事：
+- 字节码缓存：编译结果保存在TEMPLATE_BYTECODE_CACHE_DIR中（jinja2.FileSystemBytecodeCache），
+  其他工作进程和重启后的进程直接加载，模板内容变化时按源码校验和自动重新编译；
+  create_app时预先编译template目录下的所有模板（TEMPLATE_WARMUP_ENABLED）
+- 片段缓存：模板中用{% fragment 键1, 键2 %}...{% endfragment %}包住与用户无关的部分，
+  渲染结果按键缓存在进程内，例如侧边栏按侧边栏数据的版本号缓存，导航栏按文章类型缓存；
+  任一个键为None时不缓存，直接渲染
+
+片段缓存在进程内而不放在flask_caching的Redis缓存中：侧边栏版本号是每个进程各自的计数，
+而且片段很小，读取Redis的开销与重新渲染差不多。
+"""
+import os
+import threading
+import time
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from woniunote.common.article_cache import LRUCache
+from woniunote.common.simple_logger import get_simple_logger
+
+template_cache_logger = get_simple_logger('template_cache')
+
+
+class FragmentCacheExtension(Extension):
+    """{% fragment 键... %}...{% endfragment %}：按键缓存模板片段的渲染结果"""
+
+    tags = {'fragment'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        # init_template_cache中设置，为None时不缓存
+        environment.extend(fragment_cache=None, fragment_stats={'hits': 0, 'misses': 0})
+        self._lock = threading.Lock()
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        keys = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            keys.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endfragment',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(keys)]), [], [], body).set_lineno(lineno)
+
+    def _count(self, name):
+        with self._lock:
+            self.environment.fragment_stats[name] += 1
+
+    def _render(self, keys, caller):
+        cache = self.environment.fragment_cache
+        if cache is None or any(key is None for key in keys):
+            return caller()
+        key = tuple(keys)
+        html = cache.get(key)
+        if html is None:
+            self._count('misses')
+            html = caller()
+            cache.set(key, html)
+        else:
+            self._count('hits')
+        return html
+
+
+def warm_templates(app):
+    """编译所有模板，结果保存在Jinja环境的模板缓存和字节码缓存中，返回 (编译的模板数, 失败的模板)"""
+    start_time = time.time()
+    env = app.jinja_env
+    names = env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    failed = []
+    for name in names:
+        try:
+            env.get_template(name)
+        except Exception as e:
+            failed.append(name)
+            template_cache_logger.warning("模板预编译失败", {
+                'template': name,
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+    template_cache_logger.info("模板预编译完成", {
+        'template_count': len(names) - len(failed),
+        'failed': failed,
+        'warmup_time_ms': round((time.time() - start_time) * 1000, 2)
+    })
+    return len(names) - len(failed), failed
+
+
+def template_cache_stats(app):
+    env = app.jinja_env
+    stats = dict(getattr(env, 'fragment_stats', {}))
+    cache = getattr(env, 'fragment_cache', None)
+    stats.update({
+        'fragment_cache_enabled': cache is not None,
+        'fragment_count': len(cache) if cache is not None else 0,
+        'bytecode_cache_dir': getattr(env.bytecode_cache, 'directory', None)
+    })
+    return stats
+
+
+def init_template_cache(app):
+    """根据应用配置设置模板字节码缓存、片段缓存并预编译模板
+
+    配置项：
+        TEMPLATE_BYTECODE_CACHE_ENABLED: 是否把编译后的模板保存到文件
+        TEMPLATE_BYTECODE_CACHE_DIR: 字节码缓存目录，默认为程序目录下的template_cache
+        TEMPLATE_WARMUP_ENABLED: 创建应用时是否预编译所有模板
+        TEMPLATE_FRAGMENT_CACHE_ENABLED: 是否启用{% fragment %}片段缓存
+        TEMPLATE_FRAGMENT_CACHE_SIZE: 进程内最多缓存的片段数
+        TEMPLATE_FRAGMENT_CACHE_TTL: 片段缓存的过期时间（秒）
+    """
+    env = app.jinja_env
+    if app.config.get('TEMPLATE_BYTECODE_CACHE_ENABLED', True):
+        directory = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR') or os.path.join(app.root_path, 'template_cache')
+        try:
+            os.makedirs(directory, exist_ok=True)
+            env.bytecode_cache = FileSystemBytecodeCache(directory)
+        except OSError as e:
+            template_cache_logger.error("创建模板字节码缓存目录失败", {
+                'directory': directory,
+                'error': str(e)
+            })
+
+    env.add_extension(FragmentCacheExtension)
+    if app.config.get('TEMPLATE_FRAGMENT_CACHE_ENABLED', True):
+        env.fragment_cache = LRUCache(maxsize=app.config.get('TEMPLATE_FRAGMENT_CACHE_SIZE', 100),
+                                      ttl=app.config.get('TEMPLATE_FRAGMENT_CACHE_TTL', 300))
+
+    if app.config.get('TEMPLATE_WARMUP_ENABLED', True):
+        warm_templates(app)
+    template_cache_logger.info("模板缓存初始化完成", template_cache_stats(app))
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+请求跟踪上下文
+
+每个请求在before_request中创建一个RequestTrace，保存在contextvars中：
+- 同一请求内所有模块的日志共享一个trace_id，SimpleLogger会自动把它写入日志记录
+- 请求内的耗时按名称累计（数据库、模板渲染、日志等），请求结束时通过Server-Timing响应头返回
+- trace_id通过X-Trace-Id响应头返回，也可以由上游（如nginx）通过同名请求头传入
+
+不在请求中（后台线程、脚本）调用get_trace_id()时，每次返回一个新的ID。
+"""
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from woniunote.common.simple_logger import get_simple_logger, set_trace_provider
+
+trace_logger = get_simple_logger('trace')
+
+# 上游传入的trace_id只接受字母、数字、下划线和短横线
+_TRACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]{8,64}$')
+
+_current_trace = ContextVar('woniunote_request_trace', default=None)
+
+# 日志记录自动带上当前请求的trace_id
+set_trace_provider(_current_trace.get)
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+
+class RequestTrace:
+    """一个请求的跟踪信息和分段耗时"""
+
+    __slots__ = ('trace_id', 'start', 'spans')
+
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or new_trace_id()
+        self.start = time.perf_counter()
+        # {名称: [累计耗时(秒), 次数]}
+        self.spans = {}
+
+    def add_span(self, name, seconds):
+        span = self.spans.get(name)
+        if span is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            span[0] += seconds
+            span[1] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def span_summary(self):
+        """{名称: {'ms': 累计毫秒, 'count': 次数}}"""
+        return {name: {'ms': round(seconds * 1000, 2), 'count': count}
+                for name, (seconds, count) in self.spans.items()}
+
+    def server_timing(self):
+        """生成Server-Timing响应头，浏览器开发者工具中可直接查看各分段耗时"""
+        items = [f'{name};dur={seconds * 1000:.2f};desc="{count}"'
+                 for name, (seconds, count) in self.spans.items()]
+        items.append(f'total;dur={self.elapsed() * 1000:.2f}')
+        return ', '.join(items)
+
+
+def start_trace(trace_id=None):
+    """开始一个新的跟踪上下文，返回用于结束时恢复的token"""
+    return _current_trace.set(RequestTrace(trace_id))
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+def get_current_trace():
+    """当前请求的RequestTrace，不在请求中时返回None"""
+    return _current_trace.get()
+
+
+def get_trace_id():
+    """当前请求的trace_id，不在请求中时生成一个新的ID"""
+    trace = _current_trace.get()
+    if trace is None:
+        return new_trace_id()
+    return trace.trace_id
+
+
+def add_span(name, seconds):
+    """把一段耗时累计到当前请求，不在请求中时忽略"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, seconds)
+
+
+@contextmanager
+def span(name):
+    """统计代码块的耗时
+
+    用法：
+        with span('markdown'):
+            html = render_markdown(content)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - start)
+
+
+def _install_sql_timing():
+    """通过SQLAlchemy引擎事件统计每个请求的SQL执行次数和耗时"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if getattr(_install_sql_timing, 'installed', False):
+        return
+    _install_sql_timing.installed = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('trace_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('trace_query_start')
+        if starts:
+            add_span('db', time.perf_counter() - starts.pop())
+
+
+def _install_render_timing(app):
+    """通过Flask的模板信号统计模板渲染耗时"""
+    from flask import before_render_template, template_rendered
+
+    def before_render(sender, template, context, **extra):
+        trace = _current_trace.get()
+        if trace is not None:
+            context['_trace_render_start'] = time.perf_counter()
+
+    def after_render(sender, template, context, **extra):
+        start = context.pop('_trace_render_start', None)
+        if start is not None:
+            add_span('render', time.perf_counter() - start)
+
+    before_render_template.connect(before_render, app, weak=False)
+    template_rendered.connect(after_render, app, weak=False)
+
+
+def init_trace_context(app):
+    """为应用注册请求跟踪的钩子
+
+    配置项：
+        TRACE_HEADER: 传入和返回trace_id的请求头/响应头名称
+        TRACE_SERVER_TIMING: 是否返回Server-Timing响应头
+        TRACE_SLOW_REQUEST_MS: 超过该耗时（毫秒）的请求记录一条包含分段耗时的WARNING日志，0表示不记录
+    """
+    from flask import g, request
+
+    header = app.config.get('TRACE_HEADER', 'X-Trace-Id')
+    server_timing = app.config.get('TRACE_SERVER_TIMING', True)
+    slow_request_ms = app.config.get('TRACE_SLOW_REQUEST_MS', 1000)
+
+    _install_sql_timing()
+    _install_render_timing(app)
+
+    @app.before_request
+    def start_request_trace():
+        incoming = request.headers.get(header)
+        trace_id = incoming if incoming and _TRACE_ID_PATTERN.match(incoming) else None
+        g._trace_token = start_trace(trace_id)
+
+    @app.after_request
+    def finish_request_trace(response):
+        trace = _current_trace.get()
+        if trace is None:
+            return response
+        response.headers[header] = trace.trace_id
+        if server_timing:
+            response.headers['Server-Timing'] = trace.server_timing()
+        elapsed_ms = trace.elapsed() * 1000
+        if slow_request_ms and elapsed_ms >= slow_request_ms:
+            trace_logger.warning("慢请求", lambda: {
+                'trace_id': trace.trace_id,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'elapsed_ms': round(elapsed_ms, 2),
+                'spans': trace.span_summary()
+            })
+        return response
+
+    @app.teardown_request
+    def reset_request_trace(exc=None):
+        token = g.pop('_trace_token', None)
+        if token is not None:
+            try:
+                end_trace(token)
+            except ValueError:
+                # token在其他上下文中创建（如流式响应），直接清空
+                _current_trace.set(None)
+
+    return app
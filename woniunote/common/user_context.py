@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+当前请求的登录用户
+
+以前各处分别从session中读取登录状态，并且存在三套键名：
+- main_islogin、main_userid等：/login登录时写入
+- islogin、userid等：注册和Cookie自动登录时写入，管理后台、评论和模板使用
+- islogin_<session_id>等：session_util中按Cookie中的session_id区分的键
+同一个请求中会多次读取session，部分页面还要再用Users.find_by_userid查询一次用户。
+
+现在每个请求只解析一次登录用户，结果(CurrentUser)保存在flask.g.current_user中：
+- get_current_user()返回当前用户，未登录时返回匿名用户（islogin为False，userid为None）
+- 模板中可以直接使用current_user变量
+- 登录、注册和Cookie自动登录统一调用login_user()写入main_*键并更换会话编号，退出时logout_user()清除所有键名
+- 读取时兼容旧的两套键名，已经登录的用户不需要重新登录
+- 需要完整用户信息（如积分）时使用current_user.user，按userid从带过期时间的进程内缓存读取，
+  缓存未命中时才查询数据库，用户数据修改后调用invalidate_user()
+"""
+from flask import current_app, g, has_request_context, request, session
+
+from woniunote.common.article_cache import LRUCache
+from woniunote.common.simple_logger import get_simple_logger
+
+user_context_logger = get_simple_logger('user_context')
+
+# session中保存登录信息的键名前缀
+SESSION_PREFIX = 'main_'
+SESSION_FIELDS = ('userid', 'username', 'nickname', 'role')
+# 旧版本使用过的键名，退出登录时一并清除
+LEGACY_SESSION_KEYS = ('islogin',) + SESSION_FIELDS
+
+# 用户信息缓存中不保存的字段
+_PRIVATE_FIELDS = ('password',)
+
+
+class CachedUser:
+    """用户字段快照，可以像Users对象一样通过属性访问字段（不包含密码）"""
+
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+
+    @classmethod
+    def from_model(cls, user):
+        return cls({column.name: getattr(user, column.name) for column in user.__table__.columns
+                    if column.name not in _PRIVATE_FIELDS})
+
+    def __repr__(self):
+        return f"CachedUser(userid={self.__dict__.get('userid')}, username={self.__dict__.get('username')})"
+
+
+class CurrentUser:
+    """一个请求中的登录用户"""
+
+    def __init__(self, userid=None, username=None, nickname=None, role=None, source=None):
+        """
+        Args:
+            source: 登录信息的来源，session、legacy_session、cookie，匿名用户为None
+        """
+        self.userid = userid
+        self.username = username
+        self.nickname = nickname
+        self.role = role
+        self.source = source
+        self._user = None
+
+    @property
+    def islogin(self):
+        return self.userid is not None
+
+    @property
+    def is_admin(self):
+        return self.islogin and self.role == 'admin'
+
+    @property
+    def is_editor(self):
+        return self.islogin and self.role == 'editor'
+
+    @property
+    def user(self):
+        """完整的用户信息(CachedUser)，同一请求中只读取一次，未登录或用户不存在时为None"""
+        if self._user is None and self.islogin:
+            self._user = get_user(self.userid)
+        return self._user
+
+    def to_dict(self):
+        return {
+            'userid': self.userid,
+            'username': self.username,
+            'nickname': self.nickname,
+            'role': self.role
+        }
+
+    def __repr__(self):
+        return f"CurrentUser(userid={self.userid}, role={self.role}, source={self.source})"
+
+
+ANONYMOUS = CurrentUser()
+
+# 用户信息缓存和查询函数，init_user_context中根据配置设置
+_user_cache = LRUCache(maxsize=1000, ttl=60)
+_user_loader = None
+
+
+def get_user(userid):
+    """按userid读取用户信息，优先使用进程内缓存"""
+    if userid is None:
+        return None
+    cached = _user_cache.get(userid)
+    if cached is not None:
+        return cached
+    if _user_loader is None:
+        return None
+    user = _user_loader(userid)
+    if user is None:
+        return None
+    cached = CachedUser.from_model(user)
+    _user_cache.set(userid, cached)
+    return cached
+
+
+def invalidate_user(userid):
+    """用户数据修改后调用，丢弃缓存中的旧数据"""
+    if userid is not None:
+        _user_cache.delete(userid)
+
+
+def _load_from_session():
+    """从session解析登录用户，兼容旧的键名"""
+    if session.get(SESSION_PREFIX + 'islogin') == 'true':
+        return CurrentUser(*(session.get(SESSION_PREFIX + name) for name in SESSION_FIELDS), source='session')
+    if session.get('islogin') == 'true':
+        return CurrentUser(*(session.get(name) for name in SESSION_FIELDS), source='legacy_session')
+    session_id = request.cookies.get('session_id')
+    if session_id and session.get(f'islogin_{session_id}') == 'true':
+        return CurrentUser(*(session.get(f'{name}_{session_id}') for name in SESSION_FIELDS),
+                           source='legacy_session')
+    return ANONYMOUS
+
+
+def get_current_user():
+    """当前请求的登录用户，第一次调用时从session解析，之后直接返回flask.g中的结果"""
+    if not has_request_context():
+        return ANONYMOUS
+    current = g.get('current_user')
+    if current is None:
+        current = g.current_user = _load_from_session()
+    return current
+
+
+def login_user(user, source='session'):
+    """把登录用户写入session和当前请求
+
+    Args:
+        user: Users对象
+        source: 登录方式，记录在CurrentUser.source中
+    """
+    for key in LEGACY_SESSION_KEYS:
+        session.pop(key, None)
+    session[SESSION_PREFIX + 'islogin'] = 'true'
+    for name in SESSION_FIELDS:
+        session[SESSION_PREFIX + name] = getattr(user, name)
+    # 登录后更换会话编号，登录前的会话编号（可能由他人指定）不会变成已登录的会话
+    regenerate = getattr(current_app.session_interface, 'regenerate', None)
+    if regenerate is not None:
+        regenerate(session._get_current_object())
+
+    _user_cache.set(user.userid, CachedUser.from_model(user))
+    g.current_user = CurrentUser(*(getattr(user, name) for name in SESSION_FIELDS), source=source)
+    return g.current_user
+
+
+def logout_user():
+    """清除session中所有键名的登录信息"""
+    keys = [SESSION_PREFIX + 'islogin', SESSION_PREFIX + 'session_id']
+    keys.extend(SESSION_PREFIX + name for name in SESSION_FIELDS)
+    keys.extend(LEGACY_SESSION_KEYS)
+    session_id = request.cookies.get('session_id')
+    if session_id:
+        keys.extend(f'{key}_{session_id}' for key in LEGACY_SESSION_KEYS)
+    for key in keys:
+        session.pop(key, None)
+    g.current_user = ANONYMOUS
+
+
+def init_user_context(app, user_loader):
+    """根据应用配置初始化用户信息缓存，并在模板中提供current_user变量
+
+    配置项：
+        USER_CACHE_SIZE: 进程内最多缓存的用户数
+        USER_CACHE_TTL: 用户信息缓存的过期时间（秒）
+
+    Args:
+        user_loader: 函数(userid)，返回Users对象，不存在时返回None
+    """
+    global _user_cache, _user_loader
+    _user_cache = LRUCache(maxsize=app.config.get('USER_CACHE_SIZE', 1000),
+                           ttl=app.config.get('USER_CACHE_TTL', 60))
+    _user_loader = user_loader
+
+    @app.context_processor
+    def inject_current_user():
+        return {'current_user': get_current_user()}
+
+    user_context_logger.info("登录用户上下文初始化完成", {
+        'cache_size': _user_cache.maxsize,
+        'cache_ttl': _user_cache.ttl
+    })
@@ -3,6 +3,7 @@ import string
 import time
 import yaml
 import re
+import html
 from datetime import datetime
 from email.header import Header
 from email.mime.text import MIMEText
@@ -19,6 +20,7 @@ from pymysql.cursors import DictCursor
 from PIL import Image, ImageFont, ImageDraw, ImageOps, ImageFilter
 from urllib.parse import urlparse
 import math
+from functools import lru_cache
 
 # 初始化数据库连接
 def get_db_connection(database_info):
@@ -342,6 +344,66 @@ def model_join_list(result):
     return m_list
 
 
+# 按文章编号把记录（收藏、评论等）与文章配对，返回[(记录, 文章)]，保持记录原有顺序
+# 先把文章按编号建立字典，整体为线性时间；找不到对应文章的记录会被跳过
+def pair_with_articles(items, articles, key='articleid'):
+    article_map = {getattr(article, key): article for article in articles}
+    return [(item, article_map[getattr(item, key)]) for item in items if getattr(item, key) in article_map]
+
+
+# 文章摘要的最大显示宽度：中文等全角字符计1，ASCII字符计0.5
+SUMMARY_WIDTH = 120
+
+_SCRIPT_STYLE_PATTERN = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.S | re.I)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+_BLANK_PATTERN = re.compile(r'\s+')
+
+
+# 将文章HTML转换为单行纯文本：删除脚本和样式块、标签，还原HTML实体并合并空白字符
+def html_to_text(content):
+    if not content:
+        return ''
+    text = _SCRIPT_STYLE_PATTERN.sub(' ', content)
+    text = _TAG_PATTERN.sub(' ', text)
+    text = html.unescape(text)
+    return _BLANK_PATTERN.sub(' ', text).strip()
+
+
+# 按显示宽度截取字符串，ASCII字符计0.5，其他字符计1，超出length时截断并追加end
+# 内部以半个字符宽度为单位用整数计算；每个字符至少占一个单位，只需检查前limit+1个字符，
+# 耗时与length成正比，与字符串总长度无关
+def cjk_truncate(s, length, end='...'):
+    limit = math.floor(length * 2)
+    if len(s) * 2 <= limit:
+        return s
+    if s.isascii():
+        return s if len(s) <= limit else s[:limit] + end
+    units = 0
+    for index, c in enumerate(s[:limit + 1]):
+        units += 1 if c <= '\x80' else 2
+        if units > limit:
+            return s[:index] + end
+    return s
+
+
+# 模板过滤器cjk_truncate：列表页反复截取相同的标题和摘要，结果按参数缓存
+@lru_cache(maxsize=4096)
+def _cached_cjk_truncate(s, length, end):
+    return cjk_truncate(s, length, end)
+
+
+def cjk_truncate_filter(s, length, end='...'):
+    if s is None:
+        return ''
+    # Markup等str子类转换为普通字符串，截取后的内容由模板自动转义
+    return _cached_cjk_truncate(str(s), length, end)
+
+
+# 根据文章HTML内容生成纯文本摘要，在文章写入时调用并保存到summary字段
+def make_summary(content, width=SUMMARY_WIDTH):
+    return cjk_truncate(html_to_text(content), width)
+
+
 # 压缩图片，通过参数width指定压缩后的图片大小
 def compress_image(source, dest, width):
     from PIL import Image
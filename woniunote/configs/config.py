@@ -20,6 +20,14 @@ class Config:
     SESSION_COOKIE_NAME = 'woniunote_session'  # 添加明确的session名称
     SESSION_PERMANENT = True
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
+    SESSION_BACKEND = 'filesystem'  # 会话存储：filesystem为文件，redis为Redis（使用下面的Redis配置）
+    SESSION_REDIS_PREFIX = 'session:'  # Redis会话的键前缀
+    SESSION_COMPRESS_THRESHOLD = 1024  # 序列化后超过该字节数的会话压缩保存
+    SESSION_REFRESH_INTERVAL = 3600  # 会话未修改时，至少间隔该秒数才延长一次有效期
+    
+    # 登录用户信息缓存：按userid缓存用户数据，减少每个请求查询用户表
+    USER_CACHE_SIZE = 1000  # 进程内最多缓存的用户数
+    USER_CACHE_TTL = 60  # 缓存过期时间（秒）
     
     # CSRF保护
     WTF_CSRF_ENABLED = True
@@ -28,10 +36,102 @@ class Config:
     # 缓存配置
     CACHE_TYPE = 'redis'
     CACHE_DEFAULT_TIMEOUT = 300
+    
+    # 匿名访问的整页缓存：首页、分页、分类页和文章页，保存在上面配置的缓存中，文章写入时按标签失效
+    PAGE_CACHE_ENABLED = True
+    PAGE_CACHE_TTL = 120  # 页面缓存时间（秒），侧边栏和阅读次数最多延迟这么久更新
+    
+    # 静态化：首页、分页、分类页和文章页生成HTML文件由nginx直接返回，全量生成运行 scripts/build_static_site.py
+    STATIC_SITE_ENABLED = False  # 文章写入后是否自动重新生成受影响的页面
+    STATIC_SITE_DIR = None  # 输出目录，默认为程序目录下的static_site，需与nginx配置的root一致
+    STATIC_SITE_WORKERS = 1  # 全量生成时的进程数
+    STATIC_SITE_DELAY = 2  # 文章写入后延迟多少秒生成，合并连续的多次写入
+    STATIC_SITE_BASE_URL = 'https://localhost'  # 渲染页面时使用的地址
+    
+    # 模板缓存：编译后的模板保存到文件并在启动时预编译；{% fragment %}包住的侧边栏、导航栏渲染结果缓存在进程内
+    TEMPLATE_BYTECODE_CACHE_ENABLED = True
+    TEMPLATE_BYTECODE_CACHE_DIR = None  # 字节码缓存目录，默认为程序目录下的template_cache
+    TEMPLATE_WARMUP_ENABLED = True  # 创建应用时预编译所有模板
+    TEMPLATE_FRAGMENT_CACHE_ENABLED = True
+    TEMPLATE_FRAGMENT_CACHE_SIZE = 100  # 进程内最多缓存的片段数
+    TEMPLATE_FRAGMENT_CACHE_TTL = 300  # 片段缓存的过期时间（秒）
+    
+    # 流式渲染：文章页和后台文章列表先输出页面头部和正文，评论、侧边栏等在输出到对应位置时才查询
+    STREAM_TEMPLATES_ENABLED = False
+    STREAM_BUFFER_SIZE = 4096  # 合并到该字符数后再发送
+    
+    # 应用共享的Redis客户端配置，REDIS_URL可以在user_password_config.yaml的redis段中设置
+    REDIS_URL = 'redis://127.0.0.1:6379/0'
+    REDIS_MAX_CONNECTIONS = 50  # 连接池最大连接数
+    REDIS_POOL_TIMEOUT = 2  # 连接用尽时等待空闲连接的秒数
+    REDIS_SOCKET_TIMEOUT = 2  # 命令读写超时（秒）
+    REDIS_CONNECT_TIMEOUT = 1  # 建立连接超时（秒）
+    REDIS_HEALTH_CHECK_INTERVAL = 30  # 空闲连接健康检查间隔（秒）
+    REDIS_FAKE = False  # 使用fakeredis的内存实现代替Redis服务
+    
+    # 文章读缓存配置
+    ARTICLE_CACHE_ENABLED = True
+    ARTICLE_CACHE_SIZE = 1000  # 进程内最多缓存的文章数
+    ARTICLE_CACHE_TTL = 300  # 缓存过期时间（秒）
+    ARTICLE_CACHE_USE_REDIS = False  # 是否启用Redis二级缓存，多进程部署时建议开启
+    
+    # 文章阅读次数缓冲写回配置
+    READ_COUNT_BUFFER_ENABLED = True
+    READ_COUNT_FLUSH_INTERVAL = 10  # 批量写回数据库的间隔（秒）
+    READ_COUNT_USE_REDIS = False  # 是否使用Redis暂存阅读次数，多进程部署时可共享缓冲区
+    
+    # Redis文章列表：文章写入时同步更新Redis版首页和分类页的数据，需要部署Redis
+    REDIS_INDEX_ENABLED = False
+    
+    # 侧边栏（最新、最多阅读、特别推荐）缓存配置
+    SIDEBAR_CACHE_ENABLED = True
+    SIDEBAR_CACHE_TTL = 60  # 缓存有效期（秒）
+    SIDEBAR_REFRESH_AHEAD = 10  # 距离过期不足该秒数时后台提前刷新
+    
+    # 文章数量计数表配置（分页总数）
+    ARTICLE_COUNTERS_ENABLED = True
+    ARTICLE_COUNTERS_RECONCILE_INTERVAL = 300  # 从数据库重新校正计数的间隔（秒）
+    
+    # 文章全文搜索索引配置，首次启用前需运行 scripts/rebuild_search_index.py 构建索引
+    SEARCH_INDEX_ENABLED = True
+    SEARCH_INDEX_PATH = None  # 索引文件路径，默认为程序目录下的search_index/articles.db
+    
+    # 异步日志配置：日志先放入缓冲区，由后台线程批量写入文件
+    LOG_ASYNC_ENABLED = True
+    LOG_QUEUE_SIZE = 10000  # 缓冲区最多容纳的日志记录数
+    LOG_QUEUE_POLICY = 'drop'  # 缓冲区满时的策略：drop丢弃最旧的记录，block等待空位
+    LOG_FLUSH_INTERVAL = 0.5  # 后台线程的最长写入间隔（秒）
+    
+    # 日志级别配置：低于该级别的日志不会构建日志内容，生产环境可设为WARNING
+    LOG_LEVEL = 'INFO'
+    LOG_LEVELS = {}  # 按日志记录器名称单独设置级别，例如 {'articles': 'WARNING'}
+    
+    # 请求跟踪配置：同一请求的日志共享trace_id，并统计数据库、模板渲染等分段耗时
+    TRACE_HEADER = 'X-Trace-Id'  # 传入和返回trace_id的请求头/响应头
+    TRACE_SERVER_TIMING = True  # 是否返回Server-Timing响应头
+    TRACE_SLOW_REQUEST_MS = 1000  # 超过该耗时（毫秒）的请求记录分段耗时，0表示不记录
+    
+    # 请求性能统计配置：按端点统计耗时、SQL和模板渲染，管理后台/admin/metrics查看
+    METRICS_ENABLED = True
+    PROFILE_SLOW_REQUESTS = False  # 是否抽样用cProfile分析慢请求
+    PROFILE_SAMPLE_RATE = 0.1  # 抽样比例
+    PROFILE_THRESHOLD_MS = 1000  # 抽样请求耗时超过该值（毫秒）时保存分析结果
+    PROFILE_DIR = None  # 分析结果目录，默认为程序目录下的profiles
+    PROFILE_MAX_FILES = 50  # 最多保留的分析结果数量
+    
+    # N+1查询检测：同一语句在一个请求中执行超过阈值次数时处理，生产环境默认关闭
+    QUERY_DETECTOR_ENABLED = False
+    QUERY_DETECTOR_THRESHOLD = 5  # 同一语句在一个请求中允许执行的次数
+    QUERY_DETECTOR_ACTIONS = ('log',)  # 处理方式：log记录日志，header返回响应头，raise抛出异常
+    QUERY_DETECTOR_IGNORE = ()  # 不检查的端点名称
 
 class DevelopmentConfig(Config):
     DEBUG = True
     SESSION_COOKIE_SECURE = False  # 开发环境使用HTTP
+    QUERY_DETECTOR_ENABLED = True
+    QUERY_DETECTOR_ACTIONS = ('log', 'header')
+    PAGE_CACHE_ENABLED = False  # 开发时修改模板后立即生效
+    TEMPLATE_FRAGMENT_CACHE_ENABLED = False
     
 class ProductionConfig(Config):
     # 生产环境特定配置
@@ -40,6 +140,12 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SESSION_COOKIE_SECURE = False  # 测试环境使用HTTP
+    LOG_ASYNC_ENABLED = False  # 测试时同步写日志，便于断言日志内容
+    QUERY_DETECTOR_ENABLED = True
+    QUERY_DETECTOR_ACTIONS = ('log', 'header', 'raise')  # 测试中出现N+1查询时请求直接失败
+    REDIS_FAKE = True  # 测试时不需要部署Redis
+    SESSION_BACKEND = 'redis'  # 测试时使用fakeredis保存会话
+    PAGE_CACHE_ENABLED = False  # 功能测试需要每次看到最新的页面
 
 config = {
     'development': DevelopmentConfig,
@@ -1,23 +1,22 @@
-from flask import Blueprint, render_template, session, request
+from flask import Blueprint, render_template, request, jsonify, Response, current_app
 from woniunote.module.articles import Articles
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.request_metrics import get_request_metrics, get_slow_profiler
+from woniunote.common.redis_client import redis_stats
+from woniunote.common.page_cache import get_page_cache
+from woniunote.common.static_site import get_static_site
+from woniunote.common.template_cache import template_cache_stats
+from woniunote.common.streaming import LazyValue, stream_page, streaming_enabled
+from woniunote.common.user_context import get_current_user
 import math
 import traceback
-import uuid
 
 # 初始化日志记录器
 admin_logger = get_simple_logger('admin_controller')
 
-# 生成跟踪ID
-def generate_trace_id():
-    return str(uuid.uuid4())
-
-# 获取当前跟踪ID
-_thread_local_trace_id = {}
 def get_admin_trace_id():
-    if 'trace_id' not in _thread_local_trace_id:
-        _thread_local_trace_id['trace_id'] = generate_trace_id()
-    return _thread_local_trace_id['trace_id']
+    return get_trace_id()
 
 admin = Blueprint("admin", __name__)
 
@@ -33,7 +32,7 @@ def before_admin():
         method = request.method
         
         # 记录请求信息
-        admin_logger.info("管理员请求", {
+        admin_logger.info("管理员请求", lambda: {
             'trace_id': trace_id,
             'path': path,
             'method': method,
@@ -41,12 +40,12 @@ def before_admin():
         })
         
         # 检查管理员权限
-        if session.get('islogin') != 'true' or session.get('role') != 'admin':
+        if not get_current_user().is_admin:
             admin_logger.warning("非管理员访问管理页面", {
                 'trace_id': trace_id,
                 'path': path,
-                'session_islogin': session.get('islogin'),
-                'session_role': session.get('role'),
+                'islogin': get_current_user().islogin,
+                'role': get_current_user().role,
                 'remote_addr': request.remote_addr
             })
             return 'perm-denied'
@@ -66,10 +65,10 @@ def sys_admin():
     
     try:
         # 记录访问管理首页
-        admin_logger.info("访问管理首页", {
+        admin_logger.info("访问管理首页", lambda: {
             'trace_id': trace_id,
             'remote_addr': request.remote_addr,
-            'user_id': session.get('userid')
+            'user_id': get_current_user().userid
         })
         
         pagesize = 50
@@ -79,7 +78,7 @@ def sys_admin():
         html_file = 'system-admin.html'
         
         # 记录数据查询结果
-        admin_logger.info("管理首页数据查询", {
+        admin_logger.info("管理首页数据查询", lambda: {
             'trace_id': trace_id,
             'page': 1,
             'pagesize': pagesize,
@@ -106,22 +105,29 @@ def admin_article(page):
     
     try:
         # 记录分页请求
-        admin_logger.info("管理员文章分页请求", {
+        admin_logger.info("管理员文章分页请求", lambda: {
             'trace_id': trace_id,
             'page': page,
             'remote_addr': request.remote_addr,
-            'user_id': session.get('userid')
+            'user_id': get_current_user().userid
         })
         
         pagesize = 50
         start = (page - 1) * pagesize
         articles_instance = Articles()
+        html_file = 'system-admin.html'
+        
+        if streaming_enabled():
+            # 流式输出：先输出页面头部，文章列表和总页数在输出到表格时才查询
+            result = LazyValue(lambda: articles_instance.find_all_except_draft(start, pagesize))
+            total = LazyValue(lambda: math.ceil(articles_instance.get_count_except_draft() / pagesize))
+            return stream_page(html_file, page=page, result=result, total=total)
+        
         result = articles_instance.find_all_except_draft(start, pagesize)
         total = math.ceil(articles_instance.get_count_except_draft() / pagesize)
-        html_file = 'system-admin.html'
         
         # 记录数据查询结果
-        admin_logger.info("管理员文章分页数据", {
+        admin_logger.info("管理员文章分页数据", lambda: {
             'trace_id': trace_id,
             'page': page,
             'pagesize': pagesize,
@@ -143,29 +149,37 @@ def admin_article(page):
         return render_template('error.html', error_message="文章列表加载失败")
 
 # 按照文章进行分类搜索的后台接口
-@admin.route('/admin/type/<int:type>-<int:page>')
+@admin.route('/admin/type/<int:admin_type>-<int:page>')
 def admin_search_type(admin_type, page):
     # 生成跟踪ID
     trace_id = get_admin_trace_id()
     
     try:
         # 记录按类型搜索请求
-        admin_logger.info("管理员按类型搜索文章", {
+        admin_logger.info("管理员按类型搜索文章", lambda: {
             'trace_id': trace_id,
             'article_type': admin_type,
             'page': page,
             'remote_addr': request.remote_addr,
-            'user_id': session.get('userid')
+            'user_id': get_current_user().userid
         })
         
         pagesize = 50
         start = (page - 1) * pagesize
+        html_file = 'system-admin.html'
+        
+        if streaming_enabled():
+            # 流式输出：列表和总数由同一次调用查询，输出到表格时才执行
+            found = LazyValue(lambda: Articles().find_by_type_except_draft(start, pagesize, admin_type))
+            result = LazyValue(lambda: found[0])
+            total = LazyValue(lambda: math.ceil(found[1] / pagesize))
+            return stream_page(html_file, page=page, result=result, total=total)
+        
         result, total = Articles().find_by_type_except_draft(start, pagesize, admin_type)
         total = math.ceil(total / pagesize)
-        html_file = 'system-admin.html'
         
         # 记录数据查询结果
-        admin_logger.info("管理员按类型搜索结果", {
+        admin_logger.info("管理员按类型搜索结果", lambda: {
             'trace_id': trace_id,
             'article_type': admin_type,
             'page': page,
@@ -196,18 +210,18 @@ def admin_search_headline(keyword):
     
     try:
         # 记录按标题搜索请求
-        admin_logger.info("管理员按标题搜索文章", {
+        admin_logger.info("管理员按标题搜索文章", lambda: {
             'trace_id': trace_id,
             'keyword': keyword,
             'remote_addr': request.remote_addr,
-            'user_id': session.get('userid')
+            'user_id': get_current_user().userid
         })
         
         result = Articles().find_by_headline_except_draft(keyword)
         html_file = 'system-admin.html'
         
         # 记录搜索结果
-        admin_logger.info("管理员按标题搜索结果", {
+        admin_logger.info("管理员按标题搜索结果", lambda: {
             'trace_id': trace_id,
             'keyword': keyword,
             'articles_count': len(result) if result else 0
@@ -233,17 +247,17 @@ def admin_article_hide(articleid):
     
     try:
         # 记录文章隐藏切换请求
-        admin_logger.info("管理员切换文章隐藏状态", {
+        admin_logger.info("管理员切换文章隐藏状态", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'remote_addr': request.remote_addr,
-            'user_id': session.get('userid')
+            'user_id': get_current_user().userid
         })
         
         hidden = Articles().switch_hidden(articleid)
         
         # 记录操作结果
-        admin_logger.info("管理员切换文章隐藏状态成功", {
+        admin_logger.info("管理员切换文章隐藏状态成功", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'new_hidden_status': hidden
@@ -270,17 +284,17 @@ def admin_article_recommend(articleid):
     
     try:
         # 记录文章推荐切换请求
-        admin_logger.info("管理员切换文章推荐状态", {
+        admin_logger.info("管理员切换文章推荐状态", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'remote_addr': request.remote_addr,
-            'user_id': session.get('userid')
+            'user_id': get_current_user().userid
         })
         
         recommended = Articles().switch_recommended(articleid)
         
         # 记录操作结果
-        admin_logger.info("管理员切换文章推荐状态成功", {
+        admin_logger.info("管理员切换文章推荐状态成功", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'new_recommended_status': recommended
@@ -307,17 +321,17 @@ def admin_article_check(articleid):
     
     try:
         # 记录文章审核切换请求
-        admin_logger.info("管理员切换文章审核状态", {
+        admin_logger.info("管理员切换文章审核状态", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'remote_addr': request.remote_addr,
-            'user_id': session.get('userid')
+            'user_id': get_current_user().userid
         })
         
         checked = Articles().switch_checked(articleid)
         
         # 记录操作结果
-        admin_logger.info("管理员切换文章审核状态成功", {
+        admin_logger.info("管理员切换文章审核状态成功", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'new_checked_status': checked
@@ -334,3 +348,29 @@ def admin_article_check(articleid):
         })
         # 返回错误信息
         return "error"
+
+
+# 请求性能统计，默认返回JSON，?format=prometheus返回Prometheus文本格式
+@admin.route('/admin/metrics')
+def admin_metrics():
+    trace_id = get_admin_trace_id()
+    
+    try:
+        metrics = get_request_metrics()
+        if request.args.get('format') == 'prometheus':
+            return Response(metrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
+        
+        result = metrics.snapshot()
+        result['slow_profiles'] = get_slow_profiler().recent()
+        result['redis'] = redis_stats()
+        result['page_cache'] = get_page_cache().stats()
+        result['static_site'] = get_static_site().stats()
+        result['templates'] = template_cache_stats(current_app)
+        return jsonify(result)
+    except Exception as e:
+        admin_logger.error("获取请求性能统计异常", {
+            'trace_id': trace_id,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        })
+        return "error"
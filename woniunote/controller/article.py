@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, session, abort, url_for, redirect
+from flask import Blueprint, render_template, request, abort, url_for, redirect
 from woniunote.module.articles import Articles
 from woniunote.module.users import Users
 from woniunote.common.session_util import get_current_user_id
@@ -9,29 +9,26 @@ from woniunote.common.timer import can_use_minute
 from woniunote.common.database import ARTICLE_TYPES
 from woniunote.common.log_decorator import log_function
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
+from woniunote.common.page_cache import cached_page, tag_page, article_tag
+from woniunote.common.static_site import is_static_render
+from woniunote.common.streaming import LazyValue, stream_page, streaming_enabled
 import math
 import traceback
 import os
 import datetime
-import uuid
 
 # 获取简单日志记录器
 simple_logger = get_simple_logger('article_controller')
 
-# 生成跟踪ID
-def generate_trace_id():
-    return str(uuid.uuid4())
-
-# 获取当前跟踪ID
-_thread_local_trace_id = {}
 def get_simple_trace_id():
-    if 'trace_id' not in _thread_local_trace_id:
-        _thread_local_trace_id['trace_id'] = generate_trace_id()
-    return _thread_local_trace_id['trace_id']
+    return get_trace_id()
 
 article = Blueprint("article", __name__)
 
 @article.route('/article/<int:articleid>')
+@cached_page(on_hit=Articles.update_read_count)  # 匿名访问命中页面缓存时仍然累加阅读次数
 @log_function(log_args=True, log_return=False, log_exception=True)
 def read(articleid):
     """读取文章详情"""
@@ -39,7 +36,7 @@ def read(articleid):
     trace_id = get_simple_trace_id()
     
     # 使用简单日志记录器记录日志
-    simple_logger.info(f"访问文章", {
+    simple_logger.info(f"访问文章", lambda: {
         'trace_id': trace_id,
         'article_id': articleid,
         'function': 'read'
@@ -57,7 +54,7 @@ def read(articleid):
             abort(404)
             
         # 记录信息日志
-        simple_logger.info(f"找到文章", {
+        simple_logger.info(f"找到文章", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'headline': article_instance.headline[:30] + '...' if len(article_instance.headline) > 30 else article_instance.headline,
@@ -81,9 +78,28 @@ def read(articleid):
             'updatetime': article_instance.updatetime
         }
         
-        # 获取作者昵称
-        user = Users.find_by_userid(article_instance.userid)
-        article_dict['nickname'] = user.nickname if user else "Unknown"
+        # 开启流式输出时先输出页面头部和正文，正文之后才用到的数据在输出到对应位置时查询
+        streaming = streaming_enabled()
+
+        if streaming:
+            # 评论由页面加载后异步获取，模板用不到时不会查询
+            comments = LazyValue(lambda: Comments.find_by_articleid(articleid))
+
+            def load_comment_users():
+                nicknames = Users.find_nicknames_by_ids({comment.userid for comment in comments})
+                return {comment.userid: nicknames.get(comment.userid, "Unknown") for comment in comments}
+
+            comment_users = LazyValue(load_comment_users)
+            article_dict['nickname'] = Users.find_nicknames_by_ids({article_instance.userid}) \
+                .get(article_instance.userid, "Unknown")
+        else:
+            # 获取当前文章的评论
+            comments = Comments.find_by_articleid(articleid)
+
+            # 作者和所有评论者的昵称一次查询得到
+            nicknames = Users.find_nicknames_by_ids({article_instance.userid} | {comment.userid for comment in comments})
+            article_dict['nickname'] = nicknames.get(article_instance.userid, "Unknown")
+            comment_users = {comment.userid: nicknames.get(comment.userid, "Unknown") for comment in comments}
 
         # 如果已经消耗积分，则不再截取文章内容
         payed = Credits().check_payed_article(articleid)
@@ -99,48 +115,55 @@ def read(articleid):
         # 检查是否已收藏
         is_favorited = Favorites().check_favorite(articleid)
 
-        Articles.update_read_count(articleid)  # 阅读次数+1
-
-        # 获取当前文章的 上一篇和下一篇
-        prev_next = Articles.find_prev_next_by_id(articleid)
+        if not is_static_render():
+            Articles.update_read_count(articleid)  # 阅读次数+1，生成静态页面时不计数
 
-        # 获取当前文章的评论
-        comments = Comments.find_by_articleid(articleid)
-        comment_users = {}
-        for comment in comments:
-            if comment.userid not in comment_users:
-                user = Users.find_by_userid(comment.userid)
-                comment_users[comment.userid] = user.nickname if user else "Unknown"
+        if streaming:
+            # 上一篇下一篇、文章总数和侧边栏都在正文之后
+            prev_next = LazyValue(lambda: Articles.find_prev_next_by_id(articleid))
+            total_articles = LazyValue(Articles.get_total_count)
+            sidebar = LazyValue(Articles.find_last_most_recommended)
+            last, most, recommended = (LazyValue(lambda i=i: sidebar[i]) for i in range(3))
+        else:
+            # 获取当前文章的 上一篇和下一篇
+            prev_next = Articles.find_prev_next_by_id(articleid)
 
-        # 获取热门文章列表
-        last, most, recommended = Articles.find_last_most_recommended()
-        # 获取总文章数
-        total_articles = Articles.get_total_count()
+            # 获取热门文章列表
+            last, most, recommended = Articles.find_last_most_recommended()
+            # 获取总文章数
+            total_articles = Articles.get_total_count()
         
-        # 记录文章阅读相关信息
-        simple_logger.info("文章访问信息", {
+        # 记录文章阅读相关信息，流式输出时评论数和文章总数还没有查询
+        simple_logger.info("文章访问信息", lambda: {
             'trace_id': get_simple_trace_id(),
             'article_id': articleid,
             'user_id': current_userid,
             'is_favorited': is_favorited,
             'article_type': article_dict['type'],
-            'comment_count': len(comments),
-            'total_articles': total_articles
+            'comment_count': None if streaming else len(comments),
+            'total_articles': None if streaming else total_articles,
+            'streaming': streaming
         })
-        return render_template('article-user.html',
-                            total = total_articles,
-                            article=article_dict,
-                            position=position,
-                            is_favorited=is_favorited,
-                            prev_next=prev_next,
-                            comments=comments,
-                            comment_users=comment_users,
-                            can_use_minute=can_use_minute(),
-                            last_articles=last,
-                            most_articles=most,
-                            recommended_articles=recommended,
-                            current_userid=current_userid,
-                            article_type=ARTICLE_TYPES)
+        context = dict(total=total_articles,
+                       article=article_dict,
+                       position=position,
+                       is_favorited=is_favorited,
+                       prev_next=prev_next,
+                       comments=comments,
+                       comment_users=comment_users,
+                       can_use_minute=can_use_minute(),
+                       last_articles=last,
+                       most_articles=most,
+                       recommended_articles=recommended,
+                       current_userid=current_userid,
+                       article_type=ARTICLE_TYPES)
+        if streaming:
+            return stream_page('article-user.html', **context)
+
+        content = render_template('article-user.html', **context)
+        # 文章页依赖本文以及上一篇、下一篇的标题
+        tag_page(*(article_tag(i) for i in (articleid, prev_next.get('prev_id'), prev_next.get('next_id')) if i))
+        return content
     except Exception as e:
         simple_logger.error(f"读取文章 ID: {articleid} 时发生错误", {
             'trace_id': trace_id,
@@ -182,7 +205,7 @@ def read_all():
             Credits().insert_detail(credit_type='阅读文章', target=articleid, credit=-1 * result.credit)
             Users().update_credit(credit=-1 * result.credit)
             
-            simple_logger.info("文章积分消费", {
+            simple_logger.info("文章积分消费", lambda: {
                 'trace_id': get_simple_trace_id(),
                 'article_id': articleid,
                 'user_id': current_userid,
@@ -205,7 +228,7 @@ def pre_post():
     """进入文章发布页面"""
     try:
         # 检查登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             simple_logger.warning("未登录访问", {
                 'trace_id': get_simple_trace_id(),
                 'page': 'article_post'
@@ -213,7 +236,7 @@ def pre_post():
             return redirect('/login')
         
         # 获取用户ID
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         if userid is None:
             simple_logger.warning("用户ID为空", {
                 'trace_id': get_simple_trace_id(),
@@ -222,7 +245,7 @@ def pre_post():
             return redirect('/login')
             
         # 查找用户
-        user = Users().find_by_userid(userid)
+        user = get_current_user().user
         if user is None:
             simple_logger.warning("用户不存在", {
                 'trace_id': get_simple_trace_id(),
@@ -232,7 +255,7 @@ def pre_post():
             return redirect('/login')
         
         # 记录用户访问
-        simple_logger.info("访问文章发布页面", {
+        simple_logger.info("访问文章发布页面", lambda: {
             'trace_id': get_simple_trace_id(),
             'user_id': userid,
             'nickname': user.nickname,
@@ -265,7 +288,7 @@ def go_edit(articleid):
     """进入文章编辑页面"""
     try:
         # 检查登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             simple_logger.warning("未登录访问", {
                 'trace_id': get_simple_trace_id(),
                 'page': 'article_edit',
@@ -274,7 +297,7 @@ def go_edit(articleid):
             return redirect('/login')
         
         # 获取用户ID
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         if userid is None:
             simple_logger.warning("用户ID为空", {
                 'trace_id': get_simple_trace_id(),
@@ -284,7 +307,7 @@ def go_edit(articleid):
             return redirect('/login')
             
         # 查找用户
-        user = Users().find_by_userid(userid)
+        user = get_current_user().user
         if user is None:
             simple_logger.warning("用户不存在", {
                 'trace_id': get_simple_trace_id(),
@@ -295,7 +318,7 @@ def go_edit(articleid):
             return redirect('/login')
         
         # 记录用户访问
-        simple_logger.info("访问文章编辑页面", {
+        simple_logger.info("访问文章编辑页面", lambda: {
             'trace_id': get_simple_trace_id(),
             'user_id': userid,
             'nickname': user.nickname,
@@ -332,7 +355,7 @@ def go_edit(articleid):
                 subTypesData[main_id][key] = value
         
         # 记录文章类型信息
-        simple_logger.info("文章编辑数据准备", {
+        simple_logger.info("文章编辑数据准备", lambda: {
             'trace_id': get_simple_trace_id(),
             'article_id': articleid,
             'article_type': result.type,
@@ -358,14 +381,14 @@ def edit_article():
     """编辑文章接口"""
     try:
         # 检查登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             simple_logger.warning("用户未登录尝试编辑文章", {
                 'trace_id': get_simple_trace_id()
             })
             return 'login'
         
         # 获取当前用户ID
-        current_userid = session.get('main_userid')
+        current_userid = get_current_user().userid
             
         # 获取表单数据
         headline = request.form.get('headline')
@@ -384,7 +407,7 @@ def edit_article():
             article_type = main_type
             
         # 记录文章编辑信息
-        simple_logger.info("文章编辑请求", {
+        simple_logger.info("文章编辑请求", lambda: {
             'trace_id': get_simple_trace_id(),
             'user_id': current_userid,
             'article_id': articleid,
@@ -417,7 +440,7 @@ def edit_article():
             return 'perm-denied'
         
         # 记录类型变化
-        simple_logger.info("文章类型变化", {
+        simple_logger.info("文章类型变化", lambda: {
             'trace_id': get_simple_trace_id(),
             'article_id': articleid,
             'original_type': article.type,
@@ -436,7 +459,7 @@ def edit_article():
                 drafted=drafted,
                 checked=checked
             )
-            simple_logger.info("文章更新成功", {
+            simple_logger.info("文章更新成功", lambda: {
                 'trace_id': get_simple_trace_id(),
                 'article_id': article_id
             })
@@ -460,20 +483,20 @@ def add_article():
     """添加新文章接口"""
     try:
         # 检查登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             simple_logger.warning("未登录用户尝试添加文章", {
                 'trace_id': get_simple_trace_id()
             })
             return 'not-login'
         
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         if userid is None:
             simple_logger.warning("用户ID为空，无法添加文章", {
                 'trace_id': get_simple_trace_id()
             })
             return 'not-login'
             
-        user = Users().find_by_userid(userid)
+        user = get_current_user().user
         if user is None:
             simple_logger.error("用户不存在", {
                 'trace_id': get_simple_trace_id(),
@@ -498,7 +521,7 @@ def add_article():
             article_type = main_type
             
         # 记录文章添加信息
-        simple_logger.info("文章添加请求", {
+        simple_logger.info("文章添加请求", lambda: {
             'trace_id': get_simple_trace_id(),
             'user_id': userid,
             'article_id': articleid,
@@ -533,7 +556,7 @@ def add_article():
                     checked=checked
                 )
                 
-                simple_logger.info("新文章插入成功", {
+                simple_logger.info("新文章插入成功", lambda: {
                     'trace_id': get_simple_trace_id(),
                     'article_id': article_id,
                     'user_id': userid,
@@ -580,7 +603,7 @@ def add_article():
                         checked=checked
                     )
                     
-                    simple_logger.info("文章更新成功", {
+                    simple_logger.info("文章更新成功", lambda: {
                         'trace_id': get_simple_trace_id(),
                         'article_id': article_id,
                         'user_id': userid,
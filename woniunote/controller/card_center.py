@@ -3,10 +3,11 @@ from woniunote.controller.user import *
 from woniunote.common.database import db
 from woniunote.models.card import Card, CardCategory
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 from functools import wraps
 import datetime
 import time
-import uuid
 import traceback
 
 card_center = Blueprint("card_center", __name__)
@@ -14,16 +15,8 @@ card_center = Blueprint("card_center", __name__)
 # 初始化日志记录器
 card_logger = get_simple_logger('card_controller')
 
-# 生成跟踪ID
-def generate_card_trace_id():
-    return str(uuid.uuid4())
-
-# 获取当前跟踪ID
-_card_thread_local_trace_id = {}
 def get_card_trace_id():
-    if 'trace_id' not in _card_thread_local_trace_id:
-        _card_thread_local_trace_id['trace_id'] = generate_card_trace_id()
-    return _card_thread_local_trace_id['trace_id']
+    return get_trace_id()
 
 # Decorator for requiring login
 def login_required(f):
@@ -33,7 +26,7 @@ def login_required(f):
         # 生成跟踪ID
         trace_id = get_card_trace_id()
         
-        if session.get('main_islogin') is None:
+        if not get_current_user().islogin:
             # 记录未授权访问尝试
             card_logger.warning("未授权访问卡片管理功能", {
                 'trace_id': trace_id,
@@ -45,10 +38,10 @@ def login_required(f):
             abort(404)
         
         # 记录授权访问
-        card_logger.info("访问卡片管理功能", {
+        card_logger.info("访问卡片管理功能", lambda: {
             'trace_id': trace_id,
             'function': f.__name__,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'remote_addr': request.remote_addr,
             'path': request.path,
             'method': request.method
@@ -75,7 +68,7 @@ def db_error_handler(f):
             card_logger.error("卡片管理数据库错误", {
                 'trace_id': trace_id,
                 'function': f.__name__,
-                'user_id': session.get('main_userid'),
+                'user_id': get_current_user().userid,
                 'remote_addr': request.remote_addr,
                 'path': request.path,
                 'method': request.method,
@@ -103,7 +96,7 @@ def cal_leave_day(target_date):
     # 检查目标日期是否有效
     if not target_date:
         # 记录无效日期
-        card_logger.debug("计算天数差异失败", {
+        card_logger.debug("计算天数差异失败", lambda: {
             'trace_id': trace_id,
             'reason': 'target_date_is_none',
             'result': 0
@@ -119,7 +112,7 @@ def cal_leave_day(target_date):
     result = max(0, days_passed)
     
     # 记录计算结果
-    card_logger.debug("计算天数差异成功", {
+    card_logger.debug("计算天数差异成功", lambda: {
         'trace_id': trace_id,
         'target_date': str(target_date),
         'now_datetime': str(now_datetime),
@@ -142,9 +135,9 @@ def card_index():
     trace_id = get_card_trace_id()
     
     # 记录访问信息
-    card_logger.info("访问卡片管理首页", {
+    card_logger.info("访问卡片管理首页", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'remote_addr': request.remote_addr
     })
     
@@ -177,9 +170,9 @@ def add_new_card():
         now_time = datetime.datetime.now()
         
         # 记录创建新卡片的请求
-        card_logger.info("创建新卡片", {
+        card_logger.info("创建新卡片", lambda: {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'headline': headline,
             'category_id': category_id,
             'card_type': card_type,
@@ -200,9 +193,9 @@ def add_new_card():
         db.session.commit()
         
         # 记录创建成功
-        card_logger.info("卡片创建成功", {
+        card_logger.info("卡片创建成功", lambda: {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'headline': headline,
             'category_id': category_id,
             'card_id': card_item.id
@@ -211,9 +204,9 @@ def add_new_card():
         return redirect(f"/cards/category/{category_id}")
     
     # 如果不是POST请求，重定向到默认分类
-    card_logger.info("非POST请求访问添加卡片页面", {
+    card_logger.info("非POST请求访问添加卡片页面", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'method': request.method
     })
     
@@ -236,9 +229,9 @@ def begin_card(card_id):
     trace_id = get_card_trace_id()
     
     # 记录开始卡片的请求
-    card_logger.info("开始卡片任务", {
+    card_logger.info("开始卡片任务", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'card_id': card_id,
         'remote_addr': request.remote_addr
     })
@@ -248,7 +241,7 @@ def begin_card(card_id):
     category_id = card.cardcategory_id
     
     # 记录卡片信息
-    card_logger.info("卡片信息", {
+    card_logger.info("卡片信息", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': card.headline,
@@ -264,7 +257,7 @@ def begin_card(card_id):
         db.session.commit()
         
         # 记录卡片开始成功
-        card_logger.info("卡片开始成功", {
+        card_logger.info("卡片开始成功", lambda: {
             'trace_id': trace_id,
             'card_id': card_id,
             'headline': card.headline,
@@ -272,7 +265,7 @@ def begin_card(card_id):
         })
     else:
         # 记录卡片已经开始
-        card_logger.info("卡片已经开始", {
+        card_logger.info("卡片已经开始", lambda: {
             'trace_id': trace_id,
             'card_id': card_id,
             'headline': card.headline,
@@ -301,9 +294,9 @@ def end_card(card_id):
     trace_id = get_card_trace_id()
     
     # 记录结束卡片的请求
-    card_logger.info("结束卡片任务", {
+    card_logger.info("结束卡片任务", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'card_id': card_id,
         'remote_addr': request.remote_addr
     })
@@ -315,7 +308,7 @@ def end_card(card_id):
     now_time = datetime.datetime.now()
     
     # 记录卡片信息
-    card_logger.info("卡片结束信息", {
+    card_logger.info("卡片结束信息", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': head_line,
@@ -338,7 +331,7 @@ def end_card(card_id):
         total_seconds = (now_time - begin_datetime).seconds
     
     # 记录使用时间
-    card_logger.info("卡片使用时间", {
+    card_logger.info("卡片使用时间", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': head_line,
@@ -353,7 +346,7 @@ def end_card(card_id):
     
     # 特殊处理重复卡片
     if "重复" in head_line:
-        card_logger.info("处理重复卡片", {
+        card_logger.info("处理重复卡片", lambda: {
             'trace_id': trace_id,
             'card_id': card_id,
             'headline': head_line,
@@ -376,7 +369,7 @@ def end_card(card_id):
         db.session.commit()
         
         # 记录重复卡片处理成功
-        card_logger.info("重复卡片处理成功", {
+        card_logger.info("重复卡片处理成功", lambda: {
             'trace_id': trace_id,
             'original_card_id': card_id,
             'new_card_id': done_card.id,
@@ -389,7 +382,7 @@ def end_card(card_id):
         db.session.commit()
         
         # 记录普通卡片结束成功
-        card_logger.info("普通卡片结束成功", {
+        card_logger.info("普通卡片结束成功", lambda: {
             'trace_id': trace_id,
             'card_id': card_id,
             'headline': head_line,
@@ -418,18 +411,18 @@ def category(card_id):
     trace_id = get_card_trace_id()
     
     # 记录访问分类页面
-    card_logger.info("访问卡片分类页面", {
+    card_logger.info("访问卡片分类页面", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'category_id': card_id,
         'remote_addr': request.remote_addr
     })
     
     # 特殊处理已完成分类
     if card_id == 2:  # ID 2是'已完成'分类
-        card_logger.info("访问已完成分类", {
+        card_logger.info("访问已完成分类", lambda: {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid')
+            'user_id': get_current_user().userid
         })
         return _handle_done_category()
     
@@ -438,7 +431,7 @@ def category(card_id):
     if not categories:
         card_logger.error("获取卡片分类失败", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid')
+            'user_id': get_current_user().userid
         })
         return jsonify({"error": "无法加载分类"}), 500
     
@@ -446,7 +439,7 @@ def category(card_id):
     card_category = CardCategory.query.get_or_404(card_id)
     
     # 记录当前分类信息
-    card_logger.info("当前分类信息", {
+    card_logger.info("当前分类信息", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'category_name': card_category.name,
@@ -489,9 +482,9 @@ def _handle_done_category():
     trace_id = get_card_trace_id()
     
     # 记录访问已完成分类
-    card_logger.info("处理已完成卡片分类", {
+    card_logger.info("处理已完成卡片分类", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'remote_addr': request.remote_addr
     })
     
@@ -500,7 +493,7 @@ def _handle_done_category():
     done_items = done_category.cards
     
     # 记录已完成卡片数量
-    card_logger.info("已完成卡片数量", {
+    card_logger.info("已完成卡片数量", lambda: {
         'trace_id': trace_id,
         'total_done_cards': len(done_items)
     })
@@ -525,7 +518,7 @@ def _handle_done_category():
             })
     
     # 记录按月分组结果
-    card_logger.info("按月分组卡片结果", {
+    card_logger.info("按月分组卡片结果", lambda: {
         'trace_id': trace_id,
         'month_count': len(month_cards),
         'months': list(month_cards.keys())
@@ -533,7 +526,7 @@ def _handle_done_category():
     
     # 如果没有卡片有完成时间，返回空页面
     if not month_cards:
-        card_logger.info("未找到已完成卡片", {
+        card_logger.info("未找到已完成卡片", lambda: {
             'trace_id': trace_id
         })
         return render_template('card_index.html', 
@@ -570,7 +563,7 @@ def _prepare_card_collections(categories):
         all_cards.extend(category.cards)
     
     # 记录总卡片数量
-    card_logger.info("卡片总数量", {
+    card_logger.info("卡片总数量", lambda: {
         'trace_id': trace_id,
         'total_cards': len(all_cards)
     })
@@ -589,7 +582,7 @@ def _prepare_card_collections(categories):
     type_4_cards = [card for card in all_undone_cards if card.type == 4]
     
     # 记录各类型卡片数量
-    card_logger.info("卡片分类统计", {
+    card_logger.info("卡片分类统计", lambda: {
         'trace_id': trace_id,
         'undone_cards': len(all_undone_cards),
         'begin_cards': len(all_begin_cards),
@@ -615,7 +608,7 @@ def _prepare_card_collections(categories):
     important_cards = type_1_cards + type_2_cards
     
     # 记录卡片集合准备完成
-    card_logger.info("卡片集合准备完成", {
+    card_logger.info("卡片集合准备完成", lambda: {
         'trace_id': trace_id,
         'important_cards': len(important_cards),
         'time_categories': len(time_categories)
@@ -650,7 +643,7 @@ def _categorize_cards_by_time(all_undone_cards):
     ten_year_cards = []
     
     # 记录开始分类
-    card_logger.info("开始按时间分类卡片", {
+    card_logger.info("开始按时间分类卡片", lambda: {
         'trace_id': trace_id,
         'total_cards': len(all_undone_cards)
     })
@@ -671,7 +664,7 @@ def _categorize_cards_by_time(all_undone_cards):
             ten_year_cards.append(card)
     
     # 记录分类结果
-    card_logger.info("按时间分类卡片结果", {
+    card_logger.info("按时间分类卡片结果", lambda: {
         'trace_id': trace_id,
         'day_cards': len(day_cards),
         'week_cards': len(week_cards),
@@ -707,7 +700,7 @@ def _select_items_for_category(card_category, card_collections, card_id):
     category_name = card_category.name
     
     # 记录开始选择卡片
-    card_logger.info("选择分类卡片", {
+    card_logger.info("选择分类卡片", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'category_name': category_name
@@ -718,7 +711,7 @@ def _select_items_for_category(card_category, card_collections, card_id):
     items = sorted(items, key=lambda x: getattr(x, "updatetime"))
     
     # 记录原始卡片数量
-    card_logger.info("分类原始卡片", {
+    card_logger.info("分类原始卡片", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'category_name': category_name,
@@ -732,7 +725,7 @@ def _select_items_for_category(card_category, card_collections, card_id):
     # 处理基于时间的分类
     if category_name in time_categories:
         items = card_collections['times_cards'].get(category_name, [])
-        card_logger.info("选择时间分类卡片", {
+        card_logger.info("选择时间分类卡片", lambda: {
             'trace_id': trace_id,
             'category_name': category_name,
             'items_count': len(items)
@@ -741,7 +734,7 @@ def _select_items_for_category(card_category, card_collections, card_id):
     # 处理基于优先级的分类
     elif category_name in priority_categories:
         items = card_collections['types_cards'].get(category_name, [])
-        card_logger.info("选择优先级分类卡片", {
+        card_logger.info("选择优先级分类卡片", lambda: {
             'trace_id': trace_id,
             'category_name': category_name,
             'items_count': len(items)
@@ -750,7 +743,7 @@ def _select_items_for_category(card_category, card_collections, card_id):
     # 处理默认视图的特殊情况（card_id = 1）
     elif card_id == 1 and len(card_collections['important_cards']) > 0:
         items = card_collections['important_cards']
-        card_logger.info("选择重要卡片", {
+        card_logger.info("选择重要卡片", lambda: {
             'trace_id': trace_id,
             'category_id': card_id,
             'items_count': len(items)
@@ -759,14 +752,14 @@ def _select_items_for_category(card_category, card_collections, card_id):
     # 处理已开始卡片列表
     elif category_name == "已开始清单":
         items = card_collections['all_begin_cards']
-        card_logger.info("选择已开始卡片", {
+        card_logger.info("选择已开始卡片", lambda: {
             'trace_id': trace_id,
             'category_name': category_name,
             'items_count': len(items)
         })
     
     # 记录最终选择结果
-    card_logger.info("卡片选择结果", {
+    card_logger.info("卡片选择结果", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'category_name': category_name,
@@ -788,7 +781,7 @@ def _ensure_safe_defaults(categories, times_cards, types_cards):
     trace_id = get_card_trace_id()
     
     # 记录开始确保安全默认值
-    card_logger.info("确保卡片分类安全默认值", {
+    card_logger.info("确保卡片分类安全默认值", lambda: {
         'trace_id': trace_id,
         'categories_count': len(categories),
         'times_cards_count': len(times_cards),
@@ -815,7 +808,7 @@ def _ensure_safe_defaults(categories, times_cards, types_cards):
     
     # 记录添加的默认值
     if missing_time_categories or missing_priority_categories:
-        card_logger.info("添加缺失的分类默认值", {
+        card_logger.info("添加缺失的分类默认值", lambda: {
             'trace_id': trace_id,
             'missing_time_categories': missing_time_categories,
             'missing_priority_categories': missing_priority_categories
@@ -841,9 +834,9 @@ def get_done_category(year_month):
     trace_id = get_card_trace_id()
     
     # 记录访问已完成卡片
-    card_logger.info("查看已完成卡片", {
+    card_logger.info("查看已完成卡片", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'year_month': year_month,
         'remote_addr': request.remote_addr
     })
@@ -853,7 +846,7 @@ def get_done_category(year_month):
     if not categories:
         card_logger.error("获取卡片分类失败", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid')
+            'user_id': get_current_user().userid
         })
         return jsonify({"error": "无法加载分类"}), 500
     
@@ -865,7 +858,7 @@ def get_done_category(year_month):
     done_items = done_category.cards
     
     # 记录已完成卡片数量
-    card_logger.info("已完成卡片数量", {
+    card_logger.info("已完成卡片数量", lambda: {
         'trace_id': trace_id,
         'total_done_cards': len(done_items)
     })
@@ -874,7 +867,7 @@ def get_done_category(year_month):
     month_cards_dict = _group_done_cards_by_month(done_items)
     
     # 记录按月分组结果
-    card_logger.info("已完成卡片按月分组结果", {
+    card_logger.info("已完成卡片按月分组结果", lambda: {
         'trace_id': trace_id,
         'month_count': len(month_cards_dict),
         'months': list(month_cards_dict.keys()),
@@ -891,7 +884,7 @@ def get_done_category(year_month):
         
         if not month_cards_dict:
             # 没有已完成卡片
-            card_logger.info("没有找到已完成卡片", {
+            card_logger.info("没有找到已完成卡片", lambda: {
                 'trace_id': trace_id
             })
             return render_template('card_done_index.html',
@@ -908,7 +901,7 @@ def get_done_category(year_month):
         
         # 重定向到最近的月份
         month_list = sorted(list(month_cards_dict.keys()), reverse=True)
-        card_logger.info("重定向到最近的月份", {
+        card_logger.info("重定向到最近的月份", lambda: {
             'trace_id': trace_id,
             'requested_month': year_month,
             'redirect_month': month_list[0]
@@ -920,7 +913,7 @@ def get_done_category(year_month):
     filtered_items = sorted(filtered_items, key=lambda x: x.donetime, reverse=True)
     
     # 记录过滤结果
-    card_logger.info("已完成卡片过滤结果", {
+    card_logger.info("已完成卡片过滤结果", lambda: {
         'trace_id': trace_id,
         'year_month': year_month,
         'filtered_items_count': len(filtered_items)
@@ -956,7 +949,7 @@ def _group_done_cards_by_month(done_items):
     trace_id = get_card_trace_id()
     
     # 记录开始按月分组卡片
-    card_logger.info("开始按月分组已完成卡片", {
+    card_logger.info("开始按月分组已完成卡片", lambda: {
         'trace_id': trace_id,
         'total_cards': len(done_items)
     })
@@ -979,7 +972,7 @@ def _group_done_cards_by_month(done_items):
                 month_cards[item_done_time] = []
                 
                 # 记录新月份分组创建
-                card_logger.info("创建新月份分织", {
+                card_logger.info("创建新月份分织", lambda: {
                     'trace_id': trace_id,
                     'year_month': item_done_time
                 })
@@ -998,7 +991,7 @@ def _group_done_cards_by_month(done_items):
             })
     
     # 记录分组结果
-    card_logger.info("完成按月分组卡片", {
+    card_logger.info("完成按月分组卡片", lambda: {
         'trace_id': trace_id,
         'total_cards': len(done_items),
         'processed_cards': processed_cards,
@@ -1027,9 +1020,9 @@ def new_category():
     trace_id = get_card_trace_id()
     
     # 记录创建新分类请求
-    card_logger.info("创建新卡片分类请求", {
+    card_logger.info("创建新卡片分类请求", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'remote_addr': request.remote_addr,
         'method': request.method
     })
@@ -1037,7 +1030,7 @@ def new_category():
     name = request.form.get('name')
     
     # 记录分类名称
-    card_logger.info("新分类名称", {
+    card_logger.info("新分类名称", lambda: {
         'trace_id': trace_id,
         'name': name
     })
@@ -1046,16 +1039,16 @@ def new_category():
         # 记录空分类名称错误
         card_logger.warning("尝试创建空名称分类", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'remote_addr': request.remote_addr
         })
         return jsonify({"error": "分类名称不能为空"}), 400
     
     # 记录创建新分类
-    card_logger.info("创建新分类", {
+    card_logger.info("创建新分类", lambda: {
         'trace_id': trace_id,
         'name': name,
-        'user_id': session.get('main_userid')
+        'user_id': get_current_user().userid
     })
     
     # 创建新分类
@@ -1064,11 +1057,11 @@ def new_category():
     db.session.commit()
     
     # 记录创建成功
-    card_logger.info("新分类创建成功", {
+    card_logger.info("新分类创建成功", lambda: {
         'trace_id': trace_id,
         'name': name,
         'category_id': card_category.id,
-        'user_id': session.get('main_userid')
+        'user_id': get_current_user().userid
     })
     
     return redirect(f"/cards/category/{card_category.id}")
@@ -1090,9 +1083,9 @@ def edit_card(card_id):
     trace_id = get_card_trace_id()
     
     # 记录编辑卡片请求
-    card_logger.info("编辑卡片请求", {
+    card_logger.info("编辑卡片请求", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'card_id': card_id,
         'remote_addr': request.remote_addr,
         'method': request.method
@@ -1102,7 +1095,7 @@ def edit_card(card_id):
     card_0 = Card.query.get_or_404(card_id)
     
     # 记录卡片信息
-    card_logger.info("当前卡片信息", {
+    card_logger.info("当前卡片信息", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': card_0.headline,
@@ -1114,7 +1107,7 @@ def edit_card(card_id):
     categories = CardCategory.query.all()
     
     # 记录分类信息
-    card_logger.info("获取所有分类", {
+    card_logger.info("获取所有分类", lambda: {
         'trace_id': trace_id,
         'categories_count': len(categories)
     })
@@ -1135,7 +1128,7 @@ def edit_card(card_id):
     type_4_cards = [i for i in all_undone_cards if i.type == 4]
     
     # 记录卡片类型统计
-    card_logger.info("卡片类型统计", {
+    card_logger.info("卡片类型统计", lambda: {
         'trace_id': trace_id,
         'type_1_count': len(type_1_cards),  # 重要紧急
         'type_2_count': len(type_2_cards),  # 重要不紧急
@@ -1154,7 +1147,7 @@ def edit_card(card_id):
     ten_year_cards = []
     
     # 记录开始按时间分类
-    card_logger.info("开始按时间分类卡片", {
+    card_logger.info("开始按时间分类卡片", lambda: {
         'trace_id': trace_id,
         'total_undone_cards': len(all_undone_cards)
     })
@@ -1174,7 +1167,7 @@ def edit_card(card_id):
             ten_year_cards.append(card)
     
     # 记录时间分类统计
-    card_logger.info("卡片时间分类统计", {
+    card_logger.info("卡片时间分类统计", lambda: {
         'trace_id': trace_id,
         'day_count': len(day_cards),      # 日清单
         'week_count': len(week_cards),    # 周清单
@@ -1192,7 +1185,7 @@ def edit_card(card_id):
     category_name = card_category.name
     
     # 记录当前分类信息
-    card_logger.info("当前卡片分类信息", {
+    card_logger.info("当前卡片分类信息", lambda: {
         'trace_id': trace_id,
         'category_id': card_category.id,
         'category_name': category_name,
@@ -1202,7 +1195,7 @@ def edit_card(card_id):
     # 根据分类类型选择卡片
     if category_name in ["日清单", "周清单", "月清单", "年清单", "十年清单"]:
         items = times_cards[category_name]
-        card_logger.info("按时间分类选择卡片", {
+        card_logger.info("按时间分类选择卡片", lambda: {
             'trace_id': trace_id,
             'category_name': category_name,
             'selected_items_count': len(items)
@@ -1210,7 +1203,7 @@ def edit_card(card_id):
     
     if category_name in ["不重要不紧急", "紧急不重要", "重要不紧急", "重要紧急"]:
         items = types_cards[category_name]
-        card_logger.info("按类型分类选择卡片", {
+        card_logger.info("按类型分类选择卡片", lambda: {
             'trace_id': trace_id,
             'category_name': category_name,
             'selected_items_count': len(items)
@@ -1222,13 +1215,13 @@ def edit_card(card_id):
     if card_id == 1:
         if len(type_1_cards) + len(type_2_cards) > 0:
             items = important_cards
-            card_logger.info("选择重要卡片", {
+            card_logger.info("选择重要卡片", lambda: {
                 'trace_id': trace_id,
                 'important_cards_count': len(important_cards)
             })
     
     # 记录渲染编辑页面
-    card_logger.info("渲染卡片编辑页面", {
+    card_logger.info("渲染卡片编辑页面", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': card_0.headline,
@@ -1275,9 +1268,9 @@ def edit_item(card_id):
     trace_id = get_card_trace_id()
     
     # 记录保存卡片编辑请求
-    card_logger.info("保存卡片编辑请求", {
+    card_logger.info("保存卡片编辑请求", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'card_id': card_id,
         'remote_addr': request.remote_addr,
         'method': request.method
@@ -1287,7 +1280,7 @@ def edit_item(card_id):
     card = Card.query.get_or_404(card_id)
     
     # 记录当前卡片信息
-    card_logger.info("当前卡片信息", {
+    card_logger.info("当前卡片信息", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': card.headline,
@@ -1313,7 +1306,7 @@ def edit_item(card_id):
     }
     
     # 记录表单数据
-    card_logger.info("提交的表单数据", {
+    card_logger.info("提交的表单数据", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'form_data': {
@@ -1448,7 +1441,7 @@ def edit_item(card_id):
         category_id = card.cardcategory_id
 
     # 记录变更摘要
-    card_logger.info("卡片变更摘要", {
+    card_logger.info("卡片变更摘要", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'changes': changes,
@@ -1460,11 +1453,11 @@ def edit_item(card_id):
     db.session.commit()
     
     # 记录更新成功
-    card_logger.info("卡片更新成功", {
+    card_logger.info("卡片更新成功", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'category_id': category_id,
-        'user_id': session.get('main_userid')
+        'user_id': get_current_user().userid
     })
     
     return redirect(f"/cards/category/{category_id}")
@@ -1489,9 +1482,9 @@ def edit_category(card_id):
     trace_id = get_card_trace_id()
     
     # 记录编辑分类请求
-    card_logger.info("编辑卡片分类请求", {
+    card_logger.info("编辑卡片分类请求", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'category_id': card_id,
         'remote_addr': request.remote_addr,
         'method': request.method
@@ -1501,7 +1494,7 @@ def edit_category(card_id):
     card_category = CardCategory.query.get_or_404(card_id)
     
     # 记录当前分类信息
-    card_logger.info("当前分类信息", {
+    card_logger.info("当前分类信息", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'current_name': card_category.name
@@ -1510,7 +1503,7 @@ def edit_category(card_id):
     name = request.form.get('name')
     
     # 记录新分类名称
-    card_logger.info("新分类名称", {
+    card_logger.info("新分类名称", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'new_name': name
@@ -1520,7 +1513,7 @@ def edit_category(card_id):
         # 记录空分类名称错误
         card_logger.warning("尝试更新为空名称分类", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'category_id': card_id,
             'current_name': card_category.name,
             'remote_addr': request.remote_addr
@@ -1528,12 +1521,12 @@ def edit_category(card_id):
         return jsonify({"error": "分类名称不能为空"}), 400
     
     # 记录分类更新
-    card_logger.info("更新分类名称", {
+    card_logger.info("更新分类名称", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'old_name': card_category.name,
         'new_name': name,
-        'user_id': session.get('main_userid')
+        'user_id': get_current_user().userid
     })
     
     # 更新分类名称
@@ -1542,11 +1535,11 @@ def edit_category(card_id):
     db.session.commit()
     
     # 记录更新成功
-    card_logger.info("分类更新成功", {
+    card_logger.info("分类更新成功", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'name': name,
-        'user_id': session.get('main_userid')
+        'user_id': get_current_user().userid
     })
     
     return redirect(f"/cards/category/1")
@@ -1571,9 +1564,9 @@ def done(card_id):
     trace_id = get_card_trace_id()
     
     # 记录完成卡片请求
-    card_logger.info("标记卡片为已完成请求", {
+    card_logger.info("标记卡片为已完成请求", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'card_id': card_id,
         'remote_addr': request.remote_addr,
         'method': request.method
@@ -1584,7 +1577,7 @@ def done(card_id):
     category_id = card.cardcategory_id
     
     # 记录原始卡片信息
-    card_logger.info("原始卡片信息", {
+    card_logger.info("原始卡片信息", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': card.headline,
@@ -1600,7 +1593,7 @@ def done(card_id):
     now_time = datetime.datetime.now()
     
     # 记录完成时间
-    card_logger.info("卡片完成时间", {
+    card_logger.info("卡片完成时间", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'donetime': str(now_time)
@@ -1610,7 +1603,7 @@ def done(card_id):
     done_category = CardCategory.query.get_or_404(2)
     
     # 记录目标分类信息
-    card_logger.info("目标分类信息", {
+    card_logger.info("目标分类信息", lambda: {
         'trace_id': trace_id,
         'category_id': done_category.id,
         'category_name': done_category.name
@@ -1627,7 +1620,7 @@ def done(card_id):
                      type=card.type)
     
     # 记录移动卡片操作
-    card_logger.info("移动卡片到已完成分类", {
+    card_logger.info("移动卡片到已完成分类", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': card.headline,
@@ -1640,7 +1633,7 @@ def done(card_id):
     db.session.delete(card)
     
     # 记录数据库操作
-    card_logger.info("数据库操作准备", {
+    card_logger.info("数据库操作准备", lambda: {
         'trace_id': trace_id,
         'operations': ['add_done_card', 'delete_original_card']
     })
@@ -1648,11 +1641,11 @@ def done(card_id):
     db.session.commit()
     
     # 记录操作成功
-    card_logger.info("卡片完成操作成功", {
+    card_logger.info("卡片完成操作成功", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'done_card_id': done_card.id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'donetime': str(now_time)
     })
     
@@ -1675,9 +1668,9 @@ def delete_item(card_id):
     trace_id = get_card_trace_id()
     
     # 记录删除卡片请求
-    card_logger.info("删除卡片请求", {
+    card_logger.info("删除卡片请求", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'card_id': card_id,
         'remote_addr': request.remote_addr,
         'method': request.method
@@ -1688,7 +1681,7 @@ def delete_item(card_id):
     category_id = item.cardcategory_id
     
     # 记录卡片信息
-    card_logger.info("将要删除的卡片信息", {
+    card_logger.info("将要删除的卡片信息", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': item.headline,
@@ -1705,17 +1698,17 @@ def delete_item(card_id):
         card_logger.warning("尝试删除不存在的卡片", {
             'trace_id': trace_id,
             'card_id': card_id,
-            'user_id': session.get('main_userid')
+            'user_id': get_current_user().userid
         })
         return redirect(f"/cards/category/1")
     
     # 记录删除操作
-    card_logger.info("删除卡片操作", {
+    card_logger.info("删除卡片操作", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
         'headline': item.headline,
         'category_id': category_id,
-        'user_id': session.get('main_userid')
+        'user_id': get_current_user().userid
     })
     
     # 删除卡片
@@ -1723,10 +1716,10 @@ def delete_item(card_id):
     db.session.commit()
     
     # 记录删除成功
-    card_logger.info("卡片删除成功", {
+    card_logger.info("卡片删除成功", lambda: {
         'trace_id': trace_id,
         'card_id': card_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'redirect_category_id': category_id
     })
     
@@ -1749,9 +1742,9 @@ def delete_category(card_id):
     trace_id = get_card_trace_id()
     
     # 记录删除分类请求
-    card_logger.info("删除卡片分类请求", {
+    card_logger.info("删除卡片分类请求", lambda: {
         'trace_id': trace_id,
-        'user_id': session.get('main_userid'),
+        'user_id': get_current_user().userid,
         'category_id': card_id,
         'remote_addr': request.remote_addr,
         'method': request.method
@@ -1762,7 +1755,7 @@ def delete_category(card_id):
         # 记录尝试删除受保护的分类
         card_logger.warning("尝试删除受保护的分类", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'category_id': card_id,
             'remote_addr': request.remote_addr
         })
@@ -1772,7 +1765,7 @@ def delete_category(card_id):
     card_category = CardCategory.query.get_or_404(card_id)
     
     # 记录分类信息
-    card_logger.info("将要删除的分类信息", {
+    card_logger.info("将要删除的分类信息", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'category_name': card_category.name,
@@ -1789,11 +1782,11 @@ def delete_category(card_id):
         return redirect(f"/cards/category/1")
     
     # 记录删除分类操作
-    card_logger.info("删除分类", {
+    card_logger.info("删除分类", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
         'category_name': card_category.name,
-        'user_id': session.get('main_userid')
+        'user_id': get_current_user().userid
     })
         
     # 删除分类
@@ -1801,10 +1794,10 @@ def delete_category(card_id):
     db.session.commit()
     
     # 记录删除成功
-    card_logger.info("分类删除成功", {
+    card_logger.info("分类删除成功", lambda: {
         'trace_id': trace_id,
         'category_id': card_id,
-        'user_id': session.get('main_userid')
+        'user_id': get_current_user().userid
     })
     
     # 删除后始终重定向到默认分类
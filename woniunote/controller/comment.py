@@ -1,28 +1,20 @@
-from flask import Blueprint, request, session, jsonify
-import uuid
-import datetime
+from flask import Blueprint, request, jsonify
 
 from woniunote.module.articles import Articles
 from woniunote.module.comments import Comments
 from woniunote.module.credits import Credits
 from woniunote.module.users import Users
 from woniunote.common.simple_logger import SimpleLogger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 
 comment = Blueprint('comment', __name__)
 
 # 初始化评论模块日志记录器
 comment_logger = SimpleLogger('comment')
 
-# 生成评论模块跟踪ID的函数
 def get_comment_trace_id():
-    """生成评论模块的跟踪ID
-    
-    Returns:
-        str: 格式为 'comment_yyyyMMdd_uuid' 的跟踪ID
-    """
-    now = datetime.datetime.now()
-    date_str = now.strftime('%Y%m%d')
-    return f"comment_{date_str}_{str(uuid.uuid4())[:8]}"
+    return get_trace_id()
 
 
 @comment.before_request
@@ -36,17 +28,17 @@ def before_comment():
     trace_id = get_comment_trace_id()
     
     # 记录请求信息
-    comment_logger.info("评论模块请求", {
+    comment_logger.info("评论模块请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('userid')
+        'user_id': get_current_user().userid
     })
     
     try:
         # 检查用户是否已登录
-        if session.get('islogin') is None or session.get('islogin') != 'true':
+        if not get_current_user().islogin:
             # 记录未登录访问
             comment_logger.warning("未登录用户尝试访问评论功能", {
                 'trace_id': trace_id,
@@ -82,10 +74,10 @@ def add():
         articleid = request.form.get('articleid')
         content = request.form.get('content').strip() if request.form.get('content') else ''
         ipaddr = request.remote_addr
-        userid = session.get('userid')
+        userid = get_current_user().userid
         
         # 记录评论请求
-        comment_logger.info("添加评论请求", {
+        comment_logger.info("添加评论请求", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'article_id': articleid,
@@ -117,7 +109,7 @@ def add():
                 comment_instance.insert_comment(articleid, content, ipaddr)
                 
                 # 记录评论添加成功
-                comment_logger.info("评论添加成功", {
+                comment_logger.info("评论添加成功", lambda: {
                     'trace_id': trace_id,
                     'user_id': userid,
                     'article_id': articleid,
@@ -130,7 +122,7 @@ def add():
                 Articles().update_replycount(articleid)
                 
                 # 记录积分更新
-                comment_logger.info("评论积分更新", {
+                comment_logger.info("评论积分更新", lambda: {
                     'trace_id': trace_id,
                     'user_id': userid,
                     'article_id': articleid,
@@ -187,10 +179,10 @@ def reply():
         commentid = request.form.get('commentid')
         content = request.form.get('content').strip() if request.form.get('content') else ''
         ipaddr = request.remote_addr
-        userid = session.get('userid')
+        userid = get_current_user().userid
         
         # 记录回复请求
-        comment_logger.info("回复评论请求", {
+        comment_logger.info("回复评论请求", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'article_id': articleid,
@@ -225,7 +217,7 @@ def reply():
                                               content=content, ipaddr=ipaddr)
                 
                 # 记录回复添加成功
-                comment_logger.info("回复添加成功", {
+                comment_logger.info("回复添加成功", lambda: {
                     'trace_id': trace_id,
                     'user_id': userid,
                     'article_id': articleid,
@@ -239,7 +231,7 @@ def reply():
                 Articles().update_replycount(articleid)
                 
                 # 记录积分更新
-                comment_logger.info("回复积分更新", {
+                comment_logger.info("回复积分更新", lambda: {
                     'trace_id': trace_id,
                     'user_id': userid,
                     'article_id': articleid,
@@ -300,11 +292,11 @@ def comment_page(articleid, page):
     trace_id = get_comment_trace_id()
     
     # 记录评论分页请求
-    comment_logger.info("评论分页请求", {
+    comment_logger.info("评论分页请求", lambda: {
         'trace_id': trace_id,
         'article_id': articleid,
         'page': page,
-        'user_id': session.get('userid'),
+        'user_id': get_current_user().userid,
         'remote_addr': request.remote_addr
     })
     
@@ -314,7 +306,7 @@ def comment_page(articleid, page):
         page_size = 10
         
         # 记录分页参数
-        comment_logger.info("评论分页参数", {
+        comment_logger.info("评论分页参数", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'page': page,
@@ -327,7 +319,7 @@ def comment_page(articleid, page):
         comment_data = comment_instance.get_comment_user_list(articleid, start, page_size)
         
         # 记录评论数据获取结果
-        comment_logger.info("评论数据获取成功", {
+        comment_logger.info("评论数据获取成功", lambda: {
             'trace_id': trace_id,
             'article_id': articleid,
             'page': page,
@@ -1,25 +1,17 @@
-from flask import Blueprint, request, session
-import uuid
-import datetime
+from flask import Blueprint, request
 
 from woniunote.module.favorites import Favorites
 from woniunote.common.simple_logger import SimpleLogger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 
 favorite = Blueprint('favorite', __name__)
 
 # 初始化收藏模块日志记录器
 favorite_logger = SimpleLogger('favorite')
 
-# 生成收藏模块跟踪ID的函数
 def get_favorite_trace_id():
-    """生成收藏模块的跟踪ID
-    
-    Returns:
-        str: 格式为 'favorite_yyyyMMdd_uuid' 的跟踪ID
-    """
-    now = datetime.datetime.now()
-    date_str = now.strftime('%Y%m%d')
-    return f"favorite_{date_str}_{str(uuid.uuid4())[:8]}"
+    return get_trace_id()
 
 
 @favorite.route('/favorite', methods=['POST'])
@@ -37,10 +29,10 @@ def add_favorite():
     try:
         # 获取收藏参数
         articleid = request.form.get('articleid')
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         
         # 记录收藏请求
-        favorite_logger.info("添加收藏请求", {
+        favorite_logger.info("添加收藏请求", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'article_id': articleid,
@@ -49,7 +41,7 @@ def add_favorite():
         })
         
         # 检查用户是否已登录
-        if not session.get('main_islogin'):
+        if not get_current_user().islogin:
             # 记录未登录访问
             favorite_logger.warning("未登录用户尝试添加收藏", {
                 'trace_id': trace_id,
@@ -64,7 +56,7 @@ def add_favorite():
         
         if result:
             # 记录收藏成功
-            favorite_logger.info("添加收藏成功", {
+            favorite_logger.info("添加收藏成功", lambda: {
                 'trace_id': trace_id,
                 'user_id': userid,
                 'article_id': articleid
@@ -84,7 +76,7 @@ def add_favorite():
         favorite_logger.error("添加收藏异常", {
             'trace_id': trace_id,
             'article_id': articleid if 'articleid' in locals() else None,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
@@ -108,10 +100,10 @@ def cancel_favorite(articleid):
     
     try:
         # 获取用户ID
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         
         # 记录取消收藏请求
-        favorite_logger.info("取消收藏请求", {
+        favorite_logger.info("取消收藏请求", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'article_id': articleid,
@@ -120,7 +112,7 @@ def cancel_favorite(articleid):
         })
         
         # 检查用户是否已登录
-        if not session.get('main_islogin'):
+        if not get_current_user().islogin:
             # 记录未登录访问
             favorite_logger.warning("未登录用户尝试取消收藏", {
                 'trace_id': trace_id,
@@ -135,7 +127,7 @@ def cancel_favorite(articleid):
         
         if result:
             # 记录取消收藏成功
-            favorite_logger.info("取消收藏成功", {
+            favorite_logger.info("取消收藏成功", lambda: {
                 'trace_id': trace_id,
                 'user_id': userid,
                 'article_id': articleid
@@ -155,7 +147,7 @@ def cancel_favorite(articleid):
         favorite_logger.error("取消收藏异常", {
             'trace_id': trace_id,
             'article_id': articleid,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
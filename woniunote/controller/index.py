@@ -1,32 +1,29 @@
-from flask import Blueprint, render_template, abort, request, session
-import uuid
+from flask import Blueprint, render_template, abort, request
 import math
 from datetime import datetime, UTC
 
 from woniunote.module.articles import Articles
 from woniunote.common.timer import can_use_minute
 from woniunote.common.redisdb import redis_connect
+from woniunote.common.redis_index import fetch_article_page, type_key
 from woniunote.common.simple_logger import SimpleLogger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
+from woniunote.common.page_cache import cached_page, tag_page, article_tags, LIST_TAG, type_tag
+from woniunote.common.static_site import get_static_site
 
 index = Blueprint("index", __name__)
 
 # 初始化首页模块日志记录器
 index_logger = SimpleLogger('index')
 
-# 生成首页模块跟踪ID的函数
 def get_index_trace_id():
-    """生成首页模块的跟踪ID
-    
-    Returns:
-        str: 格式为 'index_yyyyMMdd_uuid' 的跟踪ID
-    """
-    now = datetime.now(UTC)
-    date_str = now.strftime('%Y%m%d')
-    return f"index_{date_str}_{str(uuid.uuid4())[:8]}"
+    return get_trace_id()
 
 
 @index.route('/')
 @index.route('/index')
+@cached_page()
 def home():
     """首页访问处理函数
     
@@ -39,12 +36,12 @@ def home():
     trace_id = get_index_trace_id()
     
     # 记录首页访问请求
-    index_logger.info("首页访问请求", {
+    index_logger.info("首页访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
@@ -53,7 +50,7 @@ def home():
         total = math.ceil(Articles.get_total_count() / 10)
         
         # 记录文章列表查询结果
-        index_logger.info("首页文章列表查询", {
+        index_logger.info("首页文章列表查询", lambda: {
             'trace_id': trace_id,
             'article_count': len(result) if result else 0,
             'total_pages': total
@@ -63,7 +60,7 @@ def home():
         last, most, recommended = Articles.find_last_most_recommended()
         
         # 记录侧边栏文章查询结果
-        index_logger.info("首页侧边栏文章查询", {
+        index_logger.info("首页侧边栏文章查询", lambda: {
             'trace_id': trace_id,
             'last_articles_count': len(last) if last else 0,
             'most_articles_count': len(most) if most else 0,
@@ -75,9 +72,10 @@ def home():
         content = render_template(html_file, result=result, page=1, total=total,
                                 can_use_minute=can_use_minute(),
                                 last_articles=last, most_articles=most, recommended_articles=recommended)
+        tag_page(LIST_TAG, *article_tags(result))
         
         # 记录首页渲染成功
-        index_logger.info("首页渲染成功", {
+        index_logger.info("首页渲染成功", lambda: {
             'trace_id': trace_id,
             'template': html_file,
             'content_length': len(content) if content else 0
@@ -108,12 +106,12 @@ def get_home():
     trace_id = get_index_trace_id()
     
     # 记录备用首页访问请求
-    index_logger.info("备用首页访问请求", {
+    index_logger.info("备用首页访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
@@ -122,7 +120,7 @@ def get_home():
         total = math.ceil(Articles.get_total_count() / 10)
         
         # 记录文章列表查询结果
-        index_logger.info("备用首页文章列表查询", {
+        index_logger.info("备用首页文章列表查询", lambda: {
             'trace_id': trace_id,
             'article_count': len(result) if result else 0,
             'total_pages': total
@@ -132,7 +130,7 @@ def get_home():
         last, most, recommended = Articles.find_last_most_recommended()
         
         # 记录侧边栏文章查询结果
-        index_logger.info("备用首页侧边栏文章查询", {
+        index_logger.info("备用首页侧边栏文章查询", lambda: {
             'trace_id': trace_id,
             'last_articles_count': len(last) if last else 0,
             'most_articles_count': len(most) if most else 0,
@@ -146,7 +144,7 @@ def get_home():
                                   last_articles=last, most_articles=most, recommended_articles=recommended)
         
         # 记录首页渲染成功
-        index_logger.info("备用首页渲染成功", {
+        index_logger.info("备用首页渲染成功", lambda: {
             'trace_id': trace_id,
             'template': html_file,
             'content_length': len(content) if content else 0
@@ -165,6 +163,7 @@ def get_home():
 
 
 @index.route('/page/<int:page>')
+@cached_page()
 def paginate(page):
     """文章列表分页处理函数
     
@@ -180,26 +179,29 @@ def paginate(page):
     trace_id = get_index_trace_id()
     
     # 记录分页请求
-    index_logger.info("文章列表分页请求", {
+    index_logger.info("文章列表分页请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'page': page,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
         # 计算开始位置并查询文章
         start = (page - 1) * 10  # 计算正确的开始索引
-        result = Articles.find_limit_with_users(start, 10)
+        # 支持游标分页：/page/<n>?before=<articleid>，深翻页时不再依赖OFFSET
+        before_id = request.args.get('before', type=int)
+        result = Articles.find_limit_with_users(start, 10, before_id=before_id)
         total = math.ceil(Articles.get_total_count() / 10)
         
         # 记录文章列表查询结果
-        index_logger.info("分页文章列表查询", {
+        index_logger.info("分页文章列表查询", lambda: {
             'trace_id': trace_id,
             'page': page,
             'start_index': start,
+            'before_id': before_id,
             'article_count': len(result) if result else 0,
             'total_pages': total
         })
@@ -208,7 +210,7 @@ def paginate(page):
         last, most, recommended = Articles.find_last_most_recommended()
         
         # 记录侧边栏文章查询结果
-        index_logger.info("分页侧边栏文章查询", {
+        index_logger.info("分页侧边栏文章查询", lambda: {
             'trace_id': trace_id,
             'page': page,
             'last_articles_count': len(last) if last else 0,
@@ -224,9 +226,10 @@ def paginate(page):
         content = render_template(html_file, result=result, page=page, total=total,
                                   can_use_minute=can_use_minute(),
                                   last_articles=last, most_articles=most, recommended_articles=recommended)
+        tag_page(LIST_TAG, *article_tags(result))
         
         # 记录分页渲染成功
-        index_logger.info("分页渲染成功", {
+        index_logger.info("分页渲染成功", lambda: {
             'trace_id': trace_id,
             'page': page,
             'template': html_file,
@@ -247,6 +250,7 @@ def paginate(page):
 
 
 @index.route('/type/<int:class_type>/<int:page>')
+@cached_page()
 def classify(class_type, page):
     """按类型分类文章列表处理函数
     
@@ -263,14 +267,14 @@ def classify(class_type, page):
     trace_id = get_index_trace_id()
     
     # 记录分类请求
-    index_logger.info("按类型分类文章请求", {
+    index_logger.info("按类型分类文章请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'class_type': class_type,
         'page': page,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
@@ -282,7 +286,7 @@ def classify(class_type, page):
         total = math.ceil(article.get_count_by_type(class_type) / 10)
         
         # 记录文章列表查询结果
-        index_logger.info("分类文章列表查询", {
+        index_logger.info("分类文章列表查询", lambda: {
             'trace_id': trace_id,
             'class_type': class_type,
             'page': page,
@@ -295,7 +299,7 @@ def classify(class_type, page):
         last, most, recommended = article.find_last_most_recommended()
         
         # 记录侧边栏文章查询结果
-        index_logger.info("分类页侧边栏文章查询", {
+        index_logger.info("分类页侧边栏文章查询", lambda: {
             'trace_id': trace_id,
             'class_type': class_type,
             'page': page,
@@ -315,9 +319,10 @@ def classify(class_type, page):
                                last_articles=last,
                                most_articles=most,
                                recommended_articles=recommended)
+        tag_page(type_tag(class_type), *article_tags(result))
         
         # 记录分类页渲染成功
-        index_logger.info("分类页渲染成功", {
+        index_logger.info("分类页渲染成功", lambda: {
             'trace_id': trace_id,
             'class_type': class_type,
             'page': page,
@@ -337,6 +342,9 @@ def classify(class_type, page):
         })
         # 返回错误页面
         return render_template('error.html', error_message=f"类型{class_type}第{page}页加载失败")
+
+
+@index.route('/search/<int:page>-<keyword>')
 def search(page, keyword):
     """文章搜索处理函数
     
@@ -353,14 +361,14 @@ def search(page, keyword):
     trace_id = get_index_trace_id()
     
     # 记录搜索请求
-    index_logger.info("文章搜索请求", {
+    index_logger.info("文章搜索请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'keyword': keyword,
         'page': page,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
@@ -368,14 +376,14 @@ def search(page, keyword):
         if keyword is None or keyword == '' or '%' in keyword or len(keyword) > 10:
             abort(404)
 
-        # 计算开始位置并搜索文章
+        # 计算开始位置并搜索文章，一次查询同时得到当前页结果和总数
         start = (page - 1) * 10
         article = Articles()
-        result = article.find_by_headline(keyword, start, 10)
-        total = math.ceil(article.get_count_by_headline(keyword) / 10)
+        result, count = article.search_articles(keyword, start, 10)
+        total = math.ceil(count / 10)
         
         # 记录搜索结果
-        index_logger.info("文章搜索结果", {
+        index_logger.info("文章搜索结果", lambda: {
             'trace_id': trace_id,
             'keyword': keyword,
             'page': page,
@@ -388,7 +396,7 @@ def search(page, keyword):
         last, most, recommended = article.find_last_most_recommended()
         
         # 记录侧边栏文章查询结果
-        index_logger.info("搜索页侧边栏文章查询", {
+        index_logger.info("搜索页侧边栏文章查询", lambda: {
             'trace_id': trace_id,
             'keyword': keyword,
             'page': page,
@@ -405,7 +413,7 @@ def search(page, keyword):
                                keyword=keyword)
         
         # 记录搜索页渲染成功
-        index_logger.info("搜索页渲染成功", {
+        index_logger.info("搜索页渲染成功", lambda: {
             'trace_id': trace_id,
             'keyword': keyword,
             'page': page,
@@ -439,12 +447,12 @@ def recommend():
     trace_id = get_index_trace_id()
     
     # 记录侧边栏请求
-    index_logger.info("侧边栏推荐文章请求", {
+    index_logger.info("侧边栏推荐文章请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
@@ -453,7 +461,7 @@ def recommend():
         last, most, recommended = article.find_last_most_recommended()
         
         # 记录侧边栏文章查询结果
-        index_logger.info("侧边栏文章查询结果", {
+        index_logger.info("侧边栏文章查询结果", lambda: {
             'trace_id': trace_id,
             'last_articles_count': len(last) if last else 0,
             'most_articles_count': len(most) if most else 0,
@@ -467,7 +475,7 @@ def recommend():
                                recommended_articles=recommended)
         
         # 记录侧边栏渲染成功
-        index_logger.info("侧边栏渲染成功", {
+        index_logger.info("侧边栏渲染成功", lambda: {
             'trace_id': trace_id,
             'template': html_file,
             'content_length': len(content) if content else 0
@@ -502,12 +510,12 @@ def home_redis():
     trace_id = get_index_trace_id()
     
     # 记录Redis首页访问请求
-    index_logger.info("Redis首页访问请求", {
+    index_logger.info("Redis首页访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
@@ -515,31 +523,23 @@ def home_redis():
         red = redis_connect()
         
         # 记录Redis连接成功
-        index_logger.info("Redis连接成功", {
+        index_logger.info("Redis连接成功", lambda: {
             'trace_id': trace_id
         })
         
-        # 获取有序集合article的总数量
-        count = red.zcard('article')
+        # 从文章编号的有序集合中倒序取0-9共10篇，即最新文章，再批量读取每篇文章的Hash
+        article_list, count = fetch_article_page(red, 0, 10)
         total = math.ceil(count / 10)
         
         # 记录文章总数
-        index_logger.info("Redis文章总数查询", {
+        index_logger.info("Redis文章总数查询", lambda: {
             'trace_id': trace_id,
             'article_count': count,
             'total_pages': total
         })
         
-        # 利用zrevrange从有序集合中倒序取0-9共10条数据，即最新文章
-        result = red.zrevrange('article', 0, 9)
-        
-        # 由于加载进来的每一条数据是一个字符串，需要使用eval函数将其转换为字典
-        article_list = []
-        for row in result:
-            article_list.append(eval(row))
-        
         # 记录文章列表获取结果
-        index_logger.info("Redis首页文章列表获取", {
+        index_logger.info("Redis首页文章列表获取", lambda: {
             'trace_id': trace_id,
             'article_count': len(article_list)
         })
@@ -549,7 +549,7 @@ def home_redis():
         content = render_template(html_file, article_list=article_list, page=1, total=total)
         
         # 记录Redis首页渲染成功
-        index_logger.info("Redis首页渲染成功", {
+        index_logger.info("Redis首页渲染成功", lambda: {
             'trace_id': trace_id,
             'template': html_file,
             'content_length': len(content) if content else 0
@@ -582,13 +582,13 @@ def paginate_redis(page):
     trace_id = get_index_trace_id()
     
     # 记录Redis分页请求
-    index_logger.info("Redis分页请求", {
+    index_logger.info("Redis分页请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'page': page,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
@@ -600,31 +600,25 @@ def paginate_redis(page):
         red = redis_connect()
         
         # 记录Redis连接成功
-        index_logger.info("Redis分页连接成功", {
+        index_logger.info("Redis分页连接成功", lambda: {
             'trace_id': trace_id,
             'page': page
         })
         
-        # 获取文章总数和总页数
-        count = red.zcard('article')
+        # 获取当前页的文章列表、文章总数和总页数
+        article_list, count = fetch_article_page(red, start, pagesize)
         total = math.ceil(count / 10)
         
         # 记录文章总数
-        index_logger.info("Redis分页文章总数查询", {
+        index_logger.info("Redis分页文章总数查询", lambda: {
             'trace_id': trace_id,
             'page': page,
             'article_count': count,
             'total_pages': total
         })
         
-        # 获取当前页的文章列表
-        result = red.zrevrange('article', start, start + pagesize - 1)
-        article_list = []
-        for row in result:
-            article_list.append(eval(row))
-        
         # 记录文章列表获取结果
-        index_logger.info("Redis分页文章列表获取", {
+        index_logger.info("Redis分页文章列表获取", lambda: {
             'trace_id': trace_id,
             'page': page,
             'start_index': start,
@@ -636,7 +630,7 @@ def paginate_redis(page):
         content = render_template(html_file, article_list=article_list, page=page, total=total)
         
         # 记录Redis分页渲染成功
-        index_logger.info("Redis分页渲染成功", {
+        index_logger.info("Redis分页渲染成功", lambda: {
             'trace_id': trace_id,
             'page': page,
             'template': html_file,
@@ -655,95 +649,97 @@ def paginate_redis(page):
         # 返回错误页面
         return render_template('error.html', error_message=f"Redis第{page}页加载失败")
 
-# ================== 静态化处理 ======================#
-@index.route('/static')
-def all_static():
-    """文章列表静态化处理函数
+@index.route('/redis/type/<int:class_type>/<int:page>')
+def classify_redis(class_type, page):
+    """使用Redis缓存的分类文章列表处理函数
     
-    将所有文章列表页面静态化处理，生成静态HTML文件
+    从Redis中该分类的文章编号有序集合读取指定页码的文章列表并渲染页面
     
+    Args:
+        class_type (int): 文章类型编号
+        page (int): 要访问的页码，从1开始
+        
     Returns:
-        Response: 静态化处理完成的提示信息
+        Response: 渲染后的Redis缓存分类页HTML内容
     """
     # 生成跟踪ID
     trace_id = get_index_trace_id()
     
-    # 记录静态化处理请求
-    index_logger.info("文章列表静态化处理请求", {
+    # 记录Redis分类请求
+    index_logger.info("Redis分类请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
-        'method': request.method,
         'path': request.path,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'class_type': class_type,
+        'page': page
     })
     
     try:
-        # 设置页面大小和初始化文章对象
         pagesize = 10
-        article = Articles()
+        start = (page - 1) * pagesize
         
-        # 计算总页数
-        total = math.ceil(article.get_total_count() / pagesize)
+        red = redis_connect()
+        article_list, count = fetch_article_page(red, start, pagesize, type_key(class_type))
+        total = math.ceil(count / pagesize)
         
-        # 记录总页数
-        index_logger.info("静态化总页数计算", {
+        # 记录文章列表获取结果
+        index_logger.info("Redis分类文章列表获取", lambda: {
             'trace_id': trace_id,
+            'class_type': class_type,
+            'page': page,
+            'article_count': len(article_list),
             'total_pages': total
         })
         
-        # 获取侧边栏文章
-        last, most, recommended = article.find_last_most_recommended()
-        
-        # 记录侧边栏文章获取
-        index_logger.info("静态化侧边栏文章获取", {
+        return render_template('index-redis.html', article_list=article_list, page=page, total=total,
+                               page_url=f'/redis/type/{class_type}/')
+    except Exception as e:
+        # 记录异常
+        index_logger.error("Redis分类页访问异常", {
             'trace_id': trace_id,
-            'last_articles_count': len(last) if last else 0,
-            'most_articles_count': len(most) if most else 0,
-            'recommended_articles_count': len(recommended) if recommended else 0
+            'class_type': class_type,
+            'page': page,
+            'error': str(e),
+            'error_type': type(e).__name__
         })
-        
-        # 遍历每一页生成静态文件
-        for page in range(1, total + 1):
-            # 计算当前页的起始位置
-            start = (page - 1) * pagesize
-            
-            # 获取当前页的文章列表
-            result = article.find_limit_with_users(start, pagesize)
-            
-            # 记录当前页文章列表获取
-            index_logger.info("静态化当前页文章获取", {
-                'trace_id': trace_id,
-                'page': page,
-                'start_index': start,
-                'article_count': len(result) if result else 0
-            })
-
-            # 渲染当前页面
-            html_file = 'index.html'
-            content = render_template(html_file, result=result, page=page, total=total,
-                                      can_use_minute=can_use_minute(),
-                                      last_articles=last, most_articles=most, recommended_articles=recommended)
-            
-            # 记录当前页渲染成功
-            index_logger.info("静态化当前页渲染成功", {
-                'trace_id': trace_id,
-                'page': page,
-                'template': html_file,
-                'content_length': len(content) if content else 0
-            })
-
-            # 将渲染后的内容写入静态文件, 其实content本身就是标准的HTML页面
-            # 注释代码保留，但不执行写入操作
-            # with open(f'./template/index-static/index-{page}.html', mode='w', encoding='utf-8') as f:
-            #     f.write(content)
+        # 返回错误页面
+        return render_template('error.html', error_message=f"Redis类型{class_type}第{page}页加载失败")
+
+# ================== 静态化处理 ======================#
+@index.route('/static')
+def all_static():
+    """全量生成静态页面
+
+    把首页、分页、分类页和文章页全部生成静态HTML文件，写入STATIC_SITE_DIR，只有管理员可以执行。
+    页面较多时建议使用 scripts/build_static_site.py --workers 在后台用进程池生成。
+
+    Returns:
+        Response: 生成结果的提示信息
+    """
+    # 生成跟踪ID
+    trace_id = get_index_trace_id()
+    
+    # 记录静态化处理请求
+    index_logger.info("文章列表静态化处理请求", lambda: {
+        'trace_id': trace_id,
+        'remote_addr': request.remote_addr,
+        'method': request.method,
+        'path': request.path,
+        'user_id': get_current_user().userid
+    })
+    
+    if not get_current_user().is_admin:
+        return 'perm-denied'
+    
+    try:
+        # 在当前进程中生成，进程池只在命令行脚本中使用
+        result = get_static_site().build_all(workers=1)
         
         # 记录静态化处理完成
-        index_logger.info("静态化处理完成", {
-            'trace_id': trace_id,
-            'total_pages_processed': total
-        })
+        index_logger.info("静态化处理完成", lambda: dict(result, trace_id=trace_id))
 
-        return '文章列表页面分页静态化处理完成'  # 最后简单响应给前面一个提示信息
+        return f"静态页面生成完成：共{result['pages']}个页面，写入{result['written']}个，" \
+               f"删除{result['removed']}个，失败{result['failed']}个"
     except Exception as e:
         # 记录异常
         index_logger.error("静态化处理异常", {
@@ -1,10 +1,10 @@
-from flask import render_template, redirect, abort, request, session
-import uuid
-from datetime import datetime, UTC
+from flask import render_template, redirect, abort, request
 
 from woniunote.controller.user import Blueprint
 from woniunote.common.database import db
 from woniunote.common.simple_logger import SimpleLogger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 
 # 从模型文件导入数据库模型
 from woniunote.models.todo import Item, Category
@@ -14,16 +14,8 @@ tcenter = Blueprint("tcenter", __name__)
 # 初始化待办事项模块日志记录器
 todo_logger = SimpleLogger('todo')
 
-# 生成待办事项模块跟踪ID的函数
 def get_todo_trace_id():
-    """生成待办事项模块的跟踪ID
-    
-    Returns:
-        str: 格式为 'todo_yyyyMMdd_uuid' 的跟踪ID
-    """
-    now = datetime.now(UTC)
-    date_str = now.strftime('%Y%m%d')
-    return f"todo_{date_str}_{str(uuid.uuid4())[:8]}"
+    return get_trace_id()
 
 
 # @tcenter.route('/todo')
@@ -49,16 +41,16 @@ def todo_index():
     trace_id = get_todo_trace_id()
     
     # 记录待办事项首页访问请求
-    todo_logger.info("待办事项首页访问", {
+    todo_logger.info("待办事项首页访问", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     # 检查用户登录状态
-    if session.get('main_islogin') is None:
+    if not get_current_user().islogin:
         # 记录未登录访问尝试
         todo_logger.warning("未登录访问待办事项首页", {
             'trace_id': trace_id,
@@ -76,12 +68,12 @@ def todo_index():
             category_id = request.form.get('category')
             
             # 记录添加待办事项请求
-            todo_logger.info("添加待办事项请求", {
+            todo_logger.info("添加待办事项请求", lambda: {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'body': body,
                 'category_id': category_id,
-                'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+                'user_id': get_current_user().userid
             })
             
             # 获取分类并创建新的待办事项
@@ -93,7 +85,7 @@ def todo_index():
             db.session.commit()
             
             # 记录添加待办事项成功
-            todo_logger.info("添加待办事项成功", {
+            todo_logger.info("添加待办事项成功", lambda: {
                 'trace_id': trace_id,
                 'item_id': item.id,
                 'body': body,
@@ -115,7 +107,7 @@ def todo_index():
             return redirect(f"/todo/category/1")
     
     # GET请求，重定向到默认分类
-    todo_logger.info("重定向到默认待办事项分类", {
+    todo_logger.info("重定向到默认待办事项分类", lambda: {
         'trace_id': trace_id,
         'default_category_id': 1
     })
@@ -138,17 +130,17 @@ def category(category_id):
     trace_id = get_todo_trace_id()
     
     # 记录待办事项分类页面访问请求
-    todo_logger.info("待办事项分类页面访问", {
+    todo_logger.info("待办事项分类页面访问", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'category_id': category_id,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     # 检查用户登录状态
-    if session.get('main_islogin') is None:
+    if not get_current_user().islogin:
         # 记录未登录访问尝试
         todo_logger.warning("未登录访问待办事项分类页面", {
             'trace_id': trace_id,
@@ -163,7 +155,7 @@ def category(category_id):
         category_card = Category.query.get_or_404(category_id)
         
         # 记录分类获取成功
-        todo_logger.info("待办事项分类获取成功", {
+        todo_logger.info("待办事项分类获取成功", lambda: {
             'trace_id': trace_id,
             'category_id': category_id,
             'category_name': category_card.name
@@ -174,7 +166,7 @@ def category(category_id):
         items = category_card.items
         
         # 记录待办事项列表获取成功
-        todo_logger.info("待办事项列表获取成功", {
+        todo_logger.info("待办事项列表获取成功", lambda: {
             'trace_id': trace_id,
             'category_id': category_id,
             'items_count': len(items) if items else 0,
@@ -187,7 +179,7 @@ def category(category_id):
                                categories=categories, category_now=category_card)
         
         # 记录渲染成功
-        todo_logger.info("待办事项分类页面渲染成功", {
+        todo_logger.info("待办事项分类页面渲染成功", lambda: {
             'trace_id': trace_id,
             'category_id': category_id,
             'template': html_file,
@@ -220,16 +212,16 @@ def new_category():
     trace_id = get_todo_trace_id()
     
     # 记录新建分类请求
-    todo_logger.info("新建待办事项分类请求", {
+    todo_logger.info("新建待办事项分类请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     # 检查用户登录状态
-    if session.get('main_islogin') is None:
+    if not get_current_user().islogin:
         # 记录未登录访问尝试
         todo_logger.warning("未登录尝试新建待办事项分类", {
             'trace_id': trace_id,
@@ -243,7 +235,7 @@ def new_category():
         name = request.form.get('name')
         
         # 记录分类名称
-        todo_logger.info("新建待办事项分类信息", {
+        todo_logger.info("新建待办事项分类信息", lambda: {
             'trace_id': trace_id,
             'category_name': name
         })
@@ -254,7 +246,7 @@ def new_category():
         db.session.commit()
         
         # 记录新建分类成功
-        todo_logger.info("新建待办事项分类成功", {
+        todo_logger.info("新建待办事项分类成功", lambda: {
             'trace_id': trace_id,
             'category_id': category_card.id,
             'category_name': name
@@ -291,17 +283,17 @@ def edit_item(item_id):
     trace_id = get_todo_trace_id()
     
     # 记录编辑待办事项请求
-    todo_logger.info("编辑待办事项请求", {
+    todo_logger.info("编辑待办事项请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'item_id': item_id,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     # 检查用户登录状态
-    if session.get('main_islogin') is None:
+    if not get_current_user().islogin:
         # 记录未登录访问尝试
         todo_logger.warning("未登录尝试编辑待办事项", {
             'trace_id': trace_id,
@@ -317,7 +309,7 @@ def edit_item(item_id):
         category_ = item.category
         
         # 记录待办事项获取成功
-        todo_logger.info("待办事项获取成功", {
+        todo_logger.info("待办事项获取成功", lambda: {
             'trace_id': trace_id,
             'item_id': item_id,
             'category_id': category_.id,
@@ -333,7 +325,7 @@ def edit_item(item_id):
         db.session.commit()
         
         # 记录编辑待办事项成功
-        todo_logger.info("编辑待办事项成功", {
+        todo_logger.info("编辑待办事项成功", lambda: {
             'trace_id': trace_id,
             'item_id': item_id,
             'category_id': category_.id,
@@ -372,17 +364,17 @@ def edit_category(category_id):
     trace_id = get_todo_trace_id()
     
     # 记录编辑分类请求
-    todo_logger.info("编辑待办事项分类请求", {
+    todo_logger.info("编辑待办事项分类请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'category_id': category_id,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     # 检查用户登录状态
-    if session.get('main_islogin') is None:
+    if not get_current_user().islogin:
         # 记录未登录访问尝试
         todo_logger.warning("未登录尝试编辑待办事项分类", {
             'trace_id': trace_id,
@@ -397,7 +389,7 @@ def edit_category(category_id):
         category_card = Category.query.get_or_404(category_id)
         
         # 记录分类获取成功
-        todo_logger.info("待办事项分类获取成功", {
+        todo_logger.info("待办事项分类获取成功", lambda: {
             'trace_id': trace_id,
             'category_id': category_id,
             'original_name': category_card.name
@@ -412,7 +404,7 @@ def edit_category(category_id):
         db.session.commit()
         
         # 记录编辑分类成功
-        todo_logger.info("编辑待办事项分类成功", {
+        todo_logger.info("编辑待办事项分类成功", lambda: {
             'trace_id': trace_id,
             'category_id': category_id,
             'new_name': new_name
@@ -450,17 +442,17 @@ def done(item_id):
     trace_id = get_todo_trace_id()
     
     # 记录标记待办事项为已完成请求
-    todo_logger.info("标记待办事项为已完成请求", {
+    todo_logger.info("标记待办事项为已完成请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'item_id': item_id,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     # 检查用户登录状态
-    if session.get('main_islogin') is None:
+    if not get_current_user().islogin:
         # 记录未登录访问尝试
         todo_logger.warning("未登录尝试标记待办事项为已完成", {
             'trace_id': trace_id,
@@ -476,7 +468,7 @@ def done(item_id):
         category_card = item.category
         
         # 记录待办事项获取成功
-        todo_logger.info("待办事项获取成功", {
+        todo_logger.info("待办事项获取成功", lambda: {
             'trace_id': trace_id,
             'item_id': item_id,
             'body': item.body,
@@ -488,7 +480,7 @@ def done(item_id):
         done_category = Category.query.get_or_404(2)
         
         # 记录已完成分类获取成功
-        todo_logger.info("已完成分类获取成功", {
+        todo_logger.info("已完成分类获取成功", lambda: {
             'trace_id': trace_id,
             'done_category_id': done_category.id,
             'done_category_name': done_category.name
@@ -503,7 +495,7 @@ def done(item_id):
         db.session.commit()
         
         # 记录标记待办事项为已完成成功
-        todo_logger.info("标记待办事项为已完成成功", {
+        todo_logger.info("标记待办事项为已完成成功", lambda: {
             'trace_id': trace_id,
             'original_item_id': item_id,
             'new_item_id': done_item.id,
@@ -544,17 +536,17 @@ def delete_item(item_id):
     trace_id = get_todo_trace_id()
     
     # 记录删除待办事项请求
-    todo_logger.info("删除待办事项请求", {
+    todo_logger.info("删除待办事项请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'item_id': item_id,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     # 检查用户登录状态
-    if session.get('main_islogin') is None:
+    if not get_current_user().islogin:
         # 记录未登录访问尝试
         todo_logger.warning("未登录尝试删除待办事项", {
             'trace_id': trace_id,
@@ -581,7 +573,7 @@ def delete_item(item_id):
         category_card = item.category
         
         # 记录待办事项获取成功
-        todo_logger.info("待办事项获取成功", {
+        todo_logger.info("待办事项获取成功", lambda: {
             'trace_id': trace_id,
             'item_id': item_id,
             'body': item.body,
@@ -594,7 +586,7 @@ def delete_item(item_id):
         db.session.commit()
         
         # 记录删除待办事项成功
-        todo_logger.info("删除待办事项成功", {
+        todo_logger.info("删除待办事项成功", lambda: {
             'trace_id': trace_id,
             'item_id': item_id,
             'category_id': category_card.id
@@ -632,17 +624,17 @@ def delete_category(category_id):
     trace_id = get_todo_trace_id()
     
     # 记录删除分类请求
-    todo_logger.info("删除待办事项分类请求", {
+    todo_logger.info("删除待办事项分类请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'category_id': category_id,
-        'user_id': session.get('userid') if session.get('islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     # 检查用户登录状态
-    if session.get('main_islogin') is None:
+    if not get_current_user().islogin:
         # 记录未登录访问尝试
         todo_logger.warning("未登录尝试删除待办事项分类", {
             'trace_id': trace_id,
@@ -667,7 +659,7 @@ def delete_category(category_id):
             return redirect(f"/todo/category/1")
         
         # 记录分类获取成功
-        todo_logger.info("待办事项分类获取成功", {
+        todo_logger.info("待办事项分类获取成功", lambda: {
             'trace_id': trace_id,
             'category_id': category_id,
             'category_name': category_card.name,
@@ -679,7 +671,7 @@ def delete_category(category_id):
         db.session.commit()
         
         # 记录删除分类成功
-        todo_logger.info("删除待办事项分类成功", {
+        todo_logger.info("删除待办事项分类成功", lambda: {
             'trace_id': trace_id,
             'category_id': category_id
         })
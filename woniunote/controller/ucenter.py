@@ -1,30 +1,26 @@
-from flask import Blueprint, render_template, session, redirect, url_for, request
-import uuid
-from datetime import datetime, UTC
+from flask import Blueprint, render_template, redirect, url_for, request
+import math
 
 from woniunote.module.articles import Articles
 from woniunote.module.comments import Comments
 from woniunote.module.favorites import Favorites
-from woniunote.module.users import Users
 from woniunote.module.credits import Credits
 from woniunote.common.database import ARTICLE_TYPES
+from woniunote.common.utils import pair_with_articles
 from woniunote.common.simple_logger import SimpleLogger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 
 ucenter = Blueprint("ucenter", __name__)
 
 # 初始化用户中心模块日志记录器
 ucenter_logger = SimpleLogger('ucenter')
 
-# 生成用户中心模块跟踪ID的函数
+# 用户中心收藏列表每页显示的数量
+FAVORITES_PAGE_SIZE = 20
+
 def get_ucenter_trace_id():
-    """生成用户中心模块的跟踪ID
-    
-    Returns:
-        str: 格式为 'ucenter_yyyyMMdd_uuid' 的跟踪ID
-    """
-    now = datetime.now(UTC)
-    date_str = now.strftime('%Y%m%d')
-    return f"ucenter_{date_str}_{str(uuid.uuid4())[:8]}"
+    return get_trace_id()
 
 
 @ucenter.route('/ucenter')
@@ -40,17 +36,17 @@ def user_center():
     trace_id = get_ucenter_trace_id()
     
     # 记录用户中心访问请求
-    ucenter_logger.info("用户中心访问请求", {
+    ucenter_logger.info("用户中心访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
         # 检查用户登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             # 记录未登录访问尝试
             ucenter_logger.warning("未登录访问用户中心", {
                 'trace_id': trace_id,
@@ -60,73 +56,50 @@ def user_center():
             return redirect(url_for('index.home'))
         
         # 获取用户ID
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         if not userid:
             # 记录用户ID不存在
             ucenter_logger.warning("用户ID不存在", {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'path': request.path,
-                'session_data': str(session)
+                'current_user': get_current_user().to_dict()
             })
             return redirect(url_for('index.home'))
         
         # 记录开始查询用户收藏
-        ucenter_logger.info("查询用户收藏", {
+        ucenter_logger.info("查询用户收藏", lambda: {
             'trace_id': trace_id,
             'user_id': userid
         })
         
-        # 获取用户收藏
-        favorites = Favorites().find_by_userid(userid)
+        # 分页获取用户收藏及对应文章，一次连接查询完成
+        page = max(request.args.get('page', 1, type=int), 1)
+        start = (page - 1) * FAVORITES_PAGE_SIZE
+        result = Favorites.find_favorites_with_articles(userid, start, FAVORITES_PAGE_SIZE)
+        total = math.ceil(Favorites.get_count_by_userid(userid) / FAVORITES_PAGE_SIZE)
         
-        if favorites:
-            # 记录收藏查询结果
-            ucenter_logger.info("用户收藏查询结果", {
-                'trace_id': trace_id,
-                'user_id': userid,
-                'favorites_count': len(favorites)
-            })
-            
-            # 获取收藏文章的详细信息
-            article_ids = [f.articleid for f in favorites]
-            articles = Articles.find_by_ids(article_ids)
-            
-            # 记录文章查询结果
-            ucenter_logger.info("收藏文章查询结果", {
-                'trace_id': trace_id,
-                'user_id': userid,
-                'article_ids': article_ids,
-                'articles_count': len(articles) if articles else 0
-            })
-            
-            # 关联收藏和文章
-            result = []
-            for fav in favorites:
-                for art in articles:
-                    if fav.articleid == art.articleid:
-                        result.append((fav, art))
-                        break
-        else:
-            # 记录没有收藏
-            ucenter_logger.info("用户没有收藏", {
-                'trace_id': trace_id,
-                'user_id': userid
-            })
-            result = []
+        # 记录收藏查询结果
+        ucenter_logger.info("用户收藏查询结果", lambda: {
+            'trace_id': trace_id,
+            'user_id': userid,
+            'page': page,
+            'favorites_count': len(result),
+            'total_pages': total
+        })
         
         # 记录最终结果
-        ucenter_logger.info("用户中心收藏列表生成成功", {
+        ucenter_logger.info("用户中心收藏列表生成成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'result_count': len(result)
         })
         
         # 渲染模板
-        content = render_template("user-center.html", result=result)
+        content = render_template("user-center.html", result=result, page=page, total=total)
         
         # 记录渲染成功
-        ucenter_logger.info("用户中心页面渲染成功", {
+        ucenter_logger.info("用户中心页面渲染成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'content_length': len(content) if content else 0
@@ -137,7 +110,7 @@ def user_center():
         # 记录异常
         ucenter_logger.error("用户中心访问异常", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
@@ -157,17 +130,17 @@ def user_article():
     trace_id = get_ucenter_trace_id()
     
     # 记录用户文章列表访问请求
-    ucenter_logger.info("用户文章列表访问请求", {
+    ucenter_logger.info("用户文章列表访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
         # 检查用户登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             # 记录未登录访问尝试
             ucenter_logger.warning("未登录访问用户文章列表", {
                 'trace_id': trace_id,
@@ -177,19 +150,19 @@ def user_article():
             return redirect(url_for('index.home'))
         
         # 获取用户ID
-        userid = session.get("main_userid")
+        userid = get_current_user().userid
         if not userid:
             # 记录用户ID不存在
             ucenter_logger.warning("用户ID不存在", {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'path': request.path,
-                'session_data': str(session)
+                'current_user': get_current_user().to_dict()
             })
             return redirect(url_for('index.home'))
         
         # 记录开始查询用户文章
-        ucenter_logger.info("查询用户文章", {
+        ucenter_logger.info("查询用户文章", lambda: {
             'trace_id': trace_id,
             'user_id': userid
         })
@@ -201,7 +174,7 @@ def user_article():
         result = [(None, article) for article in articles] if articles else []
         
         # 记录文章查询结果
-        ucenter_logger.info("用户文章查询结果", {
+        ucenter_logger.info("用户文章查询结果", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'articles_count': len(articles) if articles else 0,
@@ -212,7 +185,7 @@ def user_article():
         content = render_template("user-center.html", result=result)
         
         # 记录渲染成功
-        ucenter_logger.info("用户文章列表页面渲染成功", {
+        ucenter_logger.info("用户文章列表页面渲染成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'content_length': len(content) if content else 0
@@ -223,7 +196,7 @@ def user_article():
         # 记录异常
         ucenter_logger.error("用户文章列表访问异常", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
@@ -243,17 +216,17 @@ def user_comment():
     trace_id = get_ucenter_trace_id()
     
     # 记录用户评论列表访问请求
-    ucenter_logger.info("用户评论列表访问请求", {
+    ucenter_logger.info("用户评论列表访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
         # 检查用户登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             # 记录未登录访问尝试
             ucenter_logger.warning("未登录访问用户评论列表", {
                 'trace_id': trace_id,
@@ -263,19 +236,19 @@ def user_comment():
             return redirect(url_for('index.home'))
         
         # 获取用户ID
-        userid = session.get("main_userid")
+        userid = get_current_user().userid
         if not userid:
             # 记录用户ID不存在
             ucenter_logger.warning("用户ID不存在", {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'path': request.path,
-                'session_data': str(session)
+                'current_user': get_current_user().to_dict()
             })
             return redirect(url_for('index.home'))
         
         # 记录开始查询用户评论
-        ucenter_logger.info("查询用户评论", {
+        ucenter_logger.info("查询用户评论", lambda: {
             'trace_id': trace_id,
             'user_id': userid
         })
@@ -285,7 +258,7 @@ def user_comment():
         
         if comments:
             # 记录评论查询结果
-            ucenter_logger.info("用户评论查询结果", {
+            ucenter_logger.info("用户评论查询结果", lambda: {
                 'trace_id': trace_id,
                 'user_id': userid,
                 'comments_count': len(comments)
@@ -295,7 +268,7 @@ def user_comment():
             article_ids = list(set(c.articleid for c in comments))
             
             # 记录开始查询相关文章
-            ucenter_logger.info("查询评论相关文章", {
+            ucenter_logger.info("查询评论相关文章", lambda: {
                 'trace_id': trace_id,
                 'user_id': userid,
                 'article_ids': article_ids,
@@ -303,27 +276,27 @@ def user_comment():
             })
             
             # 获取相关文章
-            articles = Articles.find_by_ids(article_ids)
+            articles = Articles.find_summaries_by_ids(article_ids)
             
             # 记录文章查询结果
-            ucenter_logger.info("评论相关文章查询结果", {
+            ucenter_logger.info("评论相关文章查询结果", lambda: {
                 'trace_id': trace_id,
                 'user_id': userid,
                 'articles_count': len(articles) if articles else 0
             })
             
-            # 关联评论和文章
-            result = [(comment, article) for comment, article in zip(comments, articles)]
+            # 按文章编号关联评论和文章
+            result = pair_with_articles(comments, articles)
         else:
             # 记录没有评论
-            ucenter_logger.info("用户没有评论", {
+            ucenter_logger.info("用户没有评论", lambda: {
                 'trace_id': trace_id,
                 'user_id': userid
             })
             result = []
         
         # 记录最终结果
-        ucenter_logger.info("用户评论列表生成成功", {
+        ucenter_logger.info("用户评论列表生成成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'result_count': len(result)
@@ -333,7 +306,7 @@ def user_comment():
         content = render_template("user-center.html", result=result)
         
         # 记录渲染成功
-        ucenter_logger.info("用户评论列表页面渲染成功", {
+        ucenter_logger.info("用户评论列表页面渲染成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'content_length': len(content) if content else 0
@@ -344,7 +317,7 @@ def user_comment():
         # 记录异常
         ucenter_logger.error("用户评论列表访问异常", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
@@ -364,17 +337,17 @@ def user_info():
     trace_id = get_ucenter_trace_id()
     
     # 记录用户信息页面访问请求
-    ucenter_logger.info("用户信息页面访问请求", {
+    ucenter_logger.info("用户信息页面访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
         # 检查用户登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             # 记录未登录访问尝试
             ucenter_logger.warning("未登录访问用户信息页面", {
                 'trace_id': trace_id,
@@ -384,25 +357,25 @@ def user_info():
             return redirect(url_for('index.home'))
         
         # 获取用户ID
-        userid = session.get("main_userid")
+        userid = get_current_user().userid
         if not userid:
             # 记录用户ID不存在
             ucenter_logger.warning("用户ID不存在", {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'path': request.path,
-                'session_data': str(session)
+                'current_user': get_current_user().to_dict()
             })
             return redirect(url_for('index.home'))
         
         # 记录开始查询用户信息
-        ucenter_logger.info("查询用户信息", {
+        ucenter_logger.info("查询用户信息", lambda: {
             'trace_id': trace_id,
             'user_id': userid
         })
         
         # 获取用户信息
-        user = Users().find_by_userid(userid)
+        user = get_current_user().user
         
         # 检查用户是否存在
         if not user:
@@ -414,7 +387,7 @@ def user_info():
             return redirect(url_for('index.home'))
         
         # 记录用户信息查询成功
-        ucenter_logger.info("用户信息查询成功", {
+        ucenter_logger.info("用户信息查询成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'username': user.username,
@@ -425,7 +398,7 @@ def user_info():
         content = render_template("user-info.html", user=user)
         
         # 记录渲染成功
-        ucenter_logger.info("用户信息页面渲染成功", {
+        ucenter_logger.info("用户信息页面渲染成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'content_length': len(content) if content else 0
@@ -436,7 +409,7 @@ def user_info():
         # 记录异常
         ucenter_logger.error("用户信息页面访问异常", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
@@ -456,17 +429,17 @@ def user_credit():
     trace_id = get_ucenter_trace_id()
     
     # 记录用户积分页面访问请求
-    ucenter_logger.info("用户积分页面访问请求", {
+    ucenter_logger.info("用户积分页面访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
         # 检查用户登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             # 记录未登录访问尝试
             ucenter_logger.warning("未登录访问用户积分页面", {
                 'trace_id': trace_id,
@@ -476,19 +449,19 @@ def user_credit():
             return redirect(url_for('index.home'))
         
         # 获取用户ID
-        userid = session.get("main_userid")
+        userid = get_current_user().userid
         if not userid:
             # 记录用户ID不存在
             ucenter_logger.warning("用户ID不存在", {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'path': request.path,
-                'session_data': str(session)
+                'current_user': get_current_user().to_dict()
             })
             return redirect(url_for('index.home'))
         
         # 记录开始查询用户积分
-        ucenter_logger.info("查询用户积分", {
+        ucenter_logger.info("查询用户积分", lambda: {
             'trace_id': trace_id,
             'user_id': userid
         })
@@ -497,7 +470,7 @@ def user_credit():
         credits = Credits().find_by_userid(userid)
         
         # 记录积分查询结果
-        ucenter_logger.info("用户积分查询结果", {
+        ucenter_logger.info("用户积分查询结果", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'credits_count': len(credits) if credits else 0
@@ -507,7 +480,7 @@ def user_credit():
         content = render_template("user-credit.html", credits=credits)
         
         # 记录渲染成功
-        ucenter_logger.info("用户积分页面渲染成功", {
+        ucenter_logger.info("用户积分页面渲染成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'content_length': len(content) if content else 0
@@ -518,7 +491,7 @@ def user_credit():
         # 记录异常
         ucenter_logger.error("用户积分页面访问异常", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
@@ -538,18 +511,18 @@ def user_draft():
     trace_id = get_ucenter_trace_id()
     
     # 记录用户草稿列表访问请求
-    ucenter_logger.info("用户草稿列表访问请求", {
+    ucenter_logger.info("用户草稿列表访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None,
-        'role': session.get('main_role')
+        'user_id': get_current_user().userid,
+        'role': get_current_user().role
     })
     
     try:
         # 检查用户登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             # 记录未登录访问尝试
             ucenter_logger.warning("未登录访问用户草稿列表", {
                 'trace_id': trace_id,
@@ -559,30 +532,30 @@ def user_draft():
             return redirect(url_for('index.home'))
         
         # 获取用户ID
-        userid = session.get("main_userid")
+        userid = get_current_user().userid
         if not userid:
             # 记录用户ID不存在
             ucenter_logger.warning("用户ID不存在", {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'path': request.path,
-                'session_data': str(session)
+                'current_user': get_current_user().to_dict()
             })
             return redirect(url_for('index.home'))
         
         # 检查用户角色
-        if session.get('main_role') != 'editor':
+        if get_current_user().role != 'editor':
             # 记录非编辑角色访问尝试
             ucenter_logger.warning("非编辑角色访问草稿列表", {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'user_id': userid,
-                'role': session.get('main_role')
+                'role': get_current_user().role
             })
             return redirect(url_for('index.home'))
         
         # 记录开始查询用户草稿
-        ucenter_logger.info("查询用户草稿", {
+        ucenter_logger.info("查询用户草稿", lambda: {
             'trace_id': trace_id,
             'user_id': userid
         })
@@ -594,7 +567,7 @@ def user_draft():
         result = [(None, draft) for draft in drafts] if drafts else []
         
         # 记录草稿查询结果
-        ucenter_logger.info("用户草稿查询结果", {
+        ucenter_logger.info("用户草稿查询结果", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'drafts_count': len(drafts) if drafts else 0,
@@ -605,7 +578,7 @@ def user_draft():
         content = render_template("user-center.html", result=result)
         
         # 记录渲染成功
-        ucenter_logger.info("用户草稿列表页面渲染成功", {
+        ucenter_logger.info("用户草稿列表页面渲染成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'content_length': len(content) if content else 0
@@ -616,7 +589,7 @@ def user_draft():
         # 记录异常
         ucenter_logger.error("用户草稿列表访问异常", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
@@ -636,18 +609,18 @@ def user_post():
     trace_id = get_ucenter_trace_id()
     
     # 记录用户发布文章页面访问请求
-    ucenter_logger.info("用户发布文章页面访问请求", {
+    ucenter_logger.info("用户发布文章页面访问请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
-        'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None,
-        'role': session.get('main_role')
+        'user_id': get_current_user().userid,
+        'role': get_current_user().role
     })
     
     try:
         # 检查用户登录状态
-        if session.get('main_islogin') != 'true':
+        if not get_current_user().islogin:
             # 记录未登录访问尝试
             ucenter_logger.warning("未登录访问用户发布文章页面", {
                 'trace_id': trace_id,
@@ -657,19 +630,19 @@ def user_post():
             return redirect(url_for('index'))
         
         # 获取用户ID
-        userid = session.get("main_userid")
+        userid = get_current_user().userid
         if not userid:
             # 记录用户ID不存在
             ucenter_logger.warning("用户ID不存在", {
                 'trace_id': trace_id,
                 'remote_addr': request.remote_addr,
                 'path': request.path,
-                'session_data': str(session)
+                'current_user': get_current_user().to_dict()
             })
             return redirect(url_for('index.home'))
         
         # 记录准备发布文章页面
-        ucenter_logger.info("准备发布文章页面", {
+        ucenter_logger.info("准备发布文章页面", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'article_types_count': len(ARTICLE_TYPES) if ARTICLE_TYPES else 0
@@ -679,7 +652,7 @@ def user_post():
         content = render_template("user-post.html", article_type=ARTICLE_TYPES, result=[{'type': None}])
         
         # 记录渲染成功
-        ucenter_logger.info("用户发布文章页面渲染成功", {
+        ucenter_logger.info("用户发布文章页面渲染成功", lambda: {
             'trace_id': trace_id,
             'user_id': userid,
             'content_length': len(content) if content else 0
@@ -690,7 +663,7 @@ def user_post():
         # 记录异常
         ucenter_logger.error("用户发布文章页面访问异常", {
             'trace_id': trace_id,
-            'user_id': session.get('main_userid'),
+            'user_id': get_current_user().userid,
             'error': str(e),
             'error_type': type(e).__name__
         })
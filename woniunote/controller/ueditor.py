@@ -1,26 +1,20 @@
 import time
-import uuid
 import os
 
-from flask import Blueprint, render_template, request, jsonify, session
+from flask import Blueprint, render_template, request, jsonify
 import traceback
 from woniunote.common.utils import compress_image
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 
 ueditor = Blueprint("ueditor", __name__)
 
 # 初始化日志记录器
 ueditor_logger = get_simple_logger('ueditor')
 
-# 生成唯一的跟踪ID
 def get_ueditor_trace_id():
-    """
-    生成唯一的跟踪ID用于日志关联
-    
-    Returns:
-        str: 唯一的跟踪ID
-    """
-    return f"ueditor_{uuid.uuid4().hex}"
+    return get_trace_id()
 
 
 @ueditor.route('/uedit', methods=['GET', 'POST'])
@@ -37,13 +31,13 @@ def uedit():
     trace_id = get_ueditor_trace_id()
     
     # 记录UEditor请求
-    ueditor_logger.info("UEditor请求", {
+    ueditor_logger.info("UEditor请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'method': request.method,
         'path': request.path,
         'action': request.args.get('action'),
-        'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+        'user_id': get_current_user().userid
     })
     
     try:
@@ -53,7 +47,7 @@ def uedit():
         
         # 处理配置请求
         if request.method == 'GET' and param == 'config':
-            ueditor_logger.info("请求UEditor配置", {
+            ueditor_logger.info("请求UEditor配置", lambda: {
                 'trace_id': trace_id,
                 'action': 'config'
             })
@@ -61,7 +55,7 @@ def uedit():
             config_json = 'config.json'
             response = render_template(config_json)
             
-            ueditor_logger.info("返回UEditor配置成功", {
+            ueditor_logger.info("返回UEditor配置成功", lambda: {
                 'trace_id': trace_id,
                 'config_file': config_json,
                 'response_length': len(response) if response else 0
@@ -71,7 +65,7 @@ def uedit():
 
         # 构造上传图片的接口
         elif request.method == 'POST' and request.args.get('action') == 'uploadimage':
-            ueditor_logger.info("开始上传图片", {
+            ueditor_logger.info("开始上传图片", lambda: {
                 'trace_id': trace_id,
                 'action': 'uploadimage',
                 'content_length': request.content_length,
@@ -82,7 +76,7 @@ def uedit():
             f = request.files['upfile']
             filename = f.filename
             
-            ueditor_logger.info("接收到图片文件", {
+            ueditor_logger.info("接收到图片文件", lambda: {
                 'trace_id': trace_id,
                 'filename': filename,
                 'file_size': f.content_length if hasattr(f, 'content_length') else -1
@@ -96,7 +90,7 @@ def uedit():
             # 保存图片
             try:
                 f.save(save_path)
-                ueditor_logger.info("图片保存成功", {
+                ueditor_logger.info("图片保存成功", lambda: {
                     'trace_id': trace_id,
                     'original_filename': filename,
                     'new_filename': newname,
@@ -117,7 +111,7 @@ def uedit():
             source = dest = save_path
             try:
                 compress_image(source, dest, 1200)
-                ueditor_logger.info("图片压缩成功", {
+                ueditor_logger.info("图片压缩成功", lambda: {
                     'trace_id': trace_id,
                     'source': source,
                     'dest': dest,
@@ -137,7 +131,7 @@ def uedit():
             # 构造响应数据
             result = {'state': 'SUCCESS', "url": f"/upload/{newname}", 'title': filename, 'original': filename}
             
-            ueditor_logger.info("图片上传完成", {
+            ueditor_logger.info("图片上传完成", lambda: {
                 'trace_id': trace_id,
                 'url': f"/upload/{newname}",
                 'title': filename,
@@ -149,7 +143,7 @@ def uedit():
 
         # 列出所有图片给前端浏览
         elif request.method == 'GET' and param == 'listimage':
-            ueditor_logger.info("请求图片列表", {
+            ueditor_logger.info("请求图片列表", lambda: {
                 'trace_id': trace_id,
                 'action': 'listimage'
             })
@@ -164,7 +158,7 @@ def uedit():
                     if filename.lower().endswith('.png') or filename.lower().endswith('.jpg'):
                         m_list.append({'url': '/upload/%s' % filename})
                 
-                ueditor_logger.info("读取图片列表成功", {
+                ueditor_logger.info("读取图片列表成功", lambda: {
                     'trace_id': trace_id,
                     'total_files': len(filelist),
                     'image_count': len(m_list)
@@ -181,7 +175,7 @@ def uedit():
             # 根据listimage接口规则构建响应数据
             result = {'state': 'SUCCESS', 'list': m_list, 'start': 0, 'total': len(m_list)}
             
-            ueditor_logger.info("返回图片列表", {
+            ueditor_logger.info("返回图片列表", lambda: {
                 'trace_id': trace_id,
                 'state': 'SUCCESS',
                 'image_count': len(m_list),
@@ -3,27 +3,21 @@ import re
 import traceback
 import uuid
 from flask import Blueprint, make_response, session, request, url_for, jsonify
-from woniunote.common.redisdb import redis_connect
+from woniunote.common.redisdb import redis_connect, find_cached_user
 from woniunote.common.utils import ImageCode, gen_email_code, send_email
 from woniunote.module.credits import Credits
 from woniunote.module.users import Users
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user, login_user, logout_user
 
 user = Blueprint('user', __name__)
 
 # 初始化日志记录器
 user_logger = get_simple_logger('user_controller')
 
-# 生成跟踪ID
-def generate_user_trace_id():
-    return str(uuid.uuid4())
-
-# 获取当前跟踪ID
-_user_thread_local_trace_id = {}
 def get_user_trace_id():
-    if 'trace_id' not in _user_thread_local_trace_id:
-        _user_thread_local_trace_id['trace_id'] = generate_user_trace_id()
-    return _user_thread_local_trace_id['trace_id']
+    return get_trace_id()
 
 
 @user.route('/vcode')
@@ -32,7 +26,7 @@ def vcode():
     trace_id = get_user_trace_id()
     
     # 记录请求验证码
-    user_logger.info("请求图形验证码", {
+    user_logger.info("请求图形验证码", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string
@@ -45,7 +39,7 @@ def vcode():
         session['vcode'] = code.lower()
         
         # 记录生成验证码成功
-        user_logger.info("生成图形验证码成功", {
+        user_logger.info("生成图形验证码成功", lambda: {
             'trace_id': trace_id
         })
         
@@ -66,7 +60,7 @@ def ecode():
     trace_id = get_user_trace_id()
     
     # 记录请求邮箱验证码
-    user_logger.info("请求邮箱验证码", {
+    user_logger.info("请求邮箱验证码", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string
@@ -76,7 +70,7 @@ def ecode():
         email = request.form.get('email')
         
         # 记录邮箱信息
-        user_logger.info("邮箱验证码请求信息", {
+        user_logger.info("邮箱验证码请求信息", lambda: {
             'trace_id': trace_id,
             'email': email
         })
@@ -95,7 +89,7 @@ def ecode():
             session['ecode'] = code  # 将邮箱验证码保存在Session中
             
             # 记录发送邮箱验证码成功
-            user_logger.info("发送邮箱验证码成功", {
+            user_logger.info("发送邮箱验证码成功", lambda: {
                 'trace_id': trace_id,
                 'email': email
             })
@@ -126,7 +120,7 @@ def register():
     trace_id = get_user_trace_id()
     
     # 记录用户注册请求
-    user_logger.info("用户注册请求", {
+    user_logger.info("用户注册请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string
@@ -139,7 +133,7 @@ def register():
         ecode_ = request.form.get('ecode').strip()
         
         # 记录注册信息（不记录密码）
-        user_logger.info("用户注册信息", {
+        user_logger.info("用户注册信息", lambda: {
             'trace_id': trace_id,
             'username': username,
             'password_length': len(password)
@@ -182,7 +176,7 @@ def register():
             result = user_instance.do_register(username, password)
             
             # 记录注册成功
-            user_logger.info("用户注册成功", {
+            user_logger.info("用户注册成功", lambda: {
                 'trace_id': trace_id,
                 'username': username,
                 'userid': result.userid,
@@ -190,17 +184,13 @@ def register():
                 'role': result.role
             })
             
-            session['islogin'] = 'true'
-            session['userid'] = result.userid
-            session['username'] = username
-            session['nickname'] = result.nickname
-            session['role'] = result.role
+            login_user(result, source='register')
             
             # 更新积分详情表
             Credits().insert_detail(credit_type='用户注册', target='0', credit=50)
             
             # 记录积分更新
-            user_logger.info("用户注册积分更新", {
+            user_logger.info("用户注册积分更新", lambda: {
                 'trace_id': trace_id,
                 'username': username,
                 'userid': result.userid,
@@ -225,7 +215,7 @@ def login():
     trace_id = get_user_trace_id()
     
     # 记录登录请求
-    user_logger.info("用户登录请求", {
+    user_logger.info("用户登录请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string
@@ -238,7 +228,7 @@ def login():
         vcode = request.form.get('vcode')
         
         # 记录登录尝试（不记录密码）
-        user_logger.info("登录尝试", {
+        user_logger.info("登录尝试", lambda: {
             'trace_id': trace_id,
             'username': username,
             'has_password': bool(password),
@@ -261,7 +251,7 @@ def login():
         result = user_.find_by_username(username)
         
         # 记录数据库查询结果
-        user_logger.info("用户数据库查询结果", {
+        user_logger.info("用户数据库查询结果", lambda: {
             'trace_id': trace_id,
             'username': username,
             'user_found': len(result) > 0
@@ -272,7 +262,7 @@ def login():
             if result[0].password == password:
                 # 记录登录成功
                 session_id = str(uuid.uuid4())
-                user_logger.info("登录成功", {
+                user_logger.info("登录成功", lambda: {
                     'trace_id': trace_id,
                     'username': username,
                     'userid': result[0].userid,
@@ -283,11 +273,7 @@ def login():
                 
                 # 设置session
                 session['main_session_id'] = session_id
-                session['main_islogin'] = 'true'
-                session['main_userid'] = result[0].userid
-                session['main_username'] = username
-                session['main_nickname'] = result[0].nickname
-                session['main_role'] = result[0].role
+                login_user(result[0])
                 return 'login-pass'
             else:
                 # 记录密码错误
@@ -319,7 +305,7 @@ def logout():
     trace_id = get_user_trace_id()
     
     # 记录登出请求
-    user_logger.info("用户登出请求", {
+    user_logger.info("用户登出请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string,
@@ -328,33 +314,20 @@ def logout():
     
     try:
         # 记录登出前的会话信息
-        user_info = {
-            'userid': session.get('main_userid'),
-            'username': session.get('main_username'),
-            'nickname': session.get('main_nickname'),
-            'role': session.get('main_role'),
-            'session_id': session.get('main_session_id')
-        }
+        current_user = get_current_user()
+        user_info = dict(current_user.to_dict(), session_id=session.get('main_session_id'))
         
-        user_logger.info("登出前的会话信息", {
+        user_logger.info("登出前的会话信息", lambda: {
             'trace_id': trace_id,
             'user_info': user_info,
-            'is_logged_in': session.get('main_islogin') == 'true'
+            'is_logged_in': current_user.islogin
         })
         
-        # 清除主系统的session
-        session.pop('main_session_id', None)
-        session.pop('main_islogin', None)
-        session.pop('main_userid', None)
-        session.pop('main_username', None)
-        session.pop('main_nickname', None)
-        session.pop('main_role', None)
-        
-        # 确保 session 被修改
-        session.modified = True
+        # 清除所有键名的登录信息
+        logout_user()
         
         # 记录登出成功
-        user_logger.info("用户登出成功", {
+        user_logger.info("用户登出成功", lambda: {
             'trace_id': trace_id,
             'previous_user_info': user_info
         })
@@ -376,23 +349,19 @@ def loginfo():
     trace_id = get_user_trace_id()
     
     # 记录查询登录信息请求
-    user_logger.info("查询登录信息请求", {
+    user_logger.info("查询登录信息请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string
     })
     
     try:
-        if session.get('main_islogin') == 'true':
-            user_info = {
-                'userid': session.get('main_userid'),
-                'username': session.get('main_username'),
-                'nickname': session.get('main_nickname'),
-                'role': session.get('main_role')
-            }
+        current_user = get_current_user()
+        if current_user.islogin:
+            user_info = current_user.to_dict()
             
             # 记录已登录用户信息
-            user_logger.info("用户已登录", {
+            user_logger.info("用户已登录", lambda: {
                 'trace_id': trace_id,
                 'user_info': user_info
             })
@@ -400,7 +369,7 @@ def loginfo():
             return jsonify(user_info)
         
         # 记录用户未登录
-        user_logger.info("用户未登录", {
+        user_logger.info("用户未登录", lambda: {
             'trace_id': trace_id
         })
         
@@ -422,7 +391,7 @@ def redis_code():
     trace_id = get_user_trace_id()
     
     # 记录Redis验证码请求
-    user_logger.info("Redis验证码请求", {
+    user_logger.info("Redis验证码请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string
@@ -432,7 +401,7 @@ def redis_code():
         username = request.form.get('username').strip()
         
         # 记录用户名信息
-        user_logger.info("Redis验证码用户信息", {
+        user_logger.info("Redis验证码用户信息", lambda: {
             'trace_id': trace_id,
             'username': username
         })
@@ -443,7 +412,7 @@ def redis_code():
         red.expire(username, 30)  # 设置username变量的有效期为30秒
         
         # 记录Redis操作成功
-        user_logger.info("Redis验证码设置成功", {
+        user_logger.info("Redis验证码设置成功", lambda: {
             'trace_id': trace_id,
             'username': username,
             'expire_seconds': 30
@@ -468,7 +437,7 @@ def redis_reg():
     trace_id = get_user_trace_id()
     
     # 记录Redis验证注册请求
-    user_logger.info("Redis验证注册请求", {
+    user_logger.info("Redis验证注册请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string
@@ -480,7 +449,7 @@ def redis_reg():
         ecode_ = request.form.get('ecode').lower().strip()
         
         # 记录注册信息（不记录密码）
-        user_logger.info("Redis验证注册信息", {
+        user_logger.info("Redis验证注册信息", lambda: {
             'trace_id': trace_id,
             'username': username,
             'password_length': len(_password),
@@ -492,7 +461,7 @@ def redis_reg():
             code = red.get(username).lower()
             
             # 记录Redis获取验证码成功
-            user_logger.info("Redis获取验证码成功", {
+            user_logger.info("Redis获取验证码成功", lambda: {
                 'trace_id': trace_id,
                 'username': username,
                 'code_match': code == ecode_
@@ -500,7 +469,7 @@ def redis_reg():
             
             if code == ecode_:
                 # 记录验证码正确
-                user_logger.info("Redis验证码验证成功", {
+                user_logger.info("Redis验证码验证成功", lambda: {
                     'trace_id': trace_id,
                     'username': username
                 })
@@ -540,7 +509,7 @@ def redis_login():
     trace_id = get_user_trace_id()
     
     # 记录Redis登录请求
-    user_logger.info("Redis登录请求", {
+    user_logger.info("Redis登录请求", lambda: {
         'trace_id': trace_id,
         'remote_addr': request.remote_addr,
         'user_agent': request.user_agent.string
@@ -553,7 +522,7 @@ def redis_login():
         password = request.form.get('password').strip()
         
         # 记录登录尝试（不记录密码）
-        user_logger.info("Redis登录尝试", {
+        user_logger.info("Redis登录尝试", lambda: {
             'trace_id': trace_id,
             'username': username,
             'has_password': bool(password)
@@ -562,16 +531,16 @@ def redis_login():
         password = hashlib.md5(password.encode()).hexdigest()
 
         try:
-            result = red.hget('users_hash', username)
+            user_result = find_cached_user(red, username)
             
             # 记录Redis查询结果
-            user_logger.info("Redis用户查询结果", {
+            user_logger.info("Redis用户查询结果", lambda: {
                 'trace_id': trace_id,
                 'username': username,
-                'user_found': bool(result)
+                'user_found': bool(user_result)
             })
             
-            if not result:
+            if not user_result:
                 # 记录用户不存在
                 user_logger.warning("Redis用户不存在", {
                     'trace_id': trace_id,
@@ -579,10 +548,9 @@ def redis_login():
                 })
                 return '用户名不存在'
             
-            user_result = eval(result)
             if password == user_result['password']:
                 # 记录登录成功
-                user_logger.info("Redis登录成功", {
+                user_logger.info("Redis登录成功", lambda: {
                     'trace_id': trace_id,
                     'username': username
                 })
@@ -1,29 +1,139 @@
 import time
 import traceback
-import uuid
-from flask import session
-from sqlalchemy import Table, Column, Integer, String, Text, DateTime, func, ForeignKey
+from sqlalchemy import Table, Column, Integer, String, Text, DateTime, func, case, ForeignKey, select, literal, union_all
 from sqlalchemy.orm import relationship
 from woniunote.common.database import dbconnect
 from woniunote.module.users import Users
 from woniunote.common.create_database import Article
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.utils import make_summary
+from woniunote.common.article_cache import get_article_cache, CachedArticle
+from woniunote.common.read_counter import get_read_counter
+from woniunote.common.sidebar import get_sidebar_cache
+from woniunote.common.article_counters import get_article_counters, make_state
+from woniunote.common.search_index import get_search_index
+from woniunote.common.redis_index import get_redis_index, article_cache_row
+from woniunote.common.user_context import get_current_user
+from woniunote.common.page_cache import get_page_cache
+from woniunote.common.static_site import get_static_site
 
 # 初始化日志记录器
 articles_logger = get_simple_logger('articles')
 
-# 生成唯一的跟踪ID
 def get_articles_trace_id():
-    """
-    生成唯一的跟踪ID用于日志关联
-    
-    Returns:
-        str: 唯一的跟踪ID
-    """
-    return f"articles_{uuid.uuid4().hex}"
+    return get_trace_id()
 
 dbsession, md, DBase = dbconnect()
 
+# 列表页需要的文章字段（不包含content大字段），用于首页等列表查询
+ARTICLE_LIST_COLUMNS = (
+    Article.articleid, Article.userid, Article.type, Article.headline, Article.thumbnail,
+    Article.credit, Article.readcount, Article.replycount, Article.createtime
+)
+
+# 后台管理列表额外需要的状态字段
+ARTICLE_STATUS_COLUMNS = (Article.recommended, Article.hidden, Article.drafted, Article.checked)
+
+# 侧边栏（最新、最多阅读、特别推荐）只需要编号和标题
+ARTICLE_HEADLINE_COLUMNS = (Article.articleid, Article.headline)
+
+# 侧边栏特别推荐的候选池大小，每次刷新时从中随机选出展示的文章
+SIDEBAR_RECOMMENDED_POOL_SIZE = 50
+
+# 列表页摘要字段：使用写入文章时生成的纯文本摘要，列表页无需再处理文章HTML
+def article_summary_column():
+    return Article.summary
+
+
+# 文章摘要投影查询：列表字段 + 摘要，content不会被查询和加载
+# 返回的每一行可以像Article对象一样通过属性访问，如row.articleid、row.summary
+def article_summary_query(*extra_columns):
+    return dbsession.query(*ARTICLE_LIST_COLUMNS, article_summary_column(), *extra_columns)
+
+
+# 带作者昵称的文章摘要投影查询，结果需经with_nickname转换为[(row, 'nickname')]
+def article_summary_with_users_query():
+    return article_summary_query(Users.nickname).join(Users, Users.userid == Article.userid)
+
+
+# 将带昵称的投影行转换为模板使用的 (row, nickname) 结构
+def with_nickname(rows):
+    return [(row, row.nickname) for row in rows]
+
+
+def article_count_rows():
+    """按状态和分类分组统计文章数量，用于加载和校正文章计数表"""
+    return dbsession.query(Article.hidden, Article.drafted, Article.checked, Article.type,
+                           func.count(Article.articleid)) \
+        .group_by(Article.hidden, Article.drafted, Article.checked, Article.type).all()
+
+
+def article_count_state(article):
+    """文章在计数表中的状态键"""
+    return make_state(article.hidden, article.drafted, article.checked, article.type)
+
+
+def rows_in_id_order(rows, ids, key=lambda row: row.articleid):
+    """按全文索引返回的编号顺序（相关度）排列查询结果"""
+    position = {articleid: i for i, articleid in enumerate(ids)}
+    return sorted(rows, key=lambda row: position.get(key(row), len(position)))
+
+
+def update_search_index(article):
+    """文章写入后更新全文索引，失败时只记录日志，可通过重建索引修复"""
+    try:
+        get_search_index().index_article(article.articleid, article.headline, article.content,
+                                         article.hidden, article.drafted, article.checked)
+    except Exception as e:
+        articles_logger.error("更新文章搜索索引失败", {
+            'articleid': article.articleid,
+            'error': str(e),
+            'error_type': type(e).__name__
+        })
+
+
+def update_redis_index(article):
+    """文章写入后同步Redis中的文章列表，失败时只记录日志，可通过一致性检查修复"""
+    redis_index = get_redis_index()
+    if not redis_index.enabled:
+        return
+    try:
+        nickname = dbsession.query(Users.nickname).filter(Users.userid == article.userid).scalar()
+        redis_index.sync(article_cache_row(article, nickname))
+    except Exception as e:
+        articles_logger.error("同步Redis文章索引失败", {
+            'articleid': article.articleid,
+            'error': str(e),
+            'error_type': type(e).__name__
+        })
+
+
+def purge_article_pages(article, listing_changed=True, old_type=None):
+    """文章写入后使页面缓存中相关的页面失效并安排重新生成静态页面，listing_changed表示文章是否进出了列表或改变了位置"""
+    get_page_cache().purge_article(article.articleid, article.type, listing_changed, old_type)
+    get_static_site().schedule(article.articleid, article.type, listing_changed, old_type)
+
+
+def article_cache_batches(batch_size=500):
+    """按编号顺序分批读取全部文章的Redis缓存字典，用于重建和检查Redis文章索引"""
+    last_id = 0
+    while True:
+        rows = article_summary_query(Article.recommended, Article.hidden, Article.drafted, Article.checked,
+                                     Users.nickname) \
+            .join(Users, Users.userid == Article.userid) \
+            .filter(Article.articleid > last_id) \
+            .order_by(Article.articleid).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].articleid
+        yield [article_cache_row(row, row.nickname) for row in rows]
+
+
+# 后台管理列表投影查询：列表字段 + 状态字段，不含content
+def article_admin_query():
+    return dbsession.query(*ARTICLE_LIST_COLUMNS, *ARTICLE_STATUS_COLUMNS)
+
 
 class Articles(DBase):
     __table__ = Table(
@@ -33,6 +143,7 @@ class Articles(DBase):
         Column('type', Integer, nullable=False),
         Column('headline', String(100), nullable=False),
         Column('content', Text(16777216)),
+        Column('summary', String(255)),
         Column('thumbnail', String(30)),
         Column('credit', Integer, default=0),
         Column('readcount', Integer, default=0),
@@ -59,7 +170,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始查询所有文章", {
+        articles_logger.info("开始查询所有文章", lambda: {
             'trace_id': trace_id
         })
         
@@ -70,7 +181,7 @@ class Articles(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            articles_logger.info("查询所有文章成功", {
+            articles_logger.info("查询所有文章成功", lambda: {
                 'trace_id': trace_id,
                 'result_count': len(result) if result else 0,
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
@@ -87,24 +198,37 @@ class Articles(DBase):
             traceback.print_exc()
             return []
 
-    # 根据id查询文章，数据格式：(Article, 'nickname')
+    # 根据id查询文章，优先从文章缓存读取，返回文章字段快照CachedArticle
     @staticmethod
     def find_by_id(articleid):
         # 生成跟踪ID
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("根据ID查询文章", {
+        articles_logger.info("根据ID查询文章", lambda: {
             'trace_id': trace_id,
             'articleid': articleid
         })
         
         try:
-            result = dbsession.query(Article).filter_by(articleid=articleid).first()
+            articleid = int(articleid)
+        except (ValueError, TypeError):
+            articles_logger.warning("文章ID参数无效", {
+                'trace_id': trace_id,
+                'articleid': articleid
+            })
+            return None
+        
+        def load_article():
+            row = dbsession.query(Article).filter_by(articleid=articleid).first()
+            return CachedArticle.from_model(row) if row else None
+        
+        try:
+            result = get_article_cache().get(articleid, load_article)
             
             # 记录查询结果
             if result:
-                articles_logger.info("文章查询成功", {
+                articles_logger.info("文章查询成功", lambda: {
                     'trace_id': trace_id,
                     'articleid': articleid,
                     'headline': result.headline,
@@ -140,6 +264,19 @@ class Articles(DBase):
             traceback.print_exc()
             return []
 
+    # 根据多个文章ID查询文章摘要投影（不含content），用于用户中心等列表页
+    @staticmethod
+    def find_summaries_by_ids(articleid_list):
+        try:
+            if not articleid_list:
+                return []
+            result = article_summary_query().filter(Article.articleid.in_(articleid_list)).all()
+            return result
+        except Exception as e:
+            print(e)
+            traceback.print_exc()
+            return []
+
     # 根据用户ID查询文章
     @staticmethod
     def find_by_userid(userid):
@@ -147,7 +284,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始根据用户ID查询文章", {
+        articles_logger.info("开始根据用户ID查询文章", lambda: {
             'trace_id': trace_id,
             'userid': userid
         })
@@ -155,11 +292,12 @@ class Articles(DBase):
         try:
             # 执行查询
             query_start_time = time.time()
-            result = dbsession.query(Article).filter_by(userid=userid, drafted=0).order_by(Article.articleid.desc()).all()
+            result = article_summary_query().filter(Article.userid == userid, Article.drafted == 0) \
+                .order_by(Article.articleid.desc()).all()
             query_end_time = time.time()
             
             # 记录查询结果
-            articles_logger.info("根据用户ID查询文章成功", {
+            articles_logger.info("根据用户ID查询文章成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'result_count': len(result) if result else 0,
@@ -185,7 +323,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始根据用户ID查询草稿", {
+        articles_logger.info("开始根据用户ID查询草稿", lambda: {
             'trace_id': trace_id,
             'userid': userid
         })
@@ -193,11 +331,12 @@ class Articles(DBase):
         try:
             # 执行查询
             query_start_time = time.time()
-            result = dbsession.query(Article).filter_by(userid=userid, drafted=1).order_by(Article.articleid.desc()).all()
+            result = article_summary_query().filter(Article.userid == userid, Article.drafted == 1) \
+                .order_by(Article.articleid.desc()).all()
             query_end_time = time.time()
             
             # 记录查询结果
-            articles_logger.info("根据用户ID查询草稿成功", {
+            articles_logger.info("根据用户ID查询草稿成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'result_count': len(result) if result else 0,
@@ -217,68 +356,49 @@ class Articles(DBase):
             return []
 
     # 指定分页的limit和offset的参数值，同时与用户表做连接查询
+    # 分页直接下推到SQL中执行（ORDER BY articleid DESC LIMIT/OFFSET），且只查询列表页需要的字段，
+    # 不再把整张文章表（包括content大字段）加载到Python中排序和切片
+    # 传入before_id时使用游标分页：查询编号小于before_id的count篇文章，此时忽略start
+    # 返回数据格式：[(row, 'nickname')]，row可通过属性访问列表字段及摘要summary
     @staticmethod
-    def find_limit_with_users(start, count):
+    def find_limit_with_users(start, count, before_id=None):
         # 生成跟踪ID
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始分页查询文章", {
+        articles_logger.info("开始分页查询文章", lambda: {
             'trace_id': trace_id,
             'start': start,
-            'count': count
+            'count': count,
+            'before_id': before_id
         })
         
         try:
-            # 执行连接查询
-            query_start_time = time.time()
-            result = dbsession.query(Article, Users.nickname).join(Users, Users.userid == Article.userid).all()
-            query_end_time = time.time()
-            
-            # 记录查询时间
-            articles_logger.info("文章连接查询完成", {
-                'trace_id': trace_id,
-                'total_results': len(result) if result else 0,
-                'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
-            })
-            
-            # 排序处理
-            sort_start_time = time.time()
-            result = sorted(result, key=lambda row: row[0].articleid, reverse=True)
-            sort_end_time = time.time()
+            query = article_summary_with_users_query()
             
-            # 记录排序时间
-            articles_logger.info("文章排序完成", {
-                'trace_id': trace_id,
-                'sort_time_ms': round((sort_end_time - sort_start_time) * 1000, 2)
-            })
-            
-            # 分页处理
-            begin = start
-            end = start + count
-            
-            if begin == -10:
-                result = result[:count]
-                articles_logger.info("特殊分页处理", {
-                    'trace_id': trace_id,
-                    'special_start': begin,
-                    'result_count': len(result) if result else 0
-                })
+            if before_id is not None:
+                # 游标分页，借助主键索引直接定位，不受页码深度影响
+                query = query.filter(Article.articleid < before_id)
+                offset = 0
             else:
-                result = result[begin:end]
-                articles_logger.info("正常分页处理", {
-                    'trace_id': trace_id,
-                    'begin': begin,
-                    'end': end,
-                    'result_count': len(result) if result else 0
-                })
+                # start为-10是首页的历史调用约定，等同于从第一条开始
+                offset = max(start, 0)
+            
+            # 执行分页查询
+            query_start_time = time.time()
+            rows = query.order_by(Article.articleid.desc()).limit(count).offset(offset).all()
+            query_end_time = time.time()
+            result = with_nickname(rows)
             
             # 记录查询结果
-            articles_logger.info("分页查询文章成功", {
+            articles_logger.info("分页查询文章成功", lambda: {
                 'trace_id': trace_id,
                 'start': start,
                 'count': count,
-                'result_count': len(result) if result else 0
+                'before_id': before_id,
+                'offset': offset,
+                'result_count': len(result),
+                'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
             })
             
             return result
@@ -288,6 +408,7 @@ class Articles(DBase):
                 'trace_id': trace_id,
                 'start': start,
                 'count': count,
+                'before_id': before_id,
                 'error': str(e),
                 'error_type': type(e).__name__
             })
@@ -301,18 +422,18 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录开始统计
-        articles_logger.info("开始统计文章总数", {
+        articles_logger.info("开始统计文章总数", lambda: {
             'trace_id': trace_id
         })
         
         try:
             # 执行统计查询
             query_start_time = time.time()
-            count = dbsession.query(Article).filter(Article.hidden == 0, Article.drafted == 0, Article.checked == 1).count()
+            count = get_article_counters().count(article_count_rows, hidden=0, drafted=0, checked=1)
             query_end_time = time.time()
             
             # 记录统计结果
-            articles_logger.info("统计文章总数成功", {
+            articles_logger.info("统计文章总数成功", lambda: {
                 'trace_id': trace_id,
                 'count': count,
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
@@ -348,7 +469,7 @@ class Articles(DBase):
             return []
         
         # 记录查询开始
-        articles_logger.info("开始按类型查询文章", {
+        articles_logger.info("开始按类型查询文章", lambda: {
             'trace_id': trace_id,
             'article_type': article_type_int,
             'start': start,
@@ -358,16 +479,16 @@ class Articles(DBase):
         try:
             # 执行查询
             query_start_time = time.time()
-            result = dbsession.query(Article, Users.nickname).join(Users, Users.userid == Article.userid) \
-                .filter(Article.hidden == 0, 
-                        Article.drafted == 0, 
-                        # Article.checked == 1, 
-                        Article.type == article_type_int) \
-                .order_by(Article.articleid.desc()).limit(count).offset(start).all()
+            result = with_nickname(article_summary_with_users_query()
+                                   .filter(Article.hidden == 0,
+                                           Article.drafted == 0,
+                                           # Article.checked == 1,
+                                           Article.type == article_type_int)
+                                   .order_by(Article.articleid.desc()).limit(count).offset(start).all())
             query_end_time = time.time()
             
             # 记录查询结果
-            articles_logger.info("按类型查询文章成功", {
+            articles_logger.info("按类型查询文章成功", lambda: {
                 'trace_id': trace_id,
                 'article_type': article_type_int,
                 'start': start,
@@ -409,7 +530,7 @@ class Articles(DBase):
             return 0
         
         # 记录开始统计
-        articles_logger.info("开始按类型统计文章数量", {
+        articles_logger.info("开始按类型统计文章数量", lambda: {
             'trace_id': trace_id,
             'article_type': article_type_int
         })
@@ -417,14 +538,12 @@ class Articles(DBase):
         try:
             # 执行统计查询
             query_start_time = time.time()
-            count = dbsession.query(Article).filter(Article.hidden == 0,
-                                                Article.drafted == 0,
-                                                # Article.checked == 1,
-                                                Article.type == article_type_int).count()
+            count = get_article_counters().count(article_count_rows, hidden=0, drafted=0,
+                                                 type=article_type_int)
             query_end_time = time.time()
             
             # 记录统计结果
-            articles_logger.info("按类型统计文章数量成功", {
+            articles_logger.info("按类型统计文章数量成功", lambda: {
                 'trace_id': trace_id,
                 'article_type': article_type_int,
                 'count': count,
@@ -450,7 +569,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录搜索开始
-        articles_logger.info("开始根据标题模糊搜索文章", {
+        articles_logger.info("开始根据标题模糊搜索文章", lambda: {
             'trace_id': trace_id,
             'headline': headline,
             'start': start,
@@ -460,14 +579,17 @@ class Articles(DBase):
         try:
             # 执行搜索查询
             query_start_time = time.time()
-            result = dbsession.query(Article, Users.nickname).join(Users, Users.userid == Article.userid) \
-                .filter(Article.hidden == 0, Article.drafted == 0, Article.checked == 1,
-                        Article.headline.like('%' + headline + '%')) \
-                .order_by(Article.articleid.desc()).limit(count).offset(start).all()
+            if get_search_index().is_ready():
+                result, _ = Articles.search_articles(headline, start, count)
+            else:
+                result = with_nickname(article_summary_with_users_query()
+                                       .filter(Article.hidden == 0, Article.drafted == 0, Article.checked == 1,
+                                               Article.headline.like('%' + headline + '%'))
+                                       .order_by(Article.articleid.desc()).limit(count).offset(start).all())
             query_end_time = time.time()
             
             # 记录搜索结果
-            articles_logger.info("根据标题模糊搜索文章成功", {
+            articles_logger.info("根据标题模糊搜索文章成功", lambda: {
                 'trace_id': trace_id,
                 'headline': headline,
                 'start': start,
@@ -497,7 +619,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录开始统计
-        articles_logger.info("开始统计标题搜索结果数量", {
+        articles_logger.info("开始统计标题搜索结果数量", lambda: {
             'trace_id': trace_id,
             'headline': headline
         })
@@ -505,14 +627,20 @@ class Articles(DBase):
         try:
             # 执行统计查询
             query_start_time = time.time()
-            count = dbsession.query(Article).filter(Article.hidden == 0,
-                                                Article.drafted == 0,
-                                                Article.checked == 1,
-                                                Article.headline.like('%' + headline + '%')).count()
+            if get_search_index().is_ready():
+                count = get_search_index().search(headline, count=0)[1]
+            else:
+                count = get_article_counters().headline_count(
+                    headline,
+                    lambda: dbsession.query(func.count(Article.articleid)).filter(
+                        Article.hidden == 0,
+                        Article.drafted == 0,
+                        Article.checked == 1,
+                        Article.headline.like('%' + headline + '%')).scalar())
             query_end_time = time.time()
             
             # 记录统计结果
-            articles_logger.info("统计标题搜索结果数量成功", {
+            articles_logger.info("统计标题搜索结果数量成功", lambda: {
                 'trace_id': trace_id,
                 'headline': headline,
                 'count': count,
@@ -531,51 +659,56 @@ class Articles(DBase):
             traceback.print_exc()
             return 0
 
-    # 最新文章[(id, headline),(id, headline)]
+    # 全文搜索：一次索引查询同时得到当前页的文章和结果总数，返回 ([(article, nickname)], 总数)
+    # 搜索索引未构建时退回到标题的LIKE查询
     @staticmethod
-    def find_last_9():
+    def search_articles(keyword, start, count):
         # 生成跟踪ID
         trace_id = get_articles_trace_id()
-        
-        # 记录查询开始
-        articles_logger.info("开始查询最新9篇文章", {
-            'trace_id': trace_id
-        })
-        
+
+        if not get_search_index().is_ready():
+            return Articles.find_by_headline(keyword, start, count), Articles.get_count_by_headline(keyword)
+
         try:
-            # 执行查询
             query_start_time = time.time()
-            result = dbsession.query(Article.articleid, Article.headline). \
-                filter(Article.hidden == 0, Article.drafted == 0, Article.checked == 1) \
-                .order_by(Article.articleid.desc()).limit(9).all()
+            ids, total = get_search_index().search(keyword, start, count)
+            search_end_time = time.time()
+            result = []
+            if ids:
+                rows = article_summary_with_users_query().filter(Article.articleid.in_(ids)).all()
+                result = with_nickname(rows_in_id_order(rows, ids))
             query_end_time = time.time()
-            
-            # 记录查询结果
-            articles_logger.info("查询最新9篇文章成功", {
+
+            articles_logger.info("全文搜索文章成功", lambda: {
                 'trace_id': trace_id,
-                'result_count': len(result) if result else 0,
+                'keyword': keyword,
+                'start': start,
+                'count': count,
+                'result_count': len(result),
+                'total': total,
+                'search_time_ms': round((search_end_time - query_start_time) * 1000, 2),
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
             })
-            
-            return result
+            return result, total
         except Exception as e:
             # 记录异常
-            articles_logger.error("查询最新9篇文章异常", {
+            articles_logger.error("全文搜索文章异常", {
                 'trace_id': trace_id,
+                'keyword': keyword,
                 'error': str(e),
                 'error_type': type(e).__name__
             })
             traceback.print_exc()
-            return []
+            return [], 0
 
-    # 最多阅读
+    # 最新文章[(id, headline),(id, headline)]
     @staticmethod
-    def find_most_9():
+    def find_last_9():
         # 生成跟踪ID
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始查询阅读量最多的9篇文章", {
+        articles_logger.info("开始查询最新9篇文章", lambda: {
             'trace_id': trace_id
         })
         
@@ -584,11 +717,11 @@ class Articles(DBase):
             query_start_time = time.time()
             result = dbsession.query(Article.articleid, Article.headline). \
                 filter(Article.hidden == 0, Article.drafted == 0, Article.checked == 1) \
-                .order_by(Article.readcount.desc()).limit(9).all()
+                .order_by(Article.articleid.desc()).limit(9).all()
             query_end_time = time.time()
             
             # 记录查询结果
-            articles_logger.info("查询阅读量最多的9篇文章成功", {
+            articles_logger.info("查询最新9篇文章成功", lambda: {
                 'trace_id': trace_id,
                 'result_count': len(result) if result else 0,
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
@@ -597,7 +730,7 @@ class Articles(DBase):
             return result
         except Exception as e:
             # 记录异常
-            articles_logger.error("查询阅读量最多的9篇文章异常", {
+            articles_logger.error("查询最新9篇文章异常", {
                 'trace_id': trace_id,
                 'error': str(e),
                 'error_type': type(e).__name__
@@ -605,14 +738,14 @@ class Articles(DBase):
             traceback.print_exc()
             return []
 
-    # 特别推荐，如果超过9篇，可以考虑order by rand()的方式随机显示9篇
+    # 最多阅读
     @staticmethod
-    def find_recommended_9():
+    def find_most_9():
         # 生成跟踪ID
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始查询推荐的9篇文章", {
+        articles_logger.info("开始查询阅读量最多的9篇文章", lambda: {
             'trace_id': trace_id
         })
         
@@ -620,12 +753,12 @@ class Articles(DBase):
             # 执行查询
             query_start_time = time.time()
             result = dbsession.query(Article.articleid, Article.headline). \
-                filter(Article.hidden == 0, Article.drafted == 0, Article.checked == 1, Article.recommended == 1) \
-                .order_by(func.rand()).limit(9).all()
+                filter(Article.hidden == 0, Article.drafted == 0, Article.checked == 1) \
+                .order_by(Article.readcount.desc()).limit(9).all()
             query_end_time = time.time()
             
             # 记录查询结果
-            articles_logger.info("查询推荐的9篇文章成功", {
+            articles_logger.info("查询阅读量最多的9篇文章成功", lambda: {
                 'trace_id': trace_id,
                 'result_count': len(result) if result else 0,
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
@@ -634,7 +767,7 @@ class Articles(DBase):
             return result
         except Exception as e:
             # 记录异常
-            articles_logger.error("查询推荐的9篇文章异常", {
+            articles_logger.error("查询阅读量最多的9篇文章异常", {
                 'trace_id': trace_id,
                 'error': str(e),
                 'error_type': type(e).__name__
@@ -642,80 +775,57 @@ class Articles(DBase):
             traceback.print_exc()
             return []
 
-    # 一次性返回三个推荐数据
+    # 特别推荐，从侧边栏缓存中洗牌后的推荐文章池里取9篇，不再使用order by rand()全表排序
     @staticmethod
-    def find_last_most_recommended():
+    def find_recommended_9():
+        last, most, recommended = Articles.find_last_most_recommended()
+        return recommended
+
+    # 侧边栏三类文章用一条UNION ALL语句查询，只取编号和标题
+    # recommended返回最多pool_size篇推荐文章作为随机展示的候选池
+    @staticmethod
+    def find_sidebar_lists(count=9, pool_size=SIDEBAR_RECOMMENDED_POOL_SIZE):
         # 生成跟踪ID
         trace_id = get_articles_trace_id()
-        
-        # 记录查询开始
-        articles_logger.info("开始查询三类推荐文章", {
-            'trace_id': trace_id
-        })
-        
-        try:
-            # 最新文章
-            query_start_time = time.time()
-            last = dbsession.query(Article).filter(
-                Article.hidden == 0,
-                Article.drafted == 0,
-                Article.checked == 1
-            ).order_by(Article.articleid.desc()).limit(9).all()
-            query_end_time = time.time()
-            
-            # 记录最新文章查询结果
-            articles_logger.info("查询最新文章成功", {
-                'trace_id': trace_id,
-                'last_count': len(last) if last else 0,
-                'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
-            })
-
-            # 最多阅读
-            query_start_time = time.time()
-            most = dbsession.query(Article).filter(
-                Article.hidden == 0,
-                Article.drafted == 0,
-                Article.checked == 1
-            ).order_by(Article.readcount.desc()).limit(9).all()
-            query_end_time = time.time()
-            
-            # 记录最多阅读查询结果
-            articles_logger.info("查询最多阅读文章成功", {
-                'trace_id': trace_id,
-                'most_count': len(most) if most else 0,
-                'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
-            })
 
-            # 推荐文章
-            query_start_time = time.time()
-            recommended = dbsession.query(Article).filter(
+        def sidebar_select(kind, order_by, limit, *criterion):
+            subquery = select(*ARTICLE_HEADLINE_COLUMNS).where(
                 Article.hidden == 0,
                 Article.drafted == 0,
                 Article.checked == 1,
-                Article.recommended == 1
-            ).order_by(Article.articleid.desc()).limit(9).all()
-            query_end_time = time.time()
-            
-            # 记录推荐文章查询结果
-            articles_logger.info("查询推荐文章成功", {
-                'trace_id': trace_id,
-                'recommended_count': len(recommended) if recommended else 0,
-                'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
-            })
-            
-            # 记录总体查询结果
-            articles_logger.info("查询三类推荐文章成功", {
-                'trace_id': trace_id,
-                'last_count': len(last) if last else 0,
-                'most_count': len(most) if most else 0,
-                'recommended_count': len(recommended) if recommended else 0
-            })
+                *criterion
+            ).order_by(order_by).limit(limit).subquery()
+            return select(literal(kind).label('kind'), subquery.c.articleid, subquery.c.headline)
 
-            return last, most, recommended
+        query_start_time = time.time()
+        statement = union_all(
+            sidebar_select('last', Article.articleid.desc(), count),
+            sidebar_select('most', Article.readcount.desc(), count),
+            sidebar_select('recommended', Article.articleid.desc(), pool_size, Article.recommended == 1)
+        )
+        lists = {'last': [], 'most': [], 'recommended': []}
+        for row in dbsession.execute(statement):
+            lists[row.kind].append(row)
+        query_end_time = time.time()
+
+        articles_logger.info("查询侧边栏文章成功", lambda: {
+            'trace_id': trace_id,
+            'last_count': len(lists['last']),
+            'most_count': len(lists['most']),
+            'recommended_pool_size': len(lists['recommended']),
+            'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
+        })
+        return lists
+
+    # 一次性返回三个推荐数据，数据由侧边栏缓存在进程内共享
+    @staticmethod
+    def find_last_most_recommended():
+        try:
+            return get_sidebar_cache().get(Articles.find_sidebar_lists)
         except Exception as e:
             # 记录异常
             articles_logger.error("查询三类推荐文章异常", {
-                'trace_id': trace_id,
+                'trace_id': get_articles_trace_id(),
                 'error': str(e),
                 'error_type': type(e).__name__
             })
@@ -723,45 +833,31 @@ class Articles(DBase):
             return [], [], []
 
     # 每阅读一次文章，阅读次数+1
+    # 启用缓冲计数时只在内存/Redis中累加，由后台线程通过add_read_counts批量写回
     @staticmethod
     def update_read_count(articleid):
         # 生成跟踪ID
         trace_id = get_articles_trace_id()
         
         # 记录开始更新阅读计数
-        articles_logger.info("开始更新文章阅读计数", {
+        articles_logger.info("开始更新文章阅读计数", lambda: {
             'trace_id': trace_id,
             'articleid': articleid,
-            'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+            'user_id': get_current_user().userid
         })
         
         try:
-            article = dbsession.query(Article).filter_by(articleid=articleid).first()
-            
-            # 检查文章是否存在
-            if not article:
-                articles_logger.warning("更新阅读计数失败：文章不存在", {
-                    'trace_id': trace_id,
-                    'articleid': articleid
-                })
-                return
-                
-            # 记录原始阅读计数
-            old_readcount = article.readcount if article.readcount is not None else 0
-            
-            # 更新阅读计数
-            if article.readcount is None:
-                article.readcount = 0
-            article.readcount += 1
-            dbsession.commit()
+            counter = get_read_counter()
+            if counter.enabled:
+                counter.incr(int(articleid))
+            else:
+                Articles.add_read_counts({int(articleid): 1})
             
             # 记录更新成功
-            articles_logger.info("文章阅读计数更新成功", {
+            articles_logger.info("文章阅读计数更新成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
-                'headline': article.headline,
-                'old_readcount': old_readcount,
-                'new_readcount': article.readcount
+                'buffered': counter.enabled
             })
             
         except Exception as e:
@@ -774,6 +870,40 @@ class Articles(DBase):
             })
             traceback.print_exc()
 
+    # 批量增加阅读次数，参数为 {articleid: 增量}
+    # 每批只执行一条 UPDATE ... SET readcount = readcount + CASE articleid WHEN ... END 语句
+    @staticmethod
+    def add_read_counts(deltas, batch_size=500):
+        if not deltas:
+            return
+        try:
+            items = list(deltas.items())
+            for i in range(0, len(items), batch_size):
+                batch = dict(items[i:i + batch_size])
+                dbsession.query(Article).filter(Article.articleid.in_(batch.keys())).update(
+                    {Article.readcount: func.coalesce(Article.readcount, 0) + case(batch, value=Article.articleid)},
+                    synchronize_session=False)
+            dbsession.commit()
+        except Exception:
+            dbsession.rollback()
+            raise
+
+    # 查询所有公开文章的编号，用于生成静态页面
+    @staticmethod
+    def find_public_ids():
+        try:
+            rows = dbsession.query(Article.articleid) \
+                .filter(Article.hidden == 0, Article.drafted == 0, Article.checked == 1).all()
+            return [row.articleid for row in rows]
+        except Exception as e:
+            # 查询失败时抛出异常，不能当作没有公开文章而删除已经生成的页面
+            articles_logger.error("查询公开文章编号异常", {
+                'trace_id': get_articles_trace_id(),
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            raise
+
     # 根据文章编号查询文章标题
     @staticmethod
     def find_headline_by_id(articleid):
@@ -781,7 +911,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始根据ID查询文章标题", {
+        articles_logger.info("开始根据ID查询文章标题", lambda: {
             'trace_id': trace_id,
             'articleid': articleid
         })
@@ -794,7 +924,7 @@ class Articles(DBase):
             
             if row:
                 # 记录查询成功
-                articles_logger.info("根据ID查询文章标题成功", {
+                articles_logger.info("根据ID查询文章标题成功", lambda: {
                     'trace_id': trace_id,
                     'articleid': articleid,
                     'headline': row.headline,
@@ -827,7 +957,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始查询文章的上一篇和下一篇", {
+        articles_logger.info("开始查询文章的上一篇和下一篇", lambda: {
             'trace_id': trace_id,
             'articleid': articleid
         })
@@ -854,7 +984,7 @@ class Articles(DBase):
             m_dict['prev_headline'] = Articles.find_headline_by_id(prev_id)
             
             # 记录上一篇查询结果
-            articles_logger.info("查询上一篇文章成功", {
+            articles_logger.info("查询上一篇文章成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'prev_id': prev_id,
@@ -880,7 +1010,7 @@ class Articles(DBase):
             m_dict['next_headline'] = Articles.find_headline_by_id(next_id)
             
             # 记录下一篇查询结果
-            articles_logger.info("查询下一篇文章成功", {
+            articles_logger.info("查询下一篇文章成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'next_id': next_id,
@@ -891,7 +1021,7 @@ class Articles(DBase):
             query_end_time = time.time()
             
             # 记录总体查询结果
-            articles_logger.info("查询文章的上一篇和下一篇成功", {
+            articles_logger.info("查询文章的上一篇和下一篇成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'prev_id': prev_id,
@@ -918,10 +1048,10 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录开始更新评论计数
-        articles_logger.info("开始更新文章评论计数", {
+        articles_logger.info("开始更新文章评论计数", lambda: {
             'trace_id': trace_id,
             'articleid': articleid,
-            'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+            'user_id': get_current_user().userid
         })
         
         try:
@@ -941,9 +1071,11 @@ class Articles(DBase):
             # 更新评论计数
             row.replycount += 1
             dbsession.commit()
+            # 新评论显示在文章页中
+            purge_article_pages(row, listing_changed=False)
             
             # 记录更新成功
-            articles_logger.info("文章评论计数更新成功", {
+            articles_logger.info("文章评论计数更新成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'headline': row.headline,
@@ -968,7 +1100,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录插入开始
-        articles_logger.info("开始插入文章", {
+        articles_logger.info("开始插入文章", lambda: {
             'trace_id': trace_id,
             'article_type': article_type,
             'headline': headline,
@@ -976,30 +1108,36 @@ class Articles(DBase):
             'credit': credit,
             'drafted': drafted,
             'checked': checked,
-            'user_id': session.get('main_userid')
+            'user_id': get_current_user().userid
         })
         
         try:
             now = time.strftime('%Y-%m-%d %H:%M:%S')
-            userid = session.get('main_userid')
+            userid = get_current_user().userid
             
             # 检查用户ID是否存在
             if not userid:
                 articles_logger.error("插入文章失败：用户ID不存在", {
                     'trace_id': trace_id,
-                    'session_data': str(session)
+                    'current_user': get_current_user().to_dict()
                 })
                 return None
                 
             # 其他字段在数据库中均已设置好默认值，无须手工插入
             article = Article(userid=userid, type=article_type, headline=headline, content=content,
-                               thumbnail=thumbnail, credit=credit, drafted=drafted, readcount=0,
-                               checked=checked, createtime=now, updatetime=now)
+                               summary=make_summary(content), thumbnail=thumbnail, credit=credit,
+                               drafted=drafted, readcount=0, checked=checked, createtime=now, updatetime=now)
             dbsession.add(article)
             dbsession.commit()
+            get_article_cache().invalidate(article.articleid)
+            get_sidebar_cache().invalidate()
+            get_article_counters().add(article_count_state(article))
+            update_search_index(article)
+            update_redis_index(article)
+            purge_article_pages(article)
             
             # 记录插入成功
-            articles_logger.info("文章插入成功", {
+            articles_logger.info("文章插入成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': article.articleid,
                 'headline': headline,
@@ -1015,7 +1153,7 @@ class Articles(DBase):
             articles_logger.error("文章插入异常", {
                 'trace_id': trace_id,
                 'headline': headline,
-                'user_id': session.get('main_userid'),
+                'user_id': get_current_user().userid,
                 'error': str(e),
                 'error_type': type(e).__name__
             })
@@ -1030,7 +1168,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录更新开始
-        articles_logger.info("开始更新文章", {
+        articles_logger.info("开始更新文章", lambda: {
             'trace_id': trace_id,
             'articleid': articleid,
             'article_type': article_type,
@@ -1039,7 +1177,7 @@ class Articles(DBase):
             'credit': credit,
             'drafted': drafted,
             'checked': checked,
-            'user_id': session.get('main_userid')
+            'user_id': get_current_user().userid
         })
         
         try:
@@ -1055,7 +1193,7 @@ class Articles(DBase):
                 return None
                 
             # 记录更新前的文章信息
-            articles_logger.info("文章更新前状态", {
+            articles_logger.info("文章更新前状态", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'old_type': article.type,
@@ -1065,9 +1203,12 @@ class Articles(DBase):
             })
             
             # 更新文章内容
+            old_state = article_count_state(article)
+            old_type = article.type
             article.type = article_type
             article.headline = headline
             article.content = content
+            article.summary = make_summary(content)
             article.thumbnail = thumbnail
             article.credit = credit
             article.drafted = drafted
@@ -1075,13 +1216,19 @@ class Articles(DBase):
             article.updatetime = now  # 修改文章的更新时间
             
             dbsession.commit()
+            get_article_cache().invalidate(article.articleid)
+            get_sidebar_cache().invalidate()
+            get_article_counters().move(old_state, article_count_state(article))
+            update_search_index(article)
+            update_redis_index(article)
+            purge_article_pages(article, old_state != article_count_state(article), old_type)
             
             # 记录更新成功
-            articles_logger.info("文章更新成功", {
+            articles_logger.info("文章更新成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'headline': headline,
-                'user_id': session.get('main_userid'),
+                'user_id': get_current_user().userid,
                 'drafted': drafted,
                 'checked': checked,
                 'updatetime': now
@@ -1094,7 +1241,7 @@ class Articles(DBase):
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'headline': headline,
-                'user_id': session.get('main_userid'),
+                'user_id': get_current_user().userid,
                 'error': str(e),
                 'error_type': type(e).__name__
             })
@@ -1102,6 +1249,156 @@ class Articles(DBase):
             dbsession.rollback()
             return None
 
+    # 为已有文章批量生成摘要，按文章编号分批处理，避免一次性加载全部content
+    # only_missing为True时只处理summary为空的文章，返回处理的文章数量
+    @staticmethod
+    def backfill_summary(batch_size=200, only_missing=True):
+        # 生成跟踪ID
+        trace_id = get_articles_trace_id()
+        
+        # 记录回填开始
+        articles_logger.info("开始回填文章摘要", lambda: {
+            'trace_id': trace_id,
+            'batch_size': batch_size,
+            'only_missing': only_missing
+        })
+        
+        last_id = 0
+        updated = 0
+        try:
+            while True:
+                query = dbsession.query(Article.articleid, Article.content).filter(Article.articleid > last_id)
+                if only_missing:
+                    query = query.filter(Article.summary.is_(None))
+                rows = query.order_by(Article.articleid).limit(batch_size).all()
+                if not rows:
+                    break
+                
+                dbsession.bulk_update_mappings(Article, [
+                    {'articleid': row.articleid, 'summary': make_summary(row.content)} for row in rows
+                ])
+                dbsession.commit()
+                
+                last_id = rows[-1].articleid
+                updated += len(rows)
+            
+            # 记录回填结果
+            articles_logger.info("回填文章摘要成功", lambda: {
+                'trace_id': trace_id,
+                'updated_count': updated
+            })
+            
+            return updated
+        except Exception as e:
+            # 记录异常
+            articles_logger.error("回填文章摘要异常", {
+                'trace_id': trace_id,
+                'last_articleid': last_id,
+                'updated_count': updated,
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            traceback.print_exc()
+            dbsession.rollback()
+            return updated
+
+    # 全量重建全文搜索索引，按文章编号分批读取，返回写入索引的文章数量
+    @staticmethod
+    def rebuild_search_index(batch_size=200):
+        # 生成跟踪ID
+        trace_id = get_articles_trace_id()
+
+        # 记录重建开始
+        articles_logger.info("开始重建文章搜索索引", lambda: {
+            'trace_id': trace_id,
+            'batch_size': batch_size
+        })
+
+        def batches():
+            last_id = 0
+            while True:
+                rows = dbsession.query(Article.articleid, Article.headline, Article.content,
+                                       Article.hidden, Article.drafted, Article.checked) \
+                    .filter(Article.articleid > last_id) \
+                    .order_by(Article.articleid).limit(batch_size).all()
+                if not rows:
+                    break
+                last_id = rows[-1].articleid
+                yield [tuple(row) for row in rows]
+
+        try:
+            total = get_search_index().rebuild(batches())
+
+            # 记录重建结果
+            articles_logger.info("重建文章搜索索引成功", lambda: {
+                'trace_id': trace_id,
+                'article_count': total
+            })
+            return total
+        except Exception as e:
+            # 记录异常
+            articles_logger.error("重建文章搜索索引异常", {
+                'trace_id': trace_id,
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            traceback.print_exc()
+            return 0
+
+    # 全量重建Redis中的文章列表索引
+    @staticmethod
+    def rebuild_redis_index(batch_size=500):
+        # 生成跟踪ID
+        trace_id = get_articles_trace_id()
+
+        try:
+            total = get_redis_index().rebuild(article_cache_batches(batch_size))
+
+            # 记录重建结果
+            articles_logger.info("重建Redis文章索引成功", lambda: {
+                'trace_id': trace_id,
+                'article_count': total
+            })
+            return total
+        except Exception as e:
+            # 记录异常
+            articles_logger.error("重建Redis文章索引异常", {
+                'trace_id': trace_id,
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            traceback.print_exc()
+            return 0
+
+    # 对比数据库和Redis中的文章列表，repair为True时修复不一致的文章
+    @staticmethod
+    def check_redis_index(repair=False, batch_size=500):
+        # 生成跟踪ID
+        trace_id = get_articles_trace_id()
+
+        try:
+            report = get_redis_index().check(article_cache_batches(batch_size), repair=repair)
+
+            # 不一致时记录警告
+            if report['missing'] or report['extra'] or report['stale']:
+                articles_logger.warning("Redis文章索引与数据库不一致", {
+                    'trace_id': trace_id,
+                    'missing': report['missing'][:50],
+                    'extra': report['extra'][:50],
+                    'stale': report['stale'][:50],
+                    'repair': repair
+                })
+            return report
+        except Exception as e:
+            # 记录异常
+            articles_logger.error("检查Redis文章索引异常", {
+                'trace_id': trace_id,
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            traceback.print_exc()
+            return None
+
     # =========== 以下方法主要用于后台管理类操作 ================== #
 
     # 查询article表中除草稿外的所有数据并返回结果集
@@ -1111,7 +1408,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始查询所有非草稿文章", {
+        articles_logger.info("开始查询所有非草稿文章", lambda: {
             'trace_id': trace_id,
             'start': start,
             'count': count
@@ -1120,12 +1417,12 @@ class Articles(DBase):
         try:
             # 执行查询
             query_start_time = time.time()
-            result = dbsession.query(Article).filter(Article.drafted == 0).order_by(
+            result = article_admin_query().filter(Article.drafted == 0).order_by(
                 Article.articleid.desc()).limit(count).offset(start).all()
             query_end_time = time.time()
             
             # 记录查询结果
-            articles_logger.info("查询所有非草稿文章成功", {
+            articles_logger.info("查询所有非草稿文章成功", lambda: {
                 'trace_id': trace_id,
                 'start': start,
                 'count': count,
@@ -1153,18 +1450,18 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录开始统计
-        articles_logger.info("开始统计非草稿文章数量", {
+        articles_logger.info("开始统计非草稿文章数量", lambda: {
             'trace_id': trace_id
         })
         
         try:
             # 执行统计查询
             query_start_time = time.time()
-            count = dbsession.query(Article).filter(Article.drafted == 0).count()
+            count = get_article_counters().count(article_count_rows, drafted=0)
             query_end_time = time.time()
             
             # 记录统计结果
-            articles_logger.info("统计非草稿文章数量成功", {
+            articles_logger.info("统计非草稿文章数量成功", lambda: {
                 'trace_id': trace_id,
                 'count': count,
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
@@ -1187,7 +1484,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始按类型查询非草稿文章", {
+        articles_logger.info("开始按类型查询非草稿文章", lambda: {
             'trace_id': trace_id,
             'article_type': article_type,
             'start': start,
@@ -1201,7 +1498,7 @@ class Articles(DBase):
                 total = self.get_count_except_draft()
                 
                 # 记录查询结果
-                articles_logger.info("查询所有非草稿文章成功", {
+                articles_logger.info("查询所有非草稿文章成功", lambda: {
                     'trace_id': trace_id,
                     'start': start,
                     'count': count,
@@ -1210,14 +1507,13 @@ class Articles(DBase):
                 })
             else:
                 # 执行查询
-                result = dbsession.query(Article).filter(Article.drafted == 0,
-                                                         Article.type == article_type).order_by(Article.articleid.desc()) \
+                result = article_admin_query().filter(Article.drafted == 0,
+                                                      Article.type == article_type).order_by(Article.articleid.desc()) \
                     .limit(count).offset(start).all()
-                total = dbsession.query(Article).filter(Article.drafted == 0,
-                                                        Article.type == article_type).count()
+                total = get_article_counters().count(article_count_rows, drafted=0, type=article_type)
                 
                 # 记录查询结果
-                articles_logger.info("按类型查询非草稿文章成功", {
+                articles_logger.info("按类型查询非草稿文章成功", lambda: {
                     'trace_id': trace_id,
                     'article_type': article_type,
                     'start': start,
@@ -1229,7 +1525,7 @@ class Articles(DBase):
             query_end_time = time.time()
             
             # 记录总体查询时间
-            articles_logger.info("按类型查询非草稿文章完成", {
+            articles_logger.info("按类型查询非草稿文章完成", lambda: {
                 'trace_id': trace_id,
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
             })
@@ -1255,7 +1551,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录查询开始
-        articles_logger.info("开始按标题模糊查询非草稿文章", {
+        articles_logger.info("开始按标题模糊查询非草稿文章", lambda: {
             'trace_id': trace_id,
             'headline': headline
         })
@@ -1263,13 +1559,18 @@ class Articles(DBase):
         try:
             # 执行查询
             query_start_time = time.time()
-            result = dbsession.query(Article).filter(Article.drafted == 0,
-                                                     Article.headline.like('%' + headline + '%')) \
-                .order_by(Article.articleid.desc()).all()
+            if get_search_index().is_ready():
+                ids, _ = get_search_index().search(headline, count=None, public=False)
+                rows = article_admin_query().filter(Article.articleid.in_(ids)).all() if ids else []
+                result = rows_in_id_order(rows, ids)
+            else:
+                result = article_admin_query().filter(Article.drafted == 0,
+                                                      Article.headline.like('%' + headline + '%')) \
+                    .order_by(Article.articleid.desc()).all()
             query_end_time = time.time()
             
             # 记录查询结果
-            articles_logger.info("按标题模糊查询非草稿文章成功", {
+            articles_logger.info("按标题模糊查询非草稿文章成功", lambda: {
                 'trace_id': trace_id,
                 'headline': headline,
                 'result_count': len(result) if result else 0,
@@ -1295,7 +1596,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录操作开始
-        articles_logger.info("开始切换文章隐藏状态", {
+        articles_logger.info("开始切换文章隐藏状态", lambda: {
             'trace_id': trace_id,
             'articleid': articleid
         })
@@ -1314,6 +1615,7 @@ class Articles(DBase):
                 return None
             
             # 记录原始状态
+            old_state = article_count_state(row)
             original_hidden = row.hidden
             
             # 切换状态
@@ -1326,10 +1628,16 @@ class Articles(DBase):
                 
             # 提交事务
             dbsession.commit()
+            get_article_cache().invalidate(row.articleid)
+            get_sidebar_cache().invalidate()
+            get_article_counters().move(old_state, article_count_state(row))
+            update_search_index(row)
+            update_redis_index(row)
+            purge_article_pages(row)
             query_end_time = time.time()
             
             # 记录操作结果
-            articles_logger.info("切换文章隐藏状态成功", {
+            articles_logger.info("切换文章隐藏状态成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'headline': row.headline if hasattr(row, 'headline') else None,
@@ -1357,7 +1665,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录操作开始
-        articles_logger.info("开始切换文章推荐状态", {
+        articles_logger.info("开始切换文章推荐状态", lambda: {
             'trace_id': trace_id,
             'articleid': articleid
         })
@@ -1388,10 +1696,14 @@ class Articles(DBase):
                 
             # 提交事务
             dbsession.commit()
+            get_article_cache().invalidate(row.articleid)
+            get_sidebar_cache().invalidate()
+            update_redis_index(row)
+            purge_article_pages(row, listing_changed=False)
             query_end_time = time.time()
             
             # 记录操作结果
-            articles_logger.info("切换文章推荐状态成功", {
+            articles_logger.info("切换文章推荐状态成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'headline': row.headline if hasattr(row, 'headline') else None,
@@ -1419,7 +1731,7 @@ class Articles(DBase):
         trace_id = get_articles_trace_id()
         
         # 记录操作开始
-        articles_logger.info("开始切换文章审核状态", {
+        articles_logger.info("开始切换文章审核状态", lambda: {
             'trace_id': trace_id,
             'articleid': articleid
         })
@@ -1438,6 +1750,7 @@ class Articles(DBase):
                 return None
             
             # 记录原始状态
+            old_state = article_count_state(row)
             original_checked = row.checked
             
             # 切换状态
@@ -1450,10 +1763,16 @@ class Articles(DBase):
                 
             # 提交事务
             dbsession.commit()
+            get_article_cache().invalidate(row.articleid)
+            get_sidebar_cache().invalidate()
+            get_article_counters().move(old_state, article_count_state(row))
+            update_search_index(row)
+            update_redis_index(row)
+            purge_article_pages(row)
             query_end_time = time.time()
             
             # 记录操作结果
-            articles_logger.info("切换文章审核状态成功", {
+            articles_logger.info("切换文章审核状态成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'headline': row.headline if hasattr(row, 'headline') else None,
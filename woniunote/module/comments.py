@@ -1,23 +1,22 @@
 import time
 import traceback
-import uuid
 from woniunote.common.utils import model_join_list
-from flask import session
 from sqlalchemy import Table, Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from woniunote.common.database import dbconnect
 from woniunote.module.users import Users
 from woniunote.common.create_database import Comment
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 
 dbsession, md, DBase = dbconnect()
 
 # 创建评论模块的日志记录器
 comments_logger = get_simple_logger('comments')
 
-# 生成评论模块的跟踪ID
 def get_comments_trace_id():
-    return str(uuid.uuid4())
+    return get_trace_id()
 
 
 class Comments(DBase):
@@ -55,15 +54,15 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 记录评论插入开始
-        comments_logger.info("开始插入评论", {
+        comments_logger.info("开始插入评论", lambda: {
             'trace_id': trace_id,
             'articleid': articleid,
             'ipaddr': ipaddr,
-            'user_id': session.get('main_userid') if session.get('main_islogin') == 'true' else None
+            'user_id': get_current_user().userid
         })
         
         try:
-            userid = session.get('main_userid')
+            userid = get_current_user().userid
             if not userid:
                 # 记录用户ID不存在
                 comments_logger.warning("插入评论失败，用户ID不存在", {
@@ -80,7 +79,7 @@ class Comments(DBase):
             dbsession.commit()
             
             # 记录评论插入成功
-            comments_logger.info("插入评论成功", {
+            comments_logger.info("插入评论成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'commentid': comment.commentid,
@@ -94,7 +93,7 @@ class Comments(DBase):
             comments_logger.error("插入评论异常", {
                 'trace_id': trace_id,
                 'articleid': articleid,
-                'userid': session.get('main_userid'),
+                'userid': get_current_user().userid,
                 'error': str(e),
                 'error_type': type(e).__name__
             })
@@ -108,7 +107,7 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 记录查询开始
-        comments_logger.info("开始根据用户ID查询评论", {
+        comments_logger.info("开始根据用户ID查询评论", lambda: {
             'trace_id': trace_id,
             'userid': userid
         })
@@ -116,9 +115,8 @@ class Comments(DBase):
         try:
             # 执行查询
             query_start_time = time.time()
-            # 查询用户的所有评论，并关联文章信息
-            results = dbsession.query(Comment, Article)\
-                .join(Article, Comment.articleid == Article.articleid)\
+            # 查询用户的所有评论，对应的文章由调用方按编号批量查询后配对
+            results = dbsession.query(Comment)\
                 .filter(Comment.userid == userid)\
                 .filter(Comment.hidden == 0)\
                 .order_by(Comment.commentid.desc())\
@@ -126,7 +124,7 @@ class Comments(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            comments_logger.info("根据用户ID查询评论成功", {
+            comments_logger.info("根据用户ID查询评论成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'result_count': len(results) if results else 0,
@@ -152,7 +150,7 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 记录查询开始
-        comments_logger.info("开始根据文章ID查询评论", {
+        comments_logger.info("开始根据文章ID查询评论", lambda: {
             'trace_id': trace_id,
             'articleid': articleid
         })
@@ -164,7 +162,7 @@ class Comments(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            comments_logger.info("根据文章ID查询评论成功", {
+            comments_logger.info("根据文章ID查询评论成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'result_count': len(result) if result else 0,
@@ -190,10 +188,10 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('userid')
+        userid = get_current_user().userid
         
         # 记录查询开始
-        comments_logger.info("开始检查用户评论数量限制", {
+        comments_logger.info("开始检查用户评论数量限制", lambda: {
             'trace_id': trace_id,
             'userid': userid
         })
@@ -211,7 +209,7 @@ class Comments(DBase):
             is_limited = comment_count >= 5
             
             # 记录查询结果
-            comments_logger.info("检查用户评论数量限制成功", {
+            comments_logger.info("检查用户评论数量限制成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'comment_count': comment_count,
@@ -239,7 +237,7 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 记录查询开始
-        comments_logger.info("开始查询带用户信息的评论", {
+        comments_logger.info("开始查询带用户信息的评论", lambda: {
             'trace_id': trace_id,
             'articleid': articleid,
             'start': start,
@@ -255,7 +253,7 @@ class Comments(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            comments_logger.info("查询带用户信息的评论成功", {
+            comments_logger.info("查询带用户信息的评论成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'start': start,
@@ -284,7 +282,7 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 记录查询开始
-        comments_logger.info("开始查询所有评论", {
+        comments_logger.info("开始查询所有评论", lambda: {
             'trace_id': trace_id
         })
         
@@ -295,7 +293,7 @@ class Comments(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            comments_logger.info("查询所有评论成功", {
+            comments_logger.info("查询所有评论成功", lambda: {
                 'trace_id': trace_id,
                 'result_count': len(result) if result else 0,
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
@@ -319,10 +317,10 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('userid')
+        userid = get_current_user().userid
         
         # 记录回复插入开始
-        comments_logger.info("开始插入评论回复", {
+        comments_logger.info("开始插入评论回复", lambda: {
             'trace_id': trace_id,
             'articleid': articleid,
             'commentid': commentid,
@@ -350,7 +348,7 @@ class Comments(DBase):
             dbsession.commit()
             
             # 记录回复插入成功
-            comments_logger.info("插入评论回复成功", {
+            comments_logger.info("插入评论回复成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'commentid': commentid,
@@ -380,7 +378,7 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 记录查询开始
-        comments_logger.info("开始查询原始评论及用户信息", {
+        comments_logger.info("开始查询原始评论及用户信息", lambda: {
             'trace_id': trace_id,
             'articleid': articleid,
             'start': start,
@@ -399,7 +397,7 @@ class Comments(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            comments_logger.info("查询原始评论及用户信息成功", {
+            comments_logger.info("查询原始评论及用户信息成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'start': start,
@@ -429,7 +427,7 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 记录查询开始
-        comments_logger.info("开始查询回复评论及用户信息", {
+        comments_logger.info("开始查询回复评论及用户信息", lambda: {
             'trace_id': trace_id,
             'replyid': replyid
         })
@@ -443,7 +441,7 @@ class Comments(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            comments_logger.info("查询回复评论及用户信息成功", {
+            comments_logger.info("查询回复评论及用户信息成功", lambda: {
                 'trace_id': trace_id,
                 'replyid': replyid,
                 'result_count': len(result) if result else 0,
@@ -462,13 +460,53 @@ class Comments(DBase):
             traceback.print_exc()
             return []
 
+    # 一次查询多条原始评论的全部回复及用户信息，按回复编号升序排列
+    @staticmethod
+    def find_replies_with_user(replyids):
+        # 生成跟踪ID
+        trace_id = get_comments_trace_id()
+
+        replyids = list(replyids)
+        if not replyids:
+            return []
+
+        try:
+            # 执行查询
+            query_start_time = time.time()
+            result = dbsession.query(Comment, Users).join(
+                Users, Users.userid == Comment.userid).filter(
+                Comment.replyid.in_(replyids),
+                Comment.hidden == 0).order_by(Comment.commentid).all()
+            query_end_time = time.time()
+
+            # 记录查询结果
+            comments_logger.info("批量查询回复评论及用户信息成功", lambda: {
+                'trace_id': trace_id,
+                'replyid_count': len(replyids),
+                'result_count': len(result) if result else 0,
+                'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
+            })
+
+            return result
+        except Exception as e:
+            # 记录异常
+            comments_logger.error("批量查询回复评论及用户信息异常", {
+                'trace_id': trace_id,
+                'replyid_count': len(replyids),
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            traceback.print_exc()
+            return []
+
     # 根据原始评论和回复评论生成一个关联列表
+    # 固定两次查询：一页原始评论（连接用户），以及这些评论的全部回复（连接用户），在内存中组装
     def get_comment_user_list(self, articleid, start, count):
         # 生成跟踪ID
         trace_id = get_comments_trace_id()
         
         # 记录查询开始
-        comments_logger.info("开始生成评论及回复关联列表", {
+        comments_logger.info("开始生成评论及回复关联列表", lambda: {
             'trace_id': trace_id,
             'articleid': articleid,
             'start': start,
@@ -483,34 +521,27 @@ class Comments(DBase):
             result = self.find_comment_with_user(articleid, start, count)
             comment_list = model_join_list(result)  # 原始评论的连接结果
             
-            # 记录原始评论查询结果
-            comments_logger.info("查询原始评论成功", {
-                'trace_id': trace_id,
-                'articleid': articleid,
-                'comment_count': len(comment_list) if comment_list else 0
-            })
-            
-            # 查询每个原始评论的回复
-            reply_count = 0
+            # 为每条原始评论添加reply_list，用于存储其所有回复评论，无回复评论则为空列表
+            comment_map = {}
             for comment in comment_list:
-                # 查询原始评论对应的回复评论,并转换为列表保存到comment_list中
-                result = self.find_reply_with_user(comment['commentid'])
-                # 为comment_list列表中的原始评论字典对象添加一个新Key叫reply_list
-                # 用于存储当前这条原始评论的所有回复评论,如果无回复评论则列表值为空
-                replies = model_join_list(result)
-                comment['reply_list'] = replies
-                reply_count += len(replies) if replies else 0
+                comment['reply_list'] = []
+                comment_map[comment['commentid']] = comment
+            
+            # 一次查询所有原始评论的回复，再按replyid分配到对应的原始评论下
+            replies = model_join_list(self.find_replies_with_user(comment_map.keys()))
+            for reply in replies:
+                comment_map[reply['replyid']]['reply_list'].append(reply)
                 
             query_end_time = time.time()
             
             # 记录总体查询结果
-            comments_logger.info("生成评论及回复关联列表成功", {
+            comments_logger.info("生成评论及回复关联列表成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'start': start,
                 'count': count,
                 'comment_count': len(comment_list) if comment_list else 0,
-                'reply_count': reply_count,
+                'reply_count': len(replies),
                 'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
             })
             
@@ -535,7 +566,7 @@ class Comments(DBase):
         trace_id = get_comments_trace_id()
         
         # 记录统计开始
-        comments_logger.info("开始统计文章评论数量", {
+        comments_logger.info("开始统计文章评论数量", lambda: {
             'trace_id': trace_id,
             'articleid': articleid
         })
@@ -547,7 +578,7 @@ class Comments(DBase):
             query_end_time = time.time()
             
             # 记录统计结果
-            comments_logger.info("统计文章评论数量成功", {
+            comments_logger.info("统计文章评论数量成功", lambda: {
                 'trace_id': trace_id,
                 'articleid': articleid,
                 'count': count,
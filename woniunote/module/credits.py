@@ -1,4 +1,3 @@
-from flask import session
 from sqlalchemy import Table, Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from woniunote.common.database import dbconnect
@@ -6,17 +5,17 @@ from woniunote.module.users import Users
 from woniunote.common.create_database import Credit
 import time
 import traceback
-import uuid
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 
 dbsession, md, DBase = dbconnect()
 
 # 创建积分模块的日志记录器
 credits_logger = get_simple_logger('credits')
 
-# 生成积分模块的跟踪ID
 def get_credits_trace_id():
-    return str(uuid.uuid4())
+    return get_trace_id()
 
 
 class Credits(DBase):
@@ -49,10 +48,10 @@ class Credits(DBase):
         trace_id = get_credits_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('userid')
+        userid = get_current_user().userid
         
         # 记录积分插入开始
-        credits_logger.info("开始插入积分明细", {
+        credits_logger.info("开始插入积分明细", lambda: {
             'trace_id': trace_id,
             'userid': userid,
             'credit_type': credit_type,
@@ -80,7 +79,7 @@ class Credits(DBase):
             dbsession.commit()
             
             # 记录积分插入成功
-            credits_logger.info("插入积分明细成功", {
+            credits_logger.info("插入积分明细成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'credit_type': credit_type,
@@ -111,10 +110,10 @@ class Credits(DBase):
         trace_id = get_credits_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('userid')
+        userid = get_current_user().userid
         
         # 记录检查开始
-        credits_logger.info("开始检查用户是否已消耗积分", {
+        credits_logger.info("开始检查用户是否已消耗积分", lambda: {
             'trace_id': trace_id,
             'userid': userid,
             'articleid': articleid
@@ -138,7 +137,7 @@ class Credits(DBase):
             is_payed = True if result else False
             
             # 记录检查结果
-            credits_logger.info("检查用户是否已消耗积分成功", {
+            credits_logger.info("检查用户是否已消耗积分成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'articleid': articleid,
@@ -166,7 +165,7 @@ class Credits(DBase):
         trace_id = get_credits_trace_id()
         
         # 记录查询开始
-        credits_logger.info("开始查询用户积分明细", {
+        credits_logger.info("开始查询用户积分明细", lambda: {
             'trace_id': trace_id,
             'userid': userid
         })
@@ -178,7 +177,7 @@ class Credits(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            credits_logger.info("查询用户积分明细成功", {
+            credits_logger.info("查询用户积分明细成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'result_count': len(result) if result else 0,
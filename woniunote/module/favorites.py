@@ -1,22 +1,21 @@
 import time
 import traceback
-import uuid
-from flask import session
-from sqlalchemy import Table, Column, Integer, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Table, Column, Integer, DateTime, ForeignKey, func
+from sqlalchemy.orm import relationship, Bundle
 from woniunote.common.database import dbconnect
-from woniunote.module.articles import Article
+from woniunote.module.articles import Article, ARTICLE_LIST_COLUMNS, article_summary_column
 from woniunote.common.create_database import Favorite
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user
 
 dbsession, md, DBase = dbconnect()
 
 # 创建收藏模块的日志记录器
 favorites_logger = get_simple_logger('favorites')
 
-# 生成收藏模块的跟踪ID
 def get_favorites_trace_id():
-    return str(uuid.uuid4())
+    return get_trace_id()
 
 
 class Favorites(DBase):
@@ -48,10 +47,10 @@ class Favorites(DBase):
         trace_id = get_favorites_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         
         # 记录收藏操作开始
-        favorites_logger.info("开始添加文章收藏", {
+        favorites_logger.info("开始添加文章收藏", lambda: {
             'trace_id': trace_id,
             'userid': userid,
             'articleid': articleid
@@ -74,7 +73,7 @@ class Favorites(DBase):
             
             # 如果已经收藏过，只需要设置状态为未取消
             if row is not None:
-                favorites_logger.info("文章已收藏过，更新状态", {
+                favorites_logger.info("文章已收藏过，更新状态", lambda: {
                     'trace_id': trace_id,
                     'userid': userid,
                     'articleid': articleid,
@@ -89,7 +88,7 @@ class Favorites(DBase):
                                     updatetime=now)
                 dbsession.add(favorite)
                 
-                favorites_logger.info("创建新的收藏记录", {
+                favorites_logger.info("创建新的收藏记录", lambda: {
                     'trace_id': trace_id,
                     'userid': userid,
                     'articleid': articleid,
@@ -100,7 +99,7 @@ class Favorites(DBase):
             dbsession.commit()
             
             # 记录收藏成功
-            favorites_logger.info("添加文章收藏成功", {
+            favorites_logger.info("添加文章收藏成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'articleid': articleid,
@@ -126,7 +125,7 @@ class Favorites(DBase):
         trace_id = get_favorites_trace_id()
         
         # 记录查询开始
-        favorites_logger.info("开始查询用户收藏", {
+        favorites_logger.info("开始查询用户收藏", lambda: {
             'trace_id': trace_id,
             'userid': userid
         })
@@ -138,7 +137,7 @@ class Favorites(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            favorites_logger.info("查询用户收藏成功", {
+            favorites_logger.info("查询用户收藏成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'result_count': len(result) if result else 0,
@@ -164,10 +163,10 @@ class Favorites(DBase):
         trace_id = get_favorites_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         
         # 记录取消收藏操作开始
-        favorites_logger.info("开始取消文章收藏", {
+        favorites_logger.info("开始取消文章收藏", lambda: {
             'trace_id': trace_id,
             'userid': userid,
             'articleid': articleid
@@ -197,7 +196,7 @@ class Favorites(DBase):
                 dbsession.commit()
                 
                 # 记录取消收藏成功
-                favorites_logger.info("取消文章收藏成功", {
+                favorites_logger.info("取消文章收藏成功", lambda: {
                     'trace_id': trace_id,
                     'userid': userid,
                     'articleid': articleid,
@@ -236,10 +235,10 @@ class Favorites(DBase):
         trace_id = get_favorites_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         
         # 记录检查收藏状态开始
-        favorites_logger.info("开始检查文章收藏状态", {
+        favorites_logger.info("开始检查文章收藏状态", lambda: {
             'trace_id': trace_id,
             'userid': userid,
             'articleid': articleid
@@ -275,7 +274,7 @@ class Favorites(DBase):
                 status = "favorited"
             
             # 记录检查结果
-            favorites_logger.info("检查文章收藏状态成功", {
+            favorites_logger.info("检查文章收藏状态成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'articleid': articleid,
@@ -305,10 +304,10 @@ class Favorites(DBase):
         trace_id = get_favorites_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('main_userid')
+        userid = get_current_user().userid
         
         # 记录查询开始
-        favorites_logger.info("开始查询我的收藏", {
+        favorites_logger.info("开始查询我的收藏", lambda: {
             'trace_id': trace_id,
             'userid': userid
         })
@@ -329,7 +328,7 @@ class Favorites(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            favorites_logger.info("查询我的收藏成功", {
+            favorites_logger.info("查询我的收藏成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'result_count': len(result) if result else 0,
@@ -348,6 +347,70 @@ class Favorites(DBase):
             traceback.print_exc()
             return []
 
+    # 分页查询用户的有效收藏及对应的文章摘要，一次连接查询返回 [(favorite, article)]
+    # article只包含列表字段和摘要，不加载文章正文
+    @staticmethod
+    def find_favorites_with_articles(userid, start=0, count=None):
+        # 生成跟踪ID
+        trace_id = get_favorites_trace_id()
+        
+        # 记录查询开始
+        favorites_logger.info("开始分页查询收藏及文章", lambda: {
+            'trace_id': trace_id,
+            'userid': userid,
+            'start': start,
+            'count': count
+        })
+        
+        try:
+            # 执行查询
+            query_start_time = time.time()
+            query = dbsession.query(Favorite, Bundle('article', *ARTICLE_LIST_COLUMNS, article_summary_column())) \
+                .join(Article, Favorite.articleid == Article.articleid) \
+                .filter(Favorite.userid == userid, Favorite.canceled == 0) \
+                .order_by(Favorite.favoriteid)
+            if count is not None:
+                query = query.limit(count).offset(start)
+            result = query.all()
+            query_end_time = time.time()
+            
+            # 记录查询结果
+            favorites_logger.info("分页查询收藏及文章成功", lambda: {
+                'trace_id': trace_id,
+                'userid': userid,
+                'result_count': len(result) if result else 0,
+                'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
+            })
+            
+            return result
+        except Exception as e:
+            # 记录异常
+            favorites_logger.error("分页查询收藏及文章异常", {
+                'trace_id': trace_id,
+                'userid': userid,
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            traceback.print_exc()
+            return []
+
+    # 统计用户有效收藏的数量，用于收藏列表分页
+    @staticmethod
+    def get_count_by_userid(userid):
+        try:
+            return dbsession.query(func.count(Favorite.favoriteid)) \
+                .join(Article, Favorite.articleid == Article.articleid) \
+                .filter(Favorite.userid == userid, Favorite.canceled == 0).scalar()
+        except Exception as e:
+            # 记录异常
+            favorites_logger.error("统计用户收藏数量异常", {
+                'userid': userid,
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            traceback.print_exc()
+            return 0
+
     # 切换收藏和取消收藏的状态
     @staticmethod
     def switch_favorite(favoriteid):
@@ -355,7 +418,7 @@ class Favorites(DBase):
         trace_id = get_favorites_trace_id()
         
         # 记录切换收藏状态开始
-        favorites_logger.info("开始切换收藏状态", {
+        favorites_logger.info("开始切换收藏状态", lambda: {
             'trace_id': trace_id,
             'favoriteid': favoriteid
         })
@@ -389,7 +452,7 @@ class Favorites(DBase):
             dbsession.commit()
             
             # 记录切换收藏状态成功
-            favorites_logger.info("切换收藏状态成功", {
+            favorites_logger.info("切换收藏状态成功", lambda: {
                 'trace_id': trace_id,
                 'favoriteid': favoriteid,
                 'articleid': row.articleid,
@@ -1,22 +1,21 @@
 import random
 import time
 import traceback
-import uuid
-from flask import session
 from sqlalchemy import Table, Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from woniunote.common.database import dbconnect
 from woniunote.common.create_database import User
 from woniunote.common.simple_logger import get_simple_logger
+from woniunote.common.trace_context import get_trace_id
+from woniunote.common.user_context import get_current_user, invalidate_user
 
 dbsession, md, DBase = dbconnect()
 
 # 创建用户模块的日志记录器
 users_logger = get_simple_logger('users')
 
-# 生成用户模块的跟踪ID
 def get_users_trace_id():
-    return str(uuid.uuid4())
+    return get_trace_id()
 
 
 class Users(DBase):
@@ -41,7 +40,7 @@ class Users(DBase):
         trace_id = get_users_trace_id()
         
         # 记录查询开始
-        users_logger.info("开始根据用户名查询用户", {
+        users_logger.info("开始根据用户名查询用户", lambda: {
             'trace_id': trace_id,
             'username': username
         })
@@ -53,7 +52,7 @@ class Users(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            users_logger.info("根据用户名查询用户成功", {
+            users_logger.info("根据用户名查询用户成功", lambda: {
                 'trace_id': trace_id,
                 'username': username,
                 'result_count': len(result) if result else 0,
@@ -81,7 +80,7 @@ class Users(DBase):
         trace_id = get_users_trace_id()
         
         # 记录注册开始
-        users_logger.info("开始用户注册操作", {
+        users_logger.info("开始用户注册操作", lambda: {
             'trace_id': trace_id,
             'username': username
         })
@@ -93,7 +92,7 @@ class Users(DBase):
             avatar = str(random.randint(1, 15))  # 从15张头像图片中随机选择一张
             
             # 记录用户信息生成
-            users_logger.info("生成用户初始信息", {
+            users_logger.info("生成用户初始信息", lambda: {
                 'trace_id': trace_id,
                 'username': username,
                 'nickname': nickname,
@@ -113,7 +112,7 @@ class Users(DBase):
             query_end_time = time.time()
             
             # 记录注册成功
-            users_logger.info("用户注册成功", {
+            users_logger.info("用户注册成功", lambda: {
                 'trace_id': trace_id,
                 'username': username,
                 'userid': user.userid,
@@ -140,10 +139,10 @@ class Users(DBase):
         trace_id = get_users_trace_id()
         
         # 获取当前用户ID
-        userid = session.get('userid')
+        userid = get_current_user().userid
         
         # 记录更新积分开始
-        users_logger.info("开始更新用户积分", {
+        users_logger.info("开始更新用户积分", lambda: {
             'trace_id': trace_id,
             'userid': userid,
             'credit_change': credit
@@ -171,10 +170,11 @@ class Users(DBase):
             
             # 提交事务
             dbsession.commit()
+            invalidate_user(userid)
             query_end_time = time.time()
             
             # 记录更新积分成功
-            users_logger.info("更新用户积分成功", {
+            users_logger.info("更新用户积分成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'old_credit': old_credit,
@@ -202,7 +202,7 @@ class Users(DBase):
         trace_id = get_users_trace_id()
         
         # 记录查询开始
-        users_logger.info("开始根据用户ID查询用户", {
+        users_logger.info("开始根据用户ID查询用户", lambda: {
             'trace_id': trace_id,
             'userid': userid
         })
@@ -214,7 +214,7 @@ class Users(DBase):
             query_end_time = time.time()
             
             # 记录查询结果
-            users_logger.info("根据用户ID查询用户成功", {
+            users_logger.info("根据用户ID查询用户成功", lambda: {
                 'trace_id': trace_id,
                 'userid': userid,
                 'username': user.username if user else None,
@@ -234,6 +234,42 @@ class Users(DBase):
             return None
 
 
+    # 批量查询用户昵称，返回 {userid: nickname}，用于评论列表等需要多个用户昵称的页面
+    @staticmethod
+    def find_nicknames_by_ids(userids):
+        # 生成跟踪ID
+        trace_id = get_users_trace_id()
+
+        userids = {userid for userid in userids if userid is not None}
+        if not userids:
+            return {}
+
+        try:
+            # 执行查询，只取编号和昵称
+            query_start_time = time.time()
+            rows = dbsession.query(Users.userid, Users.nickname).filter(Users.userid.in_(userids)).all()
+            query_end_time = time.time()
+
+            # 记录查询结果
+            users_logger.info("批量查询用户昵称成功", lambda: {
+                'trace_id': trace_id,
+                'userid_count': len(userids),
+                'result_count': len(rows),
+                'query_time_ms': round((query_end_time - query_start_time) * 1000, 2)
+            })
+
+            return {row.userid: row.nickname for row in rows}
+        except Exception as e:
+            # 记录异常
+            users_logger.error("批量查询用户昵称异常", {
+                'trace_id': trace_id,
+                'userid_count': len(userids),
+                'error': str(e),
+                'error_type': type(e).__name__
+            })
+            traceback.print_exc()
+            return {}
+
 if __name__ == '__main__':
     user_instance = Users()
 